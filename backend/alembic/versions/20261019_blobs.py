@@ -0,0 +1,47 @@
+"""blobs: inhaltsadressierter Upload-Speicher mit Referenzzähler
+
+Revision ID: 20261019_blobs
+Revises: 20261019_document_jobs
+Create Date: 2026-10-19
+
+"""
+from alembic import op
+import sqlalchemy as sa
+from sqlalchemy import text
+
+
+revision = "20261019_blobs"
+down_revision = "20261019_document_jobs"
+branch_labels = None
+depends_on = None
+
+
+def _table_exists(conn, table: str) -> bool:
+    if conn.dialect.name != "sqlite":
+        return False
+    r = conn.execute(text("SELECT name FROM sqlite_master WHERE type='table' AND name=:t"), {"t": table})
+    return r.fetchone() is not None
+
+
+def upgrade() -> None:
+    conn = op.get_bind()
+    if _table_exists(conn, "blobs"):
+        return
+    op.create_table(
+        "blobs",
+        sa.Column("sha256", sa.String(64), nullable=False),
+        sa.Column("path", sa.String(500), nullable=False),
+        sa.Column("size", sa.BigInteger(), nullable=False),
+        sa.Column("mime_type", sa.String(100), nullable=False),
+        sa.Column("ref_count", sa.Integer(), nullable=False),
+        sa.Column("released_at", sa.DateTime(), nullable=True),
+        sa.Column("created_at", sa.DateTime(timezone=True), server_default=sa.func.now(), nullable=False),
+        sa.PrimaryKeyConstraint("sha256"),
+        sa.UniqueConstraint("path"),
+    )
+    op.create_index("ix_blobs_ref_count_released_at", "blobs", ["ref_count", "released_at"], unique=False)
+
+
+def downgrade() -> None:
+    op.drop_index("ix_blobs_ref_count_released_at", table_name="blobs")
+    op.drop_table("blobs")
@@ -0,0 +1,61 @@
+"""document_jobs: Warteschlange für Dokumenterzeugung im Hintergrund
+
+Revision ID: 20261019_document_jobs
+Revises: 20261019_reminders
+Create Date: 2026-10-19
+
+"""
+from alembic import op
+import sqlalchemy as sa
+from sqlalchemy import text
+
+
+revision = "20261019_document_jobs"
+down_revision = "20261019_reminders"
+branch_labels = None
+depends_on = None
+
+
+def _table_exists(conn, table: str) -> bool:
+    if conn.dialect.name != "sqlite":
+        return False
+    r = conn.execute(text("SELECT name FROM sqlite_master WHERE type='table' AND name=:t"), {"t": table})
+    return r.fetchone() is not None
+
+
+def upgrade() -> None:
+    conn = op.get_bind()
+    if _table_exists(conn, "document_jobs"):
+        return
+    op.create_table(
+        "document_jobs",
+        sa.Column("id", sa.Integer(), autoincrement=True, nullable=False),
+        sa.Column("kind", sa.String(50), nullable=False),
+        sa.Column("params", sa.JSON(), nullable=False),
+        sa.Column("dedup_key", sa.String(64), nullable=False),
+        sa.Column("status", sa.String(20), nullable=False),
+        sa.Column("attempts", sa.Integer(), nullable=False),
+        sa.Column("max_attempts", sa.Integer(), nullable=False),
+        sa.Column("next_attempt_at", sa.DateTime(), nullable=False),
+        sa.Column("started_at", sa.DateTime(), nullable=True),
+        sa.Column("finished_at", sa.DateTime(), nullable=True),
+        sa.Column("expires_at", sa.DateTime(), nullable=True),
+        sa.Column("result_path", sa.String(500), nullable=True),
+        sa.Column("result_name", sa.String(255), nullable=True),
+        sa.Column("error", sa.Text(), nullable=True),
+        sa.Column("created_by_id", sa.Integer(), nullable=True),
+        sa.Column("created_at", sa.DateTime(timezone=True), server_default=sa.func.now(), nullable=False),
+        sa.Column("updated_at", sa.DateTime(timezone=True), server_default=sa.func.now(), nullable=False),
+        sa.ForeignKeyConstraint(["created_by_id"], ["users.id"], ondelete="SET NULL"),
+        sa.PrimaryKeyConstraint("id"),
+    )
+    op.create_index("ix_document_jobs_id", "document_jobs", ["id"], unique=False)
+    op.create_index("ix_document_jobs_dedup_key", "document_jobs", ["dedup_key"], unique=False)
+    op.create_index("ix_document_jobs_status_next_attempt", "document_jobs", ["status", "next_attempt_at"], unique=False)
+
+
+def downgrade() -> None:
+    op.drop_index("ix_document_jobs_status_next_attempt", table_name="document_jobs")
+    op.drop_index("ix_document_jobs_dedup_key", table_name="document_jobs")
+    op.drop_index("ix_document_jobs_id", table_name="document_jobs")
+    op.drop_table("document_jobs")
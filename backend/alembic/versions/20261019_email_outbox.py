@@ -0,0 +1,62 @@
+"""email_outbox: Warteschlange ausgehender E-Mails
+
+Revision ID: 20261019_email_outbox
+Revises: 20261019_file_texts_search
+Create Date: 2026-10-19
+
+"""
+from alembic import op
+import sqlalchemy as sa
+from sqlalchemy import text
+
+
+revision = "20261019_email_outbox"
+down_revision = "20261019_file_texts_search"
+branch_labels = None
+depends_on = None
+
+
+def _table_exists(conn, table: str) -> bool:
+    if conn.dialect.name != "sqlite":
+        return False
+    r = conn.execute(text("SELECT name FROM sqlite_master WHERE type='table' AND name=:t"), {"t": table})
+    return r.fetchone() is not None
+
+
+def upgrade() -> None:
+    conn = op.get_bind()
+    if _table_exists(conn, "email_outbox"):
+        return
+    op.create_table(
+        "email_outbox",
+        sa.Column("id", sa.Integer(), autoincrement=True, nullable=False),
+        sa.Column("entity_type", sa.String(30), nullable=True),
+        sa.Column("entity_id", sa.Integer(), nullable=True),
+        sa.Column("typ", sa.String(30), nullable=True),
+        sa.Column("to_addresses", sa.JSON(), nullable=False),
+        sa.Column("subject", sa.String(500), nullable=False),
+        sa.Column("body", sa.Text(), nullable=False),
+        sa.Column("html", sa.Boolean(), nullable=False),
+        sa.Column("attachment_path", sa.String(500), nullable=True),
+        sa.Column("attachment_filename", sa.String(255), nullable=True),
+        sa.Column("status", sa.String(20), nullable=False),
+        sa.Column("attempts", sa.Integer(), nullable=False),
+        sa.Column("max_attempts", sa.Integer(), nullable=False),
+        sa.Column("next_attempt_at", sa.DateTime(), nullable=False),
+        sa.Column("claimed_at", sa.DateTime(), nullable=True),
+        sa.Column("finished_at", sa.DateTime(), nullable=True),
+        sa.Column("last_error", sa.Text(), nullable=True),
+        sa.Column("created_at", sa.DateTime(timezone=True), server_default=sa.func.now(), nullable=False),
+        sa.Column("updated_at", sa.DateTime(timezone=True), server_default=sa.func.now(), nullable=False),
+        sa.PrimaryKeyConstraint("id"),
+    )
+    op.create_index("ix_email_outbox_id", "email_outbox", ["id"], unique=False)
+    op.create_index("ix_email_outbox_status_next_attempt", "email_outbox", ["status", "next_attempt_at"], unique=False)
+    op.create_index("ix_email_outbox_entity", "email_outbox", ["entity_type", "entity_id"], unique=False)
+
+
+def downgrade() -> None:
+    op.drop_index("ix_email_outbox_entity", table_name="email_outbox")
+    op.drop_index("ix_email_outbox_status_next_attempt", table_name="email_outbox")
+    op.drop_index("ix_email_outbox_id", table_name="email_outbox")
+    op.drop_table("email_outbox")
@@ -0,0 +1,115 @@
+"""events: fingerprint für Dubletten-Erkennung (eindeutig unter offenen Terminen) + Index (tenant_id, start_date)
+
+Revision ID: 20261019_event_fp
+Revises: 20250217_mc_aw
+Create Date: 2026-10-19
+
+"""
+import hashlib
+import re
+import unicodedata
+
+from alembic import op
+import sqlalchemy as sa
+from sqlalchemy import text
+
+
+revision = "20261019_event_fp"
+down_revision = "20250217_mc_aw"
+branch_labels = None
+depends_on = None
+
+
+def _column_exists(conn, table: str, column: str) -> bool:
+    if conn.dialect.name != "sqlite":
+        return True
+    r = conn.execute(text(f"PRAGMA table_info({table})"))
+    return any(row[1] == column for row in r.fetchall())
+
+
+def _index_exists(conn, index: str) -> bool:
+    if conn.dialect.name != "sqlite":
+        return False
+    r = conn.execute(text("SELECT name FROM sqlite_master WHERE type='index' AND name=:i"), {"i": index})
+    return r.fetchone() is not None
+
+
+_NON_ALNUM = re.compile(r"[^0-9a-z]+")
+OPEN_STATUSES = ("pending", "approved")
+
+
+# Eingefrorene Kopie von app.services.event_fingerprint (Stand dieser Migration), damit spätere
+# Änderungen dort nicht nachträglich verändern, was diese Migration berechnet.
+def _normalize_text(value):
+    if not value:
+        return ""
+    value = unicodedata.normalize("NFKD", value.casefold())
+    value = "".join(ch for ch in value if not unicodedata.combining(ch))
+    return _NON_ALNUM.sub(" ", value).strip()
+
+
+def _event_fingerprint(tenant_id, start_date, start_time, title, location) -> str:
+    parts = [
+        str(tenant_id),
+        start_date.isoformat(),
+        start_time.strftime("%H:%M") if start_time else "",
+        _normalize_text(title),
+        _normalize_text(location),
+    ]
+    return hashlib.sha256("|".join(parts).encode("utf-8")).hexdigest()
+
+
+def upgrade() -> None:
+    conn = op.get_bind()
+    if not _column_exists(conn, "events", "fingerprint"):
+        op.add_column("events", sa.Column("fingerprint", sa.String(64), nullable=True))
+    if not _index_exists(conn, "ix_events_fingerprint"):
+        op.create_index("ix_events_fingerprint", "events", ["fingerprint"], unique=False)
+    if not _index_exists(conn, "ix_events_tenant_start_date"):
+        op.create_index("ix_events_tenant_start_date", "events", ["tenant_id", "start_date"], unique=False)
+
+    # Bestehende Termine nachberechnen. Unter offenen/freigegebenen Terminen behält nur der älteste
+    # einer Dublettengruppe den Fingerprint, sonst ließe sich der eindeutige Index nicht anlegen.
+    events = sa.table(
+        "events",
+        sa.column("id", sa.Integer),
+        sa.column("tenant_id", sa.Integer),
+        sa.column("start_date", sa.Date),
+        sa.column("start_time", sa.Time),
+        sa.column("title", sa.String),
+        sa.column("location", sa.String),
+        sa.column("status", sa.String),
+        sa.column("fingerprint", sa.String),
+    )
+    rows = conn.execute(
+        sa.select(
+            events.c.id, events.c.tenant_id, events.c.start_date, events.c.start_time,
+            events.c.title, events.c.location, events.c.status, events.c.fingerprint,
+        ).order_by(events.c.id)
+    ).fetchall()
+    taken = set()
+    for row in rows:
+        fp = row.fingerprint or _event_fingerprint(row.tenant_id, row.start_date, row.start_time, row.title, row.location)
+        if row.status in OPEN_STATUSES:
+            if fp in taken:
+                fp = None
+            else:
+                taken.add(fp)
+        if fp != row.fingerprint:
+            conn.execute(events.update().where(events.c.id == row.id).values(fingerprint=fp))
+
+    if conn.dialect.name in ("sqlite", "postgresql") and not _index_exists(conn, "uq_events_fingerprint_open"):
+        where = sa.column("status").in_(OPEN_STATUSES)
+        op.create_index(
+            "uq_events_fingerprint_open", "events", ["fingerprint"], unique=True,
+            sqlite_where=where, postgresql_where=where,
+        )
+
+
+def downgrade() -> None:
+    conn = op.get_bind()
+    if conn.dialect.name in ("sqlite", "postgresql"):
+        op.drop_index("uq_events_fingerprint_open", table_name="events")
+    op.drop_index("ix_events_tenant_start_date", table_name="events")
+    op.drop_index("ix_events_fingerprint", table_name="events")
+    op.drop_column("events", "fingerprint")
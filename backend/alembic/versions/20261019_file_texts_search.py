@@ -0,0 +1,58 @@
+"""file_texts und Volltextindex search_entries (SQLite FTS5)
+
+Revision ID: 20261019_file_texts_search
+Revises: 20261019_kv_protokoll_vorschau
+Create Date: 2026-10-19
+
+"""
+from alembic import op
+import sqlalchemy as sa
+from sqlalchemy import text
+
+
+revision = "20261019_file_texts_search"
+down_revision = "20261019_kv_protokoll_vorschau"
+branch_labels = None
+depends_on = None
+
+
+def _table_exists(conn, table: str) -> bool:
+    if conn.dialect.name != "sqlite":
+        return False
+    r = conn.execute(text("SELECT name FROM sqlite_master WHERE type='table' AND name=:t"), {"t": table})
+    return r.fetchone() is not None
+
+
+def upgrade() -> None:
+    conn = op.get_bind()
+    if not _table_exists(conn, "file_texts"):
+        op.create_table(
+            "file_texts",
+            sa.Column("sha256", sa.String(64), nullable=False),
+            sa.Column("status", sa.String(20), nullable=False),
+            sa.Column("extractor", sa.String(20), nullable=True),
+            sa.Column("text", sa.Text(), nullable=True),
+            sa.Column("chars", sa.Integer(), nullable=False),
+            sa.Column("error", sa.String(500), nullable=True),
+            sa.Column("extracted_at", sa.DateTime(), nullable=False),
+            sa.PrimaryKeyConstraint("sha256"),
+        )
+    # Inhalt füllt der Dokument-Worker (index_file_texts) beim nächsten Lauf
+    if conn.dialect.name == "sqlite":
+        op.execute(
+            "CREATE VIRTUAL TABLE IF NOT EXISTS search_entries USING fts5("
+            "title, body, kind UNINDEXED, ref_id UNINDEXED, kreisverband_id UNINDEXED, tenant_id UNINDEXED, "
+            "min_role UNINDEXED, source UNINDEXED, content_hash UNINDEXED, "
+            "tokenize = 'unicode61 remove_diacritics 2', prefix = '2 3')"
+        )
+    else:
+        op.execute(
+            "CREATE TABLE IF NOT EXISTS search_entries ("
+            "title TEXT, body TEXT, kind VARCHAR(30) NOT NULL, ref_id INTEGER NOT NULL, kreisverband_id INTEGER, "
+            "tenant_id INTEGER, min_role VARCHAR(20) NOT NULL, source VARCHAR(500), content_hash VARCHAR(64))"
+        )
+
+
+def downgrade() -> None:
+    op.execute("DROP TABLE IF EXISTS search_entries")
+    op.drop_table("file_texts")
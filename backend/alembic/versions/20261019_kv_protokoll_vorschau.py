@@ -0,0 +1,39 @@
+"""kv_protokolle: PDF-Fassung, Vorschaubild und Vorschau-Status
+
+Revision ID: 20261019_kv_protokoll_vorschau
+Revises: 20261019_storage_sweeps
+Create Date: 2026-10-19
+
+"""
+from alembic import op
+import sqlalchemy as sa
+from sqlalchemy import text
+
+
+revision = "20261019_kv_protokoll_vorschau"
+down_revision = "20261019_storage_sweeps"
+branch_labels = None
+depends_on = None
+
+
+def _column_exists(conn, table: str, column: str) -> bool:
+    if conn.dialect.name != "sqlite":
+        return False
+    r = conn.execute(text(f"PRAGMA table_info({table})"))
+    return any(row[1] == column for row in r.fetchall())
+
+
+def upgrade() -> None:
+    conn = op.get_bind()
+    if not _column_exists(conn, "kv_protokolle", "pdf_pfad"):
+        op.add_column("kv_protokolle", sa.Column("pdf_pfad", sa.String(500), nullable=True))
+    if not _column_exists(conn, "kv_protokolle", "thumbnail_pfad"):
+        op.add_column("kv_protokolle", sa.Column("thumbnail_pfad", sa.String(500), nullable=True))
+    if not _column_exists(conn, "kv_protokolle", "vorschau_status"):
+        op.add_column("kv_protokolle", sa.Column("vorschau_status", sa.String(20), nullable=True))
+
+
+def downgrade() -> None:
+    op.drop_column("kv_protokolle", "vorschau_status")
+    op.drop_column("kv_protokolle", "thumbnail_pfad")
+    op.drop_column("kv_protokolle", "pdf_pfad")
@@ -0,0 +1,55 @@
+"""reminders: Erinnerungen vor Terminen und Sitzungen
+
+Revision ID: 20261019_reminders
+Revises: 20261019_event_fp
+Create Date: 2026-10-19
+
+"""
+from alembic import op
+import sqlalchemy as sa
+from sqlalchemy import text
+
+
+revision = "20261019_reminders"
+down_revision = "20261019_event_fp"
+branch_labels = None
+depends_on = None
+
+
+def _table_exists(conn, table: str) -> bool:
+    if conn.dialect.name != "sqlite":
+        return False
+    r = conn.execute(text("SELECT name FROM sqlite_master WHERE type='table' AND name=:t"), {"t": table})
+    return r.fetchone() is not None
+
+
+def upgrade() -> None:
+    conn = op.get_bind()
+    if _table_exists(conn, "reminders"):
+        return
+    op.create_table(
+        "reminders",
+        sa.Column("id", sa.Integer(), autoincrement=True, nullable=False),
+        sa.Column("entity_type", sa.String(20), nullable=False),
+        sa.Column("entity_id", sa.Integer(), nullable=False),
+        sa.Column("recipient_email", sa.String(255), nullable=False),
+        sa.Column("due_at", sa.DateTime(), nullable=False),
+        sa.Column("status", sa.String(20), nullable=False),
+        sa.Column("sent_at", sa.DateTime(), nullable=True),
+        sa.Column("created_at", sa.DateTime(timezone=True), server_default=sa.func.now(), nullable=False),
+        sa.Column("updated_at", sa.DateTime(timezone=True), server_default=sa.func.now(), nullable=False),
+        sa.PrimaryKeyConstraint("id"),
+        sa.UniqueConstraint("entity_type", "entity_id", "recipient_email", name="uq_reminder_entity_recipient"),
+    )
+    op.create_index("ix_reminders_id", "reminders", ["id"], unique=False)
+    op.create_index("ix_reminders_updated_at", "reminders", ["updated_at"], unique=False)
+    op.create_index("ix_reminders_status_due_at", "reminders", ["status", "due_at"], unique=False)
+    op.create_index("ix_reminders_entity", "reminders", ["entity_type", "entity_id"], unique=False)
+
+
+def downgrade() -> None:
+    op.drop_index("ix_reminders_entity", table_name="reminders")
+    op.drop_index("ix_reminders_status_due_at", table_name="reminders")
+    op.drop_index("ix_reminders_updated_at", table_name="reminders")
+    op.drop_index("ix_reminders_id", table_name="reminders")
+    op.drop_table("reminders")
@@ -0,0 +1,44 @@
+"""storage_sweeps: Cursor und Zähler für das Aufräumen verwaister Upload-Dateien
+
+Revision ID: 20261019_storage_sweeps
+Revises: 20261019_blobs
+Create Date: 2026-10-19
+
+"""
+from alembic import op
+import sqlalchemy as sa
+from sqlalchemy import text
+
+
+revision = "20261019_storage_sweeps"
+down_revision = "20261019_blobs"
+branch_labels = None
+depends_on = None
+
+
+def _table_exists(conn, table: str) -> bool:
+    if conn.dialect.name != "sqlite":
+        return False
+    r = conn.execute(text("SELECT name FROM sqlite_master WHERE type='table' AND name=:t"), {"t": table})
+    return r.fetchone() is not None
+
+
+def upgrade() -> None:
+    conn = op.get_bind()
+    if _table_exists(conn, "storage_sweeps"):
+        return
+    op.create_table(
+        "storage_sweeps",
+        sa.Column("id", sa.Integer(), nullable=False),
+        sa.Column("cursor", sa.String(500), nullable=True),
+        sa.Column("pass_started_at", sa.DateTime(), nullable=True),
+        sa.Column("last_pass_at", sa.DateTime(), nullable=True),
+        sa.Column("deleted_files", sa.Integer(), nullable=False),
+        sa.Column("deleted_bytes", sa.BigInteger(), nullable=False),
+        sa.Column("updated_at", sa.DateTime(timezone=True), server_default=sa.func.now(), nullable=False),
+        sa.PrimaryKeyConstraint("id"),
+    )
+
+
+def downgrade() -> None:
+    op.drop_table("storage_sweeps")
@@ -146,6 +146,17 @@ async def get_visible_tenant_ids_for_public(
     return visible_ids
 
 
+async def get_public_calendar_scope(
+    calendar: Optional[str] = Query(None, description="Kalender: landesverband | kreisverband"),
+    tenant_ids: List[int] = Depends(get_visible_tenant_ids_for_public),
+    db: Session = Depends(get_db),
+) -> List[int]:
+    """Sichtbare Tenant-IDs für öffentliche Abfragen, einmalig aufgelöst (Tenant-Kontext + Kalender-Typ)."""
+    if calendar in ("landesverband", "kreisverband"):
+        return get_public_calendar_tenant_ids(db, calendar)
+    return tenant_ids
+
+
 def get_public_calendar_tenant_ids(
     db: Session,
     calendar: Optional[str],
@@ -2,15 +2,18 @@
 from fastapi import APIRouter, Depends, HTTPException, status, Query, Request
 from sqlalchemy.orm import Session
 from typing import List, Optional
-from datetime import datetime
+from collections import defaultdict
+from datetime import datetime, timedelta
 from pydantic import BaseModel
 
 from app.api.deps import get_db, get_tenant_filter
 from app.core.rbac import require_role
 from app.models.event import Event
 from app.models.user import User
-from app.schemas.event import EventResponse
+from app.schemas.event import EventResponse, EventDuplicateGroup, EventDuplicateCandidate
 from app.services.audit import log_action
+from app.services.event_fingerprint import similarity
+from app.services.reminders import sync_event_reminders
 
 router = APIRouter()
 
@@ -41,6 +44,61 @@ async def list_pending_events(
     return events
 
 
+@router.get("/events/pending/duplicates", response_model=List[EventDuplicateGroup])
+async def list_pending_duplicates(
+    tenant_id: Optional[int] = Query(None, description="Filter by tenant"),
+    min_score: float = Query(0.75, ge=0.0, le=1.0, description="Mindest-Ähnlichkeit"),
+    limit: int = Query(50, ge=1, le=200),
+    db: Session = Depends(get_db),
+    current_user: User = Depends(require_role("vorstand")),
+):
+    """Offene Termine mit wahrscheinlichen Dubletten (gleicher Tenant, Datum ±1 Tag, ähnlicher Titel/Ort)."""
+    tenant_ids = get_tenant_filter(db, current_user, tenant_id, include_children=True)
+    if not tenant_ids:
+        return []
+
+    pending = (
+        db.query(Event)
+        .filter(Event.tenant_id.in_(tenant_ids), Event.status == "pending")
+        .order_by(Event.created_at.asc())
+        .limit(limit)
+        .all()
+    )
+    if not pending:
+        return []
+
+    # Eine Abfrage über den Index (tenant_id, start_date) für alle Kandidaten
+    first_day = min(e.start_date for e in pending) - timedelta(days=1)
+    last_day = max(e.start_date for e in pending) + timedelta(days=1)
+    nearby = (
+        db.query(Event)
+        .filter(
+            Event.tenant_id.in_({e.tenant_id for e in pending}),
+            Event.start_date.between(first_day, last_day),
+            Event.status != "rejected",
+        )
+        .all()
+    )
+    by_tenant_day = defaultdict(list)
+    for other in nearby:
+        by_tenant_day[(other.tenant_id, other.start_date)].append(other)
+
+    groups: List[EventDuplicateGroup] = []
+    for event in pending:
+        candidates = []
+        for offset in (-1, 0, 1):
+            for other in by_tenant_day.get((event.tenant_id, event.start_date + timedelta(days=offset)), []):
+                if other.id == event.id:
+                    continue
+                score = similarity(event, other)
+                if score >= min_score:
+                    candidates.append(EventDuplicateCandidate(event=other, score=round(score, 3)))
+        if candidates:
+            candidates.sort(key=lambda c: c.score, reverse=True)
+            groups.append(EventDuplicateGroup(event=event, candidates=candidates))
+    return groups
+
+
 @router.post("/events/{event_id}/approve", response_model=EventResponse)
 async def approve_event(
     event_id: int,
@@ -64,6 +122,7 @@ async def approve_event(
     event.approved_at = datetime.utcnow()
     event.approved_by = current_user.id
     event.rejection_reason = None
+    sync_event_reminders(db, event)
 
     log_action(db, current_user.id, "approve", "event", event.id, f"Event freigegeben: {event.title}", request)
     db.commit()
@@ -95,6 +154,7 @@ async def reject_event(
     event.rejection_reason = reject_data.rejection_reason
     event.approved_at = None
     event.approved_by = None
+    sync_event_reminders(db, event)
 
     log_action(db, current_user.id, "reject", "event", event.id, f"Event abgelehnt: {event.title}", request)
     db.commit()
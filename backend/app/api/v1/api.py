@@ -2,7 +2,7 @@
 from fastapi import APIRouter
 
 from app.api.v1 import auth, users, events, admin, categories, tenants, public
-from app.api.v1 import kreisverband, member_changes, email_templates, email_recipients, documents, meetings, audit, settings as settings_router
+from app.api.v1 import kreisverband, member_changes, email_templates, email_recipients, documents, meetings, jobs, files, search, audit, settings as settings_router
 
 api_router = APIRouter()
 
@@ -30,6 +30,9 @@ api_router.include_router(email_recipients.router, prefix="/email-recipients", t
 # Dokumentenverwaltung (Satzung/GO) & Sitzungen
 api_router.include_router(documents.router, prefix="/documents", tags=["documents"])
 api_router.include_router(meetings.router, prefix="/meetings", tags=["meetings"])
+api_router.include_router(jobs.router, prefix="/jobs", tags=["jobs"])
+api_router.include_router(files.router, prefix="/files", tags=["files"])
+api_router.include_router(search.router, prefix="/search", tags=["search"])
 
 # Audit-Log
 api_router.include_router(audit.router, prefix="/audit", tags=["audit"])
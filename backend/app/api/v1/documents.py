@@ -1,29 +1,28 @@
 """Document CRUD and Aenderungsantrag CRUD endpoints"""
-import asyncio
+import logging
 import os
-import tempfile
-import uuid
 from pathlib import Path
 
-from docx import Document as DocxDocument
-from docx.shared import Pt
-from docx.enum.text import WD_ALIGN_PARAGRAPH
 from fastapi import APIRouter, Depends, HTTPException, status, Query, UploadFile, File, Request
 from fastapi.responses import Response, FileResponse
 from sqlalchemy.orm import Session, joinedload
 from typing import List, Optional
 
-import aiofiles
-
 from app.api.deps import get_db
 from app.core.rbac import require_role
-from app.services.pdf import docx_to_pdf
+from app.services.amendment_pdf import aenderungsantrag_pdf_bytes, python_renderer_enabled
+from app.services.pdf_cache import cached_pdf_from_docx_bytes, cached_pdf_from_docx_bytes_async, pdf_cache, sha256_data
+from app.services.render_pool import aenderungsantrag_docx_bytes, run_in_render_pool
+from app.services.singleflight import document_flight
+from app.services.blob_store import release, store_upload
+from app.services.file_delivery import title_filename
+from app.services.signed_urls import signed_download_url
 from app.models.document import Document
 from app.models.document_aenderungsantrag import DocumentAenderungsantrag
 from app.models.document_aenderung import DocumentAenderung
-from app.models.email_template import EmailTemplate
 from app.models.user import User
-from app.services.email import send_email, render_template
+from app.services.email_outbox import enqueue_email
+from app.services.mail_templates import TemplateResolver
 from app.schemas.document import (
     DocumentCreate,
     DocumentUpdate,
@@ -38,6 +37,8 @@ from app.schemas.document import (
 from app.config import settings
 from app.services.audit import log_action
 
+logger = logging.getLogger(__name__)
+
 router = APIRouter()
 
 DOCUMENT_UPLOAD_DIR = os.path.join(settings.UPLOAD_DIR, "dokumente")
@@ -52,12 +53,6 @@ def _validate_upload(filename: str, content_length: int = 0) -> str:
         raise HTTPException(status_code=400, detail=f"Dateityp '{ext}' nicht erlaubt. Erlaubt: {', '.join(ALLOWED_DOCUMENT_EXTENSIONS)}")
     return ext
 
-def _safe_file_path(base_dir: str, file_path: str) -> bool:
-    """Check that file_path is within base_dir (prevent path traversal)."""
-    real_base = os.path.realpath(base_dir)
-    real_path = os.path.realpath(file_path)
-    return real_path.startswith(real_base)
-
 
 def _stellen_for_export(antrag: DocumentAenderungsantrag) -> List[dict]:
     """Ergibt eine Liste von Stellen (dict mit bezug, alte_fassung, neue_fassung, aenderungstext) für Export. Legacy: ein Eintrag aus antrag wenn keine stellen."""
@@ -94,8 +89,9 @@ def _default_aenderungstext(bezug: str, alte: Optional[str], neue: Optional[str]
     return ""
 
 
-def _send_aenderungsantrag_emails(db: Session, antrag: DocumentAenderungsantrag, doc: Document) -> None:
-    """Sendet Benachrichtigungs-E-Mails für einen Änderungsantrag an konfigurierte Empfänger."""
+def _queue_aenderungsantrag_emails(db: Session, antrag: DocumentAenderungsantrag, doc: Document) -> None:
+    """Benachrichtigungs-E-Mails für einen Änderungsantrag an die konfigurierten Empfänger in die
+    Mail-Warteschlange stellen (Commit macht der Aufrufer)."""
     if not settings.email_configured:
         return
     recipients = settings.document_amendment_notify_emails_list
@@ -114,67 +110,49 @@ def _send_aenderungsantrag_emails(db: Session, antrag: DocumentAenderungsantrag,
         "link": f"{settings.APP_URL}/dokumente/satzung/{doc.id}",
         "stellen_uebersicht": stellen_uebersicht,
     }
-    templates = (
-        db.query(EmailTemplate)
-        .filter(
-            EmailTemplate.scenario == "aenderungsantrag",
-            EmailTemplate.typ == "benachrichtigung",
-            EmailTemplate.kreisverband_id.is_(None),
+    templates = TemplateResolver.load(db, "aenderungsantrag")
+    for template in templates.general("aenderungsantrag", "benachrichtigung"):
+        subject, body = template.render(template_vars)
+        enqueue_email(
+            db,
+            recipients,
+            subject,
+            body,
+            entity_type="aenderungsantrag",
+            entity_id=antrag.id,
+            typ="benachrichtigung",
         )
-        .all()
-    )
-    for template in templates:
-        subject = render_template(template.betreff, template_vars)
-        body = render_template(template.inhalt, template_vars)
-        send_email(to=recipients, subject=subject, body=body)
-
-
-def _build_aenderungsantrag_docx(antrag: DocumentAenderungsantrag, doc: Document, out_path: str) -> None:
-    """Erstellt eine DOCX-Datei: Titel, Antragsteller, Begründung, Änderungstext, Synopse (Tabelle)."""
-    d = DocxDocument()
-    style = d.styles["Normal"]
-    style.font.size = Pt(11)
-    # Titel
-    title = d.add_paragraph()
-    title.add_run("Änderungsantrag").bold = True
-    title.alignment = WD_ALIGN_PARAGRAPH.CENTER
-    d.add_paragraph(doc.titel)
-    if antrag.titel:
-        d.add_paragraph(antrag.titel)
-    d.add_paragraph()
-    d.add_paragraph(f"Antragsteller: {antrag.antragsteller}")
-    if antrag.begruendung:
-        d.add_paragraph()
-        p = d.add_paragraph()
-        p.add_run("Begründung:").bold = True
-        d.add_paragraph(antrag.begruendung)
-    stellen = _stellen_for_export(antrag)
-    # Änderungstext
-    d.add_paragraph()
-    h = d.add_paragraph()
-    h.add_run("Änderungstext").bold = True
-    h.paragraph_format.space_before = Pt(12)
-    for i, st in enumerate(stellen):
-        if st["bezug"]:
-            d.add_paragraph(st["bezug"]).paragraph_format.space_before = Pt(6)
-        d.add_paragraph(st["aenderungstext"])
-    # Synopse
-    d.add_paragraph()
-    h2 = d.add_paragraph()
-    h2.add_run("Synopse").bold = True
-    h2.paragraph_format.space_before = Pt(18)
-    table = d.add_table(rows=1 + len(stellen), cols=3)
-    table.style = "Table Grid"
-    hdr = table.rows[0].cells
-    hdr[0].text = "Bezug"
-    hdr[1].text = "Alte Fassung"
-    hdr[2].text = "Neue Fassung"
-    for i, st in enumerate(stellen):
-        row = table.rows[i + 1].cells
-        row[0].text = st["bezug"] or "—"
-        row[1].text = st["alte_fassung"] or "—"
-        row[2].text = st["neue_fassung"] or "—"
-    d.save(out_path)
+
+
+# Bei Layout-Änderungen erhöhen, damit gecachte PDFs nicht mehr getroffen werden
+# (2: PDF direkt mit fpdf2 statt über LibreOffice)
+AENDERUNGSANTRAG_LAYOUT_VERSION = 2
+
+
+def _aenderungsantrag_export_data(antrag: DocumentAenderungsantrag, doc: Document) -> dict:
+    """Alle Daten, die in den Export einfließen (Grundlage für DOCX und PDF-Cache-Schlüssel)."""
+    return {
+        "layout": AENDERUNGSANTRAG_LAYOUT_VERSION,
+        "dokument_titel": doc.titel,
+        "titel": antrag.titel or "",
+        "antragsteller": antrag.antragsteller,
+        "begruendung": antrag.begruendung or "",
+        "stellen": _stellen_for_export(antrag),
+    }
+
+
+def render_aenderungsantrag_pdf(data: dict) -> Optional[str]:
+    """PDF zu Exportdaten aus dem Cache oder frisch erzeugt (synchron, z. B. für den Dokument-Worker)."""
+    cache_key = sha256_data(data)
+    cached = pdf_cache.get(cache_key)
+    if cached:
+        return cached
+    if python_renderer_enabled():
+        try:
+            return pdf_cache.put_bytes(cache_key, aenderungsantrag_pdf_bytes(data))
+        except Exception:
+            logger.exception("fpdf2-Export fehlgeschlagen, weiter mit LibreOffice")
+    return cached_pdf_from_docx_bytes(cache_key, aenderungsantrag_docx_bytes(data))
 
 
 # ---------------------------------------------------------------------------
@@ -192,7 +170,12 @@ async def list_documents(
     if typ:
         query = query.filter(Document.typ == typ)
     query = query.order_by(Document.titel)
-    return query.all()
+    return [
+        DocumentResponse.model_validate(d).model_copy(update={
+            "download_url": signed_download_url(d.datei_pfad, title_filename(d.titel, os.path.splitext(d.datei_pfad or "")[1])),
+        })
+        for d in query.all()
+    ]
 
 
 @router.post("/", response_model=DocumentResponse, status_code=status.HTTP_201_CREATED)
@@ -266,23 +249,11 @@ async def upload_document_file(
     if not doc:
         raise HTTPException(status_code=404, detail="Document not found")
 
-    os.makedirs(DOCUMENT_UPLOAD_DIR, exist_ok=True)
     ext = _validate_upload(datei.filename)
-    safe_filename = f"{uuid.uuid4().hex}{ext}"
-    file_path = os.path.join(DOCUMENT_UPLOAD_DIR, safe_filename)
-
-    content = await datei.read()
-    if len(content) > MAX_FILE_SIZE:
-        raise HTTPException(status_code=400, detail=f"Datei zu groß. Maximum: {MAX_FILE_SIZE // (1024*1024)} MB")
-
-    async with aiofiles.open(file_path, "wb") as f:
-        await f.write(content)
-
-    # Remove old file if exists
-    if doc.datei_pfad and os.path.exists(doc.datei_pfad) and _safe_file_path(DOCUMENT_UPLOAD_DIR, doc.datei_pfad):
-        os.remove(doc.datei_pfad)
-
-    doc.datei_pfad = file_path
+    # Gleicher Inhalt wie ein vorhandener Upload: nur Referenz, keine zweite Datei
+    blob = await store_upload(db, datei, MAX_FILE_SIZE, ext)
+    release(db, doc.datei_pfad, DOCUMENT_UPLOAD_DIR)
+    doc.datei_pfad = blob.path
     db.commit()
     db.refresh(doc)
     return doc
@@ -300,8 +271,7 @@ async def delete_document(
     if not doc:
         raise HTTPException(status_code=404, detail="Document not found")
 
-    if doc.datei_pfad and os.path.exists(doc.datei_pfad) and _safe_file_path(DOCUMENT_UPLOAD_DIR, doc.datei_pfad):
-        os.remove(doc.datei_pfad)
+    release(db, doc.datei_pfad, DOCUMENT_UPLOAD_DIR)
 
     # Delete associated aenderungsantrag
     db.query(DocumentAenderungsantrag).filter(DocumentAenderungsantrag.document_id == document_id).delete()
@@ -365,17 +335,17 @@ async def create_aenderungsantrag(
     db.add(aenderungsantrag)
     db.flush()
     log_action(db, current_user.id, "create", "aenderungsantrag", aenderungsantrag.id, f"Änderungsantrag erstellt für Dokument {document_id}: {aenderungsantrag.antragsteller}", request)
+    if send_emails:
+        _queue_aenderungsantrag_emails(db, aenderungsantrag, doc)
     db.commit()
     db.refresh(aenderungsantrag)
-    # Reload with stellen for response and optional email
+    # Reload with stellen for response
     aenderungsantrag = (
         db.query(DocumentAenderungsantrag)
         .options(joinedload(DocumentAenderungsantrag.stellen))
         .filter(DocumentAenderungsantrag.id == aenderungsantrag.id)
         .first()
     )
-    if send_emails:
-        _send_aenderungsantrag_emails(db, aenderungsantrag, doc)
     return aenderungsantrag
 
 
@@ -422,7 +392,7 @@ async def send_aenderungsantrag_email(
     db: Session = Depends(get_db),
     current_user: User = Depends(require_role("leitung")),
 ):
-    """E-Mail-Benachrichtigung für diesen Änderungsantrag an konfigurierte Empfänger senden. Leitung+."""
+    """E-Mail-Benachrichtigung für diesen Änderungsantrag an konfigurierte Empfänger einreihen. Leitung+."""
     antrag = (
         db.query(DocumentAenderungsantrag)
         .options(joinedload(DocumentAenderungsantrag.stellen))
@@ -435,11 +405,12 @@ async def send_aenderungsantrag_email(
     if not doc:
         raise HTTPException(status_code=404, detail="Dokument nicht gefunden")
     if not settings.email_configured:
-        raise HTTPException(status_code=503, detail="E-Mail ist nicht konfiguriert (SMTP).")
+        raise HTTPException(status_code=503, detail=f"E-Mail ist nicht konfiguriert ({settings.MAIL_TRANSPORT}).")
     if not settings.document_amendment_notify_emails_list:
         raise HTTPException(status_code=400, detail="Keine Empfänger konfiguriert (DOCUMENT_AMENDMENT_NOTIFY_EMAILS).")
-    _send_aenderungsantrag_emails(db, antrag, doc)
-    return {"detail": "E-Mails wurden versendet."}
+    _queue_aenderungsantrag_emails(db, antrag, doc)
+    db.commit()
+    return {"detail": "E-Mails wurden zum Versand eingereiht."}
 
 
 # ---------------------------------------------------------------------------
@@ -575,24 +546,13 @@ async def export_aenderungsantrag_docx(
     doc = db.query(Document).filter(Document.id == antrag.document_id).first()
     if not doc:
         raise HTTPException(status_code=404, detail="Document not found")
-    fd, path = tempfile.mkstemp(suffix=".docx")
-    try:
-        os.close(fd)
-        _build_aenderungsantrag_docx(antrag, doc, path)
-        with open(path, "rb") as f:
-            docx_bytes = f.read()
-        filename = f"aenderungsantrag_{aenderungsantrag_id}.docx"
-        return Response(
-            content=docx_bytes,
-            media_type="application/vnd.openxmlformats-officedocument.wordprocessingml.document",
-            headers={"Content-Disposition": f'attachment; filename="{filename}"'},
-        )
-    finally:
-        if os.path.exists(path):
-            try:
-                os.unlink(path)
-            except OSError:
-                pass
+    docx_bytes = await run_in_render_pool(aenderungsantrag_docx_bytes, _aenderungsantrag_export_data(antrag, doc))
+    filename = f"aenderungsantrag_{aenderungsantrag_id}.docx"
+    return Response(
+        content=docx_bytes,
+        media_type="application/vnd.openxmlformats-officedocument.wordprocessingml.document",
+        headers={"Content-Disposition": f'attachment; filename="{filename}"'},
+    )
 
 
 @router.get("/aenderungsantraege/{aenderungsantrag_id}/export.pdf")
@@ -601,7 +561,7 @@ async def export_aenderungsantrag_pdf(
     db: Session = Depends(get_db),
     current_user: User = Depends(require_role("vorstand")),
 ):
-    """Änderungsantrag als PDF exportieren (DOCX wird mit LibreOffice konvertiert)."""
+    """Änderungsantrag als PDF exportieren (direkt mit fpdf2, sonst DOCX über LibreOffice)."""
     antrag = (
         db.query(DocumentAenderungsantrag)
         .options(joinedload(DocumentAenderungsantrag.stellen))
@@ -613,28 +573,28 @@ async def export_aenderungsantrag_pdf(
     doc = db.query(Document).filter(Document.id == antrag.document_id).first()
     if not doc:
         raise HTTPException(status_code=404, detail="Document not found")
-    fd, path = tempfile.mkstemp(suffix=".docx")
-    try:
-        os.close(fd)
-        _build_aenderungsantrag_docx(antrag, doc, path)
-        pdf_path = await asyncio.to_thread(docx_to_pdf, path)
-        if not pdf_path or not os.path.isfile(pdf_path):
-            raise HTTPException(status_code=500, detail="PDF-Konvertierung fehlgeschlagen (LibreOffice erforderlich).")
-        filename = f"aenderungsantrag_{aenderungsantrag_id}.pdf"
-        with open(pdf_path, "rb") as f:
-            pdf_bytes = f.read()
-        return Response(
-            content=pdf_bytes,
-            media_type="application/pdf",
-            headers={"Content-Disposition": f'attachment; filename="{filename}"'},
-        )
-    finally:
-        for p in (path, path.replace(".docx", ".pdf")):
-            if os.path.exists(p):
-                try:
-                    os.unlink(p)
-                except OSError:
-                    pass
+    data = _aenderungsantrag_export_data(antrag, doc)
+    filename = f"aenderungsantrag_{aenderungsantrag_id}.pdf"
+    cache_key = sha256_data(data)
+    cached = pdf_cache.get(cache_key)
+    if cached:
+        return FileResponse(cached, media_type="application/pdf", filename=filename)
+
+    async def render() -> Optional[str]:
+        if python_renderer_enabled():
+            try:
+                pdf_bytes = await run_in_render_pool(aenderungsantrag_pdf_bytes, data)
+                return pdf_cache.put_bytes(cache_key, pdf_bytes)
+            except Exception:
+                logger.exception("fpdf2-Export fehlgeschlagen, weiter mit LibreOffice")
+        docx_bytes = await run_in_render_pool(aenderungsantrag_docx_bytes, data)
+        return await cached_pdf_from_docx_bytes_async(cache_key, docx_bytes)
+
+    # Gleichzeitige Downloads desselben Stands warten auf eine gemeinsame Konvertierung
+    pdf_path = await document_flight.do(("aenderungsantrag-pdf", aenderungsantrag_id, cache_key), render)
+    if not pdf_path:
+        raise HTTPException(status_code=500, detail="PDF-Konvertierung fehlgeschlagen (LibreOffice erforderlich).")
+    return FileResponse(pdf_path, media_type="application/pdf", filename=filename)
 
 
 @router.delete("/aenderungsantraege/{aenderungsantrag_id}", status_code=status.HTTP_204_NO_CONTENT)
@@ -1,6 +1,5 @@
 """Email template CRUD endpoints"""
-import re
-import uuid
+import os
 from pathlib import Path
 
 from fastapi import APIRouter, Depends, HTTPException, status, Query, UploadFile, File
@@ -18,12 +17,19 @@ from app.schemas.email_template import (
     EmailTemplateUpdate,
     EmailTemplateResponse,
 )
-from app.services.email import send_email, render_template, get_attachment_from_path
+from app.services.email import send_email, get_attachment_from_path
+from app.services.mail_templates import compiled_template, forget_template
+from app.services.blob_store import release, store_upload
 
 router = APIRouter()
 
-EMAIL_TEMPLATES_UPLOAD_DIR = "email_templates"
+EMAIL_TEMPLATES_UPLOAD_DIR = "email_templates"  # Altbestand; neue Anhänge liegen im Blob-Speicher
 ALLOWED_ATTACHMENT_EXTENSIONS = {".pdf", ".doc", ".docx", ".odt", ".txt", ".png", ".jpg", ".jpeg"}
+MAX_ATTACHMENT_SIZE = 15 * 1024 * 1024  # 15 MB
+
+
+def _legacy_attachment_dir() -> str:
+    return os.path.join(settings.UPLOAD_DIR, EMAIL_TEMPLATES_UPLOAD_DIR)
 
 
 def _sample_template_vars(scenario: str, typ: str) -> dict:
@@ -59,7 +65,6 @@ def _sample_template_vars(scenario: str, typ: str) -> dict:
 def _build_attachments_list(template: EmailTemplate) -> List[tuple]:
     """[(filename, bytes), ...] für send_email."""
     att = get_attachment_from_path(
-        settings.UPLOAD_DIR,
         template.attachment_storage_path,
         template.attachment_original_filename,
     )
@@ -159,8 +164,10 @@ async def delete_email_template(
     if not template:
         raise HTTPException(status_code=404, detail="Email template not found")
 
+    release(db, template.attachment_storage_path, _legacy_attachment_dir())
     db.delete(template)
     db.commit()
+    forget_template(template_id)
     return None
 
 
@@ -181,8 +188,7 @@ async def test_email_template(
         raise HTTPException(status_code=404, detail="Email template not found")
 
     vars_ = _sample_template_vars(template.scenario, template.typ)
-    subject = render_template(template.betreff, vars_)
-    body = render_template(template.inhalt, vars_)
+    subject, body = compiled_template(template).render(vars_)
     attachments = _build_attachments_list(template)
 
     if not send_email(to=[data.to], subject=subject, body=body, attachments=attachments or None):
@@ -214,33 +220,17 @@ async def upload_template_attachment(
             detail=f"Dateityp nicht erlaubt. Erlaubt: {', '.join(ALLOWED_ATTACHMENT_EXTENSIONS)}",
         )
 
-    base_dir = Path(settings.UPLOAD_DIR) / EMAIL_TEMPLATES_UPLOAD_DIR
-    base_dir.mkdir(parents=True, exist_ok=True)
-    safe_name = re.sub(r"[^\w.\-]", "_", file.filename)[:200]
-    storage_name = f"{template_id}_{uuid.uuid4().hex[:8]}_{safe_name}"
-    storage_path = base_dir / storage_name
     try:
-        content = await file.read()
-        if len(content) > 15 * 1024 * 1024:  # 15 MB
-            raise HTTPException(status_code=400, detail="Datei zu groß (max. 15 MB)")
-        storage_path.write_bytes(content)
+        blob = await store_upload(db, file, MAX_ATTACHMENT_SIZE, ext)
     except HTTPException:
         raise
     except Exception as e:
         raise HTTPException(status_code=500, detail=f"Speichern fehlgeschlagen: {e}")
 
-    # Alte Anhang-Datei löschen falls vorhanden
-    if template.attachment_storage_path:
-        old_path = Path(settings.UPLOAD_DIR) / template.attachment_storage_path
-        if old_path.is_file():
-            try:
-                old_path.unlink()
-            except Exception:
-                pass
-
-    relative_path = f"{EMAIL_TEMPLATES_UPLOAD_DIR}/{storage_name}"
+    # Alten Anhang freigeben (Altbestand unter email_templates/ wird direkt gelöscht)
+    release(db, template.attachment_storage_path, _legacy_attachment_dir())
     template.attachment_original_filename = file.filename
-    template.attachment_storage_path = relative_path
+    template.attachment_storage_path = blob.path
     db.commit()
     db.refresh(template)
     return template
@@ -257,13 +247,7 @@ async def delete_template_attachment(
     if not template:
         raise HTTPException(status_code=404, detail="Email template not found")
 
-    if template.attachment_storage_path:
-        path = Path(settings.UPLOAD_DIR) / template.attachment_storage_path
-        if path.is_file():
-            try:
-                path.unlink()
-            except Exception:
-                pass
+    release(db, template.attachment_storage_path, _legacy_attachment_dir())
     template.attachment_original_filename = None
     template.attachment_storage_path = None
     db.commit()
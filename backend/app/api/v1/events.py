@@ -1,5 +1,6 @@
 """Event CRUD endpoints"""
 from fastapi import APIRouter, Depends, HTTPException, status, Query, Request
+from sqlalchemy.exc import IntegrityError
 from sqlalchemy.orm import Session
 from typing import List, Optional
 from datetime import date, datetime
@@ -16,10 +17,21 @@ from app.models.event import Event
 from app.models.user import User
 from app.schemas.event import EventCreate, EventUpdate, EventResponse
 from app.services.audit import log_action
+from app.services.event_fingerprint import fingerprint_for
+from app.services.reminders import sync_event_reminders, cancel_reminders
 
 router = APIRouter()
 
 
+def _duplicate_conflict(db: Session) -> HTTPException:
+    """uq_events_fingerprint_open verletzt: gleicher Termin ist schon offen oder freigegeben."""
+    db.rollback()
+    return HTTPException(
+        status_code=status.HTTP_409_CONFLICT,
+        detail="Ein gleicher Termin (Datum, Uhrzeit, Titel, Ort) ist bereits vorhanden.",
+    )
+
+
 @router.get("/", response_model=List[EventResponse])
 async def list_events(
     tenant_id: Optional[int] = Query(None, description="Filter by tenant"),
@@ -100,8 +112,13 @@ async def create_event(
         approved_at=datetime.utcnow() if initial_status == "approved" else None,
         approved_by=current_user.id if initial_status == "approved" else None,
     )
+    db_event.fingerprint = fingerprint_for(db_event)
     db.add(db_event)
-    db.flush()
+    try:
+        db.flush()
+    except IntegrityError:
+        raise _duplicate_conflict(db)
+    sync_event_reminders(db, db_event)
     log_action(db, current_user.id, "create", "event", db_event.id, f"Event erstellt: {db_event.title}", request)
     db.commit()
     db.refresh(db_event)
@@ -151,12 +168,18 @@ async def update_event(
     update_data = event_data.model_dump(exclude_unset=True)
     for field, value in update_data.items():
         setattr(event, field, value)
+    event.fingerprint = fingerprint_for(event)
 
     # If a non-vorstand user edits a rejected event, reset to pending
     if not is_vorstand and event.status == "rejected":
         event.status = "pending"
         event.rejection_reason = None
 
+    try:
+        db.flush()
+    except IntegrityError:
+        raise _duplicate_conflict(db)
+    sync_event_reminders(db, event)
     log_action(db, current_user.id, "update", "event", event.id, f"Event aktualisiert: {event.title}", request)
     db.commit()
     db.refresh(event)
@@ -183,6 +206,7 @@ async def delete_event(
 
     event_title = event.title
     db.delete(event)
+    cancel_reminders(db, "event", event_id)
     log_action(db, current_user.id, "delete", "event", event_id, f"Event gelöscht: {event_title}", request)
     db.commit()
     return None
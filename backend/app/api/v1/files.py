@@ -0,0 +1,82 @@
+"""Downloads gespeicherter Dateien (Uploads und erzeugte Sitzungsdokumente) mit Rechteprüfung.
+
+Der Pfad ist der in der Datenbank gespeicherte Wert (z. B. blobs/ab/cd/<sha256>.pdf oder
+sitzungen/protokoll_3_2026-03-01_<hash>.docx). Erlaubt ist der Download, wenn der Nutzer mindestens
+eines der Objekte sehen darf, die auf die Datei verweisen.
+"""
+import os
+from typing import Callable, List, Tuple
+from urllib.parse import quote
+
+from fastapi import APIRouter, Depends, HTTPException, Query, Request
+from sqlalchemy.orm import Session
+
+from app.api.deps import get_db, get_current_user
+from app.api.v1.meetings import document_filename
+from app.config import settings
+from app.core.rbac import has_min_role
+from app.models.document import Document
+from app.models.email_template import EmailTemplate
+from app.models.kreisverband import KVProtokoll
+from app.models.meeting import Meeting
+from app.models.user import User
+from app.services.file_delivery import file_response, title_filename
+from app.services.signed_urls import verify_download
+
+router = APIRouter()
+signed_router = APIRouter()
+
+
+# (Model, Spalte, Mindestrolle wie beim Lesen des Objekts, Download-Dateiname)
+FILE_REFERENCES: List[Tuple[type, str, str, Callable[[object, str], str]]] = [
+    (Meeting, "einladung_pfad", "mitarbeiter", lambda m, ext: document_filename(m, "einladung", ext)),
+    (Meeting, "protokoll_pfad", "mitarbeiter", lambda m, ext: document_filename(m, "protokoll", ext)),
+    (KVProtokoll, "datei_pfad", "mitarbeiter", lambda p, ext: title_filename(p.titel, ext)),
+    (KVProtokoll, "pdf_pfad", "mitarbeiter", lambda p, ext: title_filename(p.titel, ext)),
+    (KVProtokoll, "thumbnail_pfad", "mitarbeiter", lambda p, ext: title_filename(p.titel, ext)),
+    (Document, "datei_pfad", "vorstand", lambda d, ext: title_filename(d.titel, ext)),
+    (EmailTemplate, "attachment_storage_path", "leitung", lambda t, ext: t.attachment_original_filename or f"anhang{ext}"),
+]
+
+
+@router.get("/{path:path}")
+async def download_file(
+    path: str,
+    request: Request,
+    db: Session = Depends(get_db),
+    current_user: User = Depends(get_current_user),
+):
+    """Datei herunterladen. Rolle je nach verweisendem Objekt (Sitzung/KV-Protokoll: Mitarbeiter+,
+    Dokument: Vorstand+, E-Mail-Anhang: Leitung+)."""
+    # Altbestand speichert den Pfad inklusive UPLOAD_DIR
+    stored = [path, os.path.join(settings.UPLOAD_DIR, path)]
+    ext = os.path.splitext(path)[1].lower()
+    forbidden = False
+    for model, column, min_role, filename in FILE_REFERENCES:
+        row = db.query(model).filter(getattr(model, column).in_(stored)).first()
+        if row is None:
+            continue
+        if not has_min_role(current_user.role, min_role):
+            forbidden = True
+            continue
+        return file_response(request, getattr(row, column), filename(row, ext))
+    if forbidden:
+        raise HTTPException(status_code=403, detail="Keine Berechtigung für diese Datei")
+    raise HTTPException(status_code=404, detail="Datei nicht gefunden")
+
+
+@signed_router.get("/{path:path}")
+async def signed_download(
+    path: str,
+    request: Request,
+    md5: str = Query(...),
+    expires: int = Query(...),
+    name: str = Query(...),
+):
+    """Download über signierten Link (ohne Login). Entspricht der nginx-Location /dl/ für Setups ohne nginx."""
+    error = verify_download(path, md5, expires, quote(name, safe=""))
+    if error == "expired":
+        raise HTTPException(status_code=410, detail="Download-Link abgelaufen")
+    if error:
+        raise HTTPException(status_code=403, detail="Ungültiger Download-Link")
+    return file_response(request, path, name)
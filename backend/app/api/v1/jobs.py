@@ -0,0 +1,92 @@
+"""Dokument-Jobs: Einladung/Protokoll/PDF im Hintergrund erzeugen (Worker: scripts.document_worker)"""
+import os
+from datetime import datetime
+
+from fastapi import APIRouter, Depends, HTTPException, Request, status
+from sqlalchemy.orm import Session
+
+from app.api.deps import get_db
+from app.core.rbac import require_role, has_min_role
+from app.models.document_aenderungsantrag import DocumentAenderungsantrag
+from app.models.document_job import DocumentJob
+from app.models.meeting import Meeting
+from app.models.user import User
+from app.schemas.document_job import DocumentJobCreate, DocumentJobResponse
+from app.services.document_jobs import JOB_PARAMS, JOB_ROLES, submit_job
+from app.services.file_delivery import file_response
+from app.services.storage import get_storage
+
+router = APIRouter()
+
+
+def _check_access(db: Session, current_user: User, kind: str, entity_id) -> None:
+    """Mindestrolle der Job-Art und Existenz der Sitzung bzw. des Änderungsantrags (wie die synchronen Endpunkte)."""
+    if not has_min_role(current_user.role, JOB_ROLES[kind]):
+        raise HTTPException(
+            status_code=status.HTTP_403_FORBIDDEN,
+            detail=f"Mindestens die Rolle '{JOB_ROLES[kind]}' ist erforderlich",
+        )
+    param = JOB_PARAMS[kind]
+    if not isinstance(entity_id, int):
+        raise HTTPException(status_code=422, detail=f"Parameter '{param}' (Ganzzahl) fehlt")
+    if param == "meeting_id":
+        if not db.query(Meeting.id).filter(Meeting.id == entity_id).first():
+            raise HTTPException(status_code=404, detail="Meeting not found")
+    elif not db.query(DocumentAenderungsantrag.id).filter(DocumentAenderungsantrag.id == entity_id).first():
+        raise HTTPException(status_code=404, detail="Aenderungsantrag not found")
+
+
+def _get_job(db: Session, job_id: int, current_user: User) -> DocumentJob:
+    """Job lesen: wer den Job anlegen dürfte, darf ihn auch abfragen – identische Jobs werden
+    benutzerübergreifend zusammengelegt. Interne Job-Arten (ohne JOB_ROLES) nur Ersteller und Admin."""
+    job = db.query(DocumentJob).filter(DocumentJob.id == job_id).first()
+    if not job:
+        raise HTTPException(status_code=404, detail="Job nicht gefunden")
+    if job.kind not in JOB_ROLES:
+        if job.created_by_id != current_user.id and current_user.role != "admin":
+            raise HTTPException(status_code=404, detail="Job nicht gefunden")
+        return job
+    _check_access(db, current_user, job.kind, (job.params or {}).get(JOB_PARAMS[job.kind]))
+    return job
+
+
+@router.post("/", response_model=DocumentJobResponse, status_code=status.HTTP_202_ACCEPTED)
+async def create_job(
+    data: DocumentJobCreate,
+    db: Session = Depends(get_db),
+    current_user: User = Depends(require_role("mitarbeiter")),
+):
+    """Dokument-Job einreihen. Ein identischer offener Job wird wiederverwendet."""
+    param = JOB_PARAMS[data.kind]
+    entity_id = data.params.get(param)
+    _check_access(db, current_user, data.kind, entity_id)
+    return submit_job(db, data.kind, {param: entity_id}, user_id=current_user.id)
+
+
+@router.get("/{job_id}", response_model=DocumentJobResponse)
+async def get_job(
+    job_id: int,
+    db: Session = Depends(get_db),
+    current_user: User = Depends(require_role("mitarbeiter")),
+):
+    """Status eines Jobs (für alle mit der Mindestrolle der Job-Art)."""
+    return _get_job(db, job_id, current_user)
+
+
+@router.get("/{job_id}/result")
+async def get_job_result(
+    job_id: int,
+    request: Request,
+    db: Session = Depends(get_db),
+    current_user: User = Depends(require_role("mitarbeiter")),
+):
+    """Ergebnis eines abgeschlossenen Jobs herunterladen."""
+    job = _get_job(db, job_id, current_user)
+    if job.status == "failed":
+        raise HTTPException(status_code=422, detail=job.error or "Job fehlgeschlagen")
+    if job.status != "done":
+        raise HTTPException(status_code=409, detail="Job ist noch nicht abgeschlossen")
+    expired = job.expires_at and job.expires_at < datetime.utcnow()
+    if expired or not job.result_path or not get_storage().exists(job.result_path):
+        raise HTTPException(status_code=410, detail="Ergebnis ist abgelaufen")
+    return file_response(request, job.result_path, job.result_name or os.path.basename(job.result_path))
@@ -1,14 +1,11 @@
 """Kreisverband CRUD, Vorstandsmitglieder CRUD, Protokoll CRUD + file upload"""
 import os
-import uuid
 
 from fastapi import APIRouter, Depends, HTTPException, status, Query, UploadFile, File, Form, Request
 from sqlalchemy.orm import Session
 from typing import List, Optional
 from datetime import date
 
-import aiofiles
-
 from app.api.deps import get_db
 from app.core.rbac import require_role, has_min_role
 from app.models.kreisverband import Kreisverband, KVVorstandsmitglied, KVProtokoll
@@ -27,6 +24,10 @@ from app.schemas.kreisverband import (
 )
 from app.config import settings
 from app.services.audit import log_action
+from app.services.blob_store import release, store_upload
+from app.services.document_jobs import submit_job
+from app.services.file_delivery import title_filename
+from app.services.signed_urls import signed_download_url
 
 router = APIRouter()
 
@@ -42,12 +43,6 @@ def _validate_upload(filename: str, content_length: int = 0) -> str:
         raise HTTPException(status_code=400, detail=f"Dateityp '{ext}' nicht erlaubt. Erlaubt: {', '.join(ALLOWED_PROTOKOLL_EXTENSIONS)}")
     return ext
 
-def _safe_file_path(base_dir: str, file_path: str) -> bool:
-    """Check that file_path is within base_dir (prevent path traversal)."""
-    real_base = os.path.realpath(base_dir)
-    real_path = os.path.realpath(file_path)
-    return real_path.startswith(real_base)
-
 
 # ---------------------------------------------------------------------------
 # Kreisverband CRUD
@@ -326,7 +321,15 @@ async def list_protokolle(
     query = db.query(KVProtokoll).filter(KVProtokoll.kreisverband_id == kv_id)
     if typ:
         query = query.filter(KVProtokoll.typ == typ)
-    return query.order_by(KVProtokoll.datum.desc()).all()
+    # Direkte Links: der Browser lädt die Dateien ohne weiteren API-Aufruf (nginx prüft die Signatur)
+    return [
+        KVProtokollResponse.model_validate(p).model_copy(update={
+            "download_url": signed_download_url(p.datei_pfad, title_filename(p.titel, os.path.splitext(p.datei_pfad or "")[1])),
+            "pdf_url": signed_download_url(p.pdf_pfad, title_filename(p.titel, ".pdf")),
+            "thumbnail_url": signed_download_url(p.thumbnail_pfad, title_filename(p.titel, ".png")),
+        })
+        for p in query.order_by(KVProtokoll.datum.desc()).all()
+    ]
 
 
 @router.post("/{kv_id}/protokolle", response_model=KVProtokollResponse, status_code=status.HTTP_201_CREATED)
@@ -347,19 +350,9 @@ async def create_protokoll(
 
     datei_pfad = None
     if datei and datei.filename:
-        os.makedirs(PROTOKOLL_UPLOAD_DIR, exist_ok=True)
         ext = _validate_upload(datei.filename)
-        safe_filename = f"{uuid.uuid4().hex}{ext}"
-        file_path = os.path.join(PROTOKOLL_UPLOAD_DIR, safe_filename)
-
-        content = await datei.read()
-        if len(content) > MAX_FILE_SIZE:
-            raise HTTPException(status_code=400, detail=f"Datei zu groß. Maximum: {MAX_FILE_SIZE // (1024*1024)} MB")
-
-        async with aiofiles.open(file_path, "wb") as f:
-            await f.write(content)
-
-        datei_pfad = file_path
+        blob = await store_upload(db, datei, MAX_FILE_SIZE, ext)
+        datei_pfad = blob.path
 
     protokoll = KVProtokoll(
         kreisverband_id=kv_id,
@@ -368,10 +361,14 @@ async def create_protokoll(
         typ=typ,
         beschreibung=beschreibung,
         datei_pfad=datei_pfad,
+        vorschau_status="pending" if datei_pfad else None,
     )
     db.add(protokoll)
     db.commit()
     db.refresh(protokoll)
+    if datei_pfad:
+        # PDF-Fassung und Vorschaubild erzeugt der Dokument-Worker
+        submit_job(db, "protokoll_vorschau", {"protokoll_id": protokoll.id}, user_id=current_user.id)
     return protokoll
 
 
@@ -386,8 +383,10 @@ async def delete_protokoll(
     if not protokoll:
         raise HTTPException(status_code=404, detail="Protokoll not found")
 
-    if protokoll.datei_pfad and os.path.exists(protokoll.datei_pfad) and _safe_file_path(PROTOKOLL_UPLOAD_DIR, protokoll.datei_pfad):
-        os.remove(protokoll.datei_pfad)
+    release(db, protokoll.datei_pfad, PROTOKOLL_UPLOAD_DIR)
+    if protokoll.pdf_pfad != protokoll.datei_pfad:
+        release(db, protokoll.pdf_pfad)
+    release(db, protokoll.thumbnail_pfad)
 
     db.delete(protokoll)
     db.commit()
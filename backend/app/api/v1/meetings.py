@@ -2,15 +2,19 @@
 import asyncio
 import logging
 import os
+import tempfile
+import uuid
+import zipfile
 from datetime import date
-from pathlib import Path
 
 logger = logging.getLogger(__name__)
 
 from fastapi import APIRouter, Depends, HTTPException, status, Query
-from fastapi.responses import Response
+from fastapi.concurrency import run_in_threadpool
+from fastapi.responses import FileResponse
 from sqlalchemy.orm import Session
-from typing import List, Optional
+from starlette.background import BackgroundTask
+from typing import List, Optional, Tuple
 
 WOCHE_TAG = ("Montag", "Dienstag", "Mittwoch", "Donnerstag", "Freitag", "Samstag", "Sonntag")
 
@@ -18,17 +22,27 @@ from docxtpl import RichText
 
 from app.api.deps import get_db
 from app.core.rbac import require_role
-from app.services.pdf import docx_to_pdf
+from app.services.locks import async_resource_lock, resource_lock
+from app.services.pdf_cache import cached_docx_to_pdf_async, sha256_file
+from app.services.render_pool import render_template_async, render_template_docx
+from app.services.reminders import sync_meeting_reminders, cancel_reminders
+from app.services.storage import get_storage
 from app.models.meeting import Meeting
 from app.models.user import User
 from app.models.kreisverband import Kreisverband, KVVorstandsmitglied
-from app.schemas.meeting import MeetingCreate, MeetingUpdate, MeetingResponse
+from app.schemas.meeting import MeetingCreate, MeetingUpdate, MeetingResponse, MeetingBatchExport
 from app.config import settings
 
 router = APIRouter()
 
-SITZUNGEN_DIR = os.path.join(settings.UPLOAD_DIR, "sitzungen")
-os.makedirs(SITZUNGEN_DIR, exist_ok=True)
+DOCX_MEDIA_TYPE = "application/vnd.openxmlformats-officedocument.wordprocessingml.document"
+
+
+def _sitzungen_dir() -> str:
+    """Zielverzeichnis für gerenderte Dokumente (UPLOAD_DIR erst beim Aufruf gelesen)."""
+    path = os.path.join(settings.UPLOAD_DIR, "sitzungen")
+    os.makedirs(path, exist_ok=True)
+    return path
 
 
 @router.get("/", response_model=List[MeetingResponse])
@@ -89,6 +103,8 @@ async def create_meeting(
         erstellt_von_id=current_user.id,
     )
     db.add(meeting)
+    db.flush()
+    sync_meeting_reminders(db, meeting)
     db.commit()
     db.refresh(meeting)
     return meeting
@@ -130,6 +146,7 @@ async def update_meeting(
         update_data = {k: v for k, v in update_data.items() if k in MEETING_UPDATE_PROTOCOL_ONLY_FIELDS}
     for field, value in update_data.items():
         setattr(meeting, field, value)
+    sync_meeting_reminders(db, meeting)
     db.commit()
     db.refresh(meeting)
     return meeting
@@ -145,8 +162,12 @@ async def delete_meeting(
     meeting = db.query(Meeting).filter(Meeting.id == meeting_id).first()
     if not meeting:
         raise HTTPException(status_code=404, detail="Meeting not found")
+    paths = (meeting.einladung_pfad, meeting.protokoll_pfad)
     db.delete(meeting)
+    cancel_reminders(db, "meeting", meeting_id)
     db.commit()
+    for rel_path in paths:
+        _remove_document(rel_path)
     return None
 
 
@@ -449,6 +470,102 @@ def _meeting_context(meeting: Meeting, for_protocol: bool = False, db: Optional[
     return ctx
 
 
+TEMPLATES_DIR = os.path.join(os.path.dirname(os.path.dirname(os.path.dirname(__file__))), "templates")
+
+
+def document_filename(meeting: Meeting, kind: str, ext: str = ".docx") -> str:
+    """Sprechender Dateiname für Downloads (ohne Versions-Hash)."""
+    return f"{kind}_{meeting.id}_{meeting.datum.isoformat()}{ext}"
+
+
+def _render_args(meeting: Meeting, kind: str, db: Optional[Session] = None) -> Tuple[str, dict, str]:
+    """Vorlage, picklebarer Kontext und temporärer Zielpfad (im Zielverzeichnis, für atomares Umbenennen)."""
+    template_full = os.path.join(TEMPLATES_DIR, f"{kind}.docx")
+    if not os.path.exists(template_full):
+        raise FileNotFoundError(f"Template {kind}.docx not found")
+    if kind == "protokoll":
+        context = _meeting_context(meeting, for_protocol=True, db=db)
+    else:
+        context = _meeting_context(meeting)
+    tmp_full = os.path.join(_sitzungen_dir(), f".{kind}_{meeting.id}_{uuid.uuid4().hex}.tmp.docx")
+    return template_full, context, tmp_full
+
+
+def _lock_name(meeting: Meeting, kind: str) -> str:
+    return f"meeting-{meeting.id}-{kind}"
+
+
+def _swap_in(db: Session, meeting: Meeting, kind: str, tmp_full: str) -> str:
+    """Unter dem Ressourcen-Lock: gerenderte Datei unter ihrem Inhalts-Hash ablegen (atomares rename)
+    und den Pfad committen. Leser sehen immer eine vollständige Datei. Die ersetzte Version bleibt
+    liegen – wer ihren Pfad eben noch gelesen hat (PDF-Endpunkt, protokoll_pdf-Job, /files), kann sie
+    weiter öffnen; der Aufräum-Lauf (storage_sweeper) löscht sie STORAGE_SWEEP_GRACE_HOURS nach dem Ersetzen."""
+    db.refresh(meeting)
+    old = meeting.protokoll_pfad if kind == "protokoll" else meeting.einladung_pfad
+    name, ext = os.path.splitext(document_filename(meeting, kind))
+    rel_path = os.path.join("sitzungen", f"{name}_{sha256_file(tmp_full)[:12]}{ext}")
+    get_storage().put_file(rel_path, tmp_full, content_type=DOCX_MEDIA_TYPE, move=True)
+    if kind == "protokoll":
+        meeting.protokoll_pfad = rel_path
+    else:
+        meeting.einladung_pfad = rel_path
+    db.commit()
+    if old and old != rel_path:
+        _keep_for_readers(old)
+    return rel_path
+
+
+def _keep_for_readers(rel_path: str) -> None:
+    """Ersetzte Version "jetzt" datieren: die Frist des Aufräum-Laufs zählt ab dem Ersetzen, nicht
+    ab dem (evtl. lange zurückliegenden) Erzeugen. Altbestand außerhalb von sitzungen/ bleibt unberührt."""
+    if not rel_path.startswith("sitzungen" + os.sep):
+        return
+    try:
+        get_storage().touch(rel_path)
+    except FileNotFoundError:
+        pass
+    except Exception as e:
+        logger.warning("Sitzungsdokument %s konnte nicht neu datiert werden: %s", rel_path, e)
+
+
+def _remove_document(rel_path: Optional[str]) -> None:
+    """Erzeugtes Sitzungsdokument löschen (nur unter sitzungen/; Reste entfernt der Aufräum-Lauf)."""
+    if not rel_path or not rel_path.startswith("sitzungen" + os.sep):
+        return
+    try:
+        get_storage().delete(rel_path)
+    except Exception as e:
+        logger.warning("Sitzungsdokument %s konnte nicht gelöscht werden: %s", rel_path, e)
+
+
+def _discard(tmp_full: str) -> None:
+    if os.path.exists(tmp_full):
+        os.unlink(tmp_full)
+
+
+def render_meeting_docx(meeting: Meeting, kind: str, db: Session) -> str:
+    """Einladung (kind="einladung") oder Protokoll (kind="protokoll") im aktuellen Prozess erzeugen,
+    versioniert ablegen und den neuen Pfad committen. Gibt den Pfad relativ zu UPLOAD_DIR zurück."""
+    template_full, context, tmp_full = _render_args(meeting, kind, db)
+    try:
+        render_template_docx(template_full, context, tmp_full)
+        with resource_lock(_lock_name(meeting, kind), db):
+            return _swap_in(db, meeting, kind, tmp_full)
+    finally:
+        _discard(tmp_full)
+
+
+async def render_meeting_docx_async(meeting: Meeting, kind: str, db: Session) -> str:
+    """Wie render_meeting_docx, das Rendering läuft im Render-Prozesspool."""
+    template_full, context, tmp_full = _render_args(meeting, kind, db)
+    try:
+        await render_template_async(template_full, context, tmp_full)
+        async with async_resource_lock(_lock_name(meeting, kind), db):
+            return await run_in_threadpool(_swap_in, db, meeting, kind, tmp_full)
+    finally:
+        _discard(tmp_full)
+
+
 @router.post("/{meeting_id}/generate-invitation")
 async def generate_invitation(
     meeting_id: int,
@@ -460,29 +577,13 @@ async def generate_invitation(
     if not meeting:
         raise HTTPException(status_code=404, detail="Meeting not found")
 
-    context = _meeting_context(meeting)
-    output_name = f"einladung_{meeting_id}_{meeting.datum.isoformat()}.docx"
-    template_path = "einladung.docx"
-    template_full = os.path.join(
-        os.path.dirname(os.path.dirname(os.path.dirname(__file__))), "templates", template_path
-    )
-    if not os.path.exists(template_full):
-        raise HTTPException(status_code=500, detail="Template einladung.docx not found")
-
     try:
-        from docxtpl import DocxTemplate
-        doc = DocxTemplate(template_full)
-        doc.render(context)
-        rel_path = os.path.join("sitzungen", output_name)
-        out_path = os.path.join(settings.UPLOAD_DIR, "sitzungen", output_name)
-        os.makedirs(os.path.dirname(out_path), exist_ok=True)
-        doc.save(out_path)
+        rel_path = await render_meeting_docx_async(meeting, "einladung", db)
+    except FileNotFoundError as e:
+        raise HTTPException(status_code=500, detail=str(e))
     except Exception as e:
         raise HTTPException(status_code=500, detail=f"Document generation failed: {str(e)}")
 
-    meeting.einladung_pfad = rel_path
-    db.commit()
-    db.refresh(meeting)
     return {"path": rel_path, "message": "Einladung erstellt"}
 
 
@@ -497,31 +598,101 @@ async def generate_protocol(
     if not meeting:
         raise HTTPException(status_code=404, detail="Meeting not found")
 
-    template_path = os.path.join(
-        os.path.dirname(os.path.dirname(os.path.dirname(__file__))), "templates", "protokoll.docx"
-    )
-    if not os.path.exists(template_path):
-        raise HTTPException(status_code=500, detail="Template protokoll.docx not found")
-
-    context = _meeting_context(meeting, for_protocol=True, db=db)
-    output_name = f"protokoll_{meeting_id}_{meeting.datum.isoformat()}.docx"
     try:
-        from docxtpl import DocxTemplate
-        doc = DocxTemplate(template_path)
-        doc.render(context)
-        rel_path = os.path.join("sitzungen", output_name)
-        out_path = os.path.join(settings.UPLOAD_DIR, "sitzungen", output_name)
-        os.makedirs(os.path.dirname(out_path), exist_ok=True)
-        doc.save(out_path)
+        rel_path = await render_meeting_docx_async(meeting, "protokoll", db)
+    except FileNotFoundError as e:
+        raise HTTPException(status_code=500, detail=str(e))
     except Exception as e:
         raise HTTPException(status_code=500, detail=f"Protocol generation failed: {str(e)}")
 
-    meeting.protokoll_pfad = rel_path
-    db.commit()
-    db.refresh(meeting)
     return {"path": rel_path, "message": "Protokoll erstellt"}
 
 
+def _write_export_zip(eintraege: List[Tuple[str, str]], fehler: List[str]) -> str:
+    """ZIP aus (Speicherpfad, Name im Archiv) in eine Temp-Datei schreiben (blockierend, im Threadpool)."""
+    fd, zip_path = tempfile.mkstemp(suffix=".zip")
+    os.close(fd)
+    try:
+        # DOCX ist bereits komprimiert – ZIP_STORED spart nur CPU
+        with zipfile.ZipFile(zip_path, "w", compression=zipfile.ZIP_STORED) as zf:
+            for rel_path, arcname in eintraege:
+                with get_storage().local_copy(rel_path) as docx_full:
+                    zf.write(docx_full, arcname=arcname)
+            if fehler:
+                zf.writestr("fehler.txt", "\n".join(fehler) + "\n")
+    except BaseException:
+        os.unlink(zip_path)
+        raise
+    return zip_path
+
+
+@router.post("/batch-export")
+async def batch_export(
+    data: MeetingBatchExport,
+    db: Session = Depends(get_db),
+    current_user: User = Depends(require_role("vorstand")),
+):
+    """Einladungen/Protokolle vieler Sitzungen parallel neu erzeugen und als ZIP herunterladen
+    (z. B. jährlicher Export aller Protokolle). Ersetzt die gespeicherten Dokumente, daher Vorstand+;
+    Auswahl über meeting_ids und/oder jahr, höchstens BATCH_EXPORT_MAX_DOCUMENTS Dokumente."""
+    kinds = list(dict.fromkeys(data.kinds))
+    if not kinds:
+        raise HTTPException(status_code=422, detail="Mindestens eine Dokumentart angeben")
+    if not data.meeting_ids and not data.jahr:
+        raise HTTPException(status_code=422, detail="Sitzungen (meeting_ids) oder Jahr angeben")
+    query = db.query(Meeting)
+    if data.meeting_ids:
+        query = query.filter(Meeting.id.in_(data.meeting_ids))
+    if data.jahr:
+        query = query.filter(Meeting.datum >= date(data.jahr, 1, 1), Meeting.datum <= date(data.jahr, 12, 31))
+    anzahl = query.count() * len(kinds)
+    if anzahl > settings.BATCH_EXPORT_MAX_DOCUMENTS:
+        raise HTTPException(
+            status_code=422,
+            detail=f"Zu viele Dokumente ({anzahl}); höchstens {settings.BATCH_EXPORT_MAX_DOCUMENTS} je Export",
+        )
+    meetings = query.order_by(Meeting.datum, Meeting.id).all()
+    if not meetings:
+        raise HTTPException(status_code=404, detail="Keine Sitzungen gefunden")
+
+    try:
+        tasks = [(meeting, kind, *_render_args(meeting, kind, db)) for meeting in meetings for kind in kinds]
+    except FileNotFoundError as e:
+        raise HTTPException(status_code=500, detail=str(e))
+    results = await asyncio.gather(
+        *(
+            render_template_async(template_full, context, tmp_full)
+            for _meeting, _kind, template_full, context, tmp_full in tasks
+        ),
+        return_exceptions=True,
+    )
+    fehler: List[str] = []
+    eintraege: List[Tuple[str, str]] = []
+    for (meeting, kind, _template, _context, tmp_full), result in zip(tasks, results):
+        try:
+            if isinstance(result, BaseException):
+                raise result
+            async with async_resource_lock(_lock_name(meeting, kind), db):
+                rel_path = await run_in_threadpool(_swap_in, db, meeting, kind, tmp_full)
+        except Exception as e:
+            logger.warning("Batch-Export: %s fuer Sitzung %s fehlgeschlagen: %s", kind, meeting.id, e)
+            fehler.append(f"{kind} {meeting.id} ({meeting.titel}): {e}")
+            continue
+        finally:
+            _discard(tmp_full)
+        eintraege.append((rel_path, document_filename(meeting, kind)))
+    if not eintraege:
+        raise HTTPException(status_code=500, detail="Document generation failed: " + fehler[0])
+    zip_path = await run_in_threadpool(_write_export_zip, eintraege, fehler)
+    filename = f"sitzungen_{data.jahr}.zip" if data.jahr else "sitzungen.zip"
+    return FileResponse(
+        zip_path,
+        media_type="application/zip",
+        filename=filename,
+        background=BackgroundTask(os.unlink, zip_path),
+    )
+
+
 @router.get("/{meeting_id}/einladung.pdf")
 async def download_invitation_pdf(
     meeting_id: int,
@@ -533,22 +704,15 @@ async def download_invitation_pdf(
         meeting = db.query(Meeting).filter(Meeting.id == meeting_id).first()
         if not meeting or not meeting.einladung_pfad:
             raise HTTPException(status_code=404, detail="Einladung nicht vorhanden. Bitte zuerst Einladung (DOCX) erzeugen.")
-        docx_full = os.path.normpath(os.path.join(settings.UPLOAD_DIR, meeting.einladung_pfad))
-        if not os.path.isfile(docx_full):
+        try:
+            with get_storage().local_copy(meeting.einladung_pfad) as docx_full:
+                pdf_path = await cached_docx_to_pdf_async(docx_full)
+        except FileNotFoundError:
             raise HTTPException(status_code=404, detail="Einladungsdatei nicht gefunden.")
-        pdf_path = await asyncio.to_thread(docx_to_pdf, docx_full)
         if not pdf_path:
             raise HTTPException(status_code=500, detail="PDF-Konvertierung fehlgeschlagen (LibreOffice erforderlich).")
-        if not os.path.isfile(pdf_path):
-            raise HTTPException(status_code=500, detail="PDF-Datei nach Konvertierung nicht gefunden.")
-        filename = Path(meeting.einladung_pfad).with_suffix(".pdf").name
-        with open(pdf_path, "rb") as f:
-            pdf_bytes = f.read()
-        return Response(
-            content=pdf_bytes,
-            media_type="application/pdf",
-            headers={"Content-Disposition": f'attachment; filename="{filename}"'},
-        )
+        filename = document_filename(meeting, "einladung", ".pdf")
+        return FileResponse(pdf_path, media_type="application/pdf", filename=filename)
     except HTTPException:
         raise
     except Exception as e:
@@ -570,22 +734,15 @@ async def download_protocol_pdf(
         meeting = db.query(Meeting).filter(Meeting.id == meeting_id).first()
         if not meeting or not meeting.protokoll_pfad:
             raise HTTPException(status_code=404, detail="Protokoll nicht vorhanden. Bitte zuerst Protokoll (DOCX) erzeugen.")
-        docx_full = os.path.normpath(os.path.join(settings.UPLOAD_DIR, meeting.protokoll_pfad))
-        if not os.path.isfile(docx_full):
+        try:
+            with get_storage().local_copy(meeting.protokoll_pfad) as docx_full:
+                pdf_path = await cached_docx_to_pdf_async(docx_full)
+        except FileNotFoundError:
             raise HTTPException(status_code=404, detail="Protokolldatei nicht gefunden.")
-        pdf_path = await asyncio.to_thread(docx_to_pdf, docx_full)
         if not pdf_path:
             raise HTTPException(status_code=500, detail="PDF-Konvertierung fehlgeschlagen (LibreOffice erforderlich).")
-        if not os.path.isfile(pdf_path):
-            raise HTTPException(status_code=500, detail="PDF-Datei nach Konvertierung nicht gefunden.")
-        filename = Path(meeting.protokoll_pfad).with_suffix(".pdf").name
-        with open(pdf_path, "rb") as f:
-            pdf_bytes = f.read()
-        return Response(
-            content=pdf_bytes,
-            media_type="application/pdf",
-            headers={"Content-Disposition": f'attachment; filename="{filename}"'},
-        )
+        filename = document_filename(meeting, "protokoll", ".pdf")
+        return FileResponse(pdf_path, media_type="application/pdf", filename=filename)
     except HTTPException:
         raise
     except Exception as e:
@@ -1,4 +1,4 @@
-"""Member change endpoints - create, send emails, list, get by ID"""
+"""Member change endpoints - create, queue emails, list, get by ID, delivery status"""
 from datetime import datetime as dt
 from fastapi import APIRouter, Depends, HTTPException, status, Query
 from pydantic import BaseModel
@@ -19,12 +19,12 @@ def _format_date_for_template(value: Optional[str]) -> str:
 from app.api.deps import get_db
 from app.core.rbac import require_role, require_member_changes_access
 from app.models.member_change import MemberChange
-from app.models.email_template import EmailTemplate
 from app.models.kreisverband import Kreisverband, KVVorstandsmitglied
 from app.models.user import User
-from app.config import settings
+from app.schemas.email_outbox import EmailOutboxResponse
 from app.schemas.member_change import MemberChangeCreate, MemberChangeResponse
-from app.services.email import send_email, render_template, get_attachment_from_path
+from app.services.email_outbox import enqueue_email, messages_for, retry_message
+from app.services.mail_templates import TemplateResolver
 
 router = APIRouter()
 
@@ -74,11 +74,11 @@ async def get_member_change(
 @router.post("/", response_model=MemberChangeResponse, status_code=status.HTTP_201_CREATED)
 async def create_member_change(
     data: MemberChangeCreate,
-    send_emails: bool = Query(True, description="Send notification emails immediately"),
+    send_emails: bool = Query(True, description="Queue notification emails with the change"),
     db: Session = Depends(get_db),
     current_user: User = Depends(require_member_changes_access()),
 ):
-    """Create a member change and optionally send emails. Vorstand darf nicht."""
+    """Create a member change and optionally queue emails (same transaction). Vorstand darf nicht."""
     valid_scenarios = [
         "eintritt", "austritt", "verbandswechsel_eintritt",
         "verbandswechsel_austritt", "verbandswechsel_intern", "veraenderung",
@@ -131,12 +131,11 @@ async def create_member_change(
         erstellt_von_id=current_user.id,
     )
     db.add(change)
+    db.flush()
+    if send_emails:
+        _queue_change_emails(db, change)
     db.commit()
     db.refresh(change)
-
-    if send_emails:
-        _send_change_emails(db, change)
-
     return change
 
 
@@ -154,7 +153,7 @@ async def send_member_change_emails(
     if change.status == "versendet":
         raise HTTPException(status_code=400, detail="Emails already sent for this change")
 
-    _send_change_emails(db, change, send_to_member=True, send_to_kv=True)
+    _queue_change_emails(db, change, send_to_member=True, send_to_kv=True)
 
     change.status = "versendet"
     db.commit()
@@ -175,18 +174,52 @@ async def resend_member_change_emails(
         raise HTTPException(status_code=404, detail="Member change not found")
     if not data.send_to_member and not data.send_to_kv:
         raise HTTPException(status_code=400, detail="Mindestens eine Option (Mitglied oder KV) auswählen.")
-    _send_change_emails(db, change, send_to_member=data.send_to_member, send_to_kv=data.send_to_kv)
+    _queue_change_emails(db, change, send_to_member=data.send_to_member, send_to_kv=data.send_to_kv)
+    db.commit()
+    db.refresh(change)
     return change
 
 
-def _send_change_emails(
+@router.get("/{change_id}/emails", response_model=List[EmailOutboxResponse])
+async def list_member_change_emails(
+    change_id: int,
+    db: Session = Depends(get_db),
+    current_user: User = Depends(require_member_changes_access()),
+):
+    """Zustellstatus der E-Mails zu dieser Mitgliederänderung (pending, sending, sent, dead)."""
+    if not db.query(MemberChange.id).filter(MemberChange.id == change_id).first():
+        raise HTTPException(status_code=404, detail="Member change not found")
+    return messages_for(db, "member_change", change_id)
+
+
+@router.post("/{change_id}/emails/{email_id}/retry", response_model=EmailOutboxResponse)
+async def retry_member_change_email(
+    change_id: int,
+    email_id: int,
+    db: Session = Depends(get_db),
+    current_user: User = Depends(require_role("leitung")),
+):
+    """Endgültig fehlgeschlagene E-Mail erneut in die Warteschlange stellen. Leitung+."""
+    message = next((m for m in messages_for(db, "member_change", change_id) if m.id == email_id), None)
+    if not message:
+        raise HTTPException(status_code=404, detail="E-Mail nicht gefunden")
+    if message.status != "dead":
+        raise HTTPException(status_code=400, detail="Nur endgültig fehlgeschlagene E-Mails können erneut gesendet werden.")
+    retry_message(db, message)
+    db.commit()
+    db.refresh(message)
+    return message
+
+
+def _queue_change_emails(
     db: Session,
     change: MemberChange,
     *,
     send_to_member: bool = True,
     send_to_kv: bool = True,
 ) -> None:
-    """Send notification emails for a member change using templates."""
+    """Benachrichtigungen zur Mitgliederänderung aus den Vorlagen in die Mail-Warteschlange stellen
+    (Commit macht der Aufrufer – zusammen mit der Änderung selbst)."""
     template_vars = {
         "mitgliedsnummer": change.mitgliedsnummer or "",
         "vorname": change.vorname or "",
@@ -227,36 +260,25 @@ def _send_change_emails(
     # Alias für Templates: kreis = Kreisverband-Name (z. B. für "im KV {kreis}")
     template_vars["kreis"] = template_vars["kreisverband"]
 
+    # Alle Vorlagen des Szenarios in einer Abfrage; je Empfänger KV-spezifisch, sonst allgemein
+    templates = TemplateResolver.load(db, change.scenario)
+
     # Send to the member (if email provided)
     if send_to_member and change.email:
-        member_templates = db.query(EmailTemplate).filter(
-            EmailTemplate.scenario == change.scenario,
-            EmailTemplate.typ == "mitglied",
-        ).all()
-
-        # Prefer KV-specific template, fall back to general
-        template = None
-        if change.kreisverband_id:
-            template = next(
-                (t for t in member_templates if t.kreisverband_id == change.kreisverband_id),
-                None,
-            )
-        if not template:
-            template = next(
-                (t for t in member_templates if t.kreisverband_id is None),
-                None,
-            )
-
+        template = templates.resolve(change.scenario, "mitglied", change.kreisverband_id)
         if template:
-            subject = render_template(template.betreff, template_vars)
-            body = render_template(template.inhalt, template_vars)
-            att = get_attachment_from_path(
-                settings.UPLOAD_DIR,
-                template.attachment_storage_path,
-                template.attachment_original_filename,
+            subject, body = template.render(template_vars)
+            enqueue_email(
+                db,
+                [change.email],
+                subject,
+                body,
+                attachment_path=template.attachment_path,
+                attachment_filename=template.attachment_filename,
+                entity_type="member_change",
+                entity_id=change.id,
+                typ="mitglied",
             )
-            attachments = [att] if att else None
-            send_email(to=[change.email], subject=subject, body=body, attachments=attachments)
 
     # Send to Kreisverband: Vorsitzender und Schatzmeister aus dem KV-Vorstand (KV-Modul)
     if not send_to_kv:
@@ -293,23 +315,15 @@ def _send_change_emails(
             elif v.rolle == "Kreisschatzmeister":
                 kv_vorsitz_schatz[kv_id]["schatzmeister"] = v.name or ""
 
-        recipient_templates = db.query(EmailTemplate).filter(
-            EmailTemplate.scenario == change.scenario,
-            EmailTemplate.typ == "empfaenger",
-        ).all()
-
+        # Gemeinsame Platzhalter je Vorlage einmal einsetzen; je Empfänger bleiben nur dessen Werte
+        bound = {}
         for vorstand in vorstand_recipients:
-            template = next(
-                (t for t in recipient_templates if t.kreisverband_id == vorstand.kreisverband_id),
-                None,
-            )
-            if not template:
-                template = next(
-                    (t for t in recipient_templates if t.kreisverband_id is None),
-                    None,
-                )
+            template = templates.resolve(change.scenario, "empfaenger", vorstand.kreisverband_id)
+            if template and template.id not in bound:
+                bound[template.id] = template.bind(template_vars)
 
             if template and vorstand.email:
+                template = bound[template.id]
                 names = kv_vorsitz_schatz.get(vorstand.kreisverband_id, {"vorsitzender": "", "schatzmeister": ""})
                 # Bei Verbandswechsel: Platzhalter, ob Empfänger der abgebende oder aufnehmende KV ist
                 ihr_kreis = ""
@@ -327,19 +341,21 @@ def _send_change_emails(
                 else:
                     ihr_kreis = template_vars.get("kreisverband", "") or template_vars.get("kreisverband_alt", "") or template_vars.get("kreisverband_neu", "")
                 recipient_vars = {
-                    **template_vars,
                     "empfaenger_name": vorstand.name,
                     "vorsitzender": names["vorsitzender"],
                     "schatzmeister": names["schatzmeister"],
                     "ihr_kreis": ihr_kreis,
                     "abgebend_oder_aufnehmend": abgebend_oder_aufnehmend,
                 }
-                subject = render_template(template.betreff, recipient_vars)
-                body = render_template(template.inhalt, recipient_vars)
-                att = get_attachment_from_path(
-                    settings.UPLOAD_DIR,
-                    template.attachment_storage_path,
-                    template.attachment_original_filename,
+                subject, body = template.render(recipient_vars)
+                enqueue_email(
+                    db,
+                    [vorstand.email],
+                    subject,
+                    body,
+                    attachment_path=template.attachment_path,
+                    attachment_filename=template.attachment_filename,
+                    entity_type="member_change",
+                    entity_id=change.id,
+                    typ="empfaenger",
                 )
-                attachments = [att] if att else None
-                send_email(to=[vorstand.email], subject=subject, body=body, attachments=attachments)
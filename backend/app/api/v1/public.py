@@ -1,6 +1,9 @@
 """Public endpoints for the calendar (no authentication required)"""
-from fastapi import APIRouter, Depends, HTTPException, Query, status
-from fastapi.responses import Response
+from fastapi import APIRouter, Depends, HTTPException, Query, Response, status
+from fastapi.concurrency import run_in_threadpool
+from fastapi.responses import ORJSONResponse
+from sqlalchemy import func
+from sqlalchemy.exc import IntegrityError
 from sqlalchemy.orm import Session
 from typing import List, Optional
 from datetime import date
@@ -10,15 +13,19 @@ from app.api.deps import (
     get_visible_tenant_ids_for_public,
     get_tenant_context,
     get_public_calendar_tenant_ids,
+    get_public_calendar_scope,
     is_tenant_kreisverband,
 )
 from app.config import settings
+from app.database import SessionLocal
 from app.models.event import Event
 from app.models.category import Category
 from app.models.user import User
 from app.models.tenant import Tenant
 from app.schemas.event import EventResponse, EventPublicCreate
 from app.schemas.category import CategoryPublic
+from app.services.event_fingerprint import event_fingerprint
+from app.services.singleflight import document_flight
 from pydantic import BaseModel
 
 
@@ -61,6 +68,90 @@ async def get_public_calendars(db: Session = Depends(get_db)):
     return PublicCalendarsResponse(landesverband=landesverband, kreisverband=kreisverband)
 
 
+# Spalten für das kompakte Event-Format im Sammel-Endpunkt (ohne Einreicher-Daten)
+_PUBLIC_EVENT_COLUMNS = (
+    Event.id,
+    Event.title,
+    Event.description,
+    Event.start_date,
+    Event.start_time,
+    Event.end_date,
+    Event.end_time,
+    Event.location,
+    Event.location_url,
+    Event.organizer,
+    Event.category_id,
+    Event.tenant_id,
+)
+
+
+@router.get("/calendar-data", response_class=ORJSONResponse)
+async def get_public_calendar_data(
+    start_date: Optional[date] = Query(None, description="Filter from start date"),
+    end_date: Optional[date] = Query(None, description="Filter until end date"),
+    category_id: Optional[int] = Query(None, description="Filter by category"),
+    skip: int = Query(0, ge=0),
+    limit: int = Query(100, ge=1, le=500),
+    tenant_ids: List[int] = Depends(get_public_calendar_scope),
+    db: Session = Depends(get_db),
+):
+    """
+    Sammel-Endpunkt für öffentliche Kalenderseiten: Events plus Kategorien und Tenants
+    als Wörterbücher (nach ID), damit die Seite mit einer Anfrage auskommt.
+    Ersetzt /calendars + /categories + /events beim ersten Rendern.
+    """
+    active_tenants = (
+        db.query(Tenant.id, Tenant.name, Tenant.slug, Tenant.parent_id)
+        .filter(Tenant.is_active == True)
+        .order_by(Tenant.name)
+        .all()
+    )
+    landesverband_id = min((t.id for t in active_tenants if t.parent_id is None), default=None)
+    calendars = {
+        "landesverband": landesverband_id,
+        "kreisverband": [t.id for t in active_tenants if t.parent_id is not None],
+    }
+    tenants = {str(t.id): {"id": t.id, "name": t.name, "slug": t.slug} for t in active_tenants}
+
+    if not tenant_ids:
+        return ORJSONResponse({"events": [], "categories": {}, "tenants": tenants, "calendars": calendars})
+
+    query = db.query(*_PUBLIC_EVENT_COLUMNS).filter(
+        Event.status == "approved",
+        Event.is_public == True,
+        Event.tenant_id.in_(tenant_ids),
+    )
+    if start_date:
+        query = query.filter(Event.start_date >= start_date)
+    if end_date:
+        query = query.filter(Event.start_date <= end_date)
+    if category_id:
+        query = query.filter(Event.category_id == category_id)
+    rows = (
+        query.order_by(Event.start_date.asc(), Event.start_time.asc())
+        .offset(skip)
+        .limit(limit)
+        .all()
+    )
+    events = [row._asdict() for row in rows]
+
+    categories = {
+        str(c.id): {"id": c.id, "name": c.name, "color": c.color, "tenant_id": c.tenant_id}
+        for c in (
+            db.query(Category.id, Category.name, Category.color, Category.tenant_id)
+            .filter(Category.tenant_id.in_(tenant_ids), Category.is_active == True)
+            .order_by(Category.name)
+            .all()
+        )
+    }
+    return ORJSONResponse({
+        "events": events,
+        "categories": categories,
+        "tenants": tenants,
+        "calendars": calendars,
+    })
+
+
 @router.get("/events", response_model=List[EventResponse])
 async def list_public_events(
     start_date: Optional[date] = Query(None, description="Filter from start date"),
@@ -112,14 +203,26 @@ async def get_public_event(
     return event
 
 
+def _open_duplicate(db: Session, fingerprint: str) -> Optional[Event]:
+    """Offener oder freigegebener Termin mit gleichem Fingerprint (höchstens einer, siehe uq_events_fingerprint_open)."""
+    return (
+        db.query(Event)
+        .filter(Event.fingerprint == fingerprint, Event.status.in_(("pending", "approved")))
+        .first()
+    )
+
+
 @router.post("/events", response_model=EventResponse, status_code=status.HTTP_201_CREATED)
 async def submit_public_event(
     data: EventPublicCreate,
+    response: Response,
     db: Session = Depends(get_db),
 ):
     """
     Öffentliche Termin-Einreichung ohne Login.
     Erfordert PUBLIC_SUBMITTER_USER_ID und PUBLIC_DEFAULT_TENANT_ID (oder tenant_id im Body).
+    Dubletten werden abgelehnt (409); verliert eine gleichzeitige Einreichung das Rennen um den
+    eindeutigen Index, bekommt sie den bereits gespeicherten Termin zurück (200).
     """
     submitter_id = settings.PUBLIC_SUBMITTER_USER_ID
     if submitter_id is None:
@@ -168,6 +271,14 @@ async def submit_public_event(
                 detail="Ungültige oder dem Tenant nicht zugeordnete Kategorie.",
             )
 
+    # Dublette (Doppelklick, erneutes Absenden): gleicher Fingerprint noch offen oder freigegeben
+    fingerprint = event_fingerprint(tenant_id, data.start_date, data.start_time, data.title, data.location)
+    if _open_duplicate(db, fingerprint):
+        raise HTTPException(
+            status_code=status.HTTP_409_CONFLICT,
+            detail="Dieser Termin wurde bereits eingereicht.",
+        )
+
     event = Event(
         title=data.title,
         description=data.description,
@@ -185,9 +296,19 @@ async def submit_public_event(
         submitter_email=data.submitter_email,
         tenant_id=tenant_id,
         is_public=True,
+        fingerprint=fingerprint,
     )
     db.add(event)
-    db.commit()
+    try:
+        db.commit()
+    except IntegrityError:
+        # Gleichzeitige Einreichung (Doppelklick): die andere Anfrage hat zuerst geschrieben
+        db.rollback()
+        existing = _open_duplicate(db, fingerprint)
+        if existing is None:
+            raise
+        response.status_code = status.HTTP_200_OK
+        return existing
     db.refresh(event)
     return event
 
@@ -225,6 +346,26 @@ async def export_ical(
         tenant_ids = get_public_calendar_tenant_ids(db, calendar)
     if not tenant_ids:
         return Response(content="BEGIN:VCALENDAR\r\nEND:VCALENDAR\r\n", media_type="text/calendar; charset=utf-8")
+    tenant_ids = sorted(set(tenant_ids))
+    # Version des Kalenders: gleichzeitige Abrufe desselben Stands teilen sich einen Aufbau
+    count, last_change = _ical_query(db, tenant_ids, start_date, end_date).with_entities(
+        func.count(Event.id), func.max(Event.updated_at)
+    ).one()
+    key = ("ics", tuple(tenant_ids), start_date, end_date, count, last_change)
+    # Der Aufbau läuft weiter, auch wenn der erste Anfragende abbricht und get_db dessen Session
+    # schließt – daher eine eigene Session (gleiche Engine) im Thread statt der Request-Session.
+    bind = db.get_bind()
+    ical_content = await document_flight.do(
+        key, lambda: run_in_threadpool(_build_ical_in_own_session, bind, tenant_ids, start_date, end_date)
+    )
+    return Response(
+        content=ical_content,
+        media_type="text/calendar; charset=utf-8",
+        headers={"Content-Disposition": "attachment; filename=julis-kalender.ics"},
+    )
+
+
+def _ical_query(db: Session, tenant_ids: List[int], start_date: Optional[date], end_date: Optional[date]):
     query = db.query(Event).filter(
         Event.status == "approved",
         Event.is_public == True,
@@ -235,8 +376,20 @@ async def export_ical(
         query = query.filter(Event.start_date >= start_date)
     if end_date:
         query = query.filter(Event.start_date <= end_date)
+    return query
+
 
-    events = query.order_by(Event.start_date.asc()).all()
+def _build_ical_in_own_session(bind, tenant_ids: List[int], start_date: Optional[date], end_date: Optional[date]) -> str:
+    db = SessionLocal(bind=bind)
+    try:
+        return _build_ical(db, tenant_ids, start_date, end_date)
+    finally:
+        db.close()
+
+
+def _build_ical(db: Session, tenant_ids: List[int], start_date: Optional[date], end_date: Optional[date]) -> str:
+    """iCalendar-Inhalt der freigegebenen öffentlichen Termine."""
+    events = _ical_query(db, tenant_ids, start_date, end_date).order_by(Event.start_date.asc()).all()
 
     lines = [
         "BEGIN:VCALENDAR",
@@ -281,12 +434,7 @@ async def export_ical(
 
     lines.append("END:VCALENDAR")
 
-    ical_content = "\r\n".join(lines)
-    return Response(
-        content=ical_content,
-        media_type="text/calendar; charset=utf-8",
-        headers={"Content-Disposition": "attachment; filename=julis-kalender.ics"},
-    )
+    return "\r\n".join(lines)
 
 
 def _ical_escape(text: str) -> str:
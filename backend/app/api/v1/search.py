@@ -0,0 +1,39 @@
+"""Volltextsuche über Termine, Satzung/GO, Änderungsanträge, Sitzungen und hochgeladene Dateien
+(Index: services/search_index.py)"""
+from typing import List, Optional
+
+from fastapi import APIRouter, Depends, HTTPException, Query
+from fastapi.concurrency import run_in_threadpool
+from sqlalchemy.orm import Session
+
+from app.api.deps import get_db, get_tenant_filter
+from app.core.rbac import has_min_role, require_role
+from app.models.kreisverband import Kreisverband
+from app.models.user import User
+from app.schemas.search import SearchHit, SearchKind
+from app.services.search_index import query_tokens, search
+from app.services.search_records import parent_id
+
+router = APIRouter()
+
+
+@router.get("/", response_model=List[SearchHit])
+async def search_entries(
+    q: str = Query(..., min_length=2, max_length=200, description="Suchbegriffe (alle müssen vorkommen)"),
+    kind: Optional[List[SearchKind]] = Query(None, description="Nur diese Arten (mehrfach möglich)"),
+    kreisverband_id: Optional[int] = Query(None, description="Nur Treffer dieses Kreisverbands"),
+    limit: int = Query(20, ge=1, le=100),
+    offset: int = Query(0, ge=0),
+    db: Session = Depends(get_db),
+    current_user: User = Depends(require_role("mitarbeiter")),
+):
+    """Treffer nach Relevanz; nur Einträge, die der Nutzer mit seiner Rolle und seinen Mandanten lesen darf.
+    Mitarbeiter+."""
+    if not query_tokens(q):
+        raise HTTPException(status_code=422, detail="Suchanfrage enthält keine Wörter")
+    if kreisverband_id is not None and not db.query(Kreisverband.id).filter(Kreisverband.id == kreisverband_id).first():
+        raise HTTPException(status_code=404, detail="Kreisverband not found")
+    # Termine wie in GET /events: eigener Mandant samt Unter-Mandanten, Admin alle
+    tenant_ids = None if has_min_role(current_user.role, "admin") else get_tenant_filter(db, current_user, include_children=True)
+    hits = await run_in_threadpool(search, db, q, current_user.role, tenant_ids, kreisverband_id, kind, limit, offset)
+    return [SearchHit(**hit, parent_id=parent_id(hit["kind"], hit["source"])) for hit in hits]
@@ -1,11 +1,18 @@
 """Settings/Admin endpoints (SMTP test, etc.) – nur Admin."""
 from fastapi import APIRouter, Depends, HTTPException
+from fastapi.concurrency import run_in_threadpool
 from pydantic import BaseModel, EmailStr
+from sqlalchemy.orm import Session
 
+from app.api.deps import get_db
 from app.config import settings
 from app.core.rbac import require_role
 from app.models.user import User
 from app.services.email import send_email
+from app.services.pdf import pdf_pool_stats
+from app.services.render_pool import template_cache_stats
+from app.services.smtp_pool import smtp_pool_stats
+from app.services.storage_sweeper import storage_usage
 
 router = APIRouter()
 
@@ -21,12 +28,12 @@ async def test_smtp(
 ):
     """
     Test-E-Mail an die angegebene Adresse senden. Nur Administrator.
-    Prüft die SMTP-Konfiguration (Host, Port, Anmeldung, Versand).
+    Prüft die Konfiguration des gewählten Versandwegs (SMTP bzw. Microsoft Graph, MAIL_TRANSPORT).
     """
     if not settings.email_configured:
         missing = settings.smtp_missing_settings()
         detail = (
-            "SMTP ist nicht konfiguriert. In backend/.env fehlen oder sind leer: "
+            f"E-Mail-Versand ({settings.MAIL_TRANSPORT}) ist nicht konfiguriert. In backend/.env fehlen oder sind leer: "
             + ", ".join(missing)
             + ". Bitte setzen und Backend neu starten."
         )
@@ -40,6 +47,40 @@ async def test_smtp(
     if not ok:
         raise HTTPException(
             status_code=502,
-            detail="E-Mail konnte nicht gesendet werden. Bitte SMTP-Einstellungen und Logs prüfen.",
+            detail="E-Mail konnte nicht gesendet werden. Bitte SMTP- bzw. Graph-Einstellungen und Logs prüfen.",
         )
     return {"detail": f"Test-E-Mail wurde an {data.to} gesendet."}
+
+
+@router.get("/pdf-pool")
+async def get_pdf_pool_stats(
+    current_user: User = Depends(require_role("admin")),
+):
+    """Metriken des LibreOffice-Pools (Instanzen, Warteschlange, Konvertierungen, Fehler). Nur Administrator."""
+    return pdf_pool_stats() or {"detail": "PDF-Pool noch nicht gestartet."}
+
+
+@router.get("/smtp-pool")
+async def get_smtp_pool_stats(
+    current_user: User = Depends(require_role("admin")),
+):
+    """Metriken des SMTP-Pools (Sitzungen, Neuverbindungen, Drosselung) dieses Prozesses. Nur Administrator."""
+    return smtp_pool_stats() or {"detail": "SMTP-Pool noch nicht benutzt."}
+
+
+@router.get("/template-cache")
+async def get_template_cache_stats(
+    current_user: User = Depends(require_role("admin")),
+):
+    """Trefferquote und Parse-Zeiten des DOCX-Vorlagen-Caches (je Prozess). Nur Administrator."""
+    return template_cache_stats()
+
+
+@router.get("/storage")
+async def get_storage_usage(
+    db: Session = Depends(get_db),
+    current_user: User = Depends(require_role("admin")),
+):
+    """Speicherbelegung je Upload-Bereich, Blob-Referenzen und Stand des Aufräumens verwaister Dateien.
+    Nur Administrator."""
+    return await run_in_threadpool(storage_usage, db)
@@ -25,6 +25,12 @@ class Settings(BaseSettings):
     SMTP_PASSWORD: Optional[str] = None
     SMTP_FROM_EMAIL: Optional[str] = None
     SMTP_FROM_NAME: str = "JuLis SH Intranet"
+    SMTP_STARTTLS: bool = True  # nur für lokale Test-Server ohne TLS abschalten
+    SMTP_TIMEOUT: int = 30  # Sekunden je SMTP-Befehl
+    # Pool angemeldeter SMTP-Sitzungen (je Prozess) und Drosselung
+    SMTP_POOL_SIZE: int = 2  # gleichzeitig offene Sitzungen
+    SMTP_POOL_IDLE_SECONDS: int = 60  # länger unbenutzte Sitzungen werden vor dem Versand ersetzt
+    SMTP_RATE_PER_MINUTE: int = 30  # Nachrichten pro Minute (Office 365: 30); 0 = unbegrenzt
     APP_URL: str = "http://localhost:3000"
 
     # E-Mail-Empfänger für Benachrichtigungen zu Änderungsanträgen (Satzung/Geschäftsordnung), kommagetrennt
@@ -35,6 +41,10 @@ class Settings(BaseSettings):
     MS_CLIENT_ID: Optional[str] = None
     MS_CLIENT_SECRET: Optional[str] = None
     MS_SENDER_MAIL: Optional[str] = None
+    MS_GRAPH_URL: str = "https://graph.microsoft.com/v1.0"  # für Tests auf einen lokalen Ersatz umstellbar
+    MS_LOGIN_URL: str = "https://login.microsoftonline.com"
+    # Versandweg für E-Mails: "smtp" (SMTP_* oben) oder "graph" (sendMail über Microsoft Graph, MS_*)
+    MAIL_TRANSPORT: str = "smtp"
 
     # Microsoft 365 / Entra ID Login (OAuth2)
     # Redirect URI in Azure muss exakt der Frontend-Callback sein, z. B. https://intranet.example.com/login/microsoft/callback
@@ -42,6 +52,17 @@ class Settings(BaseSettings):
 
     # Upload paths
     UPLOAD_DIR: str = "./data/uploads"
+    # Ablage der Upload-Dateien: "local" = UPLOAD_DIR, "s3" = S3-kompatibler Objektspeicher (AWS, MinIO, ...)
+    # für mehrere Backend-Knoten; UPLOAD_DIR bleibt dann nur für temporäre Dateien, Cache und Locks
+    STORAGE_BACKEND: str = "local"
+    S3_ENDPOINT_URL: Optional[str] = None  # z. B. https://s3.eu-central-1.amazonaws.com oder http://minio:9000
+    S3_BUCKET: Optional[str] = None
+    S3_REGION: str = "us-east-1"
+    S3_ACCESS_KEY_ID: Optional[str] = None
+    S3_SECRET_ACCESS_KEY: Optional[str] = None
+    S3_PREFIX: Optional[str] = None  # optionaler Schlüssel-Präfix im Bucket, z. B. "intranet/"
+    S3_FORCE_PATH_STYLE: bool = True  # https://host/bucket/key (MinIO); False = https://bucket.host/key
+    S3_PART_SIZE_MB: int = 8  # größere Dateien als Multipart-Upload in Teilen dieser Größe (mind. 5)
 
     # Word-Vorlagen: Zeichenformat für Tagesordnung (RichText setzt sonst Vorlagen-Formatierung zurück)
     # Option A: Name eines in Word angelegten Zeichenstils (z. B. "TagesordnungText") – Schriftart/Größe aus Vorlage
@@ -50,6 +71,66 @@ class Settings(BaseSettings):
     DOCX_TAGESORDNUNG_FONT: Optional[str] = None
     DOCX_TAGESORDNUNG_SIZE: Optional[int] = None  # Punkt (pt)
 
+    # PDF-Konvertierung: Pool langlebiger LibreOffice-Instanzen (je eigenes Profil)
+    PDF_POOL_SIZE: int = 2
+    PDF_QUEUE_SIZE: int = 16  # wartende Aufträge; darüber wird abgelehnt
+    PDF_JOB_TIMEOUT: int = 60  # Sekunden pro Konvertierung, danach wird die Instanz neu gestartet
+    PDF_POOL_DIR: Optional[str] = None  # Profile der Instanzen (je Prozess eigene); leer = <tmp>/julis-soffice
+    PDF_UNO_PATH: str = "/usr/lib/python3/dist-packages"  # Fundort von python3-uno (Debian)
+    PDF_WORKDIR: Optional[str] = None  # Arbeitsverzeichnis der Konvertierung; leer = /dev/shm (RAM), sonst <tmp>
+    PDF_CACHE_DIR: Optional[str] = None  # leer = <UPLOAD_DIR>/cache/pdf
+    PDF_CACHE_MAX_MB: int = 256  # darüber werden die am längsten nicht genutzten PDFs gelöscht
+
+    # Änderungsantrag-PDF: "auto" = direkt mit fpdf2 (falls installiert), "libreoffice" = immer über DOCX
+    AENDERUNGSANTRAG_PDF_RENDERER: str = "auto"
+
+    # Vorschaubilder hochgeladener KV-Protokolle (erste Seite, PNG): Breite in Pixeln
+    THUMBNAIL_WIDTH: int = 320
+
+    # DOCX-Rendering in Kindprozessen; leer = Anzahl CPU-Kerne, 0 = Threads im API-Prozess
+    RENDER_POOL_SIZE: Optional[int] = None
+    BATCH_EXPORT_MAX_DOCUMENTS: int = 100  # Sitzungen × Dokumentarten je Sammel-Export; darüber 422
+
+    # Dokument-Jobs (Worker: python -m scripts.document_worker)
+    DOCUMENT_JOB_MAX_ATTEMPTS: int = 3
+    DOCUMENT_JOB_RETRY_SECONDS: int = 30  # Backoff: 30 s, 60 s, 120 s, ...
+    DOCUMENT_JOB_RESULT_TTL_HOURS: int = 24  # so lange bleibt das Ergebnis abrufbar
+    DOCUMENT_JOB_POLL_SECONDS: int = 2
+    DOCUMENT_JOB_STALE_SECONDS: int = 600  # "running" länger als das → Worker gilt als abgestürzt
+
+    # Volltextsuche in hochgeladenen Protokollen/Dokumenten (Textextraktion im Dokument-Worker)
+    TEXT_EXTRACTION_WORKERS: Optional[int] = None  # Kindprozesse; leer = Anzahl CPU-Kerne, 0 = im Worker selbst
+    TEXT_EXTRACTION_BATCH: int = 50  # Dateien pro Lauf (etwa jede Minute)
+    TEXT_EXTRACTION_MAX_CHARS: int = 500_000  # längere Texte werden für den Index abgeschnitten
+
+    # Upload-Speicher (blobs/): nicht mehr referenzierte Dateien bleiben so lange liegen, bevor der
+    # Dokument-Worker sie löscht
+    BLOB_GRACE_MINUTES: int = 60
+    # Aufräumen verwaister Dateien (Dokument-Worker): nur Dateien älter als die Karenzzeit, pro Lauf
+    # (etwa jede Minute) höchstens STORAGE_SWEEP_BATCH Dateien prüfen
+    STORAGE_SWEEP_GRACE_HOURS: int = 24
+    STORAGE_SWEEP_BATCH: int = 1000
+    # Interne nginx-Location für Downloads (X-Accel-Redirect), z. B. /_protected_uploads/;
+    # leer = Backend liefert Dateien selbst aus (Entwicklung ohne nginx)
+    FILES_X_ACCEL_REDIRECT: Optional[str] = None
+    # Signierte Download-Links (/dl/..., nginx secure_link); leer = keine Links in Listen
+    DOWNLOAD_URL_SECRET: Optional[str] = None
+    DOWNLOAD_URL_TTL_SECONDS: int = 300
+
+    # Erinnerungen vor Terminen/Sitzungen (Worker: python -m scripts.reminder_worker)
+    REMINDER_LEAD_HOURS: int = 24  # Vorlauf vor Beginn
+    REMINDER_TIMEZONE: str = "Europe/Berlin"  # Zeitzone von start_date/start_time bzw. datum/uhrzeit
+    REMINDER_POLL_SECONDS: int = 60  # Abgleich mit der reminders-Tabelle (neue/verschobene Erinnerungen)
+    REMINDER_BATCH_SIZE: int = 50  # Nachrichten pro Versandlauf
+
+    # Mail-Warteschlange email_outbox (Worker: python -m scripts.email_worker)
+    EMAIL_OUTBOX_MAX_ATTEMPTS: int = 5  # danach "dead" (bleibt zur Ansicht/zum erneuten Senden stehen)
+    EMAIL_OUTBOX_RETRY_SECONDS: int = 60  # Backoff: 60 s, 120 s, 240 s, ...
+    EMAIL_OUTBOX_BATCH_SIZE: int = 50  # Nachrichten pro Durchlauf
+    EMAIL_OUTBOX_POLL_SECONDS: int = 5
+    EMAIL_OUTBOX_STALE_SECONDS: int = 600  # "sending" länger als das → Worker gilt als abgestürzt
+    EMAIL_OUTBOX_RETENTION_DAYS: int = 90  # zugestellte/endgültig fehlgeschlagene Nachrichten danach löschen
+
     # Öffentliche Termin-Einreichung (ohne Login)
     PUBLIC_SUBMITTER_USER_ID: Optional[int] = None  # User-ID für "Gast"-Einreichungen
     PUBLIC_DEFAULT_TENANT_ID: Optional[int] = None  # Standard-Tenant für öffentliche Einreichungen
@@ -80,6 +161,9 @@ class Settings(BaseSettings):
 
     @property
     def email_configured(self) -> bool:
+        """Ist der gewählte Versandweg (MAIL_TRANSPORT) vollständig eingerichtet?"""
+        if self.MAIL_TRANSPORT == "graph":
+            return self.ms_graph_configured
         return (
             self.SMTP_ENABLED
             and bool(self.SMTP_USER)
@@ -88,7 +172,12 @@ class Settings(BaseSettings):
         )
 
     def smtp_missing_settings(self) -> List[str]:
-        """Liste der fehlenden SMTP-Einstellungen (für Fehlermeldungen)."""
+        """Liste der fehlenden Einstellungen des gewählten Versandwegs (für Fehlermeldungen)."""
+        if self.MAIL_TRANSPORT == "graph":
+            return [
+                name for name in ("MS_TENANT_ID", "MS_CLIENT_ID", "MS_CLIENT_SECRET", "MS_SENDER_MAIL")
+                if not getattr(self, name)
+            ]
         missing = []
         if not self.SMTP_ENABLED:
             missing.append("SMTP_ENABLED=true")
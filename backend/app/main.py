@@ -1,9 +1,7 @@
 """FastAPI application initialization and configuration"""
 from fastapi import FastAPI, Request, HTTPException
 from fastapi.middleware.cors import CORSMiddleware
-from fastapi.staticfiles import StaticFiles
 from fastapi.responses import JSONResponse
-import os
 
 from app.config import settings
 from app.core.limiter import limiter, RATE_LIMIT_ENABLED
@@ -81,11 +79,6 @@ if settings.cors_allow_origin_regex:
     cors_kwargs["allow_origin_regex"] = settings.cors_allow_origin_regex
 app.add_middleware(CORSMiddleware, **cors_kwargs)
 
-# Mount uploads directory for file serving
-uploads_dir = os.path.join("data", "uploads")
-os.makedirs(uploads_dir, exist_ok=True)
-app.mount("/uploads", StaticFiles(directory=uploads_dir), name="uploads")
-
 DEFAULT_JWT_SECRET = "dev-secret-key-change-in-production"
 
 
@@ -101,7 +94,15 @@ async def startup_event():
 
 @app.on_event("shutdown")
 async def shutdown_event():
+    from app.services.pdf import shutdown_pdf_pool
+    from app.services.render_pool import shutdown_render_pool
+    from app.services.graph_mail import close_graph_mailer
+    from app.services.smtp_pool import close_smtp_pool
     logger.info("Shutting down JuLis SH Intranet API")
+    shutdown_pdf_pool()
+    shutdown_render_pool()
+    close_smtp_pool()
+    close_graph_mailer()
 
 
 @app.get("/")
@@ -133,3 +134,10 @@ async def health_check():
 
 from app.api.v1.api import api_router as api_v1_router
 app.include_router(api_v1_router, prefix="/api/v1")
+
+# Suchindex für Termine, Dokumente, Änderungsanträge und Sitzungen nach jedem Commit nachziehen
+from app.services import search_records  # noqa: E402,F401
+
+# Signierte Download-Links (in Produktion beantwortet nginx /dl/ selbst)
+from app.api.v1.files import signed_router as signed_download_router
+app.include_router(signed_download_router, prefix="/dl", tags=["files"])
@@ -11,10 +11,19 @@ from app.models.document import Document
 from app.models.document_aenderungsantrag import DocumentAenderungsantrag as DocumentAmendment
 from app.models.document_aenderung import DocumentAenderung
 from app.models.meeting import Meeting
+from app.models.reminder import Reminder
+from app.models.document_job import DocumentJob
+from app.models.blob import Blob
+from app.models.storage_sweep import StorageSweep
+from app.models.file_text import FileText
+from app.models.email_outbox import EmailOutbox
+from app.models import search_entry  # noqa: F401  (FTS5-Tabelle an Base.metadata)
 
 __all__ = [
     "User", "Tenant", "Event", "Category", "AuditLog",
     "Kreisverband", "KVVorstandsmitglied", "KVProtokoll",
     "MemberChange", "EmailTemplate", "EmailRecipient",
     "Document", "DocumentAmendment", "DocumentAenderung", "Meeting",
+    "Reminder", "DocumentJob", "Blob", "StorageSweep", "FileText",
+    "EmailOutbox",
 ]
@@ -0,0 +1,19 @@
+"""Blob model: inhaltsadressierte Upload-Dateien mit Referenzzähler"""
+from sqlalchemy import Column, Integer, BigInteger, String, DateTime, Index
+from sqlalchemy.sql import func
+from app.database import Base
+
+
+class Blob(Base):
+    __tablename__ = "blobs"
+
+    sha256 = Column(String(64), primary_key=True)
+    path = Column(String(500), nullable=False, unique=True)  # relativ zu UPLOAD_DIR: blobs/ab/cd/<sha256><ext>
+    size = Column(BigInteger, nullable=False)
+    mime_type = Column(String(100), nullable=False)
+    ref_count = Column(Integer, nullable=False, default=0)  # Anzahl Datenbankfelder, die auf path zeigen
+    released_at = Column(DateTime, nullable=True)  # UTC (naiv); wann ref_count auf 0 fiel
+
+    created_at = Column(DateTime(timezone=True), server_default=func.now(), nullable=False)
+
+    __table_args__ = (Index("ix_blobs_ref_count_released_at", "ref_count", "released_at"),)
@@ -0,0 +1,34 @@
+"""DocumentJob model für die Warteschlange der Dokumenterzeugung (DOCX/PDF im Hintergrund)"""
+from sqlalchemy import Column, Integer, String, Text, DateTime, ForeignKey, JSON, Index
+from sqlalchemy.orm import relationship
+from sqlalchemy.sql import func
+from app.database import Base
+
+
+class DocumentJob(Base):
+    __tablename__ = "document_jobs"
+
+    id = Column(Integer, primary_key=True, index=True, autoincrement=True)
+    kind = Column(String(50), nullable=False)  # einladung, protokoll, einladung_pdf, protokoll_pdf, aenderungsantrag_pdf
+    params = Column(JSON, nullable=False)  # z. B. {"meeting_id": 1}
+    dedup_key = Column(String(64), nullable=False, index=True)  # SHA-256 über kind + params
+    status = Column(String(20), nullable=False, default="pending")  # pending, running, done, failed
+    attempts = Column(Integer, nullable=False, default=0)
+    max_attempts = Column(Integer, nullable=False, default=3)
+    next_attempt_at = Column(DateTime, nullable=False)  # UTC (naiv)
+    started_at = Column(DateTime, nullable=True)
+    finished_at = Column(DateTime, nullable=True)
+    expires_at = Column(DateTime, nullable=True)  # Ergebnis abrufbar bis (UTC, naiv)
+    result_path = Column(String(500), nullable=True)  # relativ zu UPLOAD_DIR
+    result_name = Column(String(255), nullable=True)  # Dateiname für den Download
+    error = Column(Text, nullable=True)
+    created_by_id = Column(Integer, ForeignKey("users.id", ondelete="SET NULL"), nullable=True)
+
+    created_at = Column(DateTime(timezone=True), server_default=func.now(), nullable=False)
+    updated_at = Column(DateTime(timezone=True), server_default=func.now(), onupdate=func.now(), nullable=False)
+
+    created_by = relationship("User", foreign_keys=[created_by_id])
+
+    __table_args__ = (
+        Index("ix_document_jobs_status_next_attempt", "status", "next_attempt_at"),
+    )
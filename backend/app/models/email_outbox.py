@@ -0,0 +1,35 @@
+"""EmailOutbox model: Warteschlange ausgehender E-Mails (Zustellung durch den E-Mail-Worker)"""
+from sqlalchemy import Column, Integer, String, Text, Boolean, DateTime, JSON, Index
+from sqlalchemy.sql import func
+from app.database import Base
+
+
+class EmailOutbox(Base):
+    __tablename__ = "email_outbox"
+
+    id = Column(Integer, primary_key=True, index=True, autoincrement=True)
+    entity_type = Column(String(30), nullable=True)  # member_change, aenderungsantrag
+    entity_id = Column(Integer, nullable=True)
+    typ = Column(String(30), nullable=True)  # Vorlagen-Typ: mitglied, empfaenger, benachrichtigung
+    to_addresses = Column(JSON, nullable=False)  # ["a@example.org", ...]
+    subject = Column(String(500), nullable=False)
+    body = Column(Text, nullable=False)
+    html = Column(Boolean, nullable=False, default=True)
+    attachment_path = Column(String(500), nullable=True)  # Blob-Referenz bis zur Zustellung gehalten
+    attachment_filename = Column(String(255), nullable=True)
+
+    status = Column(String(20), nullable=False, default="pending")  # pending, sending, sent, dead
+    attempts = Column(Integer, nullable=False, default=0)
+    max_attempts = Column(Integer, nullable=False, default=5)
+    next_attempt_at = Column(DateTime, nullable=False)  # UTC (naiv)
+    claimed_at = Column(DateTime, nullable=True)
+    finished_at = Column(DateTime, nullable=True)  # zugestellt bzw. endgültig fehlgeschlagen
+    last_error = Column(Text, nullable=True)
+
+    created_at = Column(DateTime(timezone=True), server_default=func.now(), nullable=False)
+    updated_at = Column(DateTime(timezone=True), server_default=func.now(), onupdate=func.now(), nullable=False)
+
+    __table_args__ = (
+        Index("ix_email_outbox_status_next_attempt", "status", "next_attempt_at"),
+        Index("ix_email_outbox_entity", "entity_type", "entity_id"),
+    )
@@ -1,5 +1,5 @@
 """Event SQLAlchemy model"""
-from sqlalchemy import Column, Integer, String, Boolean, DateTime, Date, Time, ForeignKey, Text, CheckConstraint
+from sqlalchemy import Column, Integer, String, Boolean, DateTime, Date, Time, ForeignKey, Text, CheckConstraint, Index
 from sqlalchemy.sql import func
 from sqlalchemy.orm import relationship
 from app.database import Base
@@ -36,11 +36,21 @@ class Event(Base):
 
     is_public = Column(Boolean, default=True, nullable=False)
 
+    # Dubletten-Erkennung: SHA-256 über Tenant, Datum, Uhrzeit, normalisierten Titel und Ort;
+    # unter offenen/freigegebenen Terminen eindeutig (uq_events_fingerprint_open)
+    fingerprint = Column(String(64), nullable=True, index=True)
+
     created_at = Column(DateTime(timezone=True), server_default=func.now(), nullable=False)
     updated_at = Column(DateTime(timezone=True), server_default=func.now(), onupdate=func.now(), nullable=False)
 
     __table_args__ = (
         CheckConstraint(status.in_(['pending', 'approved', 'rejected']), name='check_status_type'),
+        Index('ix_events_tenant_start_date', 'tenant_id', 'start_date'),
+        Index(
+            'uq_events_fingerprint_open', 'fingerprint', unique=True,
+            sqlite_where=status.in_(['pending', 'approved']),
+            postgresql_where=status.in_(['pending', 'approved']),
+        ),
     )
 
     tenant = relationship("Tenant", back_populates="events", foreign_keys=[tenant_id])
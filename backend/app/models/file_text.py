@@ -0,0 +1,15 @@
+"""FileText model: aus Upload-Dateien extrahierter Text, je Dateiinhalt (SHA-256) nur einmal"""
+from sqlalchemy import Column, Integer, String, Text, DateTime
+from app.database import Base
+
+
+class FileText(Base):
+    __tablename__ = "file_texts"
+
+    sha256 = Column(String(64), primary_key=True)  # Inhalt der Datei (bei Blobs = Blob.sha256)
+    status = Column(String(20), nullable=False)  # done | failed | unsupported
+    extractor = Column(String(20), nullable=True)  # docx | pymupdf | pdftotext | text
+    text = Column(Text, nullable=True)
+    chars = Column(Integer, nullable=False, default=0)  # Länge vor dem Abschneiden
+    error = Column(String(500), nullable=True)
+    extracted_at = Column(DateTime, nullable=False)  # UTC (naiv)
@@ -54,6 +54,10 @@ class KVProtokoll(Base):
     typ = Column(String(50), nullable=False)  # MV, Vorstandssitzung
     datei_pfad = Column(String(500), nullable=True)
     beschreibung = Column(Text, nullable=True)
+    # Vorschau (Dokument-Worker): PDF-Fassung und PNG der ersten Seite, beide im Blob-Speicher
+    pdf_pfad = Column(String(500), nullable=True)  # bei PDF-Uploads = datei_pfad
+    thumbnail_pfad = Column(String(500), nullable=True)
+    vorschau_status = Column(String(20), nullable=True)  # pending, done, failed; leer = keine Datei
 
     created_at = Column(DateTime(timezone=True), server_default=func.now(), nullable=False)
 
@@ -0,0 +1,25 @@
+"""Reminder model für Erinnerungen vor Terminen und Sitzungen"""
+from sqlalchemy import Column, Integer, String, DateTime, Index, UniqueConstraint
+from sqlalchemy.sql import func
+from app.database import Base
+
+
+class Reminder(Base):
+    __tablename__ = "reminders"
+
+    id = Column(Integer, primary_key=True, index=True, autoincrement=True)
+    entity_type = Column(String(20), nullable=False)  # event, meeting
+    entity_id = Column(Integer, nullable=False)
+    recipient_email = Column(String(255), nullable=False)
+    due_at = Column(DateTime, nullable=False)  # UTC (naiv), Fälligkeit der Erinnerung
+    status = Column(String(20), nullable=False, default="pending")  # pending, sent (in email_outbox eingereiht), failed (Altbestand), cancelled
+    sent_at = Column(DateTime, nullable=True)
+
+    created_at = Column(DateTime(timezone=True), server_default=func.now(), nullable=False)
+    updated_at = Column(DateTime(timezone=True), server_default=func.now(), onupdate=func.now(), nullable=False, index=True)
+
+    __table_args__ = (
+        UniqueConstraint("entity_type", "entity_id", "recipient_email", name="uq_reminder_entity_recipient"),
+        Index("ix_reminders_status_due_at", "status", "due_at"),
+        Index("ix_reminders_entity", "entity_type", "entity_id"),
+    )
@@ -0,0 +1,32 @@
+"""Volltextindex search_entries (SQLite FTS5) – virtuelle Tabelle ohne ORM-Klasse.
+
+title und body sind durchsuchbar, die übrigen Spalten (UNINDEXED) dienen Zuordnung und Rechteprüfung.
+Angelegt mit Base.metadata.create_all (entrypoint.sh, Tests) bzw. per Migration; auf anderen
+Datenbanken eine gewöhnliche Tabelle (Suche dann per LIKE, siehe services/search_index.py).
+"""
+from sqlalchemy import DDL, event
+
+from app.database import Base
+
+SEARCH_TABLE = "search_entries"
+
+SEARCH_COLUMNS = (
+    "title", "body", "kind", "ref_id", "kreisverband_id", "tenant_id", "min_role", "source", "content_hash",
+)
+
+CREATE_FTS5 = (
+    "CREATE VIRTUAL TABLE IF NOT EXISTS search_entries USING fts5("
+    "title, body, kind UNINDEXED, ref_id UNINDEXED, kreisverband_id UNINDEXED, tenant_id UNINDEXED, "
+    "min_role UNINDEXED, source UNINDEXED, content_hash UNINDEXED, "
+    "tokenize = 'unicode61 remove_diacritics 2', prefix = '2 3')"
+)
+
+CREATE_PLAIN = (
+    "CREATE TABLE IF NOT EXISTS search_entries ("
+    "title TEXT, body TEXT, kind VARCHAR(30) NOT NULL, ref_id INTEGER NOT NULL, kreisverband_id INTEGER, "
+    "tenant_id INTEGER, min_role VARCHAR(20) NOT NULL, source VARCHAR(500), content_hash VARCHAR(64))"
+)
+
+event.listen(Base.metadata, "after_create", DDL(CREATE_FTS5).execute_if(dialect="sqlite"))
+event.listen(Base.metadata, "after_create", DDL(CREATE_PLAIN).execute_if(callable_=lambda ddl, target, bind, **kw: bind.dialect.name != "sqlite"))
+event.listen(Base.metadata, "before_drop", DDL("DROP TABLE IF EXISTS search_entries"))
@@ -0,0 +1,17 @@
+"""StorageSweep model: Fortschritt des Aufräumens verwaister Upload-Dateien (eine Zeile, id=1)"""
+from sqlalchemy import Column, Integer, BigInteger, String, DateTime
+from sqlalchemy.sql import func
+from app.database import Base
+
+
+class StorageSweep(Base):
+    __tablename__ = "storage_sweeps"
+
+    id = Column(Integer, primary_key=True)
+    cursor = Column(String(500), nullable=True)  # zuletzt geprüfte Datei relativ zu UPLOAD_DIR; leer = neuer Durchlauf
+    pass_started_at = Column(DateTime, nullable=True)  # UTC (naiv)
+    last_pass_at = Column(DateTime, nullable=True)  # Ende des letzten vollständigen Durchlaufs (UTC, naiv)
+    deleted_files = Column(Integer, nullable=False, default=0)  # insgesamt gelöschte verwaiste Dateien
+    deleted_bytes = Column(BigInteger, nullable=False, default=0)
+
+    updated_at = Column(DateTime(timezone=True), server_default=func.now(), onupdate=func.now(), nullable=False)
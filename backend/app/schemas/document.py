@@ -58,6 +58,7 @@ class DocumentUpdate(BaseModel):
 class DocumentResponse(DocumentBase):
     id: int
     datei_pfad: Optional[str] = None
+    download_url: Optional[str] = None  # signierter, kurzlebiger Link (nur in Listen)
     created_at: datetime
     updated_at: datetime
     model_config = ConfigDict(from_attributes=True)
@@ -0,0 +1,27 @@
+"""DocumentJob Pydantic schemas"""
+from pydantic import BaseModel, ConfigDict
+from typing import Optional, Literal, Dict, Any
+from datetime import datetime
+
+DocumentJobKind = Literal["einladung", "protokoll", "einladung_pdf", "protokoll_pdf", "aenderungsantrag_pdf"]
+
+
+class DocumentJobCreate(BaseModel):
+    kind: DocumentJobKind
+    params: Dict[str, Any]  # Sitzungen: {"meeting_id": 1}, Änderungsanträge: {"aenderungsantrag_id": 1}
+
+
+class DocumentJobResponse(BaseModel):
+    id: int
+    kind: str
+    params: Dict[str, Any]
+    status: str  # pending, running, done, failed
+    attempts: int
+    max_attempts: int
+    next_attempt_at: datetime
+    finished_at: Optional[datetime] = None
+    expires_at: Optional[datetime] = None
+    result_name: Optional[str] = None
+    error: Optional[str] = None
+    created_at: datetime
+    model_config = ConfigDict(from_attributes=True)
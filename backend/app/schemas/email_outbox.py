@@ -0,0 +1,20 @@
+"""EmailOutbox Pydantic schemas (Zustellstatus einzelner Nachrichten)"""
+from datetime import datetime
+from typing import List, Optional
+
+from pydantic import BaseModel, ConfigDict
+
+
+class EmailOutboxResponse(BaseModel):
+    id: int
+    typ: Optional[str] = None
+    to_addresses: List[str]
+    subject: str
+    status: str  # pending, sending, sent, dead
+    attempts: int
+    max_attempts: int
+    next_attempt_at: datetime
+    finished_at: Optional[datetime] = None
+    last_error: Optional[str] = None
+    created_at: datetime
+    model_config = ConfigDict(from_attributes=True)
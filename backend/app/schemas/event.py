@@ -1,6 +1,6 @@
 """Event Pydantic schemas"""
 from pydantic import BaseModel, Field, ConfigDict
-from typing import Optional
+from typing import List, Optional
 from datetime import date, time, datetime
 
 
@@ -71,3 +71,14 @@ class EventResponse(EventBase):
     updated_at: datetime
 
     model_config = ConfigDict(from_attributes=True)
+
+
+class EventDuplicateCandidate(BaseModel):
+    event: EventResponse
+    score: float
+
+
+class EventDuplicateGroup(BaseModel):
+    """Offener Termin mit wahrscheinlichen Dubletten (gleicher Tenant, ±1 Tag, ähnlicher Titel/Ort)."""
+    event: EventResponse
+    candidates: List[EventDuplicateCandidate]
@@ -59,6 +59,12 @@ class KVProtokollResponse(KVProtokollBase):
     id: int
     kreisverband_id: int
     datei_pfad: Optional[str] = None
+    pdf_pfad: Optional[str] = None
+    thumbnail_pfad: Optional[str] = None
+    vorschau_status: Optional[str] = None  # pending | done | failed (None ohne Datei)
+    download_url: Optional[str] = None  # signierter, kurzlebiger Link (nur in Listen)
+    pdf_url: Optional[str] = None
+    thumbnail_url: Optional[str] = None
     created_at: datetime
     model_config = ConfigDict(from_attributes=True)
 
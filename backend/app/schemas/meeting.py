@@ -1,6 +1,6 @@
 """Meeting Pydantic schemas"""
 from pydantic import BaseModel, ConfigDict
-from typing import Optional, List, Any, Union
+from typing import Optional, List, Any, Union, Literal
 from datetime import date, time, datetime
 
 # Pro TOP: ein String (ganzer TOP) oder Liste von Strings (ein Text pro Unterpunkt)
@@ -57,3 +57,9 @@ class MeetingResponse(MeetingBase):
     created_at: datetime
     updated_at: datetime
     model_config = ConfigDict(from_attributes=True)
+
+
+class MeetingBatchExport(BaseModel):
+    meeting_ids: Optional[List[int]] = None  # mindestens meeting_ids oder jahr angeben
+    jahr: Optional[int] = None
+    kinds: List[Literal["einladung", "protokoll"]] = ["protokoll"]
@@ -0,0 +1,15 @@
+"""Volltextsuche Pydantic schemas"""
+from pydantic import BaseModel
+from typing import Optional, Literal
+
+SearchKind = Literal["termin", "dokument", "aenderungsantrag", "sitzung", "kv_protokoll", "dokument_datei"]
+
+
+class SearchHit(BaseModel):
+    kind: SearchKind
+    id: int
+    parent_id: Optional[int] = None  # Änderungsantrag: Dokument
+    kreisverband_id: Optional[int] = None
+    title: str
+    snippet: str  # HTML-escaped, Treffer in <mark>…</mark>
+    score: float  # höher = relevanter
@@ -0,0 +1,76 @@
+"""Änderungsantrag direkt als PDF (fpdf2, reines Python) – gleiches Layout wie der DOCX-Export.
+
+Für das feste Layout (Titel, Absätze, dreispaltige Synopse) ist der Umweg über LibreOffice unnötig
+teuer. Schriften (Anybody) werden aus app/templates/font eingebettet (Subset). Ohne fpdf2 bleibt
+LibreOffice der Weg zum PDF.
+"""
+import os
+
+try:
+    from fpdf import FPDF
+    from fpdf.fonts import FontFace
+    HAS_FPDF = True
+except ImportError:
+    HAS_FPDF = False
+
+from app.config import settings
+
+FONT_DIR = os.path.join(os.path.dirname(os.path.dirname(__file__)), "templates", "font")
+FONT_FAMILY = "Anybody"
+FONT_FILES = {"": "Anybody-Regular.ttf", "B": "Anybody-ExtraBold.ttf"}
+BODY_SIZE = 11  # pt, wie im DOCX
+LINE_HEIGHT = 5.5  # mm
+
+
+def python_renderer_enabled() -> bool:
+    """fpdf2 verwenden? AENDERUNGSANTRAG_PDF_RENDERER=libreoffice erzwingt den Fallback."""
+    return HAS_FPDF and settings.AENDERUNGSANTRAG_PDF_RENDERER != "libreoffice"
+
+
+def _paragraph(pdf: "FPDF", text: str, bold: bool = False, align: str = "L", space_before: float = 0) -> None:
+    if space_before:
+        pdf.ln(space_before)
+    pdf.set_font(FONT_FAMILY, "B" if bold else "", BODY_SIZE)
+    pdf.multi_cell(0, LINE_HEIGHT, text, align=align, new_x="LMARGIN", new_y="NEXT")
+
+
+def aenderungsantrag_pdf_bytes(data: dict) -> bytes:
+    """PDF zu den Exportdaten aus documents._aenderungsantrag_export_data."""
+    pdf = FPDF(format="A4", unit="mm")
+    pdf.set_margins(25, 20, 25)
+    pdf.set_auto_page_break(auto=True, margin=20)
+    for style, filename in FONT_FILES.items():
+        pdf.add_font(FONT_FAMILY, style, os.path.join(FONT_DIR, filename))
+    pdf.set_title(f"Änderungsantrag – {data['dokument_titel']}")
+    pdf.add_page()
+
+    _paragraph(pdf, "Änderungsantrag", bold=True, align="C")
+    _paragraph(pdf, data["dokument_titel"])
+    if data["titel"]:
+        _paragraph(pdf, data["titel"])
+    _paragraph(pdf, f"Antragsteller: {data['antragsteller']}", space_before=LINE_HEIGHT)
+    if data["begruendung"]:
+        _paragraph(pdf, "Begründung:", bold=True, space_before=LINE_HEIGHT)
+        _paragraph(pdf, data["begruendung"])
+
+    stellen = data["stellen"]
+    _paragraph(pdf, "Änderungstext", bold=True, space_before=LINE_HEIGHT + 4)
+    for st in stellen:
+        if st["bezug"]:
+            _paragraph(pdf, st["bezug"], space_before=2)
+        _paragraph(pdf, st["aenderungstext"])
+
+    _paragraph(pdf, "Synopse", bold=True, space_before=LINE_HEIGHT + 6)
+    pdf.ln(2)
+    pdf.set_font(FONT_FAMILY, "", BODY_SIZE - 1)
+    with pdf.table(
+        col_widths=(2, 4, 4),
+        line_height=LINE_HEIGHT,
+        headings_style=FontFace(emphasis="BOLD"),
+        text_align="LEFT",
+        first_row_as_headings=True,
+    ) as table:
+        table.row(("Bezug", "Alte Fassung", "Neue Fassung"))
+        for st in stellen:
+            table.row((st["bezug"] or "—", st["alte_fassung"] or "—", st["neue_fassung"] or "—"))
+    return bytes(pdf.output())
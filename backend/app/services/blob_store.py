@@ -0,0 +1,199 @@
+"""Inhaltsadressierter Upload-Speicher: jede Datei liegt genau einmal unter blobs/ab/cd/<sha256><ext>.
+
+Document.datei_pfad, KVProtokoll.datei_pfad und EmailTemplate.attachment_storage_path zeigen auf
+Blob.path (relativ zu UPLOAD_DIR). Ist der Inhalt schon vorhanden, wird nur der Referenzzähler erhöht.
+Fällt er auf 0, bleibt die Datei noch BLOB_GRACE_MINUTES liegen (eine laufende Anfrage kann sie
+gerade wiederverwenden) und wird dann von purge_unreferenced gelöscht (Dokument-Worker).
+Abgelegt wird über das Speicher-Backend (services/storage: lokal oder S3); empfangen und gehasht wird
+immer lokal unter blobs/.incoming. Ältere Einträge mit Pfaden außerhalb von blobs/ liegen lokal und
+werden weiter unterstützt (scripts/migrate_blobs.py).
+"""
+import hashlib
+import logging
+import os
+import shutil
+import uuid
+from datetime import datetime, timedelta
+from typing import Optional
+
+from fastapi import UploadFile
+from fastapi.concurrency import run_in_threadpool
+from sqlalchemy import case, delete, update
+from sqlalchemy.exc import IntegrityError
+from sqlalchemy.orm import Session
+
+from app.config import settings
+from app.models.blob import Blob
+from app.services.locks import async_resource_lock, resource_lock
+from app.services.storage import get_storage
+from app.services.uploads import save_upload, sniff_mime_type
+
+logger = logging.getLogger(__name__)
+
+BLOB_DIR = "blobs"
+_INCOMING_DIR = os.path.join(BLOB_DIR, ".incoming")
+
+
+def blob_path(sha256: str, ext: str = "") -> str:
+    """Relativer Speicherpfad eines Inhalts (zweistufig geshardet)."""
+    return f"{BLOB_DIR}/{sha256[:2]}/{sha256[2:4]}/{sha256}{ext}"
+
+
+def is_blob_path(stored: Optional[str]) -> bool:
+    return bool(stored) and stored.startswith(BLOB_DIR + "/")
+
+
+def full_path(stored: str) -> str:
+    """Gespeicherten Pfad auflösen: Blob-Pfade sind relativ zu UPLOAD_DIR, Altbestand enthält UPLOAD_DIR schon."""
+    if os.path.isabs(stored):
+        return stored
+    upload_dir = os.path.normpath(settings.UPLOAD_DIR)
+    normalized = os.path.normpath(stored)
+    if normalized.startswith(upload_dir + os.sep):
+        return stored
+    return os.path.join(settings.UPLOAD_DIR, stored)
+
+
+def _lock_name(sha256: str) -> str:
+    return f"blob-{sha256}"
+
+
+def _add_reference(db: Session, sha256: str, path: str, size: int, mime_type: str) -> Blob:
+    """Referenzzähler erhöhen oder Blob anlegen (nebenläufig sicher, Commit macht der Aufrufer)."""
+    bump = update(Blob).where(Blob.sha256 == sha256).values(ref_count=Blob.ref_count + 1, released_at=None)
+    if not db.execute(bump).rowcount:
+        try:
+            with db.begin_nested():
+                db.add(Blob(sha256=sha256, path=path, size=size, mime_type=mime_type, ref_count=1))
+        except IntegrityError:
+            # Gleichzeitig vom selben Inhalt angelegt
+            db.execute(bump)
+    blob = db.get(Blob, sha256)
+    db.refresh(blob)
+    return blob
+
+
+def _place(incoming: str, sha256: str, ext: str, mime_type: str, db: Session) -> str:
+    """Neu empfangene Datei einsortieren; existiert der Inhalt schon, wird sie verworfen."""
+    existing = db.get(Blob, sha256)
+    rel_path = existing.path if existing else blob_path(sha256, ext)
+    storage = get_storage()
+    if storage.exists(rel_path):
+        os.unlink(incoming)
+        storage.touch(rel_path)  # frisch halten: der Aufräum-Lauf löscht nur Dateien älter als die Karenzzeit
+    else:
+        storage.put_file(rel_path, incoming, content_type=mime_type, move=True)
+    return rel_path
+
+
+async def store_upload(db: Session, upload: UploadFile, max_bytes: int, ext: str) -> Blob:
+    """Upload streamen (siehe uploads.save_upload) und als Blob referenzieren."""
+    incoming = os.path.join(settings.UPLOAD_DIR, _INCOMING_DIR, f"{uuid.uuid4().hex}{ext}")
+    stored = await save_upload(upload, incoming, max_bytes, ext)
+    try:
+        async with async_resource_lock(_lock_name(stored.sha256), db):
+            # S3: Hochladen blockiert – nicht im Event-Loop
+            rel_path = await run_in_threadpool(_place, incoming, stored.sha256, ext, stored.mime_type, db)
+            return _add_reference(db, stored.sha256, rel_path, stored.size, stored.mime_type)
+    finally:
+        if os.path.exists(incoming):
+            os.unlink(incoming)
+
+
+def store_file(db: Session, source: str, ext: str) -> Blob:
+    """Vorhandene Datei in den Blob-Speicher übernehmen (kopiert; z. B. für die Migration)."""
+    digest = hashlib.sha256()
+    with open(source, "rb") as f:
+        head = f.read(4096)
+        digest.update(head)
+        for chunk in iter(lambda: f.read(1024 * 1024), b""):
+            digest.update(chunk)
+    sha256 = digest.hexdigest()
+    incoming = os.path.join(settings.UPLOAD_DIR, _INCOMING_DIR, f"{uuid.uuid4().hex}{ext}")
+    os.makedirs(os.path.dirname(incoming), exist_ok=True)
+    shutil.copyfile(source, incoming)
+    try:
+        mime_type = sniff_mime_type(head)
+        with resource_lock(_lock_name(sha256), db):
+            rel_path = _place(incoming, sha256, ext, mime_type, db)
+            return _add_reference(db, sha256, rel_path, os.path.getsize(source), mime_type)
+    finally:
+        if os.path.exists(incoming):
+            os.unlink(incoming)
+
+
+def retain(db: Session, stored: Optional[str]) -> None:
+    """Weitere Referenz auf eine vorhandene Datei, z. B. Anhang einer noch nicht zugestellten E-Mail
+    (Commit macht der Aufrufer; Freigabe mit release). Altdateien außerhalb von blobs/ werden nicht gezählt.
+    """
+    if stored and is_blob_path(stored):
+        db.execute(
+            update(Blob).where(Blob.path == stored).values(ref_count=Blob.ref_count + 1, released_at=None)
+        )
+
+
+def release(db: Session, stored: Optional[str], legacy_dir: Optional[str] = None) -> None:
+    """Referenz auf stored aufgeben (Commit macht der Aufrufer).
+
+    Blob-Dateien löscht erst purge_unreferenced; Altdateien innerhalb von legacy_dir werden sofort entfernt.
+    """
+    if not stored:
+        return
+    if is_blob_path(stored):
+        db.execute(
+            update(Blob)
+            .where(Blob.path == stored, Blob.ref_count > 0)
+            .values(
+                ref_count=Blob.ref_count - 1,
+                released_at=case((Blob.ref_count == 1, datetime.utcnow()), else_=Blob.released_at),
+            )
+        )
+        return
+    path = full_path(stored)
+    if legacy_dir and os.path.realpath(path).startswith(os.path.realpath(legacy_dir) + os.sep) and os.path.isfile(path):
+        try:
+            os.remove(path)
+        except OSError as e:
+            logger.warning("Alte Upload-Datei %s konnte nicht gelöscht werden: %s", path, e)
+
+
+def purge_unreferenced(db: Session, now: Optional[datetime] = None, limit: int = 500) -> int:
+    """Blobs ohne Referenz nach Ablauf der Karenzzeit löschen. Gibt die Anzahl gelöschter Dateien zurück."""
+    now = now or datetime.utcnow()
+    cutoff = now - timedelta(minutes=settings.BLOB_GRACE_MINUTES)
+    candidates = (
+        db.query(Blob.sha256, Blob.path)
+        .filter(Blob.ref_count == 0, Blob.released_at < cutoff)
+        .limit(limit)
+        .all()
+    )
+    purged = 0
+    for sha256, path in candidates:
+        with resource_lock(_lock_name(sha256), db):
+            deleted = db.execute(delete(Blob).where(Blob.sha256 == sha256, Blob.ref_count == 0)).rowcount
+            db.commit()
+            if not deleted:
+                continue
+            get_storage().delete(path)
+            purged += 1
+    if purged:
+        logger.info("Blob-Speicher: %s nicht mehr referenzierte Dateien gelöscht", purged)
+    return purged
+
+
+def remove_stray_file(db: Session, rel_path: str, older_than: float) -> Optional[int]:
+    """Datei unter blobs/ ohne Blob-Eintrag löschen (z. B. nach zurückgerollter Transaktion).
+
+    Unter dem Lock des Inhalts erneut geprüft, damit ein gleichzeitiger Upload desselben Inhalts die
+    Datei nicht verliert. Gibt die freigegebenen Bytes zurück (None = nicht gelöscht).
+    """
+    sha256 = os.path.splitext(os.path.basename(rel_path))[0]
+    storage = get_storage()
+    with resource_lock(_lock_name(sha256), db):
+        if db.query(Blob.sha256).filter(Blob.path == rel_path).first():
+            return None
+        current = storage.stat(rel_path)
+        if current is None or current.mtime >= older_than:
+            return None
+        storage.delete(rel_path)
+        return current.size
@@ -0,0 +1,377 @@
+"""Warteschlange für Dokumenterzeugung: Jobs in document_jobs, abgearbeitet vom Dokument-Worker.
+
+Identische offene Jobs (gleiche Art + Parameter) werden zusammengelegt. Fehlgeschlagene Jobs werden
+mit exponentiellem Backoff erneut versucht; Ergebnisse bleiben bis expires_at abrufbar.
+"""
+import logging
+import os
+import shutil
+import threading
+from datetime import datetime, timedelta
+from typing import Callable, Dict, Optional, Tuple
+
+from sqlalchemy.orm import Session, joinedload
+
+from app.config import settings
+from app.database import SessionLocal
+from app.models.document import Document
+from app.models.document_aenderungsantrag import DocumentAenderungsantrag
+from app.models.document_job import DocumentJob
+from app.models.kreisverband import KVProtokoll
+from app.models.meeting import Meeting
+from app.services.blob_store import purge_unreferenced, release, store_file
+from app.services.file_delivery import title_filename
+from app.services.pdf import docx_to_pdf, ram_workspace
+from app.services.pdf_cache import cached_docx_to_pdf, sha256_data
+from app.services.storage import get_storage
+from app.services.storage_sweeper import sweep_orphans
+from app.services.text_extraction import index_file_texts
+from app.services.thumbnails import render_pdf_thumbnail
+
+logger = logging.getLogger(__name__)
+
+JOBS_DIR = "jobs"  # relativ zu UPLOAD_DIR; nur hier liegende Ergebnisse werden beim Ablauf gelöscht
+
+# Mindestrolle je Job-Art (entspricht den synchronen Endpunkten)
+JOB_ROLES = {
+    "einladung": "mitarbeiter",
+    "protokoll": "mitarbeiter",
+    "einladung_pdf": "mitarbeiter",
+    "protokoll_pdf": "mitarbeiter",
+    "aenderungsantrag_pdf": "vorstand",
+}
+
+# Pflicht-Parameter je Job-Art
+JOB_PARAMS = {
+    "einladung": "meeting_id",
+    "protokoll": "meeting_id",
+    "einladung_pdf": "meeting_id",
+    "protokoll_pdf": "meeting_id",
+    "aenderungsantrag_pdf": "aenderungsantrag_id",
+}
+
+
+class JobError(Exception):
+    """Dauerhafter Fehler (z. B. Sitzung gelöscht) – kein erneuter Versuch."""
+
+
+def dedup_key(kind: str, params: dict) -> str:
+    return sha256_data({"kind": kind, "params": params})
+
+
+def submit_job(db: Session, kind: str, params: dict, user_id: Optional[int] = None) -> DocumentJob:
+    """Job einreihen oder den bereits offenen identischen Job zurückgeben."""
+    key = dedup_key(kind, params)
+    existing = (
+        db.query(DocumentJob)
+        .filter(DocumentJob.dedup_key == key, DocumentJob.status.in_(("pending", "running")))
+        .order_by(DocumentJob.id)
+        .first()
+    )
+    if existing:
+        return existing
+    job = DocumentJob(
+        kind=kind,
+        params=params,
+        dedup_key=key,
+        status="pending",
+        attempts=0,
+        max_attempts=settings.DOCUMENT_JOB_MAX_ATTEMPTS,
+        next_attempt_at=datetime.utcnow(),
+        created_by_id=user_id,
+    )
+    db.add(job)
+    db.commit()
+    db.refresh(job)
+    return job
+
+
+def _keep_result(job_id: int, pdf_path: str, name: str) -> str:
+    """Kopie im Job-Verzeichnis ablegen – der PDF-Cache darf seine Datei zwischenzeitlich verdrängen."""
+    rel_path = os.path.join(JOBS_DIR, f"{job_id}_{name}")
+    get_storage().put_file(rel_path, pdf_path, content_type="application/pdf")
+    return rel_path
+
+
+def _meeting(db: Session, params: dict) -> Meeting:
+    meeting = db.query(Meeting).filter(Meeting.id == params["meeting_id"]).first()
+    if not meeting:
+        raise JobError("Sitzung nicht gefunden")
+    return meeting
+
+
+def _run_meeting_docx(db: Session, job: DocumentJob, kind: str) -> Tuple[str, str]:
+    from app.api.v1.meetings import document_filename, render_meeting_docx
+
+    meeting = _meeting(db, job.params)
+    rel_path = render_meeting_docx(meeting, kind, db)
+    return rel_path, document_filename(meeting, kind)
+
+
+def _run_meeting_pdf(db: Session, job: DocumentJob, kind: str) -> Tuple[str, str]:
+    meeting = _meeting(db, job.params)
+    docx_rel = meeting.protokoll_pfad if kind == "protokoll" else meeting.einladung_pfad
+    label = "Protokoll" if kind == "protokoll" else "Einladung"
+    if not docx_rel:
+        raise JobError(f"{label} nicht vorhanden. Bitte zuerst {label} (DOCX) erzeugen.")
+    try:
+        with get_storage().local_copy(docx_rel) as docx_full:
+            pdf_path = cached_docx_to_pdf(docx_full)
+    except FileNotFoundError:
+        raise JobError(f"{label}-Datei nicht gefunden.")
+    if not pdf_path:
+        raise RuntimeError("PDF-Konvertierung fehlgeschlagen (LibreOffice erforderlich).")
+    from app.api.v1.meetings import document_filename
+
+    name = document_filename(meeting, kind, ".pdf")
+    return _keep_result(job.id, pdf_path, name), name
+
+
+def _run_aenderungsantrag_pdf(db: Session, job: DocumentJob) -> Tuple[str, str]:
+    from app.api.v1.documents import _aenderungsantrag_export_data, render_aenderungsantrag_pdf
+
+    antrag_id = job.params["aenderungsantrag_id"]
+    antrag = (
+        db.query(DocumentAenderungsantrag)
+        .options(joinedload(DocumentAenderungsantrag.stellen))
+        .filter(DocumentAenderungsantrag.id == antrag_id)
+        .first()
+    )
+    if not antrag:
+        raise JobError("Änderungsantrag nicht gefunden")
+    doc = db.query(Document).filter(Document.id == antrag.document_id).first()
+    if not doc:
+        raise JobError("Dokument nicht gefunden")
+    pdf_path = render_aenderungsantrag_pdf(_aenderungsantrag_export_data(antrag, doc))
+    if not pdf_path:
+        raise RuntimeError("PDF-Konvertierung fehlgeschlagen (LibreOffice erforderlich).")
+    name = f"aenderungsantrag_{antrag_id}.pdf"
+    return _keep_result(job.id, pdf_path, name), name
+
+
+def _protokoll_vorschau(db: Session, datei_pfad: str) -> Tuple[str, Optional[str]]:
+    """PDF-Fassung und Vorschaubild als Blobs ablegen (Commit macht der Aufrufer). PDF-Uploads werden nicht
+    kopiert; ohne Renderer für Vorschaubilder bleibt das Vorschaubild leer."""
+    ext = os.path.splitext(datei_pfad)[1].lower()
+    with ram_workspace() as workdir, get_storage().local_copy(datei_pfad) as source:
+        if ext == ".pdf":
+            pdf_path = source
+        else:
+            # Kopie im Arbeitsverzeichnis: LibreOffice legt das PDF neben der Quelle ab
+            work_source = os.path.join(workdir, f"protokoll{ext}")
+            shutil.copyfile(source, work_source)
+            pdf_path = docx_to_pdf(work_source)
+            if not pdf_path:
+                raise RuntimeError("PDF-Konvertierung fehlgeschlagen (LibreOffice erforderlich).")
+        png_path = os.path.join(workdir, "vorschau.png")
+        thumbnail_pfad = None
+        try:
+            if render_pdf_thumbnail(pdf_path, png_path):
+                thumbnail_pfad = store_file(db, png_path, ".png").path
+        except Exception as e:
+            logger.warning("Vorschaubild für %s fehlgeschlagen: %s", datei_pfad, e)
+        pdf_pfad = datei_pfad if ext == ".pdf" else store_file(db, pdf_path, ".pdf").path
+    return pdf_pfad, thumbnail_pfad
+
+
+def _run_protokoll_vorschau(db: Session, job: DocumentJob) -> Tuple[str, str]:
+    """Hochgeladenes KV-Protokoll einmalig nach PDF wandeln und Vorschaubild der ersten Seite erzeugen."""
+    protokoll_id = job.params["protokoll_id"]
+    protokoll = db.query(KVProtokoll).filter(KVProtokoll.id == protokoll_id).first()
+    if not protokoll or not protokoll.datei_pfad:
+        raise JobError("Protokoll oder Datei nicht gefunden")
+    name = title_filename(protokoll.titel, ".pdf")
+    if protokoll.vorschau_status == "done" and protokoll.pdf_pfad:
+        return protokoll.pdf_pfad, name
+    try:
+        pdf_pfad, thumbnail_pfad = _protokoll_vorschau(db, protokoll.datei_pfad)
+    except FileNotFoundError:
+        _vorschau_failed(db, protokoll_id)
+        raise JobError("Protokolldatei nicht gefunden")
+    except Exception:
+        if job.attempts >= job.max_attempts:
+            _vorschau_failed(db, protokoll_id)
+        raise
+    # Während der Konvertierung gelöscht: neue Referenzen gleich wieder freigeben
+    if not db.query(KVProtokoll.id).filter(KVProtokoll.id == protokoll_id).first():
+        if pdf_pfad != protokoll.datei_pfad:
+            release(db, pdf_pfad)
+        release(db, thumbnail_pfad)
+        db.commit()
+        raise JobError("Protokoll wurde gelöscht")
+    protokoll.pdf_pfad = pdf_pfad
+    protokoll.thumbnail_pfad = thumbnail_pfad
+    protokoll.vorschau_status = "done"
+    return pdf_pfad, name
+
+
+def _vorschau_failed(db: Session, protokoll_id: int) -> None:
+    db.rollback()
+    db.query(KVProtokoll).filter(KVProtokoll.id == protokoll_id).update(
+        {"vorschau_status": "failed"}, synchronize_session=False
+    )
+    db.commit()
+
+
+HANDLERS: Dict[str, Callable[[Session, DocumentJob], Tuple[str, str]]] = {
+    "einladung": lambda db, job: _run_meeting_docx(db, job, "einladung"),
+    "protokoll": lambda db, job: _run_meeting_docx(db, job, "protokoll"),
+    "einladung_pdf": lambda db, job: _run_meeting_pdf(db, job, "einladung"),
+    "protokoll_pdf": lambda db, job: _run_meeting_pdf(db, job, "protokoll"),
+    "aenderungsantrag_pdf": _run_aenderungsantrag_pdf,
+    "protokoll_vorschau": _run_protokoll_vorschau,  # intern, nach dem Upload eingereiht
+}
+
+
+def claim_next(db: Session, now: datetime) -> Optional[DocumentJob]:
+    """Nächsten fälligen Job übernehmen. Das bedingte UPDATE verhindert, dass zwei Worker denselben Job starten."""
+    candidates = (
+        db.query(DocumentJob.id)
+        .filter(DocumentJob.status == "pending", DocumentJob.next_attempt_at <= now)
+        .order_by(DocumentJob.next_attempt_at, DocumentJob.id)
+        .limit(10)
+        .all()
+    )
+    for (job_id,) in candidates:
+        claimed = (
+            db.query(DocumentJob)
+            .filter(DocumentJob.id == job_id, DocumentJob.status == "pending")
+            .update(
+                {"status": "running", "attempts": DocumentJob.attempts + 1, "started_at": now},
+                synchronize_session=False,
+            )
+        )
+        db.commit()
+        if claimed:
+            return db.query(DocumentJob).filter(DocumentJob.id == job_id).first()
+    return None
+
+
+def run_job(db: Session, job: DocumentJob) -> None:
+    """Job ausführen und Ergebnis bzw. nächsten Versuch festhalten."""
+    now = datetime.utcnow()
+    try:
+        handler = HANDLERS.get(job.kind)
+        if handler is None:
+            raise JobError(f"Unbekannte Job-Art: {job.kind}")
+        rel_path, name = handler(db, job)
+    except JobError as e:
+        db.rollback()
+        job.status = "failed"
+        job.error = str(e)
+        job.finished_at = now
+    except Exception as e:
+        db.rollback()
+        logger.warning("Dokument-Job %s (%s) fehlgeschlagen, Versuch %s: %s", job.id, job.kind, job.attempts, e)
+        job.error = str(e)
+        if job.attempts >= job.max_attempts:
+            job.status = "failed"
+            job.finished_at = now
+        else:
+            job.status = "pending"
+            job.next_attempt_at = now + timedelta(
+                seconds=settings.DOCUMENT_JOB_RETRY_SECONDS * 2 ** (job.attempts - 1)
+            )
+    else:
+        job.status = "done"
+        job.result_path = rel_path
+        job.result_name = name
+        job.error = None
+        job.finished_at = now
+        job.expires_at = now + timedelta(hours=settings.DOCUMENT_JOB_RESULT_TTL_HOURS)
+    db.commit()
+
+
+def requeue_stale(db: Session, now: datetime) -> int:
+    """Jobs, deren Worker abgestürzt ist, wieder freigeben (der Versuch bleibt gezählt)."""
+    cutoff = now - timedelta(seconds=settings.DOCUMENT_JOB_STALE_SECONDS)
+    count = (
+        db.query(DocumentJob)
+        .filter(DocumentJob.status == "running", DocumentJob.started_at < cutoff)
+        .update({"status": "pending", "next_attempt_at": now}, synchronize_session=False)
+    )
+    db.commit()
+    return count
+
+
+def purge_expired(db: Session, now: datetime) -> int:
+    """Abgelaufene Ergebnisse und alte fehlgeschlagene Jobs entfernen."""
+    failed_cutoff = now - timedelta(hours=settings.DOCUMENT_JOB_RESULT_TTL_HOURS)
+    jobs = (
+        db.query(DocumentJob)
+        .filter(
+            ((DocumentJob.status == "done") & (DocumentJob.expires_at < now))
+            | ((DocumentJob.status == "failed") & (DocumentJob.finished_at < failed_cutoff))
+        )
+        .all()
+    )
+    for job in jobs:
+        if job.result_path and job.result_path.startswith(JOBS_DIR + os.sep):
+            try:
+                get_storage().delete(job.result_path)
+            except Exception as e:
+                logger.warning("Job-Ergebnis %s konnte nicht gelöscht werden: %s", job.result_path, e)
+        db.delete(job)
+    db.commit()
+    return len(jobs)
+
+
+class DocumentWorker:
+    """Arbeitet fällige Jobs nacheinander ab; mehrere Worker-Prozesse können parallel laufen."""
+
+    def __init__(self, session_factory: Callable[[], Session] = SessionLocal, poll_seconds: Optional[float] = None):
+        self._session_factory = session_factory
+        self.poll_seconds = poll_seconds or settings.DOCUMENT_JOB_POLL_SECONDS
+        self._stop = threading.Event()
+        self._last_housekeeping: Optional[datetime] = None
+
+    def run_once(self) -> int:
+        """Alle derzeit fälligen Jobs abarbeiten. Gibt die Anzahl bearbeiteter Jobs zurück."""
+        processed = 0
+        db = self._session_factory()
+        try:
+            now = datetime.utcnow()
+            if self._last_housekeeping is None or now - self._last_housekeeping > timedelta(minutes=1):
+                try:
+                    self._housekeeping(db, now)
+                finally:
+                    self._last_housekeeping = now
+            while not self._stop.is_set():
+                job = claim_next(db, datetime.utcnow())
+                if job is None:
+                    break
+                run_job(db, job)
+                processed += 1
+        finally:
+            db.close()
+        return processed
+
+    def _housekeeping(self, db: Session, now: datetime) -> None:
+        """Aufräumschritte einzeln absichern: ein Fehler (Speicher, S3, Textextraktion) darf weder die
+        übrigen Schritte noch die Job-Schleife blockieren."""
+        steps = (
+            ("requeue_stale", lambda: requeue_stale(db, now)),
+            ("purge_expired", lambda: purge_expired(db, now)),
+            ("purge_unreferenced", lambda: purge_unreferenced(db, now)),
+            ("sweep_orphans", lambda: sweep_orphans(db, now)),
+            ("index_file_texts", lambda: index_file_texts(db)),
+        )
+        for name, step in steps:
+            try:
+                step()
+            except Exception as e:
+                logger.exception("Dokument-Worker: Aufräumschritt %s fehlgeschlagen: %s", name, e)
+                db.rollback()
+
+    def run_forever(self) -> None:
+        logger.info("Dokument-Worker gestartet (Abfrage alle %s s)", self.poll_seconds)
+        while not self._stop.is_set():
+            try:
+                self.run_once()
+            except Exception as e:
+                logger.exception("Dokument-Worker: Durchlauf fehlgeschlagen: %s", e)
+            self._stop.wait(self.poll_seconds)
+        logger.info("Dokument-Worker beendet")
+
+    def stop(self) -> None:
+        self._stop.set()
@@ -1,44 +1,71 @@
-"""Email service for sending mails via SMTP"""
+"""Email service: Versand über SMTP (Sitzungen aus services/smtp_pool) oder Microsoft Graph (MAIL_TRANSPORT)"""
 import smtplib
-import re
 import logging
 from email.mime.text import MIMEText
 from email.mime.multipart import MIMEMultipart
 from email.mime.base import MIMEBase
 from email import encoders
-from pathlib import Path
 from typing import List, Optional, Tuple
 
 from app.config import settings
+from app.services.mail_templates import compile_text
+from app.services.smtp_pool import get_smtp_pool
+from app.services.storage import get_storage, storage_key
 
 logger = logging.getLogger(__name__)
 
 
 def get_attachment_from_path(
-    upload_dir: str,
     relative_path: Optional[str],
     original_filename: Optional[str],
 ) -> Optional[Tuple[str, bytes]]:
-    """Liest eine Anhang-Datei; gibt (filename, bytes) oder None zurück."""
-    if not relative_path or not original_filename:
-        return None
-    path = Path(upload_dir) / relative_path
-    if not path.is_file():
+    """Liest eine Anhang-Datei aus dem Speicher-Backend; gibt (filename, bytes) oder None zurück."""
+    key = storage_key(relative_path)
+    if not key or not original_filename:
         return None
     try:
-        return (original_filename, path.read_bytes())
+        return (original_filename, get_storage().read_bytes(key))
     except Exception:
         return None
 
 
 def render_template(template: str, data: dict) -> str:
-    """Replace {placeholder} patterns in template string with data values."""
-    def replacer(match):
-        key = match.group(1)
-        return str(data.get(key, ""))
+    """Replace {placeholder} patterns in template string with data values (kompiliert über mail_templates)."""
+    return compile_text(template).render(data)
+
+
+def _build_message(
+    to: List[str],
+    subject: str,
+    body: str,
+    html: bool = True,
+    attachments: Optional[List[Tuple[str, bytes]]] = None,
+) -> MIMEMultipart:
+    """MIME-Nachricht mit optionalen Anhängen (filename, raw_bytes) zusammenbauen."""
+    msg = MIMEMultipart("mixed")
+    msg["Subject"] = subject
+    msg["From"] = f"{settings.SMTP_FROM_NAME} <{settings.SMTP_FROM_EMAIL}>"
+    msg["To"] = ", ".join(to)
+
+    body_part = MIMEMultipart("alternative")
+    if html:
+        body_part.attach(MIMEText(body, "html", "utf-8"))
+    else:
+        body_part.attach(MIMEText(body, "plain", "utf-8"))
+    msg.attach(body_part)
 
-    result = re.sub(r'\{(\w+)\}', replacer, template)
-    return result.replace("\n", "<br>")
+    if attachments:
+        for filename, content in attachments:
+            part = MIMEBase("application", "octet-stream")
+            part.set_payload(content)
+            encoders.encode_base64(part)
+            part.add_header(
+                "Content-Disposition",
+                "attachment",
+                filename=("utf-8", "", filename),
+            )
+            msg.attach(part)
+    return msg
 
 
 def send_email(
@@ -48,43 +75,81 @@ def send_email(
     html: bool = True,
     attachments: Optional[List[Tuple[str, bytes]]] = None,
 ) -> bool:
-    """Send an email via SMTP. attachments: list of (filename, raw_bytes)."""
+    """Send an email via the configured transport. attachments: list of (filename, raw_bytes)."""
     if not settings.email_configured:
         logger.warning("Email not configured, skipping send")
         return False
 
-    try:
-        msg = MIMEMultipart("mixed")
-        msg["Subject"] = subject
-        msg["From"] = f"{settings.SMTP_FROM_NAME} <{settings.SMTP_FROM_EMAIL}>"
-        msg["To"] = ", ".join(to)
-
-        body_part = MIMEMultipart("alternative")
-        if html:
-            body_part.attach(MIMEText(body, "html", "utf-8"))
-        else:
-            body_part.attach(MIMEText(body, "plain", "utf-8"))
-        msg.attach(body_part)
-
-        if attachments:
-            for filename, content in attachments:
-                part = MIMEBase("application", "octet-stream")
-                part.set_payload(content)
-                encoders.encode_base64(part)
-                part.add_header(
-                    "Content-Disposition",
-                    "attachment",
-                    filename=("utf-8", "", filename),
-                )
-                msg.attach(part)
-
-        with smtplib.SMTP(settings.SMTP_HOST, settings.SMTP_PORT) as server:
-            server.starttls()
-            server.login(settings.SMTP_USER, settings.SMTP_PASSWORD)
-            server.sendmail(settings.SMTP_FROM_EMAIL, to, msg.as_string())
-
-        logger.info(f"Email sent to {to}: {subject}")
-        return True
-    except Exception as e:
-        logger.error(f"Failed to send email: {e}")
+    (error,) = deliver_emails([{"to": to, "subject": subject, "body": body, "html": html, "attachments": attachments}])
+    if error is not None:
+        logger.error(f"Failed to send email: {error}")
         return False
+    logger.info(f"Email sent to {to}: {subject}")
+    return True
+
+
+class DeliveryError(Exception):
+    """Zustellung einer Nachricht fehlgeschlagen; permanent = neuer Versuch zwecklos (z. B. 550 Empfänger unbekannt)."""
+
+    def __init__(self, message: str, permanent: bool = False):
+        super().__init__(message)
+        self.permanent = permanent
+
+
+def _delivery_error(e: Exception) -> DeliveryError:
+    """SMTP-Fehler einer einzelnen Nachricht einordnen: 5xx gilt als endgültig, alles andere als vorübergehend."""
+    if isinstance(e, smtplib.SMTPRecipientsRefused):
+        codes = [code for code, _ in e.recipients.values()]
+    else:
+        codes = [getattr(e, "smtp_code", None)]
+    permanent = bool(codes) and all(isinstance(c, int) and 500 <= c < 600 for c in codes)
+    return DeliveryError(f"{type(e).__name__}: {e}"[:1000], permanent=permanent)
+
+
+def _abort_batch(results: List[Optional[DeliveryError]], start: int, e: Exception) -> None:
+    """Server nicht erreichbar/Anmeldung fehlgeschlagen: alle übrigen Nachrichten später erneut versuchen."""
+    logger.error(f"Failed to send email batch: {e}")
+    error = DeliveryError(f"{type(e).__name__}: {e}"[:1000])
+    results[start:] = [error] * (len(results) - start)
+
+
+def deliver_emails(messages: List[dict]) -> List[Optional[DeliveryError]]:
+    """Mehrere E-Mails über den konfigurierten Transport senden (SMTP-Pool bzw. Graph-$batch).
+    messages: dicts mit den Argumenten von send_email (to, subject, body, html, attachments).
+    Gibt pro Nachricht None (versendet) oder den Fehler zurück; ist der Server auch nach erneutem
+    Verbinden nicht erreichbar, gilt der Fehler für alle noch nicht versendeten Nachrichten (vorübergehend)."""
+    if not messages:
+        return []
+    if not settings.email_configured:
+        logger.warning("Email not configured, skipping send")
+        return [DeliveryError(f"E-Mail ist nicht konfiguriert ({settings.MAIL_TRANSPORT})")] * len(messages)
+    if settings.MAIL_TRANSPORT == "graph":
+        from app.services.graph_mail import get_graph_mailer  # importiert DeliveryError von hier
+        return get_graph_mailer().send(messages)
+
+    pool = get_smtp_pool()
+    results: List[Optional[DeliveryError]] = [None] * len(messages)
+    for i, m in enumerate(messages):
+        try:
+            msg = _build_message(m["to"], m["subject"], m["body"], m.get("html", True), m.get("attachments"))
+            pool.send(settings.SMTP_FROM_EMAIL, m["to"], msg.as_string())
+        except (smtplib.SMTPConnectError, smtplib.SMTPAuthenticationError, smtplib.SMTPServerDisconnected) as e:
+            _abort_batch(results, i, e)
+            break
+        except (smtplib.SMTPResponseException, smtplib.SMTPRecipientsRefused) as e:
+            logger.error(f"Failed to send email to {m.get('to')}: {e}")
+            results[i] = _delivery_error(e)
+        except OSError as e:  # Netzwerkfehler, Zeitüberschreitung, STARTTLS nicht unterstützt
+            _abort_batch(results, i, e)
+            break
+        except Exception as e:
+            logger.error(f"Failed to send email to {m.get('to')}: {e}")
+            results[i] = DeliveryError(f"{type(e).__name__}: {e}"[:1000])
+    logger.info("Email batch: %s/%s sent", sum(r is None for r in results), len(messages))
+    return results
+
+
+def send_emails(messages: List[dict]) -> List[bool]:
+    """Mehrere E-Mails über den SMTP-Pool senden (siehe deliver_emails).
+    Gibt pro Nachricht zurück, ob sie versendet wurde."""
+    return [error is None for error in deliver_emails(messages)]
@@ -0,0 +1,231 @@
+"""Mail-Warteschlange (Tabelle email_outbox): Einreihen im Request, Zustellung im E-Mail-Worker.
+
+enqueue_email schreibt nur eine Zeile – in derselben Transaktion wie die fachliche Änderung, also
+genau dann, wenn diese committet wird. Der Worker (scripts.email_worker) holt fällige Nachrichten
+stapelweise, sendet sie über den SMTP-Pool (services/smtp_pool) bzw. Microsoft Graph
+(services/graph_mail, MAIL_TRANSPORT=graph) und plant Fehlschläge mit exponentiellem Backoff neu
+ein. Endgültige Fehler (5xx bzw. Graph-4xx) oder erschöpfte Versuche landen als "dead" und bleiben
+zur Ansicht bzw. zum erneuten Senden stehen. Zustellung mindestens einmal: stürzt der Worker während
+des Sendens ab, wird der Stapel nach EMAIL_OUTBOX_STALE_SECONDS erneut versucht.
+"""
+import logging
+import threading
+from datetime import datetime, timedelta
+from typing import Callable, List, Optional, Sequence
+
+from sqlalchemy.orm import Session
+
+from app.config import settings
+from app.database import SessionLocal
+from app.models.email_outbox import EmailOutbox
+from app.services.blob_store import release, retain
+from app.services.email import DeliveryError, deliver_emails, get_attachment_from_path
+from app.services.graph_mail import close_graph_mailer
+from app.services.smtp_pool import close_smtp_pool
+
+logger = logging.getLogger(__name__)
+
+
+def enqueue_email(
+    db: Session,
+    to: Sequence[str],
+    subject: str,
+    body: str,
+    *,
+    html: bool = True,
+    attachment_path: Optional[str] = None,
+    attachment_filename: Optional[str] = None,
+    entity_type: Optional[str] = None,
+    entity_id: Optional[int] = None,
+    typ: Optional[str] = None,
+) -> EmailOutbox:
+    """Nachricht einreihen (Commit macht der Aufrufer). Der Anhang bleibt bis zur Zustellung referenziert."""
+    if not (attachment_path and attachment_filename):
+        attachment_path = attachment_filename = None
+    retain(db, attachment_path)
+    message = EmailOutbox(
+        entity_type=entity_type,
+        entity_id=entity_id,
+        typ=typ,
+        to_addresses=list(to),
+        subject=subject,
+        body=body,
+        html=html,
+        attachment_path=attachment_path,
+        attachment_filename=attachment_filename,
+        status="pending",
+        attempts=0,
+        max_attempts=settings.EMAIL_OUTBOX_MAX_ATTEMPTS,
+        next_attempt_at=datetime.utcnow(),
+    )
+    db.add(message)
+    return message
+
+
+def messages_for(db: Session, entity_type: str, entity_id: int) -> List[EmailOutbox]:
+    return (
+        db.query(EmailOutbox)
+        .filter(EmailOutbox.entity_type == entity_type, EmailOutbox.entity_id == entity_id)
+        .order_by(EmailOutbox.id)
+        .all()
+    )
+
+
+def retry_message(db: Session, message: EmailOutbox) -> None:
+    """Endgültig fehlgeschlagene Nachricht erneut einreihen (Commit macht der Aufrufer)."""
+    retain(db, message.attachment_path)  # bei "dead" wurde der Anhang freigegeben
+    message.status = "pending"
+    message.attempts = 0
+    message.next_attempt_at = datetime.utcnow()
+    message.finished_at = None
+
+
+def claim_batch(db: Session, now: datetime, limit: Optional[int] = None) -> List[EmailOutbox]:
+    """Fällige Nachrichten übernehmen; das bedingte UPDATE verhindert doppelte Übernahme durch parallele Worker."""
+    candidates = (
+        db.query(EmailOutbox.id)
+        .filter(EmailOutbox.status == "pending", EmailOutbox.next_attempt_at <= now)
+        .order_by(EmailOutbox.next_attempt_at, EmailOutbox.id)
+        .limit(limit or settings.EMAIL_OUTBOX_BATCH_SIZE)
+        .all()
+    )
+    claimed = []
+    for (message_id,) in candidates:
+        if (
+            db.query(EmailOutbox)
+            .filter(EmailOutbox.id == message_id, EmailOutbox.status == "pending")
+            .update(
+                {"status": "sending", "attempts": EmailOutbox.attempts + 1, "claimed_at": now},
+                synchronize_session=False,
+            )
+        ):
+            claimed.append(message_id)
+    db.commit()
+    if not claimed:
+        return []
+    return db.query(EmailOutbox).filter(EmailOutbox.id.in_(claimed)).order_by(EmailOutbox.id).all()
+
+
+def _record(db: Session, message: EmailOutbox, error: Optional[DeliveryError], now: datetime) -> None:
+    if error is None:
+        message.status = "sent"
+        message.last_error = None
+        message.finished_at = now
+        release(db, message.attachment_path)
+    elif error.permanent or message.attempts >= message.max_attempts:
+        logger.warning("E-Mail %s endgültig fehlgeschlagen (Versuch %s): %s", message.id, message.attempts, error)
+        message.status = "dead"
+        message.last_error = str(error)
+        message.finished_at = now
+        release(db, message.attachment_path)
+    else:
+        message.status = "pending"
+        message.last_error = str(error)
+        message.next_attempt_at = now + timedelta(
+            seconds=settings.EMAIL_OUTBOX_RETRY_SECONDS * 2 ** (message.attempts - 1)
+        )
+
+
+def deliver_batch(db: Session, messages: List[EmailOutbox]) -> int:
+    """Übernommene Nachrichten senden und Ergebnis festhalten. Gibt die Anzahl zugestellter zurück."""
+    payload, sendable = [], []
+    errors: dict = {}
+    loaded: dict = {}  # gleicher Anhang (z. B. aus derselben Vorlage) wird je Stapel nur einmal gelesen
+    for message in messages:
+        attachments = None
+        if message.attachment_path:
+            key = (message.attachment_path, message.attachment_filename)
+            if key not in loaded:
+                loaded[key] = get_attachment_from_path(*key)
+            attachment = loaded[key]
+            if attachment is None:
+                errors[message.id] = DeliveryError(f"Anhang {message.attachment_path} nicht lesbar")
+                continue
+            attachments = [attachment]
+        payload.append({
+            "to": list(message.to_addresses),
+            "subject": message.subject,
+            "body": message.body,
+            "html": message.html,
+            "attachments": attachments,
+        })
+        sendable.append(message)
+    errors.update((m.id, e) for m, e in zip(sendable, deliver_emails(payload)))
+
+    now = datetime.utcnow()
+    for message in messages:
+        _record(db, message, errors.get(message.id), now)
+    db.commit()
+    return sum(1 for m in messages if errors.get(m.id) is None)
+
+
+def requeue_stale(db: Session, now: datetime) -> int:
+    """Nachrichten, deren Worker beim Senden abgestürzt ist, wieder freigeben (der Versuch bleibt gezählt)."""
+    cutoff = now - timedelta(seconds=settings.EMAIL_OUTBOX_STALE_SECONDS)
+    count = (
+        db.query(EmailOutbox)
+        .filter(EmailOutbox.status == "sending", EmailOutbox.claimed_at < cutoff)
+        .update({"status": "pending", "next_attempt_at": now}, synchronize_session=False)
+    )
+    db.commit()
+    return count
+
+
+def purge_finished(db: Session, now: datetime) -> int:
+    """Zugestellte und endgültig fehlgeschlagene Nachrichten nach EMAIL_OUTBOX_RETENTION_DAYS löschen."""
+    cutoff = now - timedelta(days=settings.EMAIL_OUTBOX_RETENTION_DAYS)
+    count = (
+        db.query(EmailOutbox)
+        .filter(EmailOutbox.status.in_(("sent", "dead")), EmailOutbox.finished_at < cutoff)
+        .delete(synchronize_session=False)
+    )
+    db.commit()
+    return count
+
+
+class EmailOutboxWorker:
+    """Stellt fällige Nachrichten zu; mehrere Worker-Prozesse können parallel laufen."""
+
+    def __init__(self, session_factory: Callable[[], Session] = SessionLocal, poll_seconds: Optional[float] = None):
+        self._session_factory = session_factory
+        self.poll_seconds = poll_seconds or settings.EMAIL_OUTBOX_POLL_SECONDS
+        self._stop = threading.Event()
+        self._last_housekeeping: Optional[datetime] = None
+
+    def run_once(self) -> int:
+        """Alle derzeit fälligen Nachrichten zustellen. Gibt die Anzahl zugestellter Nachrichten zurück."""
+        if not settings.email_configured:
+            return 0  # Nachrichten bleiben "pending", bis der Mailversand eingerichtet ist
+        delivered = 0
+        db = self._session_factory()
+        try:
+            now = datetime.utcnow()
+            if self._last_housekeeping is None or now - self._last_housekeeping > timedelta(minutes=1):
+                requeue_stale(db, now)
+                purge_finished(db, now)
+                self._last_housekeeping = now
+            while not self._stop.is_set():
+                batch = claim_batch(db, datetime.utcnow())
+                if not batch:
+                    break
+                delivered += deliver_batch(db, batch)
+        finally:
+            db.close()
+        return delivered
+
+    def run_forever(self) -> None:
+        logger.info("E-Mail-Worker gestartet (Abfrage alle %s s)", self.poll_seconds)
+        if not settings.email_configured:
+            logger.warning("E-Mail-Worker: Mailversand (%s) nicht konfiguriert, Nachrichten bleiben in der Warteschlange", settings.MAIL_TRANSPORT)
+        while not self._stop.is_set():
+            try:
+                self.run_once()
+            except Exception as e:
+                logger.exception("E-Mail-Worker: Durchlauf fehlgeschlagen: %s", e)
+            self._stop.wait(self.poll_seconds)
+        close_smtp_pool()
+        close_graph_mailer()
+        logger.info("E-Mail-Worker beendet")
+
+    def stop(self) -> None:
+        self._stop.set()
@@ -0,0 +1,51 @@
+"""Fingerprint und Ähnlichkeit für Termine (Dubletten-Erkennung bei Einreichungen)"""
+import hashlib
+import re
+import unicodedata
+from datetime import date, time
+from difflib import SequenceMatcher
+from typing import Optional
+
+_NON_ALNUM = re.compile(r"[^0-9a-z]+")
+
+
+def normalize_text(value: Optional[str]) -> str:
+    """Kleinschreibung, Umlaute/Akzente vereinheitlicht, Satzzeichen und Mehrfach-Leerzeichen entfernt."""
+    if not value:
+        return ""
+    text = unicodedata.normalize("NFKD", value.casefold())
+    text = "".join(ch for ch in text if not unicodedata.combining(ch))
+    return _NON_ALNUM.sub(" ", text).strip()
+
+
+def event_fingerprint(
+    tenant_id: int,
+    start_date: date,
+    start_time: Optional[time],
+    title: Optional[str],
+    location: Optional[str],
+) -> str:
+    """SHA-256 über Tenant, Datum, Uhrzeit sowie normalisierten Titel und Ort."""
+    parts = [
+        str(tenant_id),
+        start_date.isoformat(),
+        start_time.strftime("%H:%M") if start_time else "",
+        normalize_text(title),
+        normalize_text(location),
+    ]
+    return hashlib.sha256("|".join(parts).encode("utf-8")).hexdigest()
+
+
+def fingerprint_for(event) -> str:
+    """Fingerprint für ein Event-Objekt (ORM oder Schema mit denselben Feldern)."""
+    return event_fingerprint(event.tenant_id, event.start_date, event.start_time, event.title, event.location)
+
+
+def similarity(a, b) -> float:
+    """Ähnlichkeit zweier Termine (0..1) aus normalisiertem Titel und Ort."""
+    title_score = SequenceMatcher(None, normalize_text(a.title), normalize_text(b.title)).ratio()
+    loc_a, loc_b = normalize_text(a.location), normalize_text(b.location)
+    if not loc_a and not loc_b:
+        return title_score
+    loc_score = SequenceMatcher(None, loc_a, loc_b).ratio()
+    return 0.8 * title_score + 0.2 * loc_score
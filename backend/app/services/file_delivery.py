@@ -0,0 +1,112 @@
+"""Auslieferung gespeicherter Dateien nach erfolgter Rechteprüfung.
+
+Produktion: Das Backend antwortet nur mit X-Accel-Redirect auf die interne nginx-Location
+(FILES_X_ACCEL_REDIRECT); nginx überträgt die Datei selbst (sendfile, Range, ETag aus mtime/Größe).
+Ohne nginx (Entwicklung, Tests) bzw. mit S3-Backend liefert das Backend aus (S3: durchgereicht) und
+beherrscht dabei ETag/If-None-Match und einfache Range-Anfragen. Inhaltsadressierte Dateien (blobs/,
+versionierte Sitzungsdokumente) ändern sich nie und dürfen im Browser dauerhaft gecacht werden.
+"""
+import mimetypes
+import os
+import re
+from typing import Optional, Tuple
+from urllib.parse import quote
+
+from fastapi import HTTPException, Request
+from fastapi.responses import FileResponse, Response, StreamingResponse
+
+from app.config import settings
+from app.services.blob_store import is_blob_path
+from app.services.storage import StoredObject, get_storage, storage_key
+
+IMMUTABLE_CACHE = "private, max-age=31536000, immutable"
+REVALIDATE_CACHE = "private, no-cache"
+
+# blobs/ab/cd/<sha256>.ext und sitzungen/<kind>_<id>_<datum>_<sha12>.docx
+_CONTENT_HASHED = re.compile(r"_[0-9a-f]{12}\.[A-Za-z0-9]+$")
+_RANGE = re.compile(r"^bytes=(\d*)-(\d*)$")
+
+
+def is_immutable(rel_path: str) -> bool:
+    return is_blob_path(rel_path) or bool(_CONTENT_HASHED.search(rel_path))
+
+
+def content_disposition(filename: str, inline: bool = False) -> str:
+    disposition = "inline" if inline else "attachment"
+    quoted = quote(filename)
+    if quoted != filename:
+        return f"{disposition}; filename*=utf-8''{quoted}"
+    return f'{disposition}; filename="{filename}"'
+
+
+def _etag(rel_path: str, stat: StoredObject) -> str:
+    if is_blob_path(rel_path):
+        return '"' + os.path.splitext(os.path.basename(rel_path))[0] + '"'  # SHA-256 des Inhalts
+    return f'"{stat.size:x}-{int(stat.mtime * 1_000_000):x}"'
+
+
+def _parse_range(header: str, size: int) -> Optional[Tuple[int, int]]:
+    """Einzelnen Bereich "bytes=a-b" / "bytes=a-" / "bytes=-n" auswerten; None = nicht erfüllbar."""
+    m = _RANGE.match(header.strip())
+    if not m or (not m.group(1) and not m.group(2)):
+        return None
+    if m.group(1):
+        start = int(m.group(1))
+        end = min(int(m.group(2)), size - 1) if m.group(2) else size - 1
+    else:
+        start, end = max(size - int(m.group(2)), 0), size - 1
+    if start > end or start >= size:
+        return None
+    return start, end
+
+
+def title_filename(titel: str, ext: str) -> str:
+    """Download-Dateiname aus einem Titel (z. B. KV-Protokoll "MV 2026" -> "MV 2026.pdf")."""
+    safe = "".join(c if c.isalnum() or c in " ._-" else "_" for c in titel).strip() or "datei"
+    return f"{safe[:120]}{ext}"
+
+
+def file_response(request: Request, rel_path: str, filename: str, inline: bool = False) -> Response:
+    """Datei rel_path (relativ zu UPLOAD_DIR bzw. Altbestand mit UPLOAD_DIR) als Download ausliefern."""
+    storage = get_storage()
+    relative = storage_key(rel_path)
+    stat = storage.stat(relative) if relative else None
+    if stat is None:
+        raise HTTPException(status_code=404, detail="Datei nicht gefunden")
+    local = storage.local_path(relative)
+    media_type = mimetypes.guess_type(filename)[0] or mimetypes.guess_type(relative)[0] or "application/octet-stream"
+    headers = {
+        "Content-Disposition": content_disposition(filename, inline),
+        "Cache-Control": IMMUTABLE_CACHE if is_immutable(relative) else REVALIDATE_CACHE,
+    }
+
+    if local and settings.FILES_X_ACCEL_REDIRECT:
+        headers["X-Accel-Redirect"] = settings.FILES_X_ACCEL_REDIRECT.rstrip("/") + "/" + quote(relative)
+        return Response(status_code=200, media_type=media_type, headers=headers)
+
+    etag = _etag(relative, stat)
+    headers["ETag"] = etag
+    headers["Accept-Ranges"] = "bytes"
+    if_none_match = request.headers.get("if-none-match")
+    if if_none_match and etag in [t.strip() for t in if_none_match.split(",")]:
+        return Response(status_code=304, headers=headers)
+
+    range_header = request.headers.get("range")
+    if_range = request.headers.get("if-range")
+    if range_header and (not if_range or if_range == etag):
+        byte_range = _parse_range(range_header, stat.size)
+        if byte_range is None:
+            headers["Content-Range"] = f"bytes */{stat.size}"
+            return Response(status_code=416, headers=headers)
+        start, end = byte_range
+        headers["Content-Range"] = f"bytes {start}-{end}/{stat.size}"
+        headers["Content-Length"] = str(end - start + 1)
+        return StreamingResponse(
+            storage.iter_bytes(relative, start, end), status_code=206, media_type=media_type, headers=headers
+        )
+
+    if local:
+        return FileResponse(local, media_type=media_type, headers=headers)
+    headers["Content-Length"] = str(stat.size)
+    return StreamingResponse(storage.iter_bytes(relative), media_type=media_type, headers=headers)
+
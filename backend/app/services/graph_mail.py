@@ -0,0 +1,262 @@
+"""Mailversand über Microsoft Graph (sendMail) statt SMTP – MAIL_TRANSPORT=graph.
+
+App-only-Anmeldung (Client Credentials, Berechtigung Mail.Send) mit MS_TENANT_ID, MS_CLIENT_ID und
+MS_CLIENT_SECRET; gesendet wird aus dem Postfach MS_SENDER_MAIL. Das Token wird bis kurz vor Ablauf
+wiederverwendet. Nachrichten gehen zu höchstens 20 pro JSON-$batch-Aufruf raus; gleiche Anhänge
+werden pro Aufruf nur einmal kodiert (Graph kennt keine gemeinsam genutzten Anhänge, jede
+sendMail-Anfrage im Batch trägt sie mit – große Anhänge verkleinern deshalb den Batch). Von Graph
+gedrosselte Anfragen (429) werden nach Retry-After im selben Aufruf erneut gesendet. MS_GRAPH_URL/MS_LOGIN_URL lassen sich für Tests auf
+einen lokalen Ersatz umbiegen.
+"""
+import base64
+import hashlib
+import logging
+import mimetypes
+import threading
+import time
+from typing import Callable, Dict, List, Optional, Tuple
+from urllib.parse import quote
+
+import httpx
+
+from app.config import settings
+from app.services.email import DeliveryError
+
+logger = logging.getLogger(__name__)
+
+GRAPH_BATCH_LIMIT = 20  # Höchstzahl Anfragen je $batch (Graph)
+MAX_ATTACHMENT_BYTES = 3 * 1024 * 1024  # größere Anhänge bräuchten eine Upload-Session
+_BATCH_ATTACHMENT_BYTES = 4 * 1024 * 1024  # Anhänge je $batch-Aufruf, darüber neuer Aufruf
+_TOKEN_MARGIN_SECONDS = 300
+_THROTTLE_ROUNDS = 2
+_MAX_THROTTLE_WAIT = 30.0
+
+
+class GraphError(Exception):
+    """Anmeldung oder $batch-Aufruf insgesamt fehlgeschlagen."""
+
+
+class GraphMailer:
+    """Sendet Nachrichten (dicts wie bei send_email) über Graph; threadsicher."""
+
+    def __init__(
+        self,
+        tenant_id: str,
+        client_id: str,
+        client_secret: str,
+        sender: str,
+        *,
+        graph_url: str = "https://graph.microsoft.com/v1.0",
+        login_url: str = "https://login.microsoftonline.com",
+        transport: Optional[httpx.BaseTransport] = None,
+        timeout: float = 30,
+        clock: Callable[[], float] = time.monotonic,
+        sleep: Callable[[float], None] = time.sleep,
+    ):
+        self.sender = sender
+        self._tenant_id = tenant_id
+        self._client_id = client_id
+        self._client_secret = client_secret
+        self._graph_url = graph_url.rstrip("/")
+        self._login_url = login_url.rstrip("/")
+        self._client = httpx.Client(transport=transport, timeout=timeout)
+        self._clock = clock
+        self._sleep = sleep
+        self._token: Optional[str] = None
+        self._token_expires = 0.0
+        self._lock = threading.Lock()
+
+    @classmethod
+    def from_settings(cls) -> "GraphMailer":
+        return cls(
+            settings.MS_TENANT_ID,
+            settings.MS_CLIENT_ID,
+            settings.MS_CLIENT_SECRET,
+            settings.MS_SENDER_MAIL,
+            graph_url=settings.MS_GRAPH_URL,
+            login_url=settings.MS_LOGIN_URL,
+        )
+
+    # --- Token ---
+
+    def access_token(self) -> str:
+        """App-only-Token aus dem Cache oder neu angefordert."""
+        with self._lock:
+            if self._token and self._clock() < self._token_expires:
+                return self._token
+            try:
+                response = self._client.post(
+                    f"{self._login_url}/{self._tenant_id}/oauth2/v2.0/token",
+                    data={
+                        "client_id": self._client_id,
+                        "client_secret": self._client_secret,
+                        "scope": "https://graph.microsoft.com/.default",
+                        "grant_type": "client_credentials",
+                    },
+                )
+            except httpx.HTTPError as e:
+                raise GraphError(f"Token-Anfrage fehlgeschlagen: {e}") from e
+            if response.status_code != 200:
+                raise GraphError(f"Token-Anfrage fehlgeschlagen: HTTP {response.status_code} {response.text[:200]}")
+            data = response.json()
+            self._token = data["access_token"]
+            self._token_expires = self._clock() + max(int(data.get("expires_in", 3600)) - _TOKEN_MARGIN_SECONDS, 0)
+            return self._token
+
+    def _invalidate_token(self) -> None:
+        with self._lock:
+            self._token = None
+
+    # --- Nachrichten ---
+
+    def _message(self, m: dict, attachments: Dict[str, dict]) -> Tuple[dict, int]:
+        """sendMail-Body und Größe seiner Anhänge; attachments: Cache je Aufruf (Inhalt → kodiertes Graph-Objekt)."""
+        payload = {
+            "subject": m["subject"],
+            "body": {"contentType": "HTML" if m.get("html", True) else "Text", "content": m["body"]},
+            "toRecipients": [{"emailAddress": {"address": address}} for address in m["to"]],
+        }
+        size = 0
+        parts = []
+        for filename, content in m.get("attachments") or []:
+            if len(content) > MAX_ATTACHMENT_BYTES:
+                raise ValueError(f"Anhang {filename} ist zu groß für Graph sendMail (max. 3 MB)")
+            key = hashlib.sha256(content).hexdigest() + filename
+            if key not in attachments:
+                attachments[key] = {
+                    "@odata.type": "#microsoft.graph.fileAttachment",
+                    "name": filename,
+                    "contentType": mimetypes.guess_type(filename)[0] or "application/octet-stream",
+                    "contentBytes": base64.b64encode(content).decode("ascii"),
+                }
+            size += len(content)
+            parts.append(attachments[key])
+        if parts:
+            payload["attachments"] = parts
+        return {"message": payload, "saveToSentItems": False}, size
+
+    def _post_batch(self, requests: Dict[int, dict]) -> Dict[int, Tuple[int, dict, float]]:
+        """Ein $batch-Aufruf; gibt je Index (HTTP-Status, Antwort, Retry-After) zurück."""
+        url = f"/users/{quote(self.sender)}/sendMail"
+        body = {
+            "requests": [
+                {"id": str(i), "method": "POST", "url": url, "headers": {"Content-Type": "application/json"}, "body": payload}
+                for i, payload in requests.items()
+            ]
+        }
+        try:
+            response = self._client.post(
+                f"{self._graph_url}/$batch",
+                json=body,
+                headers={"Authorization": f"Bearer {self.access_token()}"},
+            )
+        except httpx.HTTPError as e:
+            raise GraphError(f"$batch fehlgeschlagen: {e}") from e
+        if response.status_code == 401:
+            self._invalidate_token()
+        if response.status_code != 200:
+            raise GraphError(f"$batch fehlgeschlagen: HTTP {response.status_code} {response.text[:200]}")
+        results = {}
+        for item in response.json().get("responses", []):
+            headers = {k.lower(): v for k, v in (item.get("headers") or {}).items()}
+            try:
+                retry_after = float(headers.get("retry-after", 0))
+            except ValueError:
+                retry_after = 0.0
+            results[int(item["id"])] = (int(item["status"]), item.get("body") or {}, retry_after)
+        return results
+
+    def _chunks(self, payloads: List[Tuple[int, dict, int]]) -> List[Dict[int, dict]]:
+        """Höchstens GRAPH_BATCH_LIMIT Anfragen und etwa _BATCH_ATTACHMENT_BYTES Anhänge je Aufruf."""
+        chunks: List[Dict[int, dict]] = []
+        current: Dict[int, dict] = {}
+        size = 0
+        for i, payload, attachment_bytes in payloads:
+            if current and (len(current) >= GRAPH_BATCH_LIMIT or size + attachment_bytes > _BATCH_ATTACHMENT_BYTES):
+                chunks.append(current)
+                current, size = {}, 0
+            current[i] = payload
+            size += attachment_bytes
+        if current:
+            chunks.append(current)
+        return chunks
+
+    def send(self, messages: List[dict]) -> List[Optional[DeliveryError]]:
+        """Wie email.deliver_emails: je Nachricht None (angenommen) oder DeliveryError."""
+        results: List[Optional[DeliveryError]] = [None] * len(messages)
+        attachments: Dict[str, dict] = {}
+        payloads = []
+        for i, m in enumerate(messages):
+            try:
+                payload, attachment_bytes = self._message(m, attachments)
+            except ValueError as e:
+                results[i] = DeliveryError(str(e), permanent=True)
+                continue
+            payloads.append((i, payload, attachment_bytes))
+
+        for chunk in self._chunks(payloads):
+            pending = chunk
+            for round_ in range(_THROTTLE_ROUNDS + 1):
+                try:
+                    responses = self._post_batch(pending)
+                except GraphError as e:
+                    logger.error("Graph: %s", e)
+                    for i in pending:
+                        results[i] = DeliveryError(str(e)[:1000])
+                    break
+                throttled: Dict[int, dict] = {}
+                wait = 0.0
+                for i in pending:
+                    status, body, retry_after = responses.get(i, (0, {}, 0.0))
+                    if 200 <= status < 300:
+                        results[i] = None
+                        continue
+                    error = (body.get("error") or {}) if isinstance(body, dict) else {}
+                    message = f"Graph HTTP {status} {error.get('code', '')}: {error.get('message', '')}".strip()[:1000]
+                    if status == 401:
+                        self._invalidate_token()
+                    if status in (429, 503, 504):
+                        throttled[i] = pending[i]
+                        wait = max(wait, retry_after or 1.0)
+                    # 400/404/413 …: Nachricht oder Empfänger ungültig; 401/403/408/429/5xx: später erneut
+                    permanent = 400 <= status < 500 and status not in (401, 403, 408, 429)
+                    results[i] = DeliveryError(message, permanent=permanent)
+                if not throttled or round_ == _THROTTLE_ROUNDS:
+                    break
+                logger.info("Graph: %s Nachrichten gedrosselt, neuer Versuch in %.0f s", len(throttled), wait)
+                self._sleep(min(wait, _MAX_THROTTLE_WAIT))
+                pending = throttled
+        logger.info("Graph: %s/%s Nachrichten angenommen", sum(r is None for r in results), len(messages))
+        return results
+
+    def close(self) -> None:
+        self._client.close()
+
+
+_mailer: Optional[GraphMailer] = None
+_mailer_key: Optional[tuple] = None
+_mailer_lock = threading.Lock()
+
+
+def get_graph_mailer() -> GraphMailer:
+    """Mailer für die aktuellen MS_*-Einstellungen (einer pro Prozess, Token-Cache inklusive)."""
+    global _mailer, _mailer_key
+    key = (
+        settings.MS_TENANT_ID, settings.MS_CLIENT_ID, settings.MS_CLIENT_SECRET, settings.MS_SENDER_MAIL,
+        settings.MS_GRAPH_URL, settings.MS_LOGIN_URL,
+    )
+    with _mailer_lock:
+        if _mailer is None or _mailer_key != key:
+            if _mailer is not None:
+                _mailer.close()
+            _mailer = GraphMailer.from_settings()
+            _mailer_key = key
+        return _mailer
+
+
+def close_graph_mailer() -> None:
+    global _mailer, _mailer_key
+    with _mailer_lock:
+        if _mailer is not None:
+            _mailer.close()
+        _mailer = _mailer_key = None
@@ -0,0 +1,173 @@
+"""Ressourcen-Locks über Prozessgrenzen (mehrere uvicorn-Worker, Dokument-Worker).
+
+PostgreSQL: pg_advisory_lock auf einer eigenen Verbindung (Session-Locks überleben sonst das
+Zurückgeben der Verbindung an den Pool nicht sauber). Sonst (SQLite, lokal): fcntl.flock auf einer
+Lock-Datei unter UPLOAD_DIR/.locks – gilt für alle Prozesse auf demselben Host. Nicht gehaltene, alte
+Lock-Dateien entfernt der Aufräum-Lauf (remove_stale_lock_files); wer eine Datei gesperrt hat, prüft
+deshalb, dass sie danach noch unter ihrem Namen liegt.
+"""
+import asyncio
+import hashlib
+import os
+import re
+import time
+from contextlib import asynccontextmanager, contextmanager
+from typing import AsyncIterator, Iterator, Optional
+
+from sqlalchemy import text
+from sqlalchemy.engine import Engine
+from sqlalchemy.orm import Session
+
+from app.config import settings
+
+try:
+    import fcntl
+    HAS_FCNTL = True
+except ImportError:  # Windows (nur Entwicklung)
+    HAS_FCNTL = False
+
+_POLL_SECONDS = 0.05
+
+
+class LockTimeout(Exception):
+    """Lock wurde innerhalb der Wartezeit nicht frei."""
+
+
+def _advisory_key(name: str) -> int:
+    """Stabiler signierter 64-bit-Schlüssel für pg_advisory_lock."""
+    return int.from_bytes(hashlib.sha256(name.encode("utf-8")).digest()[:8], "big", signed=True)
+
+
+def lock_dir() -> str:
+    """Verzeichnis der Lock-Dateien; UPLOAD_DIR wird wie beim Speicher-Backend erst beim Aufruf gelesen."""
+    return os.path.join(settings.UPLOAD_DIR, ".locks")
+
+
+def _lock_file(name: str) -> str:
+    directory = lock_dir()
+    os.makedirs(directory, exist_ok=True)
+    return os.path.join(directory, re.sub(r"[^A-Za-z0-9_.-]", "_", name) + ".lock")
+
+
+def _still_linked(fd: int, path: str) -> bool:
+    """Ob die gesperrte Datei noch die unter path liegende ist."""
+    try:
+        current = os.stat(path)
+    except FileNotFoundError:
+        return False
+    opened = os.fstat(fd)
+    return (opened.st_dev, opened.st_ino) == (current.st_dev, current.st_ino)
+
+
+def remove_stale_lock_files(older_than: float) -> int:
+    """Lock-Dateien löschen, die vor older_than (Unix-Zeit) angelegt wurden und gerade nicht gehalten
+    werden; je Sperrname (Blob, Sitzung, ...) entsteht sonst eine Datei, die nie verschwindet."""
+    if not HAS_FCNTL:
+        return 0
+    directory = lock_dir()
+    try:
+        with os.scandir(directory) as it:
+            candidates = [e.path for e in it if e.name.endswith(".lock") and e.stat().st_mtime < older_than]
+    except FileNotFoundError:
+        return 0
+    removed = 0
+    for path in candidates:
+        try:
+            fd = os.open(path, os.O_RDWR)
+        except FileNotFoundError:
+            continue
+        try:
+            fcntl.flock(fd, fcntl.LOCK_EX | fcntl.LOCK_NB)
+        except BlockingIOError:
+            os.close(fd)  # wird gerade gehalten
+            continue
+        try:
+            if _still_linked(fd, path):
+                os.unlink(path)
+                removed += 1
+        finally:
+            os.close(fd)
+    return removed
+
+
+def _engine(db: Optional[Session]) -> Optional[Engine]:
+    if db is None:
+        return None
+    bind = db.get_bind()
+    return bind if bind.dialect.name == "postgresql" else None
+
+
+class _Lock:
+    """Ein Lock-Versuch; try_acquire() blockiert nie, damit auch async gewartet werden kann."""
+
+    def __init__(self, name: str, db: Optional[Session]):
+        self.name = name
+        self._engine = _engine(db)
+        self._conn = None
+        self._fd: Optional[int] = None
+
+    def try_acquire(self) -> bool:
+        if self._engine is not None:
+            if self._conn is None:
+                self._conn = self._engine.connect()
+            return bool(self._conn.execute(
+                text("SELECT pg_try_advisory_lock(:k)"), {"k": _advisory_key(self.name)}
+            ).scalar())
+        if not HAS_FCNTL:
+            return True
+        if self._fd is None:
+            self._fd = os.open(_lock_file(self.name), os.O_RDWR | os.O_CREAT, 0o644)
+        try:
+            fcntl.flock(self._fd, fcntl.LOCK_EX | fcntl.LOCK_NB)
+        except BlockingIOError:
+            return False
+        if _still_linked(self._fd, _lock_file(self.name)):
+            return True
+        # Zwischen open und flock vom Aufräum-Lauf entfernt: neue Datei beim nächsten Versuch öffnen
+        self.release()
+        return False
+
+    def release(self) -> None:
+        if self._conn is not None:
+            try:
+                self._conn.execute(text("SELECT pg_advisory_unlock(:k)"), {"k": _advisory_key(self.name)})
+                self._conn.commit()
+            finally:
+                self._conn.close()
+                self._conn = None
+        if self._fd is not None:
+            try:
+                fcntl.flock(self._fd, fcntl.LOCK_UN)
+            finally:
+                os.close(self._fd)
+                self._fd = None
+
+
+@contextmanager
+def resource_lock(name: str, db: Optional[Session] = None, timeout: float = 120) -> Iterator[None]:
+    """Exklusiver Lock auf name (blockierend, für Worker/Threads)."""
+    lock = _Lock(name, db)
+    deadline = time.monotonic() + timeout
+    try:
+        while not lock.try_acquire():
+            if time.monotonic() > deadline:
+                raise LockTimeout(name)
+            time.sleep(_POLL_SECONDS)
+        yield
+    finally:
+        lock.release()
+
+
+@asynccontextmanager
+async def async_resource_lock(name: str, db: Optional[Session] = None, timeout: float = 120) -> AsyncIterator[None]:
+    """Wie resource_lock, wartet aber ohne den Event-Loop zu blockieren."""
+    lock = _Lock(name, db)
+    deadline = time.monotonic() + timeout
+    try:
+        while not lock.try_acquire():
+            if time.monotonic() > deadline:
+                raise LockTimeout(name)
+            await asyncio.sleep(_POLL_SECONDS)
+        yield
+    finally:
+        lock.release()
@@ -0,0 +1,162 @@
+"""E-Mail-Vorlagen (Tabelle email_templates): einmal kompiliert, je Szenario mit einer Abfrage aufgelöst.
+
+Eine Vorlage wird beim ersten Gebrauch in Segmente zerlegt – abwechselnd fester Text (Zeilenumbrüche
+schon als <br>) und Platzhalternamen – und unter (id, updated_at) zwischengespeichert; eine geänderte
+Vorlage bekommt ein neues updated_at und wird neu kompiliert. TemplateResolver lädt alle Vorlagen
+eines Szenarios in einer Abfrage und liefert je (typ, kreisverband_id) die KV-spezifische Vorlage
+oder die allgemeine (kreisverband_id None). Werte, die für alle Empfänger gleich sind, lassen sich mit
+bind() vorab einsetzen; je Empfänger bleibt dann nur noch ein join über wenige Teile.
+"""
+import re
+import threading
+from functools import lru_cache
+from typing import Dict, Iterable, List, Optional, Tuple
+
+from sqlalchemy.orm import Session
+
+from app.models.email_template import EmailTemplate
+
+_PLACEHOLDER = re.compile(r"\{(\w+)\}")
+
+
+def _html(value) -> str:
+    return str(value).replace("\n", "<br>")
+
+
+class CompiledText:
+    """Vorlagentext als Segmente: gerade Indizes fester Text, ungerade Platzhalternamen."""
+
+    __slots__ = ("segments",)
+
+    def __init__(self, segments: Tuple[str, ...]):
+        self.segments = segments
+
+    @classmethod
+    def compile(cls, text: str) -> "CompiledText":
+        parts = _PLACEHOLDER.split(text or "")
+        return cls(tuple(_html(p) if i % 2 == 0 else p for i, p in enumerate(parts)))
+
+    @property
+    def placeholders(self) -> Tuple[str, ...]:
+        return self.segments[1::2]
+
+    def bind(self, data: dict) -> "CompiledText":
+        """Bekannte Platzhalter einsetzen, die übrigen offen lassen (für Werte je Empfänger)."""
+        segments: List[str] = [self.segments[0]]
+        for i in range(1, len(self.segments), 2):
+            key, literal = self.segments[i], self.segments[i + 1]
+            if key in data:
+                segments[-1] += _html(data[key]) + literal
+            else:
+                segments += [key, literal]
+        return CompiledText(tuple(segments))
+
+    def render(self, data: dict) -> str:
+        """Wie email.render_template: fehlende Platzhalter werden leer, Zeilenumbrüche zu <br>."""
+        segments = self.segments
+        if len(segments) == 1:
+            return segments[0]
+        parts = list(segments)
+        for i in range(1, len(parts), 2):
+            parts[i] = _html(data.get(parts[i], ""))
+        return "".join(parts)
+
+
+@lru_cache(maxsize=256)
+def compile_text(text: str) -> CompiledText:
+    """Kompilierter Text für Vorlagen ohne Datenbankzeile (Test-Mails, render_template)."""
+    return CompiledText.compile(text)
+
+
+class CompiledTemplate:
+    """Betreff und Inhalt einer EmailTemplate-Zeile samt Anhang, unabhängig von der Session."""
+
+    __slots__ = ("id", "typ", "kreisverband_id", "subject", "body", "attachment_path", "attachment_filename")
+
+    def __init__(
+        self,
+        template: EmailTemplate,
+        subject: Optional[CompiledText] = None,
+        body: Optional[CompiledText] = None,
+    ):
+        self.id = template.id
+        self.typ = template.typ
+        self.kreisverband_id = template.kreisverband_id
+        self.subject = subject or CompiledText.compile(template.betreff)
+        self.body = body or CompiledText.compile(template.inhalt)
+        self.attachment_path = template.attachment_storage_path
+        self.attachment_filename = template.attachment_original_filename
+
+    def bind(self, data: dict) -> "CompiledTemplate":
+        """Kopie mit vorab eingesetzten gemeinsamen Werten."""
+        bound = object.__new__(CompiledTemplate)
+        for name in self.__slots__:
+            setattr(bound, name, getattr(self, name))
+        bound.subject = self.subject.bind(data)
+        bound.body = self.body.bind(data)
+        return bound
+
+    def render(self, data: dict) -> Tuple[str, str]:
+        """(Betreff, Inhalt) für einen Empfänger."""
+        return self.subject.render(data), self.body.render(data)
+
+
+_compiled: Dict[int, tuple] = {}
+_compiled_lock = threading.Lock()
+
+
+def compiled_template(template: EmailTemplate) -> CompiledTemplate:
+    """Kompilierte Fassung der Zeile; neu kompiliert nur, wenn sich updated_at geändert hat.
+
+    updated_at hat in SQLite nur Sekundenauflösung – zusätzlich wird der Quelltext verglichen, damit
+    zwei Änderungen in derselben Sekunde nicht die alte Fassung liefern. Anhang und KV kommen immer
+    aus der aktuellen Zeile.
+    """
+    cached = _compiled.get(template.id)
+    if cached is not None and cached[:3] == (template.updated_at, template.betreff, template.inhalt):
+        subject, body = cached[3:]
+    else:
+        subject, body = CompiledText.compile(template.betreff), CompiledText.compile(template.inhalt)
+        with _compiled_lock:
+            _compiled[template.id] = (template.updated_at, template.betreff, template.inhalt, subject, body)
+    return CompiledTemplate(template, subject, body)
+
+
+def forget_template(template_id: int) -> None:
+    """Nach dem Löschen einer Vorlage (die ID könnte sonst nie wieder abgefragt werden)."""
+    with _compiled_lock:
+        _compiled.pop(template_id, None)
+
+
+class TemplateResolver:
+    """Alle Vorlagen der angegebenen Szenarien aus einer Abfrage, nachgeschlagen über (scenario, typ, kreisverband_id)."""
+
+    def __init__(self, templates: Iterable[Tuple[str, CompiledTemplate]]):
+        self._lookup: Dict[Tuple[str, str, Optional[int]], CompiledTemplate] = {}
+        self._all: Dict[Tuple[str, str], List[CompiledTemplate]] = {}
+        for scenario, compiled in templates:
+            # bei mehreren Vorlagen für denselben Schlüssel gilt die älteste (kleinste ID)
+            self._lookup.setdefault((scenario, compiled.typ, compiled.kreisverband_id), compiled)
+            self._all.setdefault((scenario, compiled.typ), []).append(compiled)
+
+    @classmethod
+    def load(cls, db: Session, *scenarios: str) -> "TemplateResolver":
+        rows = (
+            db.query(EmailTemplate)
+            .filter(EmailTemplate.scenario.in_(scenarios))
+            .order_by(EmailTemplate.id)
+            .all()
+        )
+        return cls((row.scenario, compiled_template(row)) for row in rows)
+
+    def resolve(self, scenario: str, typ: str, kreisverband_id: Optional[int] = None) -> Optional[CompiledTemplate]:
+        """KV-spezifische Vorlage, sonst die allgemeine, sonst None."""
+        if kreisverband_id is not None:
+            template = self._lookup.get((scenario, typ, kreisverband_id))
+            if template is not None:
+                return template
+        return self._lookup.get((scenario, typ, None))
+
+    def general(self, scenario: str, typ: str) -> List[CompiledTemplate]:
+        """Alle allgemeinen Vorlagen (ohne KV) dieses Szenarios und Typs, nach ID."""
+        return [t for t in self._all.get((scenario, typ), []) if t.kreisverband_id is None]
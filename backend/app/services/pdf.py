@@ -1,45 +1,399 @@
-"""Shared DOCX-to-PDF conversion using LibreOffice headless."""
+"""Shared DOCX-to-PDF conversion using a pool of long-lived LibreOffice (soffice) instances."""
+import asyncio
 import logging
 import os
+import queue
+import shutil
 import subprocess
+import sys
+import tempfile
+import threading
+import time
+from concurrent.futures import Future
+from contextlib import contextmanager
 from pathlib import Path
-from typing import Optional
+from typing import Iterator, Optional
+
+from app.config import settings
 
 logger = logging.getLogger(__name__)
 
+try:
+    import uno  # noqa: F401
+    HAS_UNO = True
+except ImportError:
+    # python3-uno liegt im Debian-Image unter dist-packages des System-Pythons
+    if settings.PDF_UNO_PATH and os.path.isdir(settings.PDF_UNO_PATH):
+        sys.path.append(settings.PDF_UNO_PATH)
+    try:
+        import uno  # noqa: F401
+        HAS_UNO = True
+    except ImportError:
+        HAS_UNO = False
 
-def docx_to_pdf(docx_path: str) -> Optional[str]:
-    """Konvertiert DOCX zu PDF mit LibreOffice (headless). Gibt Pfad zur PDF-Datei zurueck oder None bei Fehler."""
+
+class PdfPoolBusy(Exception):
+    """Warteschlange der PDF-Konvertierung ist voll."""
+
+
+def _soffice_binary() -> Optional[str]:
+    for cmd in ("soffice", "libreoffice"):
+        path = shutil.which(cmd)
+        if path:
+            return path
+    return None
+
+
+class _SofficeInstance:
+    """Ein soffice-Prozess mit eigenem Profil (-env:UserInstallation), damit parallele
+    Konvertierungen nicht auf dasselbe Benutzerprofil zugreifen. Mit UNO bleibt der Prozess
+    als Listener auf einer benannten Pipe am Leben; ohne UNO wird pro Auftrag ein Prozess mit
+    diesem Profil gestartet. Profil und Pipe tragen die PID des Pools: mehrere uvicorn-Worker im
+    selben Container teilen sich weder Profile noch Verbindungen (feste Ports kollidierten dort)."""
+
+    def __init__(self, index: int, base_dir: str, owner_pid: int):
+        self.index = index
+        self.pipe_name = f"julis_soffice_{owner_pid}_{index}"
+        self.profile_dir = os.path.join(base_dir, f"profile_{owner_pid}_{index}")
+        self.profile_url = Path(self.profile_dir).absolute().as_uri()
+        self.process: Optional[subprocess.Popen] = None
+        self._desktop = None
+
+    def alive(self) -> bool:
+        return self.process is not None and self.process.poll() is None
+
+    def start(self, binary: str) -> None:
+        os.makedirs(self.profile_dir, exist_ok=True)
+        self.process = subprocess.Popen(
+            [
+                binary,
+                f"-env:UserInstallation={self.profile_url}",
+                "--headless",
+                "--invisible",
+                "--nologo",
+                "--nodefault",
+                "--norestore",
+                "--nolockcheck",
+                f"--accept=pipe,name={self.pipe_name};urp;StarOffice.ComponentContext",
+            ],
+            stdout=subprocess.DEVNULL,
+            stderr=subprocess.DEVNULL,
+        )
+        self._desktop = None
+
+    def kill(self) -> None:
+        self._desktop = None
+        if self.process is not None and self.process.poll() is None:
+            self.process.kill()
+            try:
+                self.process.wait(timeout=5)
+            except subprocess.TimeoutExpired:
+                pass
+        self.process = None
+
+    def _connect(self, timeout: float):
+        import uno
+        local = uno.getComponentContext()
+        resolver = local.ServiceManager.createInstanceWithContext("com.sun.star.bridge.UnoUrlResolver", local)
+        deadline = time.monotonic() + timeout
+        while True:
+            try:
+                ctx = resolver.resolve(
+                    f"uno:pipe,name={self.pipe_name};urp;StarOffice.ComponentContext"
+                )
+                return ctx.ServiceManager.createInstanceWithContext("com.sun.star.frame.Desktop", ctx)
+            except Exception:
+                if time.monotonic() > deadline or not self.alive():
+                    raise
+                time.sleep(0.25)
+
+    def convert_uno(self, src: str, dst: str, timeout: float) -> None:
+        import uno
+        from com.sun.star.beans import PropertyValue
+
+        def prop(name, value):
+            p = PropertyValue()
+            p.Name = name
+            p.Value = value
+            return p
+
+        if self._desktop is None:
+            self._desktop = self._connect(timeout)
+        doc = self._desktop.loadComponentFromURL(
+            uno.systemPathToFileUrl(src), "_blank", 0, (prop("Hidden", True),)
+        )
+        try:
+            doc.storeToURL(uno.systemPathToFileUrl(dst), (prop("FilterName", "writer_pdf_Export"),))
+        finally:
+            doc.close(True)
+
+    def convert_cli(self, binary: str, src: str, out_dir: str, timeout: float) -> None:
+        os.makedirs(self.profile_dir, exist_ok=True)
+        proc = subprocess.run(
+            [
+                binary,
+                f"-env:UserInstallation={self.profile_url}",
+                "--headless",
+                "--convert-to",
+                "pdf",
+                "--outdir",
+                out_dir,
+                src,
+            ],
+            capture_output=True,
+            timeout=timeout,
+            cwd=out_dir,
+        )
+        if proc.returncode != 0:
+            raise RuntimeError(
+                f"LibreOffice exit code {proc.returncode}: "
+                + (proc.stderr or b"").decode("utf-8", errors="replace")[:500]
+            )
+
+
+def _pid_alive(pid: int) -> bool:
     try:
-        docx_path = os.path.abspath(docx_path)
+        os.kill(pid, 0)
+    except ProcessLookupError:
+        return False
+    except PermissionError:
+        return True
+    return True
+
+
+def _remove_stale_profiles(base_dir: str) -> None:
+    """Profile beendeter Prozesse (profile_<pid>_<n>) entfernen, damit sie sich nicht ansammeln."""
+    try:
+        entries = os.listdir(base_dir)
+    except FileNotFoundError:
+        return
+    for name in entries:
+        parts = name.split("_")
+        if len(parts) == 3 and parts[0] == "profile" and parts[1].isdigit():
+            if int(parts[1]) != os.getpid() and not _pid_alive(int(parts[1])):
+                shutil.rmtree(os.path.join(base_dir, name), ignore_errors=True)
+
+
+class SofficePool:
+    """Pool langlebiger soffice-Instanzen mit begrenzter Warteschlange, Timeout pro Auftrag,
+    Neustart abgestürzter/hängender Instanzen und Metriken."""
+
+    def __init__(
+        self,
+        size: int = 2,
+        queue_size: int = 16,
+        job_timeout: float = 60,
+        base_dir: Optional[str] = None,
+    ):
+        self.size = max(1, size)
+        self.job_timeout = job_timeout
+        self.base_dir = base_dir or os.path.join(tempfile.gettempdir(), "julis-soffice")
+        self.use_uno = HAS_UNO
+        self._binary = _soffice_binary()
+        self._jobs: "queue.Queue[Optional[tuple]]" = queue.Queue(maxsize=max(1, queue_size))
+        _remove_stale_profiles(self.base_dir)
+        self._instances = [_SofficeInstance(i, self.base_dir, os.getpid()) for i in range(self.size)]
+        self._lock = threading.Lock()
+        self._busy = 0
+        self._metrics = {
+            "conversions": 0,
+            "failures": 0,
+            "timeouts": 0,
+            "restarts": 0,
+            "rejected": 0,
+            "total_seconds": 0.0,
+        }
+        self._threads = [
+            threading.Thread(target=self._worker, args=(inst,), name=f"soffice-{inst.index}", daemon=True)
+            for inst in self._instances
+        ]
+        for t in self._threads:
+            t.start()
+
+    def submit(self, docx_path: str) -> "Future[Optional[str]]":
+        """Auftrag einreihen. Wirft PdfPoolBusy, wenn die Warteschlange voll ist."""
+        future: "Future[Optional[str]]" = Future()
+        try:
+            self._jobs.put_nowait((os.path.abspath(docx_path), future))
+        except queue.Full:
+            with self._lock:
+                self._metrics["rejected"] += 1
+            raise PdfPoolBusy("PDF-Warteschlange voll")
+        return future
+
+    def _bump(self, key: str, value=1) -> None:
+        with self._lock:
+            self._metrics[key] += value
+
+    def _worker(self, inst: _SofficeInstance) -> None:
+        while True:
+            job = self._jobs.get()
+            if job is None:
+                inst.kill()
+                return
+            docx_path, future = job
+            if not future.set_running_or_notify_cancel():
+                continue
+            with self._lock:
+                self._busy += 1
+            started = time.monotonic()
+            try:
+                future.set_result(self._convert(inst, docx_path))
+            except Exception as e:
+                future.set_exception(e)
+            finally:
+                with self._lock:
+                    self._busy -= 1
+                    self._metrics["total_seconds"] += time.monotonic() - started
+
+    def _convert(self, inst: _SofficeInstance, docx_path: str) -> Optional[str]:
         if not os.path.isfile(docx_path):
             logger.warning("DOCX fuer PDF-Konvertierung nicht gefunden: %s", docx_path)
             return None
+        if not self._binary:
+            logger.warning("LibreOffice (soffice) nicht gefunden – PDF-Konvertierung nicht moeglich")
+            self._bump("failures")
+            return None
         out_dir = os.path.dirname(docx_path)
-        for cmd in ("libreoffice", "soffice"):
-            try:
-                proc = subprocess.run(
-                    [cmd, "--headless", "--convert-to", "pdf", "--outdir", out_dir, docx_path],
-                    capture_output=True,
-                    timeout=60,
-                    cwd=out_dir,
-                )
-                if proc.returncode != 0:
-                    logger.debug(
-                        "LibreOffice %s exit code %s stderr=%s",
-                        cmd,
-                        proc.returncode,
-                        (proc.stderr or b"").decode("utf-8", errors="replace")[:500],
-                    )
-                    continue
-                pdf_path = Path(docx_path).with_suffix(".pdf")
-                if pdf_path.is_file():
-                    return str(pdf_path)
-                break
-            except (FileNotFoundError, subprocess.TimeoutExpired) as e:
-                logger.debug("LibreOffice %s: %s", cmd, e)
-                continue
+        pdf_path = str(Path(docx_path).with_suffix(".pdf"))
+        try:
+            if self.use_uno:
+                if not inst.alive():
+                    if inst.process is not None:
+                        self._bump("restarts")
+                    inst.start(self._binary)
+                # Watchdog: hängende Instanz nach job_timeout beenden (UNO-Aufruf bricht dann ab)
+                timed_out = threading.Event()
+
+                def _expire():
+                    timed_out.set()
+                    inst.kill()
+
+                watchdog = threading.Timer(self.job_timeout, _expire)
+                watchdog.start()
+                try:
+                    inst.convert_uno(docx_path, pdf_path, self.job_timeout)
+                except Exception:
+                    if timed_out.is_set():
+                        raise subprocess.TimeoutExpired("soffice", self.job_timeout)
+                    inst.kill()  # Verbindung/Instanz unbrauchbar → beim nächsten Auftrag neu starten
+                    raise
+                finally:
+                    watchdog.cancel()
+            else:
+                inst.convert_cli(self._binary, docx_path, out_dir, self.job_timeout)
+        except subprocess.TimeoutExpired:
+            logger.warning("PDF-Konvertierung Timeout nach %ss: %s", self.job_timeout, docx_path)
+            self._bump("timeouts")
+            self._bump("failures")
+            return None
+        except Exception as e:
+            logger.warning("PDF-Konvertierung fehlgeschlagen fuer %s: %s", docx_path, e)
+            self._bump("failures")
+            return None
+        if not os.path.isfile(pdf_path):
+            self._bump("failures")
+            return None
+        self._bump("conversions")
+        return pdf_path
+
+    def stats(self) -> dict:
+        with self._lock:
+            m = dict(self._metrics)
+            busy = self._busy
+        done = m["conversions"] + m["failures"]
+        return {
+            "mode": "uno" if self.use_uno else "cli",
+            "size": self.size,
+            "alive": sum(1 for i in self._instances if i.alive()),
+            "busy": busy,
+            "queued": self._jobs.qsize(),
+            "queue_size": self._jobs.maxsize,
+            "conversions": m["conversions"],
+            "failures": m["failures"],
+            "timeouts": m["timeouts"],
+            "restarts": m["restarts"],
+            "rejected": m["rejected"],
+            "avg_seconds": round(m["total_seconds"] / done, 3) if done else None,
+        }
+
+    def shutdown(self) -> None:
+        for _ in self._threads:
+            self._jobs.put(None)
+        for t in self._threads:
+            t.join(timeout=10)
+        for inst in self._instances:
+            shutil.rmtree(inst.profile_dir, ignore_errors=True)
+
+
+_pool: Optional[SofficePool] = None
+_pool_lock = threading.Lock()
+
+
+def get_pdf_pool() -> SofficePool:
+    """Pool beim ersten Gebrauch starten (ein Pool pro Prozess)."""
+    global _pool
+    with _pool_lock:
+        if _pool is None:
+            _pool = SofficePool(
+                size=settings.PDF_POOL_SIZE,
+                queue_size=settings.PDF_QUEUE_SIZE,
+                job_timeout=settings.PDF_JOB_TIMEOUT,
+                base_dir=settings.PDF_POOL_DIR or None,
+            )
+        return _pool
+
+
+def shutdown_pdf_pool() -> None:
+    global _pool
+    with _pool_lock:
+        if _pool is not None:
+            _pool.shutdown()
+            _pool = None
+
+
+def pdf_pool_stats() -> Optional[dict]:
+    """Metriken des Pools oder None, wenn noch keine Konvertierung lief."""
+    return _pool.stats() if _pool is not None else None
+
+
+def _workspace_root() -> str:
+    if settings.PDF_WORKDIR:
+        os.makedirs(settings.PDF_WORKDIR, exist_ok=True)
+        return settings.PDF_WORKDIR
+    if os.path.isdir("/dev/shm") and os.access("/dev/shm", os.W_OK):
+        return "/dev/shm"
+    return tempfile.gettempdir()
+
+
+@contextmanager
+def ram_workspace() -> Iterator[str]:
+    """Temporäres Arbeitsverzeichnis für DOCX/PDF-Zwischendateien (standardmäßig im RAM, /dev/shm)."""
+    with tempfile.TemporaryDirectory(prefix="julis-pdf-", dir=_workspace_root()) as workdir:
+        yield workdir
+
+
+def docx_to_pdf(docx_path: str) -> Optional[str]:
+    """Konvertiert DOCX zu PDF ueber den soffice-Pool. Gibt Pfad zur PDF-Datei zurueck oder None bei Fehler."""
+    try:
+        return get_pdf_pool().submit(docx_path).result()
+    except PdfPoolBusy:
+        logger.warning("PDF-Konvertierung abgelehnt (Warteschlange voll): %s", docx_path)
         return None
     except Exception as e:
         logger.exception("PDF-Konvertierung fehlgeschlagen fuer %s: %s", docx_path, e)
         return None
+
+
+async def docx_to_pdf_async(docx_path: str) -> Optional[str]:
+    """Wie docx_to_pdf, ohne einen Threadpool-Thread fuer die Wartezeit zu belegen."""
+    try:
+        future = get_pdf_pool().submit(docx_path)
+    except PdfPoolBusy:
+        logger.warning("PDF-Konvertierung abgelehnt (Warteschlange voll): %s", docx_path)
+        return None
+    try:
+        return await asyncio.wrap_future(future)
+    except Exception as e:
+        logger.exception("PDF-Konvertierung fehlgeschlagen fuer %s: %s", docx_path, e)
+        return None
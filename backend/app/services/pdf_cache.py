@@ -0,0 +1,210 @@
+"""Content-hash keyed PDF cache on disk with size-bounded LRU eviction.
+
+Schlüssel ist der SHA-256 des gerenderten DOCX bzw. der serialisierten Quelldaten. Geänderte
+Eingaben ergeben einen neuen Schlüssel, eine explizite Invalidierung ist daher nicht nötig.
+"""
+import hashlib
+import json
+import logging
+import os
+import shutil
+import tempfile
+import threading
+import time
+from typing import Any, Optional
+
+from app.config import settings
+from app.services.pdf import docx_to_pdf, docx_to_pdf_async, ram_workspace
+from app.services.singleflight import document_flight
+
+logger = logging.getLogger(__name__)
+
+
+def sha256_bytes(data: bytes) -> str:
+    return hashlib.sha256(data).hexdigest()
+
+
+def sha256_file(path: str, chunk_size: int = 1024 * 1024) -> str:
+    h = hashlib.sha256()
+    with open(path, "rb") as f:
+        for chunk in iter(lambda: f.read(chunk_size), b""):
+            h.update(chunk)
+    return h.hexdigest()
+
+
+def sha256_data(data: Any) -> str:
+    """Stabiler Hash über JSON-serialisierbare Quelldaten (Schlüssel sortiert)."""
+    raw = json.dumps(data, sort_keys=True, ensure_ascii=False, default=str, separators=(",", ":"))
+    return sha256_bytes(raw.encode("utf-8"))
+
+
+class PdfCache:
+    """PDFs unter <directory>/<key[:2]>/<key>.pdf. Zugriff aktualisiert die mtime (LRU);
+    übersteigt die Gesamtgröße max_bytes, werden die am längsten nicht genutzten Dateien gelöscht.
+    Einträge, die in den letzten in_use_seconds geliefert oder abgelegt wurden, bleiben stehen: ihr
+    Pfad ist womöglich gerade auf dem Weg zur FileResponse, die die Datei erst danach öffnet."""
+
+    def __init__(self, directory: str, max_bytes: int, in_use_seconds: float = 60):
+        self.directory = directory
+        self.max_bytes = max_bytes
+        self.in_use_seconds = in_use_seconds
+        self._lock = threading.Lock()
+        self._size: Optional[int] = None
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+
+    def path_for(self, key: str) -> str:
+        return os.path.join(self.directory, key[:2], f"{key}.pdf")
+
+    def get(self, key: str) -> Optional[str]:
+        path = self.path_for(key)
+        try:
+            os.utime(path)
+        except FileNotFoundError:
+            self.misses += 1
+            return None
+        self.hits += 1
+        return path
+
+    def put(self, key: str, pdf_path: str, move: bool = False) -> str:
+        """PDF atomar in den Cache übernehmen (kopieren oder verschieben) und ggf. verdrängen."""
+        target = self.path_for(key)
+        os.makedirs(os.path.dirname(target), exist_ok=True)
+        fd, tmp = tempfile.mkstemp(dir=os.path.dirname(target), suffix=".tmp")
+        os.close(fd)
+        try:
+            if move:
+                shutil.move(pdf_path, tmp)
+            else:
+                shutil.copyfile(pdf_path, tmp)
+            os.replace(tmp, target)
+        except Exception:
+            if os.path.exists(tmp):
+                os.unlink(tmp)
+            raise
+        return self._added(target)
+
+    def put_bytes(self, key: str, data: bytes) -> str:
+        """Fertiges PDF aus dem Speicher atomar ablegen (ohne Zwischendatei außerhalb des Caches)."""
+        target = self.path_for(key)
+        os.makedirs(os.path.dirname(target), exist_ok=True)
+        fd, tmp = tempfile.mkstemp(dir=os.path.dirname(target), suffix=".tmp")
+        try:
+            with os.fdopen(fd, "wb") as f:
+                f.write(data)
+            os.replace(tmp, target)
+        except Exception:
+            if os.path.exists(tmp):
+                os.unlink(tmp)
+            raise
+        return self._added(target)
+
+    def _added(self, target: str) -> str:
+        os.utime(target)  # verschobene Dateien behalten sonst die mtime der Quelle
+        with self._lock:
+            if self._size is not None:
+                self._size += os.path.getsize(target)
+            if self._current_size() > self.max_bytes:
+                self._evict()
+        return target
+
+    def _entries(self):
+        for root, _dirs, files in os.walk(self.directory):
+            for name in files:
+                if not name.endswith(".pdf"):
+                    continue
+                path = os.path.join(root, name)
+                try:
+                    st = os.stat(path)
+                except FileNotFoundError:
+                    continue
+                yield path, st.st_size, st.st_mtime
+
+    def _current_size(self) -> int:
+        if self._size is None:
+            self._size = sum(size for _p, size, _m in self._entries())
+        return self._size
+
+    def _evict(self) -> None:
+        # Bis auf 90 % der Obergrenze räumen, damit nicht bei jedem put erneut gescannt wird
+        entries = sorted(self._entries(), key=lambda e: e[2])
+        total = sum(size for _p, size, _m in entries)
+        target = int(self.max_bytes * 0.9)
+        in_use_since = time.time() - self.in_use_seconds
+        for path, size, mtime in entries:
+            if total <= target or mtime > in_use_since:
+                break  # sortiert: alle weiteren sind ebenso frisch
+            try:
+                os.unlink(path)
+                total -= size
+                self.evictions += 1
+            except FileNotFoundError:
+                continue
+        self._size = total
+
+    def stats(self) -> dict:
+        with self._lock:
+            size = self._current_size()
+        return {
+            "entries_bytes": size,
+            "max_bytes": self.max_bytes,
+            "hits": self.hits,
+            "misses": self.misses,
+            "evictions": self.evictions,
+        }
+
+
+pdf_cache = PdfCache(
+    settings.PDF_CACHE_DIR or os.path.join(settings.UPLOAD_DIR, "cache", "pdf"),
+    settings.PDF_CACHE_MAX_MB * 1024 * 1024,
+)
+
+
+def cached_pdf_from_docx_bytes(key: str, docx_bytes: bytes) -> Optional[str]:
+    """PDF aus dem Cache oder DOCX-Bytes im RAM-Arbeitsverzeichnis konvertieren und cachen."""
+    cached = pdf_cache.get(key)
+    if cached:
+        return cached
+    with ram_workspace() as workdir:
+        docx_path = os.path.join(workdir, "dokument.docx")
+        with open(docx_path, "wb") as f:
+            f.write(docx_bytes)
+        pdf_path = docx_to_pdf(docx_path)
+        if not pdf_path or not os.path.isfile(pdf_path):
+            return None
+        return pdf_cache.put(key, pdf_path, move=True)
+
+
+async def cached_pdf_from_docx_bytes_async(key: str, docx_bytes: bytes) -> Optional[str]:
+    """Wie cached_pdf_from_docx_bytes, wartet auf die Konvertierung ohne Threadpool-Thread."""
+    cached = pdf_cache.get(key)
+    if cached:
+        return cached
+    with ram_workspace() as workdir:
+        docx_path = os.path.join(workdir, "dokument.docx")
+        with open(docx_path, "wb") as f:
+            f.write(docx_bytes)
+        pdf_path = await docx_to_pdf_async(docx_path)
+        if not pdf_path or not os.path.isfile(pdf_path):
+            return None
+        return pdf_cache.put(key, pdf_path, move=True)
+
+
+def _read(path: str) -> bytes:
+    with open(path, "rb") as f:
+        return f.read()
+
+
+def cached_docx_to_pdf(docx_path: str) -> Optional[str]:
+    """PDF zu einem DOCX aus dem Cache (Schlüssel: SHA-256 der DOCX-Bytes) oder frisch konvertiert."""
+    data = _read(docx_path)
+    return cached_pdf_from_docx_bytes(sha256_bytes(data), data)
+
+
+async def cached_docx_to_pdf_async(docx_path: str) -> Optional[str]:
+    """Wie cached_docx_to_pdf, wartet auf die Konvertierung ohne Threadpool-Thread. Gleichzeitige
+    Anfragen für dasselbe DOCX teilen sich eine Konvertierung (Single-Flight)."""
+    data = _read(docx_path)
+    key = sha256_bytes(data)
+    return await document_flight.do(("pdf", key), lambda: cached_pdf_from_docx_bytes_async(key, data))
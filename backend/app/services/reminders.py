@@ -0,0 +1,244 @@
+"""Erinnerungen vor Terminen und Sitzungen: Pflege der reminders-Tabelle und Scheduler mit Min-Heap.
+
+Fällige Erinnerungen werden in die Mail-Warteschlange (services/email_outbox) eingereiht – in derselben
+Transaktion, die sie als "sent" markiert. Zustellung, Backoff und erneute Versuche bei SMTP-/Graph-
+Ausfällen übernimmt der E-Mail-Worker; eine Erinnerung geht so nicht mehr durch einen kurzen Ausfall
+verloren.
+"""
+import heapq
+import html
+import logging
+import threading
+from datetime import date, datetime, time, timedelta, timezone
+from typing import Callable, Dict, Iterable, List, Optional, Tuple
+from zoneinfo import ZoneInfo
+
+from sqlalchemy.orm import Session
+
+from app.config import settings
+from app.database import SessionLocal
+from app.models.event import Event
+from app.models.meeting import Meeting
+from app.models.reminder import Reminder
+from app.services.email_outbox import enqueue_email
+
+logger = logging.getLogger(__name__)
+
+
+def _starts_at_utc(day: date, at: Optional[time]) -> datetime:
+    """Lokalen Beginn (REMINDER_TIMEZONE) in naive UTC umrechnen. Ganztägig = 00:00 Uhr."""
+    local = datetime.combine(day, at or time(0, 0), tzinfo=ZoneInfo(settings.REMINDER_TIMEZONE))
+    return local.astimezone(timezone.utc).replace(tzinfo=None)
+
+
+def _arm(db: Session, entity_type: str, entity_id: int, recipients: Iterable[str], starts_at: Optional[datetime]) -> None:
+    """Erinnerungen einer Entität (neu) setzen. Verschobene werden neu scharf geschaltet,
+    nicht mehr passende storniert. Kein Commit – läuft in der Transaktion des Aufrufers."""
+    now = datetime.utcnow()
+    due_at = None
+    if starts_at is not None and starts_at > now:
+        due_at = max(starts_at - timedelta(hours=settings.REMINDER_LEAD_HOURS), now)
+
+    db.flush()
+    existing = {
+        r.recipient_email: r
+        for r in db.query(Reminder).filter(Reminder.entity_type == entity_type, Reminder.entity_id == entity_id).all()
+    }
+    if due_at is not None:
+        for email in {e.strip() for e in recipients if e and e.strip()}:
+            reminder = existing.pop(email, None)
+            if reminder is None:
+                db.add(Reminder(
+                    entity_type=entity_type,
+                    entity_id=entity_id,
+                    recipient_email=email,
+                    due_at=due_at,
+                    status="pending",
+                ))
+            elif reminder.due_at != due_at or reminder.status == "cancelled":
+                reminder.due_at = due_at
+                reminder.status = "pending"
+                reminder.sent_at = None
+    for reminder in existing.values():
+        if reminder.status == "pending":
+            reminder.status = "cancelled"
+
+
+def sync_event_reminders(db: Session, event: Event) -> None:
+    """Erinnerung an den Einreicher für freigegebene Termine."""
+    recipients = [event.submitter_email] if event.status == "approved" and event.submitter_email else []
+    _arm(db, "event", event.id, recipients, _starts_at_utc(event.start_date, event.start_time))
+
+
+def sync_meeting_reminders(db: Session, meeting: Meeting) -> None:
+    """Erinnerung an den Ersteller der Sitzung."""
+    creator = meeting.erstellt_von
+    recipients = [creator.email] if creator is not None and creator.email else []
+    _arm(db, "meeting", meeting.id, recipients, _starts_at_utc(meeting.datum, meeting.uhrzeit))
+
+
+def cancel_reminders(db: Session, entity_type: str, entity_id: int) -> None:
+    """Offene Erinnerungen einer gelöschten Entität stornieren."""
+    _arm(db, entity_type, entity_id, [], None)
+
+
+def _event_message(event: Event, to: str) -> dict:
+    when = event.start_date.strftime("%d.%m.%Y")
+    if event.start_time:
+        when += f" um {event.start_time.strftime('%H:%M')} Uhr"
+    # Titel und Ort stammen ggf. aus dem öffentlichen Einreichungsformular
+    body = (
+        f"Erinnerung an den Termin <b>{html.escape(event.title)}</b> am {when}."
+        + (f"\nOrt: {html.escape(event.location)}" if event.location else "")
+        + f"\n\n{settings.APP_URL}/kalender/{event.id}"
+    ).replace("\n", "<br>")
+    return {"to": [to], "subject": f"Erinnerung: {event.title} am {when}", "body": body}
+
+
+def _meeting_message(meeting: Meeting, to: str) -> dict:
+    when = meeting.datum.strftime("%d.%m.%Y")
+    if meeting.uhrzeit:
+        when += f" um {meeting.uhrzeit.strftime('%H:%M')} Uhr"
+    body = (
+        f"Erinnerung an die Sitzung <b>{html.escape(meeting.titel)}</b> am {when}."
+        + (f"\nOrt: {html.escape(meeting.ort)}" if meeting.ort else "")
+        + f"\n\n{settings.APP_URL}/dokumente/sitzungen/{meeting.id}"
+    ).replace("\n", "<br>")
+    return {"to": [to], "subject": f"Erinnerung: {meeting.titel} am {when}", "body": body}
+
+
+class ReminderScheduler:
+    """In-Process-Scheduler: hält offene Erinnerungen als Min-Heap (due_at, id), schläft bis zur
+    nächsten Fälligkeit und gleicht sich alle REMINDER_POLL_SECONDS inkrementell (updated_at) mit
+    der Tabelle ab. Verschobene Erinnerungen erzeugen einen neuen Heap-Eintrag; der alte wird beim
+    Entnehmen als veraltet erkannt und übersprungen."""
+
+    def __init__(
+        self,
+        session_factory: Callable[[], Session] = SessionLocal,
+        poll_seconds: Optional[int] = None,
+        batch_size: Optional[int] = None,
+    ):
+        self._session_factory = session_factory
+        self.poll_seconds = poll_seconds or settings.REMINDER_POLL_SECONDS
+        self.batch_size = batch_size or settings.REMINDER_BATCH_SIZE
+        self._heap: List[Tuple[datetime, int]] = []
+        self._due: Dict[int, datetime] = {}  # aktuelle Fälligkeit je Reminder-ID
+        self._synced_since: Optional[datetime] = None
+        self._stop = threading.Event()
+
+    def __len__(self) -> int:
+        return len(self._due)
+
+    def refresh(self) -> None:
+        """Neue, verschobene und erledigte Erinnerungen aus der Tabelle übernehmen."""
+        started = datetime.utcnow()
+        db = self._session_factory()
+        try:
+            query = db.query(Reminder.id, Reminder.due_at, Reminder.status)
+            if self._synced_since is None:
+                query = query.filter(Reminder.status == "pending")
+            else:
+                query = query.filter(Reminder.updated_at >= self._synced_since)
+            rows = query.all()
+        finally:
+            db.close()
+        for row in rows:
+            if row.status == "pending":
+                if self._due.get(row.id) != row.due_at:
+                    self._due[row.id] = row.due_at
+                    heapq.heappush(self._heap, (row.due_at, row.id))
+            else:
+                self._due.pop(row.id, None)
+        # 1 s Überlappung: updated_at hat in SQLite nur Sekundenauflösung
+        self._synced_since = started - timedelta(seconds=1)
+
+    def _drop_stale(self) -> None:
+        while self._heap and self._due.get(self._heap[0][1]) != self._heap[0][0]:
+            heapq.heappop(self._heap)
+
+    def pop_due(self, now: datetime) -> List[int]:
+        """Alle bis now fälligen Reminder-IDs aus dem Heap entnehmen."""
+        ids: List[int] = []
+        while self._heap and self._heap[0][0] <= now:
+            due_at, reminder_id = heapq.heappop(self._heap)
+            if self._due.get(reminder_id) == due_at:
+                del self._due[reminder_id]
+                ids.append(reminder_id)
+        return ids
+
+    def seconds_until_next(self, now: datetime) -> float:
+        """Schlafdauer bis zur nächsten Fälligkeit, höchstens bis zum nächsten Abgleich."""
+        self._drop_stale()
+        wait = float(self.poll_seconds)
+        if self._heap:
+            wait = min(wait, (self._heap[0][0] - now).total_seconds())
+        return max(wait, 0.0)
+
+    def deliver(self, reminder_ids: List[int]) -> int:
+        """Fällige Erinnerungen in Batches in die Mail-Warteschlange stellen. Gibt die Anzahl eingereihter zurück."""
+        queued_total = 0
+        for start in range(0, len(reminder_ids), self.batch_size):
+            chunk = reminder_ids[start:start + self.batch_size]
+            db = self._session_factory()
+            try:
+                now = datetime.utcnow()
+                reminders = (
+                    db.query(Reminder)
+                    .filter(Reminder.id.in_(chunk), Reminder.status == "pending", Reminder.due_at <= now)
+                    .all()
+                )
+                event_ids = {r.entity_id for r in reminders if r.entity_type == "event"}
+                meeting_ids = {r.entity_id for r in reminders if r.entity_type == "meeting"}
+                events = {e.id: e for e in db.query(Event).filter(Event.id.in_(event_ids)).all()} if event_ids else {}
+                meetings = {m.id: m for m in db.query(Meeting).filter(Meeting.id.in_(meeting_ids)).all()} if meeting_ids else {}
+
+                queued = 0
+                for r in reminders:
+                    if r.entity_type == "event" and r.entity_id in events:
+                        message = _event_message(events[r.entity_id], r.recipient_email)
+                    elif r.entity_type == "meeting" and r.entity_id in meetings:
+                        message = _meeting_message(meetings[r.entity_id], r.recipient_email)
+                    else:
+                        r.status = "cancelled"
+                        continue
+                    enqueue_email(
+                        db,
+                        message["to"],
+                        message["subject"],
+                        message["body"],
+                        entity_type="reminder",
+                        entity_id=r.id,
+                        typ=r.entity_type,
+                    )
+                    r.status = "sent"
+                    r.sent_at = now
+                    queued += 1
+                db.commit()
+                queued_total += queued
+            except Exception as e:
+                db.rollback()
+                # pop_due hat die IDs schon entnommen, die Zeilen bleiben aber unverändert "pending" –
+                # der inkrementelle Abgleich (updated_at) fände sie nie wieder. Nächster Abgleich lädt voll.
+                self._synced_since = None
+                logger.exception("Erinnerungen konnten nicht eingereiht werden: %s", e)
+            finally:
+                db.close()
+        return queued_total
+
+    def run_once(self) -> int:
+        self.refresh()
+        return self.deliver(self.pop_due(datetime.utcnow()))
+
+    def run_forever(self) -> None:
+        logger.info("Reminder-Scheduler gestartet (Abgleich alle %s s)", self.poll_seconds)
+        while not self._stop.is_set():
+            try:
+                self.run_once()
+            except Exception as e:
+                logger.exception("Reminder-Scheduler: Durchlauf fehlgeschlagen: %s", e)
+            self._stop.wait(self.seconds_until_next(datetime.utcnow()))
+        logger.info("Reminder-Scheduler beendet")
+
+    def stop(self) -> None:
+        self._stop.set()
@@ -0,0 +1,150 @@
+"""Rendering von DOCX-Dateien (docxtpl, python-docx) in einem ProcessPoolExecutor.
+
+Rendering ist reine CPU-Arbeit in Python und blockiert sonst den Event-Loop bzw. läuft wegen des
+GIL nur auf einem Kern. Die Funktionen hier sind modulweit definiert und bekommen nur picklebare
+Argumente (Pfade, dicts, RichText), damit sie in Kindprozessen laufen können.
+"""
+import asyncio
+import io
+import logging
+import multiprocessing
+import os
+import threading
+from concurrent.futures import Executor, ProcessPoolExecutor, ThreadPoolExecutor
+from typing import IO, Any, Callable, Dict, Optional, Tuple, Union
+
+from docx import Document as DocxDocument
+from docx.shared import Pt
+from docx.enum.text import WD_ALIGN_PARAGRAPH
+
+from app.config import settings
+from app.services.template_cache import template_cache
+
+logger = logging.getLogger(__name__)
+
+
+def render_template_docx(template_path: str, context: dict, out_path: str) -> str:
+    """docxtpl-Vorlage (aus dem Vorlagen-Cache des Prozesses) mit Kontext rendern und speichern."""
+    doc = template_cache.get(template_path)
+    doc.render(context)
+    os.makedirs(os.path.dirname(out_path), exist_ok=True)
+    doc.save(out_path)
+    return out_path
+
+
+def _render_and_report(template_path: str, context: dict, out_path: str) -> Tuple[str, int, dict]:
+    """Im Kindprozess: rendern und die Cache-Statistik des Prozesses mitliefern."""
+    render_template_docx(template_path, context, out_path)
+    return out_path, os.getpid(), template_cache.stats()
+
+
+def build_aenderungsantrag_docx(data: dict, out: Union[str, IO[bytes]]) -> None:
+    """Erstellt eine DOCX-Datei: Titel, Antragsteller, Begründung, Änderungstext, Synopse (Tabelle)."""
+    d = DocxDocument()
+    style = d.styles["Normal"]
+    style.font.size = Pt(11)
+    # Titel
+    title = d.add_paragraph()
+    title.add_run("Änderungsantrag").bold = True
+    title.alignment = WD_ALIGN_PARAGRAPH.CENTER
+    d.add_paragraph(data["dokument_titel"])
+    if data["titel"]:
+        d.add_paragraph(data["titel"])
+    d.add_paragraph()
+    d.add_paragraph(f"Antragsteller: {data['antragsteller']}")
+    if data["begruendung"]:
+        d.add_paragraph()
+        p = d.add_paragraph()
+        p.add_run("Begründung:").bold = True
+        d.add_paragraph(data["begruendung"])
+    stellen = data["stellen"]
+    # Änderungstext
+    d.add_paragraph()
+    h = d.add_paragraph()
+    h.add_run("Änderungstext").bold = True
+    h.paragraph_format.space_before = Pt(12)
+    for i, st in enumerate(stellen):
+        if st["bezug"]:
+            d.add_paragraph(st["bezug"]).paragraph_format.space_before = Pt(6)
+        d.add_paragraph(st["aenderungstext"])
+    # Synopse
+    d.add_paragraph()
+    h2 = d.add_paragraph()
+    h2.add_run("Synopse").bold = True
+    h2.paragraph_format.space_before = Pt(18)
+    table = d.add_table(rows=1 + len(stellen), cols=3)
+    table.style = "Table Grid"
+    hdr = table.rows[0].cells
+    hdr[0].text = "Bezug"
+    hdr[1].text = "Alte Fassung"
+    hdr[2].text = "Neue Fassung"
+    for i, st in enumerate(stellen):
+        row = table.rows[i + 1].cells
+        row[0].text = st["bezug"] or "—"
+        row[1].text = st["alte_fassung"] or "—"
+        row[2].text = st["neue_fassung"] or "—"
+    d.save(out)
+
+
+def aenderungsantrag_docx_bytes(data: dict) -> bytes:
+    """Änderungsantrag-DOCX im Speicher erzeugen (ohne Zwischendatei)."""
+    buf = io.BytesIO()
+    build_aenderungsantrag_docx(data, buf)
+    return buf.getvalue()
+
+
+_executor: Optional[Executor] = None
+_executor_lock = threading.Lock()
+_worker_stats: Dict[int, dict] = {}  # letzte gemeldete Vorlagen-Cache-Statistik je Render-Prozess
+
+
+def render_pool_size() -> int:
+    return settings.RENDER_POOL_SIZE if settings.RENDER_POOL_SIZE is not None else (os.cpu_count() or 1)
+
+
+def get_render_pool() -> Executor:
+    """Prozesspool beim ersten Gebrauch starten. RENDER_POOL_SIZE=0 rendert in Threads im API-Prozess."""
+    global _executor
+    with _executor_lock:
+        if _executor is None:
+            size = render_pool_size()
+            if size <= 0:
+                _executor = ThreadPoolExecutor(max_workers=2, thread_name_prefix="render")
+            else:
+                # spawn statt fork: der API-Prozess hält Threads (soffice-Pool), fork würde deren Locks kopieren
+                _executor = ProcessPoolExecutor(max_workers=size, mp_context=multiprocessing.get_context("spawn"))
+        return _executor
+
+
+def shutdown_render_pool() -> None:
+    global _executor
+    with _executor_lock:
+        if _executor is not None:
+            _executor.shutdown(wait=True, cancel_futures=True)
+            _executor = None
+
+
+async def run_in_render_pool(fn: Callable[..., Any], *args: Any) -> Any:
+    """fn(*args) im Render-Pool ausführen, ohne den Event-Loop zu blockieren."""
+    return await asyncio.get_running_loop().run_in_executor(get_render_pool(), fn, *args)
+
+
+async def render_template_async(template_path: str, context: dict, out_path: str) -> str:
+    """render_template_docx im Render-Pool; merkt sich die Cache-Statistik des ausführenden Prozesses."""
+    path, pid, stats = await run_in_render_pool(_render_and_report, template_path, context, out_path)
+    _worker_stats[pid] = stats
+    return path
+
+
+def template_cache_stats() -> dict:
+    """Trefferquote und Parse-Zeiten des Vorlagen-Caches über API- und Render-Prozesse."""
+    processes = dict(_worker_stats)
+    processes[os.getpid()] = template_cache.stats()
+    hits = sum(p["hits"] for p in processes.values())
+    lookups = hits + sum(p["misses"] + p["reloads"] for p in processes.values())
+    return {
+        "hits": hits,
+        "lookups": lookups,
+        "hit_rate": round(hits / lookups, 3) if lookups else None,
+        "processes": {str(pid): stats for pid, stats in processes.items()},
+    }
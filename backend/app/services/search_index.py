@@ -0,0 +1,188 @@
+"""Volltextindex search_entries: Einträge pflegen und durchsuchen.
+
+Ein Eintrag ist (kind, ref_id) mit Titel und Text, dazu die Angaben für die Rechteprüfung
+(min_role; tenant_id nur bei mandantengebundenen Einträgen wie Terminen) und kreisverband_id.
+Unter SQLite steht dahinter FTS5 (Ranking mit bm25, Ausschnitte mit snippet()); auf anderen
+Datenbanken wird mit LIKE gesucht und der Ausschnitt in Python gebildet. Commit macht jeweils der
+Aufrufer. Einträge schreiben services/text_extraction.py (Upload-Dateien) und
+services/search_records.py (Termine, Dokumente, Änderungsanträge, Sitzungen).
+"""
+import html
+import re
+from typing import Iterable, List, Optional, Sequence
+
+from sqlalchemy import bindparam, text
+from sqlalchemy.orm import Session
+
+from app.core.rbac import ROLE_HIERARCHY, has_min_role
+from app.models.search_entry import SEARCH_COLUMNS
+
+_TOKEN = re.compile(r"\w+", re.UNICODE)
+_MAX_TOKENS = 8
+_SNIPPET_TOKENS = 12
+_SNIPPET_CHARS = 160
+# Steuerzeichen als Markierung im FTS5-Ausschnitt; erst nach dem Escapen durch <mark> ersetzt
+_OPEN, _CLOSE = "\x02", "\x03"
+
+
+def _is_sqlite(db: Session) -> bool:
+    return db.get_bind().dialect.name == "sqlite"
+
+
+def replace_entry(
+    db: Session,
+    kind: str,
+    ref_id: int,
+    title: str,
+    body: Optional[str],
+    min_role: str,
+    kreisverband_id: Optional[int] = None,
+    tenant_id: Optional[int] = None,
+    source: Optional[str] = None,
+    content_hash: Optional[str] = None,
+) -> None:
+    """Eintrag (kind, ref_id) anlegen oder ersetzen."""
+    remove_entries(db, kind, [ref_id])
+    values = {
+        "title": title or "",
+        "body": body or "",
+        "kind": kind,
+        "ref_id": ref_id,
+        "kreisverband_id": kreisverband_id,
+        "tenant_id": tenant_id,
+        "min_role": min_role,
+        "source": source,
+        "content_hash": content_hash,
+    }
+    columns = ", ".join(SEARCH_COLUMNS)
+    placeholders = ", ".join(f":{c}" for c in SEARCH_COLUMNS)
+    db.execute(text(f"INSERT INTO search_entries ({columns}) VALUES ({placeholders})"), values)
+
+
+def remove_entries(db: Session, kind: str, ref_ids: Iterable[int]) -> None:
+    ids = list(ref_ids)
+    if not ids:
+        return
+    db.execute(
+        text("DELETE FROM search_entries WHERE kind = :kind AND ref_id IN :ids").bindparams(
+            bindparam("ids", expanding=True)
+        ),
+        {"kind": kind, "ids": ids},
+    )
+
+
+def query_tokens(q: str) -> List[str]:
+    """Suchbegriffe aus der Eingabe (Wörter, höchstens _MAX_TOKENS)."""
+    return _TOKEN.findall(q or "")[:_MAX_TOKENS]
+
+
+def _fts_query(tokens: Sequence[str]) -> str:
+    """Alle Begriffe müssen vorkommen; das letzte Wort auch als Präfix (Suche während der Eingabe)."""
+    parts = [f'"{t}"' for t in tokens]
+    parts[-1] += "*"
+    return " AND ".join(parts)
+
+
+def _visible_roles(user_role: str) -> List[str]:
+    return [role for role in ROLE_HIERARCHY if has_min_role(user_role, role)]
+
+
+def _highlight(snippet: str) -> str:
+    """Ausschnitt HTML-sicher machen; nur die Treffer-Markierungen werden zu <mark>."""
+    return html.escape(snippet).replace(_OPEN, "<mark>").replace(_CLOSE, "</mark>")
+
+
+def _plain_snippet(body: str, title: str, tokens: Sequence[str]) -> str:
+    """Ausschnitt um den ersten Treffer (Fallback ohne FTS5)."""
+    source = body or title
+    lowered = source.lower()
+    positions = [p for p in (lowered.find(t.lower()) for t in tokens) if p >= 0]
+    start = max(min(positions) - _SNIPPET_CHARS // 3, 0) if positions else 0
+    excerpt = source[start:start + _SNIPPET_CHARS]
+    pattern = re.compile("|".join(re.escape(t) for t in tokens), re.IGNORECASE)
+    marked = pattern.sub(lambda m: f"{_OPEN}{m.group(0)}{_CLOSE}", excerpt)
+    return ("…" if start else "") + marked + ("…" if start + _SNIPPET_CHARS < len(source) else "")
+
+
+def search(
+    db: Session,
+    q: str,
+    user_role: str,
+    tenant_ids: Optional[Sequence[int]] = None,
+    kreisverband_id: Optional[int] = None,
+    kinds: Optional[Sequence[str]] = None,
+    limit: int = 20,
+    offset: int = 0,
+) -> List[dict]:
+    """Treffer nach Relevanz, gefiltert auf die für user_role sichtbaren Einträge.
+
+    tenant_ids: sichtbare Mandanten (None = alle, z. B. Admin); Einträge ohne tenant_id sind nicht
+    mandantengebunden und bleiben sichtbar.
+    """
+    tokens = query_tokens(q)
+    if not tokens:
+        return []
+    filters = ["min_role IN :roles"]
+    params: dict = {"roles": _visible_roles(user_role), "limit": limit, "offset": offset}
+    expanding = [bindparam("roles", expanding=True)]
+    if tenant_ids is not None:
+        if tenant_ids:
+            filters.append("(tenant_id IS NULL OR tenant_id IN :tenant_ids)")
+            params["tenant_ids"] = list(tenant_ids)
+            expanding.append(bindparam("tenant_ids", expanding=True))
+        else:
+            filters.append("tenant_id IS NULL")
+    if kreisverband_id is not None:
+        filters.append("kreisverband_id = :kreisverband_id")
+        params["kreisverband_id"] = kreisverband_id
+    if kinds:
+        filters.append("kind IN :kinds")
+        params["kinds"] = list(kinds)
+        expanding.append(bindparam("kinds", expanding=True))
+
+    if _is_sqlite(db):
+        params["match"] = _fts_query(tokens)
+        sql = (
+            "SELECT kind, ref_id, kreisverband_id, source, title, "
+            f"snippet(search_entries, -1, '{_OPEN}', '{_CLOSE}', '…', {_SNIPPET_TOKENS}) AS snippet, "
+            "bm25(search_entries, 5.0, 1.0) AS score "
+            f"FROM search_entries WHERE search_entries MATCH :match AND {' AND '.join(filters)} "
+            "ORDER BY score LIMIT :limit OFFSET :offset"
+        )
+        rows = db.execute(text(sql).bindparams(*expanding), params).mappings().all()
+        return [
+            {
+                "kind": r["kind"],
+                "id": int(r["ref_id"]),
+                "kreisverband_id": r["kreisverband_id"],
+                "source": r["source"],
+                "title": r["title"],
+                "snippet": _highlight(r["snippet"]),
+                "score": -float(r["score"]),
+            }
+            for r in rows
+        ]
+
+    # Ohne FTS5: jeder Begriff muss in Titel oder Text vorkommen; Titeltreffer zuerst
+    for i, token in enumerate(tokens):
+        filters.append(f"(LOWER(title) LIKE :t{i} OR LOWER(body) LIKE :t{i})")
+        params[f"t{i}"] = f"%{token.lower()}%"
+    sql = (
+        "SELECT kind, ref_id, kreisverband_id, source, title, body, "
+        f"CASE WHEN LOWER(title) LIKE :t0 THEN 1 ELSE 0 END AS title_hit "
+        f"FROM search_entries WHERE {' AND '.join(filters)} "
+        "ORDER BY title_hit DESC, ref_id DESC LIMIT :limit OFFSET :offset"
+    )
+    rows = db.execute(text(sql).bindparams(*expanding), params).mappings().all()
+    return [
+        {
+            "kind": r["kind"],
+            "id": int(r["ref_id"]),
+            "kreisverband_id": r["kreisverband_id"],
+            "source": r["source"],
+            "title": r["title"],
+            "snippet": _highlight(_plain_snippet(r["body"] or "", r["title"] or "", tokens)),
+            "score": float(r["title_hit"]),
+        }
+        for r in rows
+    ]
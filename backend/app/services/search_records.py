@@ -0,0 +1,157 @@
+"""Suchindex-Einträge für Termine, Satzung/GO, Änderungsanträge und Sitzungen.
+
+Gepflegt über Session-Events: after_flush merkt sich geänderte/gelöschte Objekte, after_commit
+schreibt deren Einträge in einer eigenen Session neu (die committete Session darf kein SQL mehr
+senden). Fehler beim Indexieren werden nur geloggt – der Commit der Daten ist dann schon erfolgt;
+scripts.reindex_search baut den Index vollständig neu auf. Massen-Updates per query.update()
+laufen an den Events vorbei.
+"""
+import logging
+from itertools import chain
+from typing import Iterable, Iterator, Optional, Set, Tuple
+
+from sqlalchemy import event, text
+from sqlalchemy.orm import Session
+
+from app.models.document import Document
+from app.models.document_aenderung import DocumentAenderung
+from app.models.document_aenderungsantrag import DocumentAenderungsantrag
+from app.models.event import Event
+from app.models.meeting import Meeting
+from app.services.search_index import remove_entries, replace_entry
+
+logger = logging.getLogger(__name__)
+
+# kind im Suchindex → (Model, Mindestrolle wie beim Lesen über die API)
+RECORD_KINDS = {
+    "termin": (Event, "mitarbeiter"),  # zusätzlich mandantengebunden (tenant_id)
+    "dokument": (Document, "vorstand"),
+    "aenderungsantrag": (DocumentAenderungsantrag, "vorstand"),
+    "sitzung": (Meeting, "mitarbeiter"),
+}
+_KIND_BY_MODEL = {model: kind for kind, (model, _) in RECORD_KINDS.items()}
+_PENDING = "search_index_pending"
+_DOCUMENT_SOURCE = "documents:"  # source der Änderungsanträge: übergeordnetes Dokument
+
+Key = Tuple[str, int]
+
+
+def _strings(value) -> Iterator[str]:
+    """Alle Texte aus JSON-Feldern (Tagesordnung: str oder {"titel": …, "unterpunkte": […]})."""
+    if isinstance(value, str):
+        if value.strip():
+            yield value
+    elif isinstance(value, dict):
+        for item in value.values():
+            yield from _strings(item)
+    elif isinstance(value, (list, tuple)):
+        for item in value:
+            yield from _strings(item)
+
+
+def _join(*parts) -> str:
+    return "\n".join(chain.from_iterable(_strings(p) for p in parts))
+
+
+def _write(db: Session, kind: str, obj) -> None:
+    min_role = RECORD_KINDS[kind][1]
+    if kind == "termin":
+        replace_entry(db, kind, obj.id, obj.title, _join(obj.description, obj.location, obj.organizer),
+                      min_role=min_role, tenant_id=obj.tenant_id)
+    elif kind == "dokument":
+        replace_entry(db, kind, obj.id, obj.titel, obj.aktueller_text, min_role=min_role)
+    elif kind == "aenderungsantrag":
+        stellen = [(s.bezug, s.aenderungstext, s.alte_fassung, s.neue_fassung) for s in obj.stellen]
+        replace_entry(
+            db, kind, obj.id, obj.titel or f"Änderungsantrag von {obj.antragsteller}",
+            _join(obj.antragsteller, obj.antrag_text, obj.begruendung, obj.alte_fassung, obj.neue_fassung, stellen),
+            min_role=min_role, source=f"{_DOCUMENT_SOURCE}{obj.document_id}",
+        )
+    elif kind == "sitzung":
+        replace_entry(db, kind, obj.id, obj.titel,
+                      _join(obj.ort, obj.tagesordnung, obj.protokoll_top_texte, obj.beschluesse),
+                      min_role=min_role)
+
+
+def parent_id(kind: str, source: Optional[str]) -> Optional[int]:
+    """Übergeordnetes Objekt eines Treffers (Änderungsantrag → Dokument) für Links im Frontend."""
+    if kind == "aenderungsantrag" and source and source.startswith(_DOCUMENT_SOURCE):
+        return int(source[len(_DOCUMENT_SOURCE):])
+    return None
+
+
+def reindex(db: Session, keys: Iterable[Key]) -> None:
+    """Einträge der angegebenen Objekte neu schreiben bzw. entfernen (Commit macht der Aufrufer).
+
+    ("dokument_geloescht", id) entfernt zusätzlich die Änderungsanträge des Dokuments (per FK-Cascade gelöscht).
+    """
+    for kind, ref_id in sorted(keys):
+        if kind == "dokument_geloescht":
+            db.execute(
+                text("DELETE FROM search_entries WHERE kind = 'aenderungsantrag' AND source = :source"),
+                {"source": f"{_DOCUMENT_SOURCE}{ref_id}"},
+            )
+            continue
+        obj = db.get(RECORD_KINDS[kind][0], ref_id)
+        if obj is None:
+            remove_entries(db, kind, [ref_id])
+        else:
+            _write(db, kind, obj)
+
+
+def rebuild_records(db: Session) -> int:
+    """Alle Einträge für Termine, Dokumente, Änderungsanträge und Sitzungen neu aufbauen."""
+    count = 0
+    for kind, (model, _) in RECORD_KINDS.items():
+        db.execute(text("DELETE FROM search_entries WHERE kind = :kind"), {"kind": kind})
+        for obj in db.query(model).yield_per(200):
+            _write(db, kind, obj)
+            count += 1
+    return count
+
+
+def _keys(session: Session) -> Iterator[Key]:
+    for obj in chain(session.new, session.dirty):
+        if obj in session.dirty and not session.is_modified(obj, include_collections=False):
+            continue
+        if isinstance(obj, DocumentAenderung):
+            if obj.aenderungsantrag_id is not None:
+                yield "aenderungsantrag", obj.aenderungsantrag_id
+            continue
+        kind = _KIND_BY_MODEL.get(type(obj))
+        if kind and obj.id is not None:
+            yield kind, obj.id
+    for obj in session.deleted:
+        if isinstance(obj, DocumentAenderung):
+            yield "aenderungsantrag", obj.aenderungsantrag_id
+            continue
+        kind = _KIND_BY_MODEL.get(type(obj))
+        if kind:
+            yield kind, obj.id
+        if isinstance(obj, Document):
+            yield "dokument_geloescht", obj.id
+
+
+@event.listens_for(Session, "after_flush")
+def _remember_changes(session: Session, flush_context) -> None:
+    keys = set(_keys(session))
+    if keys:
+        session.info.setdefault(_PENDING, set()).update(keys)
+
+
+@event.listens_for(Session, "after_commit")
+def _index_changes(session: Session) -> None:
+    pending: Optional[Set[Key]] = session.info.pop(_PENDING, None)
+    if not pending:
+        return
+    try:
+        with Session(bind=session.get_bind()) as db:
+            reindex(db, pending)
+            db.commit()
+    except Exception as e:
+        logger.exception("Suchindex konnte nicht aktualisiert werden (%s Einträge): %s", len(pending), e)
+
+
+@event.listens_for(Session, "after_rollback")
+def _forget_changes(session: Session) -> None:
+    session.info.pop(_PENDING, None)
@@ -0,0 +1,58 @@
+"""Kurzlebige, signierte Download-Links: /dl/<pfad>?md5=<token>&expires=<unix>&name=<dateiname>.
+
+Format von nginx secure_link / secure_link_md5, damit nginx die Links selbst prüft und ausliefert:
+    token = base64url(MD5("<expires><uri><name> <secret>")), ohne "="-Padding
+uri ist "/dl/" + Pfad relativ zu UPLOAD_DIR, name der URL-kodierte Download-Dateiname (mitsigniert, da
+nginx ihn in Content-Disposition übernimmt). Ohne DOWNLOAD_URL_SECRET werden keine Links erzeugt.
+Ohne nginx (Entwicklung) prüft verify_download dieselben Links im Backend. Mit S3-Speicher
+(STORAGE_BACKEND=s3) sind die Links vorsignierte GET-URLs des Objektspeichers.
+"""
+import base64
+import hashlib
+import hmac
+import re
+import time
+from typing import Optional
+from urllib.parse import quote
+
+from app.config import settings
+from app.services.storage import get_storage, storage_key
+
+DOWNLOAD_PREFIX = "/dl/"
+
+# nginx vergleicht mit dem dekodierten $uri – nur Pfade ohne Sonderzeichen signieren
+_SAFE_PATH = re.compile(r"[A-Za-z0-9._/-]+")
+
+
+def _token(expires: int, uri: str, name: str) -> str:
+    raw = f"{expires}{uri}{name} {settings.DOWNLOAD_URL_SECRET}".encode("utf-8")
+    return base64.urlsafe_b64encode(hashlib.md5(raw).digest()).decode("ascii").rstrip("=")
+
+
+def signed_download_url(
+    stored: Optional[str], filename: str, ttl: Optional[int] = None, now: Optional[float] = None
+) -> Optional[str]:
+    """Signierten Link für einen gespeicherten Pfad; None, wenn keine Datei oder Signieren deaktiviert."""
+    rel = storage_key(stored)
+    if rel is None:
+        return None
+    storage = get_storage()
+    if storage.local_path(rel) is None:
+        return storage.presigned_url(rel, filename, ttl)
+    if not settings.DOWNLOAD_URL_SECRET or not _SAFE_PATH.fullmatch(rel) or ".." in rel.split("/"):
+        return None
+    expires = int(now if now is not None else time.time()) + (ttl or settings.DOWNLOAD_URL_TTL_SECONDS)
+    uri = DOWNLOAD_PREFIX + rel
+    name = quote(filename, safe="")
+    return f"{uri}?md5={_token(expires, uri, name)}&expires={expires}&name={name}"
+
+
+def verify_download(rel_path: str, md5: str, expires: int, name: str, now: Optional[float] = None) -> Optional[str]:
+    """Link prüfen wie nginx: None = gültig, sonst "invalid" oder "expired"."""
+    if not settings.DOWNLOAD_URL_SECRET:
+        return "invalid"
+    if not hmac.compare_digest(_token(expires, DOWNLOAD_PREFIX + rel_path, name), md5):
+        return "invalid"
+    if expires < (now if now is not None else time.time()):
+        return "expired"
+    return None
@@ -0,0 +1,47 @@
+"""Single-flight: gleichzeitige identische Anfragen teilen sich eine laufende Berechnung.
+
+Schlüssel ist (Ressource, Version), z. B. ("meeting-pdf", 12, "protokoll", <sha256 des DOCX>). Die
+Berechnung läuft als eigener Task, damit ein abgebrochener erster Aufrufer (Client getrennt) die
+Wartenden nicht mitreißt. Ergebnisse werden nicht aufbewahrt – dafür gibt es den PDF-Cache.
+"""
+import asyncio
+from typing import Awaitable, Callable, Dict, Hashable, TypeVar
+
+T = TypeVar("T")
+
+
+class SingleFlight:
+    """Pro Event-Loop (= uvicorn-Worker) eine Instanz verwenden."""
+
+    def __init__(self):
+        self._inflight: Dict[Hashable, asyncio.Future] = {}
+        self.calls = 0
+        self.shared = 0
+
+    def __len__(self) -> int:
+        return len(self._inflight)
+
+    async def do(self, key: Hashable, fn: Callable[[], Awaitable[T]]) -> T:
+        """fn() ausführen oder auf die bereits laufende Ausführung mit gleichem key warten."""
+        self.calls += 1
+        task = self._inflight.get(key)
+        if task is None:
+            task = asyncio.ensure_future(fn())
+            self._inflight[key] = task
+            task.add_done_callback(lambda t: self._done(key, t))
+        else:
+            self.shared += 1
+        return await asyncio.shield(task)
+
+    def _done(self, key: Hashable, task: asyncio.Future) -> None:
+        if self._inflight.get(key) is task:
+            del self._inflight[key]
+        if not task.cancelled():
+            task.exception()  # als abgerufen markieren, falls alle Wartenden abgebrochen wurden
+
+    def stats(self) -> dict:
+        return {"calls": self.calls, "shared": self.shared, "in_flight": len(self._inflight)}
+
+
+# Gemeinsame Instanz für PDF-Exporte und den öffentlichen ICS-Export
+document_flight = SingleFlight()
@@ -0,0 +1,241 @@
+"""Pool angemeldeter SMTP-Sitzungen mit Drosselung (Token-Bucket).
+
+Verbindungsaufbau, STARTTLS und Anmeldung kosten bei Office 365 rund eine Sekunde; der Pool hält
+bis zu SMTP_POOL_SIZE angemeldete Sitzungen offen und sendet viele Nachrichten über dieselbe. Eine
+Sitzung, die länger als SMTP_POOL_IDLE_SECONDS unbenutzt war, wird vor dem nächsten Versand durch
+eine neue ersetzt (der Server hat sie meist schon geschlossen). Antwortet der Server mit 421 oder
+bricht die Verbindung ab, wird einmal neu verbunden und die Nachricht erneut gesendet. Der
+Token-Bucket hält das Limit des Anbieters ein (SMTP_RATE_PER_MINUTE, Office 365: 30/min) – je
+Prozess, mehrere Worker teilen sich das Limit also nicht.
+"""
+import logging
+import smtplib
+import threading
+import time
+from typing import Callable, Dict, List, Optional, Sequence, Tuple
+
+from app.config import settings
+
+logger = logging.getLogger(__name__)
+
+# Server beendet die Sitzung ("Service not available", "Too many messages in this connection")
+_RECONNECT_CODES = {421}
+
+
+class TokenBucket:
+    """rate_per_minute Nachrichten pro Minute, Stoß bis capacity; wartende Aufrufer reservieren der Reihe nach."""
+
+    def __init__(
+        self,
+        rate_per_minute: float,
+        capacity: Optional[float] = None,
+        clock: Callable[[], float] = time.monotonic,
+        sleep: Callable[[float], None] = time.sleep,
+    ):
+        self.rate = rate_per_minute / 60.0
+        self.capacity = capacity if capacity is not None else rate_per_minute
+        self._tokens = float(self.capacity)
+        self._clock = clock
+        self._sleep = sleep
+        self._updated = clock()
+        self._lock = threading.Lock()
+
+    def acquire(self) -> float:
+        """Ein Token nehmen, notfalls warten. Gibt die Wartezeit in Sekunden zurück."""
+        with self._lock:
+            now = self._clock()
+            self._tokens = min(self.capacity, self._tokens + (now - self._updated) * self.rate)
+            self._updated = now
+            self._tokens -= 1  # negativ = bereits für spätere Aufrufer reserviert
+            wait = -self._tokens / self.rate if self._tokens < 0 else 0.0
+        if wait:
+            self._sleep(wait)
+        return wait
+
+
+def _close(server: smtplib.SMTP) -> None:
+    try:
+        server.quit()
+    except Exception:
+        try:
+            server.close()
+        except Exception:
+            pass
+
+
+class SMTPPool:
+    """Angemeldete SMTP-Sitzungen wiederverwenden; send() ist threadsicher."""
+
+    def __init__(
+        self,
+        host: str,
+        port: int,
+        user: Optional[str],
+        password: Optional[str],
+        *,
+        size: int = 2,
+        idle_seconds: float = 60,
+        rate_per_minute: float = 0,
+        starttls: bool = True,
+        timeout: float = 30,
+        clock: Callable[[], float] = time.monotonic,
+        sleep: Callable[[float], None] = time.sleep,
+    ):
+        self.host, self.port = host, port
+        self._user, self._password = user, password
+        self.size = max(size, 1)
+        self.idle_seconds = idle_seconds
+        self.starttls = starttls
+        self.timeout = timeout
+        self._clock = clock
+        self._bucket = TokenBucket(rate_per_minute, clock=clock, sleep=sleep) if rate_per_minute > 0 else None
+        self._slots = threading.BoundedSemaphore(self.size)
+        self._idle: List[Tuple[smtplib.SMTP, float]] = []  # (Sitzung, zuletzt benutzt), zuletzt benutzte hinten
+        self._lock = threading.Lock()
+        self._metrics = {"connects": 0, "reconnects": 0, "expired": 0, "sent": 0, "failed": 0, "throttled_seconds": 0.0}
+
+    def _connect(self) -> smtplib.SMTP:
+        server = smtplib.SMTP(self.host, self.port, timeout=self.timeout)
+        try:
+            if self.starttls:
+                server.starttls()
+            if self._user:
+                server.login(self._user, self._password or "")
+        except BaseException:
+            _close(server)
+            raise
+        with self._lock:
+            self._metrics["connects"] += 1
+        return server
+
+    def _checkout(self) -> smtplib.SMTP:
+        cutoff = self._clock() - self.idle_seconds
+        expired = []
+        server = None
+        with self._lock:
+            while self._idle:
+                candidate, last_used = self._idle.pop()
+                if last_used >= cutoff:
+                    server = candidate
+                    break
+                expired.append(candidate)
+            self._metrics["expired"] += len(expired)
+        for old in expired:
+            _close(old)
+        return server or self._connect()
+
+    def _checkin(self, server: smtplib.SMTP) -> None:
+        with self._lock:
+            self._idle.append((server, self._clock()))
+
+    def _count(self, key: str) -> None:
+        with self._lock:
+            self._metrics[key] += 1
+
+    def send(self, sender: str, to: Sequence[str], message: str) -> Dict[str, Tuple[int, bytes]]:
+        """Nachricht senden; gibt wie smtplib.sendmail die abgelehnten Empfänger zurück.
+
+        Fehler der Nachricht selbst (z. B. 550) lassen die Sitzung im Pool; bei 421 oder
+        Verbindungsabbruch wird einmal neu verbunden.
+        """
+        if self._bucket is not None:
+            waited = self._bucket.acquire()
+            if waited:
+                with self._lock:
+                    self._metrics["throttled_seconds"] += waited
+        with self._slots:
+            server = self._checkout()
+            for attempt in (1, 2):
+                try:
+                    refused = server.sendmail(sender, list(to), message)
+                except (smtplib.SMTPResponseException, smtplib.SMTPRecipientsRefused) as e:
+                    if getattr(e, "smtp_code", None) not in _RECONNECT_CODES:
+                        self._checkin(server)  # smtplib hat RSET gesendet, die Sitzung ist weiter nutzbar
+                        self._count("failed")
+                        raise
+                    _close(server)
+                except smtplib.SMTPServerDisconnected:
+                    _close(server)
+                except BaseException:
+                    _close(server)
+                    self._count("failed")
+                    raise
+                else:
+                    self._checkin(server)
+                    self._count("sent")
+                    return refused
+                if attempt == 2:
+                    self._count("failed")
+                    raise smtplib.SMTPServerDisconnected("Verbindung nach erneutem Verbinden wieder getrennt")
+                logger.info("SMTP: Sitzung vom Server beendet, verbinde neu")
+                self._count("reconnects")
+                server = self._connect()
+
+    def close(self) -> None:
+        """Alle offenen Sitzungen beenden (laufende Sendungen bleiben unberührt)."""
+        with self._lock:
+            idle, self._idle = self._idle, []
+        for server, _ in idle:
+            _close(server)
+
+    def stats(self) -> dict:
+        with self._lock:
+            m = dict(self._metrics)
+            idle = len(self._idle)
+        return {
+            "host": self.host,
+            "size": self.size,
+            "idle": idle,
+            "rate_per_minute": round(self._bucket.rate * 60, 2) if self._bucket else None,
+            **m,
+            "throttled_seconds": round(m["throttled_seconds"], 1),
+        }
+
+
+_pool: Optional[SMTPPool] = None
+_pool_key: Optional[tuple] = None
+_pool_lock = threading.Lock()
+
+
+def _settings_key() -> tuple:
+    return (
+        settings.SMTP_HOST, settings.SMTP_PORT, settings.SMTP_USER, settings.SMTP_PASSWORD,
+        settings.SMTP_STARTTLS, settings.SMTP_TIMEOUT, settings.SMTP_POOL_SIZE,
+        settings.SMTP_POOL_IDLE_SECONDS, settings.SMTP_RATE_PER_MINUTE,
+    )
+
+
+def get_smtp_pool() -> SMTPPool:
+    """Pool für die aktuellen SMTP-Einstellungen (einer pro Prozess; neu bei geänderten Einstellungen)."""
+    global _pool, _pool_key
+    key = _settings_key()
+    with _pool_lock:
+        if _pool is None or _pool_key != key:
+            if _pool is not None:
+                _pool.close()
+            _pool = SMTPPool(
+                settings.SMTP_HOST,
+                settings.SMTP_PORT,
+                settings.SMTP_USER,
+                settings.SMTP_PASSWORD,
+                size=settings.SMTP_POOL_SIZE,
+                idle_seconds=settings.SMTP_POOL_IDLE_SECONDS,
+                rate_per_minute=settings.SMTP_RATE_PER_MINUTE,
+                starttls=settings.SMTP_STARTTLS,
+                timeout=settings.SMTP_TIMEOUT,
+            )
+            _pool_key = key
+        return _pool
+
+
+def close_smtp_pool() -> None:
+    global _pool, _pool_key
+    with _pool_lock:
+        if _pool is not None:
+            _pool.close()
+        _pool = _pool_key = None
+
+
+def smtp_pool_stats() -> Optional[dict]:
+    """Metriken des Pools oder None, wenn noch nichts gesendet wurde."""
+    return _pool.stats() if _pool is not None else None
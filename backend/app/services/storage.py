@@ -0,0 +1,537 @@
+"""Speicher-Backends für Upload-Dateien: lokales Verzeichnis oder S3-kompatibler Objektspeicher.
+
+Schlüssel sind "/"-getrennte Pfade relativ zur Wurzel und entsprechen den Werten in der Datenbank
+(blobs/ab/cd/<sha256>.pdf, sitzungen/..., jobs/...). Auswahl über STORAGE_BACKEND:
+- "local": Dateien unter UPLOAD_DIR (ein Volume, Auslieferung per X-Accel-Redirect möglich)
+- "s3": AWS S3, MinIO, Ceph usw. (mehrere Backend-Knoten); Uploads ab S3_PART_SIZE_MB als Multipart-Upload,
+  Downloads über vorsignierte GET-URLs. Signatur AWS SigV4 direkt über httpx, kein boto3 nötig.
+Temporäre Dateien (Upload-Eingang, Render-Zwischenstände, PDF-Cache, Lock-Dateien) bleiben immer lokal.
+"""
+import errno
+from abc import ABC, abstractmethod
+import hashlib
+import hmac
+import os
+import shutil
+import tempfile
+import uuid
+import xml.etree.ElementTree as ET
+from contextlib import contextmanager
+from dataclasses import dataclass
+from datetime import datetime, timezone
+from email.utils import parsedate_to_datetime
+from typing import ContextManager, Dict, Iterator, List, Optional, Tuple
+from urllib.parse import quote, urlsplit
+
+import httpx
+
+from app.config import settings
+
+CHUNK_SIZE = 256 * 1024
+
+
+class StorageError(Exception):
+    """Speicher-Backend hat die Anfrage abgelehnt oder war nicht erreichbar."""
+
+
+@dataclass
+class StoredObject:
+    key: str
+    size: int
+    mtime: float  # Unix-Zeit der letzten Änderung
+
+
+def storage_key(stored: Optional[str]) -> Optional[str]:
+    """Gespeicherten Pfad als Schlüssel relativ zu UPLOAD_DIR; Altbestand enthält UPLOAD_DIR schon.
+    None, wenn der Pfad außerhalb liegt."""
+    if not stored:
+        return None
+    path = os.path.normpath(stored)
+    upload_dir = os.path.normpath(settings.UPLOAD_DIR)
+    if os.path.isabs(path) or path == upload_dir or path.startswith(upload_dir + os.sep):
+        path = os.path.relpath(os.path.abspath(path), os.path.abspath(upload_dir))
+    if os.path.isabs(path) or path == "." or path == ".." or path.startswith(".." + os.sep):
+        return None
+    return path.replace(os.sep, "/")
+
+
+class StorageBackend(ABC):
+    """Gemeinsame Schnittstelle der Backends; unvollständige Backends scheitern schon beim Instanziieren."""
+
+    name = ""
+
+    @abstractmethod
+    def put_file(self, key: str, source: str, content_type: Optional[str] = None, move: bool = False) -> None:
+        """Lokale Datei unter key ablegen (atomar: Leser sehen nie eine halbe Datei)."""
+        raise NotImplementedError
+
+    @abstractmethod
+    def put_bytes(self, key: str, data: bytes, content_type: Optional[str] = None) -> None:
+        raise NotImplementedError
+
+    @abstractmethod
+    def iter_bytes(self, key: str, start: int = 0, end: Optional[int] = None) -> Iterator[bytes]:
+        """Inhalt (optional Bytes start..end inklusive) in Blöcken; FileNotFoundError, wenn key fehlt."""
+        raise NotImplementedError
+
+    def read_bytes(self, key: str) -> bytes:
+        return b"".join(self.iter_bytes(key))
+
+    @abstractmethod
+    def stat(self, key: str) -> Optional[StoredObject]:
+        raise NotImplementedError
+
+    def exists(self, key: str) -> bool:
+        return self.stat(key) is not None
+
+    @abstractmethod
+    def touch(self, key: str) -> None:
+        """Änderungszeit auf jetzt setzen (schützt vor dem Aufräum-Lauf)."""
+        raise NotImplementedError
+
+    @abstractmethod
+    def delete(self, key: str) -> None:
+        """Datei löschen; fehlt sie, passiert nichts."""
+        raise NotImplementedError
+
+    def local_path(self, key: str) -> Optional[str]:
+        """Pfad im lokalen Dateisystem, falls das Backend lokal ist."""
+        return None
+
+    @abstractmethod
+    def local_copy(self, key: str) -> ContextManager[str]:
+        """Kontextmanager (@contextmanager) mit lokalem Pfad für Werkzeuge, die eine Datei brauchen
+        (LibreOffice, ZIP); FileNotFoundError, wenn key fehlt."""
+        raise NotImplementedError
+
+    def presigned_url(self, key: str, filename: Optional[str] = None, ttl: Optional[int] = None) -> Optional[str]:
+        """Vorsignierte Download-URL; None, wenn das Backend keine anbietet."""
+        return None
+
+    @abstractmethod
+    def iter_files(self, prefix: str, start_after: str = "") -> Iterator[StoredObject]:
+        """Dateien unter prefix in fester Reihenfolge, nur die nach start_after (für inkrementelle Läufe)."""
+        raise NotImplementedError
+
+
+class LocalStorage(StorageBackend):
+    """Dateien unter UPLOAD_DIR (bzw. root)."""
+
+    name = "local"
+
+    def __init__(self, root: Optional[str] = None):
+        self._root = root
+
+    @property
+    def root(self) -> str:
+        return self._root or settings.UPLOAD_DIR
+
+    def _path(self, key: str) -> str:
+        return os.path.join(self.root, *key.split("/"))
+
+    def local_path(self, key: str) -> Optional[str]:
+        return self._path(key)
+
+    def put_file(self, key: str, source: str, content_type: Optional[str] = None, move: bool = False) -> None:
+        target = self._path(key)
+        os.makedirs(os.path.dirname(target), exist_ok=True)
+        if move:
+            try:
+                os.replace(source, target)
+                return
+            except OSError as e:
+                if e.errno != errno.EXDEV:
+                    raise
+        tmp = f"{target}.{uuid.uuid4().hex}.tmp"
+        try:
+            shutil.copyfile(source, tmp)
+            os.replace(tmp, target)
+        finally:
+            if os.path.exists(tmp):
+                os.unlink(tmp)
+        if move:
+            os.unlink(source)
+
+    def put_bytes(self, key: str, data: bytes, content_type: Optional[str] = None) -> None:
+        target = self._path(key)
+        os.makedirs(os.path.dirname(target), exist_ok=True)
+        tmp = f"{target}.{uuid.uuid4().hex}.tmp"
+        with open(tmp, "wb") as f:
+            f.write(data)
+        os.replace(tmp, target)
+
+    def iter_bytes(self, key: str, start: int = 0, end: Optional[int] = None) -> Iterator[bytes]:
+        f = open(self._path(key), "rb")  # FileNotFoundError sofort, nicht erst beim ersten Block
+
+        def chunks() -> Iterator[bytes]:
+            with f:
+                f.seek(start)
+                remaining = None if end is None else end - start + 1
+                while remaining is None or remaining > 0:
+                    chunk = f.read(CHUNK_SIZE if remaining is None else min(CHUNK_SIZE, remaining))
+                    if not chunk:
+                        break
+                    if remaining is not None:
+                        remaining -= len(chunk)
+                    yield chunk
+
+        return chunks()
+
+    def stat(self, key: str) -> Optional[StoredObject]:
+        try:
+            st = os.stat(self._path(key))
+        except (FileNotFoundError, NotADirectoryError):
+            return None
+        if not os.path.isfile(self._path(key)):
+            return None
+        return StoredObject(key=key, size=st.st_size, mtime=st.st_mtime)
+
+    def touch(self, key: str) -> None:
+        os.utime(self._path(key))
+
+    def delete(self, key: str) -> None:
+        try:
+            os.unlink(self._path(key))
+        except FileNotFoundError:
+            pass
+
+    @contextmanager
+    def local_copy(self, key: str) -> Iterator[str]:
+        path = self._path(key)
+        if not os.path.isfile(path):
+            raise FileNotFoundError(key)
+        yield path
+
+    def _walk(self, rel: Tuple[str, ...], cursor: Tuple[str, ...]) -> Iterator[StoredObject]:
+        """Sortiert nach Pfadbestandteilen; Teilbäume vor dem Cursor werden nicht betreten."""
+        try:
+            with os.scandir(os.path.join(self.root, *rel)) as it:
+                entries = sorted(it, key=lambda e: e.name)
+        except (FileNotFoundError, NotADirectoryError):
+            return
+        for entry in entries:
+            key = rel + (entry.name,)
+            if entry.is_dir(follow_symlinks=False):
+                if key < cursor[: len(key)]:
+                    continue
+                yield from self._walk(key, cursor)
+            elif entry.is_file(follow_symlinks=False) and key > cursor:
+                try:
+                    st = entry.stat(follow_symlinks=False)
+                except FileNotFoundError:
+                    continue
+                yield StoredObject(key="/".join(key), size=st.st_size, mtime=st.st_mtime)
+
+    def iter_files(self, prefix: str, start_after: str = "") -> Iterator[StoredObject]:
+        rel = tuple(p for p in prefix.split("/") if p)
+        return self._walk(rel, tuple(start_after.split("/")) if start_after else ())
+
+
+def _sha256_hex(data: bytes) -> str:
+    return hashlib.sha256(data).hexdigest()
+
+
+def _hmac(key: bytes, msg: str) -> bytes:
+    return hmac.new(key, msg.encode("utf-8"), hashlib.sha256).digest()
+
+
+def _canonical_query(query: Dict[str, str]) -> str:
+    return "&".join(f"{quote(k, safe='-_.~')}={quote(v, safe='-_.~')}" for k, v in sorted(query.items()))
+
+
+def _xml_text(element: ET.Element, name: str) -> Optional[str]:
+    """Text des ersten Kindelements name (Namespace egal)."""
+    for child in element.iter():
+        if child.tag.rsplit("}", 1)[-1] == name:
+            return child.text
+    return None
+
+
+UNSIGNED_PAYLOAD = "UNSIGNED-PAYLOAD"
+
+
+class S3Storage(StorageBackend):
+    """S3-kompatibler Objektspeicher, signiert mit AWS SigV4."""
+
+    name = "s3"
+
+    def __init__(
+        self,
+        endpoint_url: str,
+        bucket: str,
+        access_key: str,
+        secret_key: str,
+        region: str = "us-east-1",
+        prefix: str = "",
+        path_style: bool = True,
+        part_size: int = 8 * 1024 * 1024,
+        transport: Optional[httpx.BaseTransport] = None,
+        timeout: float = 60,
+    ):
+        if part_size < 5 * 1024 * 1024:
+            raise ValueError("S3 verlangt mindestens 5 MB pro Teil (außer dem letzten)")
+        parts = urlsplit(endpoint_url)
+        self.scheme = parts.scheme or "https"
+        self.bucket = bucket
+        self.region = region
+        self.prefix = prefix.strip("/") + "/" if prefix.strip("/") else ""
+        self.path_style = path_style
+        self.part_size = part_size
+        self._access_key = access_key
+        self._secret_key = secret_key
+        self._host = parts.netloc if path_style else f"{bucket}.{parts.netloc}"
+        self._client = httpx.Client(transport=transport, timeout=timeout)
+
+    @classmethod
+    def from_settings(cls) -> "S3Storage":
+        missing = [
+            name
+            for name in ("S3_ENDPOINT_URL", "S3_BUCKET", "S3_ACCESS_KEY_ID", "S3_SECRET_ACCESS_KEY")
+            if not getattr(settings, name)
+        ]
+        if missing:
+            raise StorageError("STORAGE_BACKEND=s3, aber nicht gesetzt: " + ", ".join(missing))
+        return cls(
+            endpoint_url=settings.S3_ENDPOINT_URL,
+            bucket=settings.S3_BUCKET,
+            access_key=settings.S3_ACCESS_KEY_ID,
+            secret_key=settings.S3_SECRET_ACCESS_KEY,
+            region=settings.S3_REGION,
+            prefix=settings.S3_PREFIX or "",
+            path_style=settings.S3_FORCE_PATH_STYLE,
+            part_size=settings.S3_PART_SIZE_MB * 1024 * 1024,
+        )
+
+    # --- Signatur (AWS Signature Version 4) ---
+
+    def _uri(self, key: Optional[str]) -> str:
+        path = "/" + quote(self.prefix + key, safe="/~") if key is not None else "/"
+        return f"/{self.bucket}{path}" if self.path_style else path
+
+    def _signing_key(self, day: str) -> bytes:
+        k = _hmac(("AWS4" + self._secret_key).encode("utf-8"), day)
+        k = _hmac(k, self.region)
+        k = _hmac(k, "s3")
+        return _hmac(k, "aws4_request")
+
+    def _signature(self, canonical_request: str, amz_date: str) -> Tuple[str, str]:
+        scope = f"{amz_date[:8]}/{self.region}/s3/aws4_request"
+        string_to_sign = "\n".join(["AWS4-HMAC-SHA256", amz_date, scope, _sha256_hex(canonical_request.encode("utf-8"))])
+        return scope, hmac.new(self._signing_key(amz_date[:8]), string_to_sign.encode("utf-8"), hashlib.sha256).hexdigest()
+
+    def sign_headers(
+        self,
+        method: str,
+        uri: str,
+        query: Dict[str, str],
+        headers: Dict[str, str],
+        payload_hash: str,
+        now: Optional[datetime] = None,
+    ) -> Dict[str, str]:
+        """Header inklusive Authorization für eine Anfrage."""
+        amz_date = (now or datetime.now(timezone.utc)).strftime("%Y%m%dT%H%M%SZ")
+        signed = {k.lower(): str(v).strip() for k, v in headers.items()}
+        signed.update({"host": self._host, "x-amz-date": amz_date, "x-amz-content-sha256": payload_hash})
+        names = sorted(signed)
+        canonical_request = "\n".join([
+            method,
+            uri,
+            _canonical_query(query),
+            "".join(f"{name}:{signed[name]}\n" for name in names),
+            ";".join(names),
+            payload_hash,
+        ])
+        scope, signature = self._signature(canonical_request, amz_date)
+        signed["authorization"] = (
+            f"AWS4-HMAC-SHA256 Credential={self._access_key}/{scope}, "
+            f"SignedHeaders={';'.join(names)}, Signature={signature}"
+        )
+        del signed["host"]  # setzt httpx aus der URL
+        return signed
+
+    def presigned_url(
+        self, key: str, filename: Optional[str] = None, ttl: Optional[int] = None, now: Optional[datetime] = None
+    ) -> Optional[str]:
+        amz_date = (now or datetime.now(timezone.utc)).strftime("%Y%m%dT%H%M%SZ")
+        uri = self._uri(key)
+        query = {
+            "X-Amz-Algorithm": "AWS4-HMAC-SHA256",
+            "X-Amz-Credential": f"{self._access_key}/{amz_date[:8]}/{self.region}/s3/aws4_request",
+            "X-Amz-Date": amz_date,
+            "X-Amz-Expires": str(ttl or settings.DOWNLOAD_URL_TTL_SECONDS),
+            "X-Amz-SignedHeaders": "host",
+        }
+        if filename:
+            query["response-content-disposition"] = f"attachment; filename*=utf-8''{quote(filename, safe='')}"
+        canonical_request = "\n".join(["GET", uri, _canonical_query(query), f"host:{self._host}\n", "host", UNSIGNED_PAYLOAD])
+        _, signature = self._signature(canonical_request, amz_date)
+        return f"{self.scheme}://{self._host}{uri}?{_canonical_query(query)}&X-Amz-Signature={signature}"
+
+    # --- Anfragen ---
+
+    def _send(
+        self,
+        method: str,
+        key: Optional[str],
+        query: Optional[Dict[str, str]] = None,
+        headers: Optional[Dict[str, str]] = None,
+        content=None,
+        payload_hash: Optional[str] = None,
+        stream: bool = False,
+    ) -> httpx.Response:
+        query = query or {}
+        if payload_hash is None:
+            payload_hash = _sha256_hex(content if isinstance(content, bytes) else b"")
+        uri = self._uri(key)
+        signed = self.sign_headers(method, uri, query, headers or {}, payload_hash)
+        url = f"{self.scheme}://{self._host}{uri}" + (f"?{_canonical_query(query)}" if query else "")
+        request = self._client.build_request(method, url, headers=signed, content=content)
+        try:
+            return self._client.send(request, stream=stream)
+        except httpx.HTTPError as e:
+            raise StorageError(f"S3 {method} {key}: {e}") from e
+
+    @staticmethod
+    def _check(response: httpx.Response, what: str) -> httpx.Response:
+        if response.status_code >= 300:
+            response.read()
+            code = _xml_text(ET.fromstring(response.content), "Code") if response.content.startswith(b"<") else None
+            raise StorageError(f"S3 {what}: HTTP {response.status_code} {code or ''}".strip())
+        return response
+
+    def put_bytes(self, key: str, data: bytes, content_type: Optional[str] = None) -> None:
+        headers = {"content-type": content_type} if content_type else {}
+        self._check(self._send("PUT", key, headers=headers, content=data), f"PUT {key}")
+
+    def put_file(self, key: str, source: str, content_type: Optional[str] = None, move: bool = False) -> None:
+        size = os.path.getsize(source)
+        headers = {"content-type": content_type} if content_type else {}
+        if size <= self.part_size:
+            with open(source, "rb") as f:
+                self._check(
+                    self._send("PUT", key, headers={**headers, "content-length": str(size)}, content=f, payload_hash=UNSIGNED_PAYLOAD),
+                    f"PUT {key}",
+                )
+        else:
+            self._multipart_upload(key, source, headers)
+        if move:
+            os.unlink(source)
+
+    def _multipart_upload(self, key: str, source: str, headers: Dict[str, str]) -> None:
+        """Datei in Teilen zu je part_size hochladen; im Speicher liegt immer nur ein Teil."""
+        created = self._check(self._send("POST", key, query={"uploads": ""}, headers=headers), f"Multipart {key}")
+        upload_id = _xml_text(ET.fromstring(created.content), "UploadId")
+        if not upload_id:
+            raise StorageError(f"S3 Multipart {key}: keine UploadId")
+        try:
+            etags: List[str] = []
+            with open(source, "rb") as f:
+                for number, part in enumerate(iter(lambda: f.read(self.part_size), b""), start=1):
+                    response = self._check(
+                        self._send("PUT", key, query={"partNumber": str(number), "uploadId": upload_id}, content=part),
+                        f"Teil {number} von {key}",
+                    )
+                    etags.append(response.headers["etag"])
+            body = "<CompleteMultipartUpload>" + "".join(
+                f"<Part><PartNumber>{n}</PartNumber><ETag>{etag}</ETag></Part>" for n, etag in enumerate(etags, start=1)
+            ) + "</CompleteMultipartUpload>"
+            completed = self._check(
+                self._send("POST", key, query={"uploadId": upload_id}, content=body.encode("utf-8")), f"Abschluss {key}"
+            )
+            if b"<Error>" in completed.content:  # S3 meldet Fehler beim Abschluss auch mit HTTP 200
+                raise StorageError(f"S3 Abschluss {key}: {_xml_text(ET.fromstring(completed.content), 'Code')}")
+        except BaseException:
+            try:
+                self._send("DELETE", key, query={"uploadId": upload_id}).close()
+            except StorageError:
+                pass
+            raise
+
+    def iter_bytes(self, key: str, start: int = 0, end: Optional[int] = None) -> Iterator[bytes]:
+        headers = {}
+        if start or end is not None:
+            headers["range"] = f"bytes={start}-{'' if end is None else end}"
+        response = self._send("GET", key, headers=headers, stream=True)
+        if response.status_code == 404:
+            response.close()
+            raise FileNotFoundError(key)
+        try:
+            self._check(response, f"GET {key}")
+        except StorageError:
+            response.close()
+            raise
+
+        def chunks() -> Iterator[bytes]:
+            try:
+                yield from response.iter_bytes(CHUNK_SIZE)
+            finally:
+                response.close()
+
+        return chunks()
+
+    def stat(self, key: str) -> Optional[StoredObject]:
+        response = self._send("HEAD", key)
+        if response.status_code == 404:
+            return None
+        self._check(response, f"HEAD {key}")
+        modified = response.headers.get("last-modified")
+        mtime = parsedate_to_datetime(modified).timestamp() if modified else 0.0
+        return StoredObject(key=key, size=int(response.headers.get("content-length", 0)), mtime=mtime)
+
+    def touch(self, key: str) -> None:
+        source = quote(f"/{self.bucket}/{self.prefix}{key}", safe="/~")
+        self._check(
+            self._send("PUT", key, headers={"x-amz-copy-source": source, "x-amz-metadata-directive": "REPLACE"}),
+            f"COPY {key}",
+        )
+
+    def delete(self, key: str) -> None:
+        response = self._send("DELETE", key)
+        if response.status_code != 404:
+            self._check(response, f"DELETE {key}")
+
+    @contextmanager
+    def local_copy(self, key: str) -> Iterator[str]:
+        chunks = self.iter_bytes(key)
+        fd, path = tempfile.mkstemp(suffix=os.path.splitext(key)[1])
+        try:
+            with os.fdopen(fd, "wb") as f:
+                for chunk in chunks:
+                    f.write(chunk)
+            yield path
+        finally:
+            os.unlink(path)
+
+    def iter_files(self, prefix: str, start_after: str = "") -> Iterator[StoredObject]:
+        query = {"list-type": "2", "prefix": self.prefix + prefix}
+        if start_after:
+            query["start-after"] = self.prefix + start_after
+        while True:
+            response = self._check(self._send("GET", None, query=query), f"LIST {prefix}")
+            root = ET.fromstring(response.content)
+            for item in root:
+                if item.tag.rsplit("}", 1)[-1] != "Contents":
+                    continue
+                modified = _xml_text(item, "LastModified") or ""
+                mtime = datetime.fromisoformat(modified.replace("Z", "+00:00")).timestamp() if modified else 0.0
+                yield StoredObject(
+                    key=(_xml_text(item, "Key") or "")[len(self.prefix):],
+                    size=int(_xml_text(item, "Size") or 0),
+                    mtime=mtime,
+                )
+            token = _xml_text(root, "NextContinuationToken")
+            if _xml_text(root, "IsTruncated") != "true" or not token:
+                return
+            query = {k: v for k, v in query.items() if k != "start-after"}
+            query["continuation-token"] = token
+
+
+_backend: Optional[StorageBackend] = None
+
+
+def get_storage() -> StorageBackend:
+    """Das konfigurierte Backend (einmal je Prozess erzeugt)."""
+    global _backend
+    if _backend is None:
+        _backend = S3Storage.from_settings() if settings.STORAGE_BACKEND == "s3" else LocalStorage()
+    return _backend
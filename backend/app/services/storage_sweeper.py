@@ -0,0 +1,248 @@
+"""Aufräumen verwaister Upload-Dateien und Speicherbelegung je Bereich.
+
+Abgeglichen werden die Upload-Bereiche (SWEPT_AREAS) mit allen Datenbankspalten, die auf Dateien
+verweisen (FILE_COLUMNS). Nicht referenzierte Dateien, die älter als STORAGE_SWEEP_GRACE_HOURS sind,
+werden gelöscht: Dateien gelöschter Sitzungen, Reste abgebrochener Uploads/Exporte (.part, .tmp),
+Anhänge, deren Löschen fehlschlug. Der Lauf ist inkrementell: pro Aufruf höchstens STORAGE_SWEEP_BATCH
+Dateien in fester Reihenfolge (lokal os.scandir nach Namen sortiert, S3 ListObjectsV2 mit start-after);
+der Cursor (zuletzt geprüfter Pfad) steht in storage_sweeps und überlebt Neustarts. Am Ende jedes
+Durchgangs werden außerdem alte, nicht gehaltene Lock-Dateien unter .locks entfernt. Aufgerufen vom
+Dokument-Worker.
+"""
+import logging
+import os
+import re
+from datetime import datetime, timedelta
+from typing import Dict, Iterable, Iterator, List, Optional, Set, Tuple
+
+from sqlalchemy import case, func
+from sqlalchemy.orm import Session
+
+from app.config import settings
+from app.models.blob import Blob
+from app.models.document import Document
+from app.models.document_job import DocumentJob
+from app.models.email_outbox import EmailOutbox
+from app.models.email_template import EmailTemplate
+from app.models.kreisverband import KVProtokoll
+from app.models.meeting import Meeting
+from app.models.storage_sweep import StorageSweep
+from app.services.blob_store import remove_stray_file
+from app.services.locks import LockTimeout, remove_stale_lock_files, resource_lock
+from app.services.pdf_cache import pdf_cache
+from app.services.storage import LocalStorage, StorageBackend, StorageError, StoredObject, get_storage
+
+logger = logging.getLogger(__name__)
+
+# Verzeichnisse unter UPLOAD_DIR mit Dateien, auf die die Datenbank verweist. Nicht dazu gehören
+# cache/pdf (eigene LRU-Verdrängung) und .locks (nur ungesperrt löschbar, siehe remove_stale_lock_files).
+SWEPT_AREAS = ("blobs", "dokumente", "email_templates", "jobs", "protokolle", "sitzungen")
+
+# Spalten mit Dateipfaden (relativ zu UPLOAD_DIR, Altbestand inklusive UPLOAD_DIR)
+FILE_COLUMNS = [
+    Meeting.einladung_pfad,
+    Meeting.protokoll_pfad,
+    KVProtokoll.datei_pfad,
+    KVProtokoll.pdf_pfad,
+    KVProtokoll.thumbnail_pfad,
+    Document.datei_pfad,
+    EmailTemplate.attachment_storage_path,
+    EmailOutbox.attachment_path,
+    Blob.path,
+    DocumentJob.result_path,
+]
+
+_BLOB_FILE = re.compile(r"blobs/[0-9a-f]{2}/[0-9a-f]{2}/[0-9a-f]{64}(\.[A-Za-z0-9]+)?")
+_QUERY_CHUNK = 400  # Parameter je IN-Abfrage (SQLite erlaubt höchstens 999)
+
+def _iter_areas(storage: StorageBackend, cursor: str) -> Iterator[StoredObject]:
+    """Dateien der Upload-Bereiche nach dem Cursor, Bereich für Bereich."""
+    cursor_area = cursor.split("/", 1)[0] if cursor else ""
+    for area in SWEPT_AREAS:
+        if area < cursor_area:
+            continue
+        yield from storage.iter_files(area + "/", cursor if area == cursor_area else "")
+
+
+def _chunks(items: List[str], size: int) -> Iterator[List[str]]:
+    for i in range(0, len(items), size):
+        yield items[i:i + size]
+
+
+def referenced_paths(db: Session, rel_paths: Iterable[str]) -> Set[str]:
+    """Die Pfade aus rel_paths, auf die mindestens eine Datenbankspalte verweist."""
+    variants: Dict[str, str] = {}
+    for rel in rel_paths:
+        variants[rel] = rel
+        variants[os.path.join(settings.UPLOAD_DIR, rel)] = rel
+    found: Set[str] = set()
+    values = list(variants)
+    for column in FILE_COLUMNS:
+        for chunk in _chunks(values, _QUERY_CHUNK):
+            for (value,) in db.query(column).filter(column.in_(chunk)).all():
+                found.add(variants[value])
+    return found
+
+
+def _remove(db: Session, storage: StorageBackend, rel_path: str, older_than: float) -> Optional[int]:
+    """Verwaiste Datei löschen, sofern sie noch alt genug ist. Gibt die freigegebenen Bytes zurück
+    (None = nicht gelöscht)."""
+    if _BLOB_FILE.fullmatch(rel_path):
+        return remove_stray_file(db, rel_path, older_than)
+    current = storage.stat(rel_path)
+    if current is None or current.mtime >= older_than:  # inzwischen neu geschrieben (z. B. gleiches Dokument)
+        return None
+    try:
+        storage.delete(rel_path)
+    except (OSError, StorageError) as e:
+        logger.warning("Verwaiste Datei %s konnte nicht gelöscht werden: %s", rel_path, e)
+        return None
+    return current.size
+
+
+def _state(db: Session) -> StorageSweep:
+    state = db.get(StorageSweep, 1)
+    if state is None:
+        state = StorageSweep(id=1, deleted_files=0, deleted_bytes=0)
+        db.add(state)
+        db.flush()
+    return state
+
+
+def sweep_orphans(db: Session, now: Optional[datetime] = None, batch: Optional[int] = None) -> dict:
+    """Nächsten Abschnitt der Upload-Bereiche prüfen und verwaiste Dateien löschen.
+
+    Läuft bereits ein anderer Prozess, wird nichts getan. Gibt geprüfte/gelöschte Dateien zurück.
+    """
+    now = now or datetime.utcnow()
+    batch = batch or settings.STORAGE_SWEEP_BATCH
+    older_than = (now - timedelta(hours=settings.STORAGE_SWEEP_GRACE_HOURS)).timestamp()
+    try:
+        with resource_lock("storage-sweep", db, timeout=0):
+            storage = get_storage()
+            state = _state(db)
+            if not state.cursor:
+                state.pass_started_at = now
+            checked: List[str] = []
+            candidates: List[str] = []
+            for obj in _iter_areas(storage, state.cursor or ""):
+                checked.append(obj.key)
+                if obj.mtime < older_than:
+                    candidates.append(obj.key)
+                if len(checked) >= batch:
+                    break
+            referenced = referenced_paths(db, candidates) if candidates else set()
+            deleted = freed = 0
+            for rel in candidates:
+                if rel in referenced:
+                    continue
+                size = _remove(db, storage, rel, older_than)
+                if size is not None:
+                    deleted += 1
+                    freed += size
+            completed = len(checked) < batch
+            state.cursor = None if completed else checked[-1]
+            if completed:
+                state.last_pass_at = now
+                stale_locks = remove_stale_lock_files(older_than)
+                if stale_locks:
+                    logger.info("Upload-Speicher: %s alte Lock-Dateien entfernt", stale_locks)
+            state.deleted_files += deleted
+            state.deleted_bytes += freed
+            db.commit()
+    except LockTimeout:
+        db.rollback()  # anderer Prozess räumt gerade auf
+        return {"checked": 0, "deleted": 0, "freed_bytes": 0, "pass_completed": False}
+    if deleted:
+        logger.info("Upload-Speicher: %s verwaiste Dateien gelöscht (%s Bytes)", deleted, freed)
+    return {"checked": len(checked), "deleted": deleted, "freed_bytes": freed, "pass_completed": completed}
+
+
+def _usage(path: str) -> Tuple[int, int]:
+    """(Anzahl Dateien, Bytes) unterhalb von path."""
+    files = size = 0
+    try:
+        with os.scandir(path) as it:
+            for entry in it:
+                if entry.is_dir(follow_symlinks=False):
+                    sub_files, sub_size = _usage(entry.path)
+                    files += sub_files
+                    size += sub_size
+                elif entry.is_file(follow_symlinks=False):
+                    files += 1
+                    size += entry.stat(follow_symlinks=False).st_size
+    except (FileNotFoundError, NotADirectoryError):
+        pass
+    return files, size
+
+
+def _local_areas(root: str) -> List[dict]:
+    areas = []
+    loose_files = loose_bytes = 0
+    try:
+        with os.scandir(root) as it:
+            entries = sorted(it, key=lambda e: e.name)
+    except FileNotFoundError:
+        entries = []
+    for entry in entries:
+        if entry.is_dir(follow_symlinks=False):
+            files, size = _usage(entry.path)
+            areas.append({"area": entry.name, "files": files, "bytes": size, "swept": entry.name in SWEPT_AREAS})
+        elif entry.is_file(follow_symlinks=False):
+            loose_files += 1
+            loose_bytes += entry.stat(follow_symlinks=False).st_size
+    if loose_files:
+        areas.append({"area": ".", "files": loose_files, "bytes": loose_bytes, "swept": False})
+    return areas
+
+
+def storage_usage(db: Session) -> dict:
+    """Belegung je Bereich (Speicher-Backend und lokales UPLOAD_DIR), Blob-Referenzen und Stand des
+    Aufräum-Laufs (für Admins). Bei S3 wird dafür der Bucket gelistet."""
+    storage = get_storage()
+    root = settings.UPLOAD_DIR
+    if isinstance(storage, LocalStorage):
+        areas = [{**a, "backend": storage.name} for a in _local_areas(storage.root)]
+    else:
+        areas = []
+        for area in SWEPT_AREAS:
+            files = size = 0
+            for obj in storage.iter_files(area + "/"):
+                files += 1
+                size += obj.size
+            areas.append({"area": area, "files": files, "bytes": size, "swept": True, "backend": storage.name})
+        # Lokal bleiben Upload-Eingang, Zwischenstände, PDF-Cache und Lock-Dateien
+        areas += [{**a, "swept": False, "backend": "local"} for a in _local_areas(root)]
+    cache_dir = os.path.realpath(pdf_cache.directory)
+    if not cache_dir.startswith(os.path.realpath(root) + os.sep):
+        files, size = _usage(cache_dir)
+        areas.append({"area": "pdf-cache", "files": files, "bytes": size, "swept": False, "backend": "local"})
+
+    unreferenced = case((Blob.ref_count == 0, 1), else_=0)
+    blob_files, blob_bytes, unreferenced_files, unreferenced_bytes = db.query(
+        func.count(Blob.sha256),
+        func.coalesce(func.sum(Blob.size), 0),
+        func.coalesce(func.sum(unreferenced), 0),
+        func.coalesce(func.sum(unreferenced * Blob.size), 0),
+    ).one()
+    state = db.get(StorageSweep, 1)
+    return {
+        "backend": storage.name,
+        "upload_dir": root,
+        "total_bytes": sum(a["bytes"] for a in areas),
+        "areas": areas,
+        "blobs": {
+            "files": blob_files,
+            "bytes": blob_bytes,
+            "unreferenced_files": unreferenced_files,
+            "unreferenced_bytes": unreferenced_bytes,
+        },
+        "sweep": {
+            "grace_hours": settings.STORAGE_SWEEP_GRACE_HOURS,
+            "cursor": state.cursor if state else None,
+            "pass_started_at": state.pass_started_at if state else None,
+            "last_pass_at": state.last_pass_at if state else None,
+            "deleted_files": state.deleted_files if state else 0,
+            "deleted_bytes": state.deleted_bytes if state else 0,
+        },
+    }
@@ -0,0 +1,132 @@
+"""Cache für DOCX-Vorlagen (docxtpl): Vorlagen-Bytes, aufbereitetes XML und kompilierte Jinja-Templates.
+
+DocxTemplate(pfad) liest und entpackt die Vorlage bei jedem Aufruf, patch_xml bereinigt das XML per
+Regex und Jinja kompiliert es neu. Hier wird das pro Vorlage einmal gemacht; jedes Rendering bekommt
+eine eigene DocxTemplate-Instanz über einer In-Memory-Kopie der Bytes. Ändert sich mtime/Größe der
+Datei, wird der SHA-256 verglichen und bei anderem Inhalt neu geladen.
+"""
+import hashlib
+import io
+import os
+import re
+import threading
+import time
+from typing import Dict, Optional
+
+from docxtpl import DocxTemplate
+from jinja2 import Environment
+
+
+class _MemoEnvironment(Environment):
+    """Jinja-Umgebung, die from_string() je Quelltext nur einmal kompiliert."""
+
+    def __init__(self, *args, **kwargs):
+        super().__init__(*args, **kwargs)
+        self._compiled: Dict[str, object] = {}
+        self._compiled_lock = threading.Lock()
+
+    def from_string(self, source, globals=None, template_class=None):
+        if globals or template_class or not isinstance(source, str):
+            return super().from_string(source, globals, template_class)
+        compiled = self._compiled.get(source)
+        if compiled is None:
+            compiled = super().from_string(source)
+            with self._compiled_lock:
+                self._compiled[source] = compiled
+        return compiled
+
+
+class _Entry:
+    __slots__ = ("mtime_ns", "size", "sha256", "data", "patched", "jinja_env", "parse_seconds")
+
+    def __init__(self, mtime_ns: int, size: int, sha256: str, data: bytes):
+        self.mtime_ns = mtime_ns
+        self.size = size
+        self.sha256 = sha256
+        self.data = data
+        self.patched: Dict[str, str] = {}
+        self.jinja_env = _MemoEnvironment()
+        self.parse_seconds = 0.0
+
+
+class CachedDocxTemplate(DocxTemplate):
+    """DocxTemplate, das aufbereitetes XML und kompilierte Templates aus dem Cache-Eintrag nutzt."""
+
+    def __init__(self, entry: _Entry):
+        super().__init__(io.BytesIO(entry.data))
+        self._entry = entry
+
+    def patch_xml(self, src_xml):
+        patched = self._entry.patched.get(src_xml)
+        if patched is None:
+            patched = super().patch_xml(src_xml)
+            self._entry.patched[src_xml] = patched
+        return patched
+
+    def render(self, context, jinja_env: Optional[Environment] = None, autoescape: bool = False) -> None:
+        if jinja_env is None and not autoescape:
+            jinja_env = self._entry.jinja_env
+        super().render(context, jinja_env, autoescape)
+
+
+class TemplateCache:
+    """Prozesslokaler Cache (jeder Render-Prozess hält eine eigene Instanz)."""
+
+    def __init__(self):
+        self._entries: Dict[str, _Entry] = {}
+        self._lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+        self.reloads = 0
+
+    def _warm(self, entry: _Entry) -> None:
+        """Vorlage einmal entpacken, XML aufbereiten und kompilieren; die Dauer ist die Parse-Zeit."""
+        started = time.perf_counter()
+        tpl = CachedDocxTemplate(entry)
+        tpl.init_docx()
+        xml = tpl.patch_xml(tpl.get_xml())
+        entry.jinja_env.from_string(re.sub(r"<w:p([ >])", r"\n<w:p\1", xml))
+        entry.parse_seconds = time.perf_counter() - started
+
+    def get(self, path: str) -> CachedDocxTemplate:
+        """Neue, renderbare Vorlage für path."""
+        path = os.path.abspath(path)
+        st = os.stat(path)
+        with self._lock:
+            entry = self._entries.get(path)
+            if entry is not None and entry.mtime_ns == st.st_mtime_ns and entry.size == st.st_size:
+                self.hits += 1
+                return CachedDocxTemplate(entry)
+            with open(path, "rb") as f:
+                data = f.read()
+            digest = hashlib.sha256(data).hexdigest()
+            if entry is not None and entry.sha256 == digest:
+                # nur angefasst (z. B. kopiert), Inhalt unverändert
+                entry.mtime_ns, entry.size = st.st_mtime_ns, st.st_size
+                self.hits += 1
+                return CachedDocxTemplate(entry)
+            if entry is None:
+                self.misses += 1
+            else:
+                self.reloads += 1
+            entry = _Entry(st.st_mtime_ns, st.st_size, digest, data)
+            self._warm(entry)
+            self._entries[path] = entry
+            return CachedDocxTemplate(entry)
+
+    def stats(self) -> dict:
+        with self._lock:
+            lookups = self.hits + self.misses + self.reloads
+            return {
+                "hits": self.hits,
+                "misses": self.misses,
+                "reloads": self.reloads,
+                "hit_rate": round(self.hits / lookups, 3) if lookups else None,
+                "templates": {
+                    os.path.basename(p): {"sha256": e.sha256, "parse_seconds": round(e.parse_seconds, 4)}
+                    for p, e in self._entries.items()
+                },
+            }
+
+
+template_cache = TemplateCache()
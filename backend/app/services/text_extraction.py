@@ -0,0 +1,232 @@
+"""Text aus hochgeladenen Protokollen und Dokumenten extrahieren und in den Volltextindex schreiben.
+
+Quellen sind KV-Protokolle (Bereich protokolle/ bzw. Blobs) und Satzungs-/GO-Dateien (dokumente/).
+Extrahiert wird je Dateiinhalt (SHA-256) genau einmal (Tabelle file_texts): gleiche Dateien in
+mehreren Protokollen oder nach erneutem Hochladen kosten nichts. Der Dokument-Worker ruft
+index_file_texts etwa jede Minute auf; pro Lauf höchstens TEXT_EXTRACTION_BATCH neue Dateien,
+extrahiert parallel in Kindprozessen (DOCX mit python-docx, PDF mit PyMuPDF oder pdftotext).
+Gelöschte oder ersetzte Dateien verschwinden beim nächsten Lauf aus dem Index.
+"""
+import hashlib
+import logging
+import os
+import re
+import shutil
+import subprocess
+from concurrent.futures import Executor, ProcessPoolExecutor, ThreadPoolExecutor
+from contextlib import ExitStack
+from dataclasses import dataclass
+from datetime import datetime
+from typing import Dict, Optional, Tuple
+
+from docx import Document as DocxDocument
+from sqlalchemy import text
+from sqlalchemy.orm import Session
+
+from app.config import settings
+from app.models.document import Document
+from app.models.file_text import FileText
+from app.models.kreisverband import KVProtokoll
+from app.services.locks import LockTimeout, resource_lock
+from app.services.search_index import remove_entries, replace_entry
+from app.services.storage import StorageBackend, get_storage
+
+logger = logging.getLogger(__name__)
+
+try:
+    import fitz  # PyMuPDF
+    HAS_PYMUPDF = True
+except ImportError:
+    HAS_PYMUPDF = False
+
+# kind im Suchindex → Mindestrolle wie beim Lesen des Objekts
+FILE_KINDS = {"kv_protokoll": "mitarbeiter", "dokument_datei": "vorstand"}
+
+_BLOB_SHA = re.compile(r"blobs/[0-9a-f]{2}/[0-9a-f]{2}/([0-9a-f]{64})(\.[A-Za-z0-9]+)?")
+_PDFTOTEXT_TIMEOUT = 60
+
+
+class UnsupportedFile(Exception):
+    """Für diesen Dateityp gibt es keinen Extraktor."""
+
+
+def extract_text(path: str) -> Tuple[str, str]:
+    """(Extraktor, Text) einer Datei. Modulweit, damit es in Kindprozessen laufen kann."""
+    ext = os.path.splitext(path)[1].lower()
+    if ext == ".docx":
+        doc = DocxDocument(path)
+        lines = [p.text for p in doc.paragraphs]
+        for table in doc.tables:
+            for row in table.rows:
+                lines.append(" | ".join(cell.text for cell in row.cells))
+        return "docx", "\n".join(line for line in lines if line.strip())
+    if ext == ".pdf":
+        if HAS_PYMUPDF:
+            with fitz.open(path) as pdf:
+                return "pymupdf", "\n".join(page.get_text() for page in pdf)
+        binary = shutil.which("pdftotext")
+        if not binary:
+            raise UnsupportedFile("Weder PyMuPDF noch pdftotext (poppler-utils) installiert")
+        result = subprocess.run(
+            [binary, "-enc", "UTF-8", "-q", path, "-"],
+            check=True,
+            capture_output=True,
+            timeout=_PDFTOTEXT_TIMEOUT,
+        )
+        return "pdftotext", result.stdout.decode("utf-8", errors="replace")
+    if ext == ".txt":
+        with open(path, "r", encoding="utf-8", errors="replace") as f:
+            return "text", f.read()
+    raise UnsupportedFile(f"Kein Extraktor für '{ext or 'ohne Endung'}'")
+
+
+def _extract_safely(path: str) -> Tuple[str, Optional[str], Optional[str], Optional[str]]:
+    """(Status, Extraktor, Text, Fehler) – Ausnahmen sollen den Pool nicht verlassen."""
+    try:
+        extractor, content = extract_text(path)
+    except UnsupportedFile as e:
+        return "unsupported", None, None, str(e)
+    except Exception as e:
+        return "failed", None, None, f"{type(e).__name__}: {e}"[:500]
+    return "done", extractor, content, None
+
+
+@dataclass
+class _Source:
+    path: str
+    title: str
+    kreisverband_id: Optional[int]
+
+
+def _current_sources(db: Session) -> Dict[Tuple[str, int], _Source]:
+    sources: Dict[Tuple[str, int], _Source] = {}
+    protokolle = (
+        db.query(KVProtokoll.id, KVProtokoll.titel, KVProtokoll.datei_pfad, KVProtokoll.kreisverband_id)
+        .filter(KVProtokoll.datei_pfad.isnot(None))
+    )
+    for id_, titel, pfad, kv_id in protokolle:
+        sources[("kv_protokoll", id_)] = _Source(pfad, titel, kv_id)
+    for id_, titel, pfad in db.query(Document.id, Document.titel, Document.datei_pfad).filter(Document.datei_pfad.isnot(None)):
+        sources[("dokument_datei", id_)] = _Source(pfad, titel, None)
+    return sources
+
+
+def _indexed_sources(db: Session) -> Dict[Tuple[str, int], Tuple[str, str]]:
+    rows = db.execute(
+        text("SELECT kind, ref_id, source, title FROM search_entries WHERE kind IN ('kv_protokoll', 'dokument_datei')")
+    )
+    return {(kind, int(ref_id)): (source, title) for kind, ref_id, source, title in rows}
+
+
+def content_hash(storage: StorageBackend, stored: str) -> str:
+    """SHA-256 des Dateiinhalts; bei Blobs steht er im Dateinamen, Altbestand wird gelesen."""
+    match = _BLOB_SHA.fullmatch(stored)
+    if match:
+        return match.group(1)
+    digest = hashlib.sha256()
+    for chunk in storage.iter_bytes(stored):
+        digest.update(chunk)
+    return digest.hexdigest()
+
+
+def _executor(jobs: int) -> Executor:
+    workers = settings.TEXT_EXTRACTION_WORKERS
+    if workers is None:
+        workers = os.cpu_count() or 1
+    if workers <= 0 or jobs <= 1:
+        return ThreadPoolExecutor(max_workers=1)
+    return ProcessPoolExecutor(max_workers=min(workers, jobs))
+
+
+def _extract_all(storage: StorageBackend, paths: Dict[str, str]) -> Dict[str, tuple]:
+    """sha256 → Ergebnis von _extract_safely, parallel; S3-Dateien werden vorher lokal geholt."""
+    if not paths:
+        return {}
+    results: Dict[str, tuple] = {}
+    with ExitStack() as stack:
+        local = {}
+        for sha, stored in paths.items():
+            try:
+                local[sha] = stack.enter_context(storage.local_copy(stored))
+            except FileNotFoundError:
+                results[sha] = ("failed", None, None, "Datei nicht gefunden")
+        with _executor(len(local)) as pool:
+            futures = {sha: pool.submit(_extract_safely, path) for sha, path in local.items()}
+            results.update((sha, future.result()) for sha, future in futures.items())
+    return results
+
+
+def _prune_texts(db: Session) -> None:
+    """Texte zu Inhalten entfernen, die weder als Blob existieren noch im Index stehen."""
+    db.execute(text(
+        "DELETE FROM file_texts WHERE sha256 NOT IN (SELECT sha256 FROM blobs) "
+        "AND sha256 NOT IN (SELECT content_hash FROM search_entries WHERE content_hash IS NOT NULL)"
+    ))
+
+
+def index_file_texts(db: Session, batch: Optional[int] = None) -> dict:
+    """Index mit den aktuellen Upload-Dateien abgleichen und bis zu batch neue Dateien aufnehmen.
+
+    Läuft bereits ein anderer Prozess, wird nichts getan.
+    """
+    batch = batch or settings.TEXT_EXTRACTION_BATCH
+    storage = get_storage()
+    try:
+        with resource_lock("text-index", db, timeout=0):
+            current = _current_sources(db)
+            indexed = _indexed_sources(db)
+            stale = {
+                key for key, (source, title) in indexed.items()
+                if key not in current or (current[key].path, current[key].title) != (source, title)
+            }
+            pending = sorted(key for key in current if key not in indexed or key in stale)[:batch]
+
+            # Fehlt die Datei, kommt nur der Titel in den Index (sonst bliebe der Eintrag ewig offen)
+            hashes: Dict[Tuple[str, int], Optional[str]] = {}
+            for key in pending:
+                try:
+                    hashes[key] = content_hash(storage, current[key].path)
+                except FileNotFoundError:
+                    logger.warning("Volltext: Datei %s fehlt (%s %s)", current[key].path, *key)
+                    hashes[key] = None
+            shas = {sha for sha in hashes.values() if sha}
+            known = {sha for (sha,) in db.query(FileText.sha256).filter(FileText.sha256.in_(shas))} if shas else set()
+            missing = {sha: current[key].path for key, sha in hashes.items() if sha and sha not in known}
+            db.commit()  # Lesetransaktion beenden, bevor die Extraktion länger dauert
+
+            results = _extract_all(storage, missing)
+            now = datetime.utcnow()
+            limit = settings.TEXT_EXTRACTION_MAX_CHARS
+            for sha, (status, extractor, content, error) in results.items():
+                db.merge(FileText(
+                    sha256=sha,
+                    status=status,
+                    extractor=extractor,
+                    text=content[:limit] if content is not None else None,
+                    chars=len(content or ""),
+                    error=error,
+                    extracted_at=now,
+                ))
+            db.flush()
+
+            for kind in FILE_KINDS:
+                remove_entries(db, kind, [ref_id for k, ref_id in stale if k == kind])
+            texts = dict(db.query(FileText.sha256, FileText.text).filter(FileText.sha256.in_(shas))) if shas else {}
+            for key, sha in hashes.items():
+                source = current[key]
+                replace_entry(
+                    db, key[0], key[1], source.title, texts.get(sha),
+                    min_role=FILE_KINDS[key[0]],
+                    kreisverband_id=source.kreisverband_id,
+                    source=source.path,
+                    content_hash=sha,
+                )
+            _prune_texts(db)
+            db.commit()
+    except LockTimeout:
+        db.rollback()  # anderer Prozess indexiert gerade
+        return {"indexed": 0, "extracted": 0, "removed": 0}
+    if results:
+        logger.info("Volltext: %s Dateien extrahiert, %s Einträge aktualisiert", len(results), len(hashes))
+    return {"indexed": len(hashes), "extracted": len(results), "removed": len(stale)}
+
@@ -0,0 +1,42 @@
+"""Vorschaubild (PNG) der ersten Seite eines PDFs.
+
+Bevorzugt PyMuPDF (falls installiert), sonst pdftoppm aus poppler-utils (im Docker-Image enthalten).
+Ohne beides gibt es keine Vorschaubilder; die PDF-Fassung wird trotzdem erzeugt.
+"""
+import os
+import shutil
+import subprocess
+from typing import Optional
+
+from app.config import settings
+
+try:
+    import fitz  # PyMuPDF
+    HAS_PYMUPDF = True
+except ImportError:
+    HAS_PYMUPDF = False
+
+_TIMEOUT_SECONDS = 30
+
+
+def render_pdf_thumbnail(pdf_path: str, png_path: str, width: Optional[int] = None) -> bool:
+    """Erste Seite von pdf_path als PNG (width Pixel breit) nach png_path. False, wenn kein Renderer da ist."""
+    width = width or settings.THUMBNAIL_WIDTH
+    if HAS_PYMUPDF:
+        with fitz.open(pdf_path) as doc:
+            page = doc[0]
+            zoom = width / page.rect.width
+            page.get_pixmap(matrix=fitz.Matrix(zoom, zoom), alpha=False).save(png_path)
+        return True
+    binary = shutil.which("pdftoppm")
+    if not binary:
+        return False
+    prefix, _ = os.path.splitext(png_path)
+    subprocess.run(
+        [binary, "-png", "-f", "1", "-l", "1", "-singlefile", "-scale-to-x", str(width), "-scale-to-y", "-1", pdf_path, prefix],
+        check=True,
+        timeout=_TIMEOUT_SECONDS,
+        stdout=subprocess.DEVNULL,
+        stderr=subprocess.PIPE,
+    )
+    return os.path.isfile(png_path)
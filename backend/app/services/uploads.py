@@ -0,0 +1,101 @@
+"""Uploads blockweise auf die Platte schreiben statt sie komplett in den Speicher zu lesen.
+
+Pro Block wird die Größe geprüft (Abbruch sofort bei Überschreitung), der SHA-256 fortgeschrieben
+und aus dem ersten Block der Dateityp erkannt. Geschrieben wird in eine Temp-Datei im Zielordner,
+die erst nach vollständiger Prüfung per os.replace an ihren Platz kommt – halbe Dateien gibt es nie.
+"""
+import hashlib
+import os
+import tempfile
+from dataclasses import dataclass
+from typing import Optional
+
+import aiofiles
+from fastapi import HTTPException, UploadFile
+
+CHUNK_SIZE = 1024 * 1024  # 1 MB
+
+# Magische Bytes am Dateianfang -> erkannter Typ
+_SIGNATURES = (
+    (b"%PDF-", "application/pdf"),
+    (b"PK\x03\x04", "application/zip"),  # docx, odt
+    (b"\xd0\xcf\x11\xe0\xa1\xb1\x1a\xe1", "application/x-ole-storage"),  # doc (Word 97-2003)
+    (b"\x89PNG\r\n\x1a\n", "image/png"),
+    (b"\xff\xd8\xff", "image/jpeg"),
+)
+
+# Welche erkannten Typen zu welcher Endung passen
+EXTENSION_MIME_TYPES = {
+    ".pdf": {"application/pdf"},
+    ".docx": {"application/zip"},
+    ".odt": {"application/zip"},
+    ".doc": {"application/x-ole-storage"},
+    ".png": {"image/png"},
+    ".jpg": {"image/jpeg"},
+    ".jpeg": {"image/jpeg"},
+    ".txt": {"text/plain"},
+}
+
+
+@dataclass
+class StoredUpload:
+    """Ergebnis eines gespeicherten Uploads."""
+
+    path: str
+    size: int
+    sha256: str
+    mime_type: str
+
+
+def sniff_mime_type(head: bytes) -> str:
+    """Dateityp anhand der ersten Bytes (keine Abhängigkeit von libmagic)."""
+    for signature, mime_type in _SIGNATURES:
+        if head.startswith(signature):
+            return mime_type
+    if b"\x00" not in head:
+        return "text/plain"  # UTF-8 oder Latin-1/cp1252 – Binärdateien enthalten praktisch immer Nullbytes
+    return "application/octet-stream"
+
+
+def _too_large(max_bytes: int) -> HTTPException:
+    return HTTPException(status_code=400, detail=f"Datei zu groß. Maximum: {max_bytes // (1024 * 1024)} MB")
+
+
+async def save_upload(upload: UploadFile, target_path: str, max_bytes: int, ext: Optional[str] = None) -> StoredUpload:
+    """upload nach target_path streamen.
+
+    Wirft HTTPException 400, wenn die Datei max_bytes überschreitet oder ihr Inhalt nicht zur Endung
+    ext passt (siehe EXTENSION_MIME_TYPES; unbekannte Endungen werden nicht geprüft).
+    """
+    if upload.size is not None and upload.size > max_bytes:
+        raise _too_large(max_bytes)
+    directory = os.path.dirname(target_path) or "."
+    os.makedirs(directory, exist_ok=True)
+    fd, tmp_path = tempfile.mkstemp(dir=directory, prefix=".upload-", suffix=".part")
+    os.close(fd)
+    digest = hashlib.sha256()
+    size = 0
+    mime_type = None
+    try:
+        async with aiofiles.open(tmp_path, "wb") as out:
+            while True:
+                chunk = await upload.read(CHUNK_SIZE)
+                if not chunk:
+                    break
+                size += len(chunk)
+                if size > max_bytes:
+                    raise _too_large(max_bytes)
+                if mime_type is None:
+                    mime_type = sniff_mime_type(chunk[:4096])
+                digest.update(chunk)
+                await out.write(chunk)
+        mime_type = mime_type or "application/octet-stream"
+        allowed = EXTENSION_MIME_TYPES.get(ext) if ext else None
+        if allowed is not None and size and mime_type not in allowed:
+            raise HTTPException(status_code=400, detail=f"Dateiinhalt passt nicht zur Endung '{ext}'.")
+        os.replace(tmp_path, target_path)
+    except BaseException:
+        if os.path.exists(tmp_path):
+            os.unlink(tmp_path)
+        raise
+    return StoredUpload(path=target_path, size=size, sha256=digest.hexdigest(), mime_type=mime_type)
@@ -0,0 +1,86 @@
+"""Vergleich: Änderungsantrag-PDF direkt (fpdf2) vs. DOCX + LibreOffice.
+
+Start: python -m scripts.benchmark_amendment_pdf [--stellen 10] [--runs 5]
+Ohne LibreOffice wird nur der fpdf2-Weg gemessen.
+"""
+import argparse
+import os
+import shutil
+import statistics
+import sys
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(__file__)))
+
+from app.services.amendment_pdf import HAS_FPDF, aenderungsantrag_pdf_bytes
+from app.services.pdf import docx_to_pdf, ram_workspace
+from app.services.render_pool import aenderungsantrag_docx_bytes
+
+
+def sample_data(stellen: int) -> dict:
+    return {
+        "layout": 0,
+        "dokument_titel": "Satzung der Jungen Liberalen Schleswig-Holstein",
+        "titel": "Mehr Mitbestimmung der Kreisverbände",
+        "antragsteller": "KV Kiel",
+        "begruendung": "Die Kreisverbände sollen stärker beteiligt werden. " * 20,
+        "stellen": [
+            {
+                "bezug": f"§ {i + 1} Abs. 2",
+                "alte_fassung": "Der Landesvorstand beschließt über die Verteilung der Mittel. " * 4,
+                "neue_fassung": "Der Landesvorstand beschließt im Einvernehmen mit den Kreisverbänden. " * 4,
+                "aenderungstext": f"In § {i + 1} Abs. 2 wird der Satz wie folgt gefasst: „…“",
+            }
+            for i in range(stellen)
+        ],
+    }
+
+
+def fpdf_run(data: dict) -> int:
+    return len(aenderungsantrag_pdf_bytes(data))
+
+
+def libreoffice_run(data: dict) -> int:
+    docx_bytes = aenderungsantrag_docx_bytes(data)
+    with ram_workspace() as workdir:
+        docx_path = os.path.join(workdir, "aenderungsantrag.docx")
+        with open(docx_path, "wb") as f:
+            f.write(docx_bytes)
+        pdf_path = docx_to_pdf(docx_path)
+        if not pdf_path:
+            raise RuntimeError("LibreOffice-Konvertierung fehlgeschlagen")
+        return os.path.getsize(pdf_path)
+
+
+def measure(name: str, fn, data: dict, runs: int) -> None:
+    size = fn(data)  # Aufwärmen (Schriften laden, soffice starten)
+    times = []
+    for _ in range(runs):
+        start = time.perf_counter()
+        fn(data)
+        times.append((time.perf_counter() - start) * 1000)
+    print(
+        f"{name:<12} median {statistics.median(times):8.1f} ms   "
+        f"min {min(times):8.1f} ms   max {max(times):8.1f} ms   {size / 1024:6.1f} KiB"
+    )
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--stellen", type=int, default=10, help="Anzahl geänderter Stellen")
+    parser.add_argument("--runs", type=int, default=5)
+    args = parser.parse_args()
+    data = sample_data(args.stellen)
+
+    if HAS_FPDF:
+        measure("fpdf2", fpdf_run, data, args.runs)
+    else:
+        print("fpdf2          nicht installiert")
+    if shutil.which("soffice") or shutil.which("libreoffice"):
+        measure("libreoffice", libreoffice_run, data, args.runs)
+    else:
+        print("libreoffice    nicht gefunden")
+
+
+if __name__ == "__main__":
+    main()
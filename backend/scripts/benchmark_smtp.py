@@ -0,0 +1,110 @@
+"""Durchsatz: eine SMTP-Sitzung pro Nachricht (bisher) vs. SMTP-Pool gegen einen lokalen Test-Server.
+
+Start: python -m scripts.benchmark_smtp [--messages 50] [--handshake-ms 300] [--message-ms 20] [--pool-size 2]
+Der Test-Server (Thread im selben Prozess, kein TLS) verzögert Begrüßung und Anmeldung um
+--handshake-ms, um Verbindungsaufbau/STARTTLS/Login bei Office 365 nachzubilden, und jede
+angenommene Nachricht um --message-ms. Es wird nichts verschickt.
+"""
+import argparse
+import os
+import smtplib
+import socketserver
+import sys
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(__file__)))
+
+from app.services.smtp_pool import SMTPPool
+
+SENDER = "intranet@example.org"
+MESSAGE = "Subject: Benchmark\r\n\r\n" + "Hallo Kreisverband,\r\n" * 40
+
+
+class _Handler(socketserver.StreamRequestHandler):
+    """Minimaler SMTP-Dialog: EHLO, AUTH PLAIN, MAIL/RCPT/DATA, RSET, NOOP, QUIT."""
+
+    def _reply(self, line: str) -> None:
+        self.wfile.write((line + "\r\n").encode())
+
+    def handle(self) -> None:
+        handshake, per_message = self.server.delays
+        time.sleep(handshake / 2)
+        self._reply("220 localhost ESMTP Benchmark")
+        while True:
+            line = self.rfile.readline()
+            if not line:
+                return
+            command = line.decode(errors="replace").strip().upper()
+            if command.startswith(("EHLO", "HELO")):
+                self._reply("250-localhost")
+                self._reply("250 AUTH PLAIN")
+            elif command.startswith("AUTH"):
+                time.sleep(handshake / 2)
+                self._reply("235 2.7.0 Authentication successful")
+            elif command == "DATA":
+                self._reply("354 End data with <CR><LF>.<CR><LF>")
+                while self.rfile.readline() not in (b".\r\n", b""):
+                    pass
+                time.sleep(per_message)
+                self.server.received += 1
+                self._reply("250 2.0.0 OK queued")
+            elif command == "QUIT":
+                self._reply("221 2.0.0 Bye")
+                return
+            else:  # MAIL, RCPT, RSET, NOOP
+                self._reply("250 OK")
+
+
+class _Server(socketserver.ThreadingTCPServer):
+    daemon_threads = True
+    allow_reuse_address = True
+
+
+def start_server(handshake_ms: float, message_ms: float) -> _Server:
+    server = _Server(("127.0.0.1", 0), _Handler)
+    server.delays = (handshake_ms / 1000, message_ms / 1000)
+    server.received = 0
+    threading.Thread(target=server.serve_forever, daemon=True).start()
+    return server
+
+
+def send_single(port: int, to: str) -> None:
+    """Bisheriges Verhalten von send_email: verbinden, anmelden, senden, trennen."""
+    with smtplib.SMTP("127.0.0.1", port) as smtp:
+        smtp.login("user", "pw")
+        smtp.sendmail(SENDER, [to], MESSAGE)
+
+
+def measure(name: str, fn, count: int, workers: int) -> None:
+    start = time.perf_counter()
+    with ThreadPoolExecutor(max_workers=workers) as executor:
+        list(executor.map(fn, [f"empfaenger{i}@example.org" for i in range(count)]))
+    elapsed = time.perf_counter() - start
+    print(f"{name:<10} {count} Nachrichten in {elapsed:6.2f} s   {count / elapsed:7.1f} Nachrichten/s")
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--messages", type=int, default=50)
+    parser.add_argument("--handshake-ms", type=float, default=300, help="Verzögerung für Begrüßung + Anmeldung")
+    parser.add_argument("--message-ms", type=float, default=20, help="Verzögerung je angenommener Nachricht")
+    parser.add_argument("--pool-size", type=int, default=2, help="Sitzungen im Pool und parallele Sender")
+    args = parser.parse_args()
+
+    server = start_server(args.handshake_ms, args.message_ms)
+    port = server.server_address[1]
+    try:
+        measure("einzeln", lambda to: send_single(port, to), args.messages, 1)
+        pool = SMTPPool("127.0.0.1", port, "user", "pw", size=args.pool_size, starttls=False)
+        measure("pool", lambda to: pool.send(SENDER, [to], MESSAGE), args.messages, args.pool_size)
+        print(f"Pool: {pool.stats()}")
+        pool.close()
+        print(f"Server: {server.received} Nachrichten angenommen")
+    finally:
+        server.shutdown()
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,25 @@
+"""Worker für Dokument-Jobs (Einladung/Protokoll/PDF im Hintergrund).
+
+Start: python -m scripts.document_worker
+Läuft als eigener Prozess (z. B. eigener Container) neben der API.
+"""
+import logging
+import os
+import signal
+import sys
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(__file__)))
+
+from app.services.document_jobs import DocumentWorker
+
+
+def main():
+    logging.basicConfig(level=logging.INFO, format="%(asctime)s - %(name)s - %(levelname)s - %(message)s")
+    worker = DocumentWorker()
+    signal.signal(signal.SIGTERM, lambda *_: worker.stop())
+    signal.signal(signal.SIGINT, lambda *_: worker.stop())
+    worker.run_forever()
+
+
+if __name__ == "__main__":
+    main()
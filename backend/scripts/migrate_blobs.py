@@ -0,0 +1,60 @@
+"""Vorhandene Uploads (dokumente/, protokolle/, email_templates/) in den Blob-Speicher übernehmen.
+
+Start: python -m scripts.migrate_blobs [--dry-run]
+Kann mehrfach laufen: bereits umgestellte Einträge werden übersprungen. Die alte Datei wird erst nach
+dem Commit gelöscht.
+"""
+import argparse
+import os
+import sys
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(__file__)))
+
+from app.database import SessionLocal
+from app.models.document import Document
+from app.models.email_template import EmailTemplate
+from app.models.kreisverband import KVProtokoll
+from app.services.blob_store import full_path, is_blob_path, store_file
+
+# (Model, Spalte)
+COLUMNS = [
+    (Document, "datei_pfad"),
+    (KVProtokoll, "datei_pfad"),
+    (EmailTemplate, "attachment_storage_path"),
+]
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--dry-run", action="store_true", help="nur anzeigen, nichts ändern")
+    args = parser.parse_args()
+
+    db = SessionLocal()
+    migrated = missing = 0
+    try:
+        for model, column in COLUMNS:
+            rows = db.query(model).filter(getattr(model, column).isnot(None)).all()
+            for row in rows:
+                stored = getattr(row, column)
+                if is_blob_path(stored):
+                    continue
+                source = full_path(stored)
+                if not os.path.isfile(source):
+                    print(f"fehlt: {model.__tablename__} {row.id}: {stored}")
+                    missing += 1
+                    continue
+                if args.dry_run:
+                    print(f"würde übernehmen: {model.__tablename__} {row.id}: {stored}")
+                    continue
+                blob = store_file(db, source, os.path.splitext(source)[1].lower())
+                setattr(row, column, blob.path)
+                db.commit()
+                os.remove(source)
+                migrated += 1
+    finally:
+        db.close()
+    print(f"{migrated} Dateien übernommen, {missing} fehlen")
+
+
+if __name__ == "__main__":
+    main()
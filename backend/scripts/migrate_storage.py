@@ -0,0 +1,48 @@
+"""Lokale Upload-Dateien (blobs/, sitzungen/, jobs/) in das konfigurierte Speicher-Backend kopieren.
+
+Start (mit STORAGE_BACKEND=s3 und S3_* gesetzt): python -m scripts.migrate_storage [--dry-run]
+Vorher scripts.migrate_blobs ausführen, damit keine Altbestand-Pfade mehr außerhalb von blobs/ liegen.
+Kann mehrfach laufen: Dateien, die im Ziel schon mit gleicher Größe vorhanden sind, werden übersprungen.
+Die lokalen Dateien bleiben liegen (nach Prüfung von Hand löschen).
+"""
+import argparse
+import os
+import sys
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(__file__)))
+
+from app.config import settings
+from app.services.storage import LocalStorage, get_storage
+
+AREAS = ("blobs", "sitzungen", "jobs")
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--dry-run", action="store_true", help="nur anzeigen, nichts ändern")
+    args = parser.parse_args()
+
+    target = get_storage()
+    if isinstance(target, LocalStorage):
+        print("STORAGE_BACKEND ist local – nichts zu tun.")
+        return
+    source = LocalStorage(settings.UPLOAD_DIR)
+    copied = skipped = 0
+    for area in AREAS:
+        for obj in source.iter_files(area + "/"):
+            if obj.key.startswith("blobs/.incoming/"):
+                continue
+            existing = target.stat(obj.key)
+            if existing is not None and existing.size == obj.size:
+                skipped += 1
+                continue
+            if args.dry_run:
+                print(f"würde kopieren: {obj.key} ({obj.size} Bytes)")
+                continue
+            target.put_file(obj.key, source.local_path(obj.key))
+            copied += 1
+    print(f"{copied} Dateien kopiert, {skipped} schon vorhanden")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,40 @@
+"""Volltextindex (search_entries) neu aufbauen.
+
+Start: python -m scripts.reindex_search
+Einmal nach dem Update ausführen (Bestandsdaten) und immer dann, wenn Daten an der Anwendung vorbei
+geändert wurden. Termine, Dokumente, Änderungsanträge und Sitzungen werden sofort neu geschrieben;
+Einträge für hochgeladene Dateien werden entfernt und vom Dokument-Worker neu aufgenommen (der
+extrahierte Text liegt in file_texts und wird nicht erneut extrahiert).
+"""
+import argparse
+import os
+import sys
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(__file__)))
+
+from sqlalchemy import text
+
+from app.database import SessionLocal
+from app.services.search_records import rebuild_records
+from app.services.text_extraction import FILE_KINDS
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--keep-files", action="store_true", help="Einträge hochgeladener Dateien behalten")
+    args = parser.parse_args()
+
+    db = SessionLocal()
+    try:
+        count = rebuild_records(db)
+        if not args.keep_files:
+            for kind in FILE_KINDS:
+                db.execute(text("DELETE FROM search_entries WHERE kind = :kind"), {"kind": kind})
+        db.commit()
+    finally:
+        db.close()
+    print(f"{count} Einträge neu geschrieben" + ("" if args.keep_files else "; Dateien folgen über den Dokument-Worker"))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,25 @@
+"""Worker für Erinnerungen vor Terminen und Sitzungen.
+
+Start: python -m scripts.reminder_worker
+Läuft als eigener Prozess (z. B. eigener Container) neben der API.
+"""
+import logging
+import os
+import signal
+import sys
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(__file__)))
+
+from app.services.reminders import ReminderScheduler
+
+
+def main():
+    logging.basicConfig(level=logging.INFO, format="%(asctime)s - %(name)s - %(levelname)s - %(message)s")
+    scheduler = ReminderScheduler()
+    signal.signal(signal.SIGTERM, lambda *_: scheduler.stop())
+    signal.signal(signal.SIGINT, lambda *_: scheduler.stop())
+    scheduler.run_forever()
+
+
+if __name__ == "__main__":
+    main()
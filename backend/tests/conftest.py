@@ -5,6 +5,7 @@ from sqlalchemy.orm import sessionmaker
 from sqlalchemy.pool import StaticPool
 from fastapi.testclient import TestClient
 
+from app.config import settings
 from app.database import Base
 from app.main import app
 from app.api.deps import get_db
@@ -46,6 +47,13 @@ def db(setup_database):
         session.close()
 
 
+@pytest.fixture
+def upload_dir(tmp_path, monkeypatch):
+    """Redirect UPLOAD_DIR to tmp_path, including the lock files under .locks (resolved per call)."""
+    monkeypatch.setattr(settings, "UPLOAD_DIR", str(tmp_path))
+    return tmp_path
+
+
 @pytest.fixture
 def client(db):
     """Get a test client with overridden DB dependency."""
@@ -0,0 +1,92 @@
+"""Tests for the Änderungsantrag export endpoints."""
+import io
+import os
+
+import pytest
+from docx import Document as DocxDocument
+
+from app.config import settings
+from app.models.document import Document
+from app.models.document_aenderungsantrag import DocumentAenderungsantrag
+from app.services import pdf_cache as pdf_cache_module
+from app.services.pdf_cache import PdfCache
+from tests.conftest import auth_header
+
+
+@pytest.fixture
+def antrag(db):
+    doc = Document(titel="Satzung", typ="satzung")
+    db.add(doc)
+    db.commit()
+    a = DocumentAenderungsantrag(
+        document_id=doc.id,
+        antragsteller="KV Kiel",
+        antrag_text="§ 3 ändern",
+        alte_fassung="Alt",
+        neue_fassung="Neu",
+    )
+    db.add(a)
+    db.commit()
+    db.refresh(a)
+    return a
+
+
+@pytest.fixture
+def fake_conversion(tmp_path, monkeypatch):
+    """Ersetzt LibreOffice: schreibt eine PDF-Datei neben das DOCX und zählt die Aufrufe."""
+    calls = []
+
+    async def convert(docx_path):
+        calls.append(docx_path)
+        pdf_path = os.path.splitext(docx_path)[0] + ".pdf"
+        with open(pdf_path, "wb") as f:
+            f.write(b"%PDF-1.4 fake")
+        return pdf_path
+
+    monkeypatch.setattr(pdf_cache_module, "docx_to_pdf_async", convert)
+    monkeypatch.setattr(pdf_cache_module, "pdf_cache", PdfCache(str(tmp_path / "cache"), 1024 * 1024))
+    monkeypatch.setattr("app.api.v1.documents.pdf_cache", pdf_cache_module.pdf_cache)
+    return calls
+
+
+class TestAenderungsantragExport:
+    def test_docx_export_is_built_in_memory(self, client, antrag, vorstand_token):
+        response = client.get(
+            f"/api/v1/documents/aenderungsantraege/{antrag.id}/export.docx", headers=auth_header(vorstand_token)
+        )
+        assert response.status_code == 200
+        assert int(response.headers["content-length"]) == len(response.content)
+        text = "\n".join(p.text for p in DocxDocument(io.BytesIO(response.content)).paragraphs)
+        assert "Antragsteller: KV Kiel" in text
+
+    def test_pdf_export_converts_once_and_serves_from_cache(
+        self, client, antrag, vorstand_token, fake_conversion, monkeypatch
+    ):
+        monkeypatch.setattr(settings, "AENDERUNGSANTRAG_PDF_RENDERER", "libreoffice")
+        url = f"/api/v1/documents/aenderungsantraege/{antrag.id}/export.pdf"
+        first = client.get(url, headers=auth_header(vorstand_token))
+        second = client.get(url, headers=auth_header(vorstand_token))
+        assert first.status_code == second.status_code == 200
+        assert second.content == b"%PDF-1.4 fake"
+        assert int(second.headers["content-length"]) == len(second.content)
+        assert len(fake_conversion) == 1
+        assert not os.path.exists(fake_conversion[0])  # Arbeitsverzeichnis aufgeräumt
+
+    def test_pdf_export_renders_directly_with_embedded_font(self, client, antrag, vorstand_token, fake_conversion):
+        url = f"/api/v1/documents/aenderungsantraege/{antrag.id}/export.pdf"
+        response = client.get(url, headers=auth_header(vorstand_token))
+        assert response.status_code == 200
+        assert response.content.startswith(b"%PDF")
+        assert b"/FontFile2" in response.content and b"Anybody" in response.content
+        assert fake_conversion == []
+
+    def test_pdf_export_falls_back_to_libreoffice(self, client, antrag, vorstand_token, fake_conversion, monkeypatch):
+        def broken(data):
+            raise RuntimeError("Schrift fehlt")
+
+        monkeypatch.setattr("app.api.v1.documents.aenderungsantrag_pdf_bytes", broken)
+        url = f"/api/v1/documents/aenderungsantraege/{antrag.id}/export.pdf"
+        response = client.get(url, headers=auth_header(vorstand_token))
+        assert response.status_code == 200
+        assert response.content == b"%PDF-1.4 fake"
+        assert len(fake_conversion) == 1
@@ -1,4 +1,6 @@
 """Tests for calendar event API endpoints and role-based access."""
+import pytest
+
 from tests.conftest import auth_header
 
 
@@ -25,3 +27,161 @@ class TestPublicEndpoints:
     def test_public_categories_no_auth_needed(self, client):
         response = client.get("/api/v1/public/categories")
         assert response.status_code == 200
+
+    def test_ics_export_reflects_new_events(self, client, db, tenant, admin_user):
+        from datetime import date
+        from app.models.event import Event
+
+        def add(title):
+            db.add(Event(title=title, start_date=date(2026, 11, 21), status="approved", is_public=True,
+                         submitter_id=admin_user.id, tenant_id=tenant.id))
+            db.commit()
+
+        add("Landeskongress")
+        first = client.get("/api/v1/public/events.ics")
+        add("Stammtisch")
+        second = client.get("/api/v1/public/events.ics")
+        assert first.status_code == second.status_code == 200
+        assert "SUMMARY:Landeskongress" in first.text and "Stammtisch" not in first.text
+        assert "SUMMARY:Stammtisch" in second.text
+
+    def test_ics_build_uses_its_own_session(self, client, db, tenant, monkeypatch):
+        from app.api.v1 import public
+
+        sessions = []
+        build = public._build_ical
+        monkeypatch.setattr(public, "_build_ical", lambda session, *args: sessions.append(session) or build(session, *args))
+        assert client.get("/api/v1/public/events.ics").status_code == 200
+        assert sessions and sessions[0] is not db
+
+
+class TestPublicCalendarData:
+    def test_compound_payload_references_by_id(self, client, db, tenant, admin_user):
+        from datetime import date
+        from app.models.category import Category
+        from app.models.event import Event
+
+        cat = Category(name="Stammtisch", color="#ff0000", tenant_id=tenant.id, created_by=admin_user.id)
+        db.add(cat)
+        db.flush()
+        for title in ("Termin A", "Termin B"):
+            db.add(Event(
+                title=title,
+                start_date=date(2026, 5, 1),
+                organizer="LV",
+                status="approved",
+                is_public=True,
+                submitter_id=admin_user.id,
+                tenant_id=tenant.id,
+                category_id=cat.id,
+            ))
+        db.commit()
+
+        response = client.get("/api/v1/public/calendar-data")
+        assert response.status_code == 200
+        data = response.json()
+        assert [e["title"] for e in data["events"]] == ["Termin A", "Termin B"]
+        assert all(e["category_id"] == cat.id for e in data["events"])
+        assert "submitter_email" not in data["events"][0]
+        assert data["categories"] == {str(cat.id): {"id": cat.id, "name": "Stammtisch", "color": "#ff0000", "tenant_id": tenant.id}}
+        assert data["tenants"][str(tenant.id)]["slug"] == "test-lv"
+        assert data["calendars"]["landesverband"] == tenant.id
+
+    def test_kreisverband_calendar_excludes_root_events(self, client, db, tenant, admin_user):
+        from datetime import date
+        from app.models.event import Event
+
+        db.add(Event(
+            title="LV-Termin",
+            start_date=date(2026, 5, 1),
+            organizer="LV",
+            status="approved",
+            is_public=True,
+            submitter_id=admin_user.id,
+            tenant_id=tenant.id,
+        ))
+        db.commit()
+        response = client.get("/api/v1/public/calendar-data", params={"calendar": "kreisverband"})
+        assert response.status_code == 200
+        assert response.json()["events"] == []
+
+
+class TestDuplicateSubmissions:
+    def _setup(self, db, tenant, admin_user, monkeypatch):
+        from app.config import settings
+        from app.models.tenant import Tenant
+
+        kv = Tenant(name="KV Kiel", slug="kv-kiel", level="kreisverband", parent_id=tenant.id, is_active=True)
+        db.add(kv)
+        db.commit()
+        monkeypatch.setattr(settings, "PUBLIC_SUBMITTER_USER_ID", admin_user.id)
+        return kv
+
+    def _payload(self, kv, **overrides):
+        payload = {
+            "title": "Stammtisch Kiel",
+            "start_date": "2026-06-01",
+            "start_time": "19:00:00",
+            "location": "Alte Mühle",
+            "organizer": "KV Kiel",
+            "submitter_name": "Gast",
+            "submitter_email": "gast@test.de",
+            "tenant_id": kv.id,
+        }
+        payload.update(overrides)
+        return payload
+
+    def test_resubmission_is_rejected(self, client, db, tenant, admin_user, monkeypatch):
+        kv = self._setup(db, tenant, admin_user, monkeypatch)
+        first = client.post("/api/v1/public/events", json=self._payload(kv))
+        assert first.status_code == 201
+        again = client.post("/api/v1/public/events", json=self._payload(kv, title="  stammtisch   KIEL! ", location="alte muhle"))
+        assert again.status_code == 409
+
+    def test_concurrent_submission_returns_existing_event(self, client, db, tenant, admin_user, monkeypatch):
+        from app.api.v1 import public
+        from app.models.event import Event
+
+        kv = self._setup(db, tenant, admin_user, monkeypatch)
+        first = client.post("/api/v1/public/events", json=self._payload(kv))
+        # Zweite Anfrage prüft, bevor die erste committet hat: die Vorab-Prüfung findet nichts
+        lookups = []
+        real = public._open_duplicate
+
+        def first_lookup_misses(db, fingerprint):
+            lookups.append(fingerprint)
+            return real(db, fingerprint) if len(lookups) > 1 else None
+
+        monkeypatch.setattr(public, "_open_duplicate", first_lookup_misses)
+        again = client.post("/api/v1/public/events", json=self._payload(kv))
+        assert again.status_code == 200
+        assert again.json()["id"] == first.json()["id"]
+        assert db.query(Event).count() == 1
+
+    def test_open_fingerprint_is_unique_in_database(self, db, tenant, admin_user):
+        from datetime import date
+        from sqlalchemy.exc import IntegrityError
+        from app.models.event import Event
+
+        def event(status):
+            return Event(title="Stammtisch", start_date=date(2026, 6, 1), status=status, submitter_id=admin_user.id,
+                         tenant_id=tenant.id, fingerprint="f" * 64)
+
+        db.add_all([event("rejected"), event("pending")])
+        db.flush()  # abgelehnte Dubletten bleiben erlaubt
+        db.add(event("pending"))
+        with pytest.raises(IntegrityError):
+            db.flush()
+
+    def test_pending_duplicates_endpoint(self, client, db, tenant, admin_user, admin_token, monkeypatch):
+        kv = self._setup(db, tenant, admin_user, monkeypatch)
+        client.post("/api/v1/public/events", json=self._payload(kv))
+        client.post("/api/v1/public/events", json=self._payload(kv, title="Stammtisch in Kiel", start_time="19:30:00"))
+        client.post("/api/v1/public/events", json=self._payload(kv, title="Landesparteitag", start_date="2026-06-20"))
+
+        response = client.get("/api/v1/admin/events/pending/duplicates", headers=auth_header(admin_token))
+        assert response.status_code == 200
+        groups = response.json()
+        assert len(groups) == 2
+        assert {g["event"]["title"] for g in groups} == {"Stammtisch Kiel", "Stammtisch in Kiel"}
+        assert all(g["candidates"][0]["score"] >= 0.75 for g in groups)
@@ -0,0 +1,81 @@
+"""Tests for authorised file downloads."""
+import pytest
+
+from app.config import settings
+from app.models.email_template import EmailTemplate
+from app.models.kreisverband import Kreisverband
+from tests.conftest import auth_header
+
+PDF = b"%PDF-1.4\n" + bytes(range(256)) * 8
+
+
+@pytest.fixture
+def protokoll_path(client, db, admin_token, upload_dir):
+    kv = Kreisverband(name="Kiel")
+    db.add(kv)
+    db.commit()
+    response = client.post(
+        f"/api/v1/kreisverband/{kv.id}/protokolle",
+        data={"titel": "MV 2026", "datum": "2026-03-01", "typ": "MV"},
+        files={"datei": ("mv.pdf", PDF, "application/pdf")},
+        headers=auth_header(admin_token),
+    )
+    return response.json()["datei_pfad"]
+
+
+class TestFileDownload:
+    def test_requires_authentication(self, client, protokoll_path):
+        assert client.get(f"/api/v1/files/{protokoll_path}").status_code in (401, 403)
+
+    def test_download_with_etag_and_immutable_caching(self, client, protokoll_path, mitarbeiter_token):
+        response = client.get(f"/api/v1/files/{protokoll_path}", headers=auth_header(mitarbeiter_token))
+        assert response.status_code == 200
+        assert response.content == PDF
+        assert response.headers["content-type"] == "application/pdf"
+        assert response.headers["content-disposition"] == "attachment; filename*=utf-8''MV%202026.pdf"
+        assert "immutable" in response.headers["cache-control"]
+        etag = response.headers["etag"]
+        assert not etag.startswith("W/")
+
+        cached = client.get(
+            f"/api/v1/files/{protokoll_path}",
+            headers={**auth_header(mitarbeiter_token), "If-None-Match": etag},
+        )
+        assert cached.status_code == 304
+
+    def test_range_requests(self, client, protokoll_path, mitarbeiter_token):
+        url = f"/api/v1/files/{protokoll_path}"
+        partial = client.get(url, headers={**auth_header(mitarbeiter_token), "Range": "bytes=9-18"})
+        assert partial.status_code == 206
+        assert partial.content == PDF[9:19]
+        assert partial.headers["content-range"] == f"bytes 9-18/{len(PDF)}"
+        tail = client.get(url, headers={**auth_header(mitarbeiter_token), "Range": "bytes=-4"})
+        assert tail.content == PDF[-4:]
+        beyond = client.get(url, headers={**auth_header(mitarbeiter_token), "Range": f"bytes={len(PDF)}-"})
+        assert beyond.status_code == 416
+
+    def test_hands_transfer_to_nginx(self, client, protokoll_path, mitarbeiter_token, monkeypatch):
+        monkeypatch.setattr(settings, "FILES_X_ACCEL_REDIRECT", "/_protected_uploads/")
+        response = client.get(f"/api/v1/files/{protokoll_path}", headers=auth_header(mitarbeiter_token))
+        assert response.status_code == 200
+        assert response.headers["x-accel-redirect"] == f"/_protected_uploads/{protokoll_path}"
+        assert response.content == b""
+
+    def test_role_of_referencing_object_is_enforced(self, client, db, admin_token, mitarbeiter_token, upload_dir):
+        template = EmailTemplate(name="Eintritt", typ="mitglied", scenario="eintritt", betreff="Hallo", inhalt="Text")
+        db.add(template)
+        db.commit()
+        client.put(
+            f"/api/v1/email-templates/{template.id}/attachment",
+            files={"file": ("satzung.pdf", b"%PDF-1.4 intern", "application/pdf")},
+            headers=auth_header(admin_token),
+        )
+        db.refresh(template)
+        path = template.attachment_storage_path
+        assert client.get(f"/api/v1/files/{path}", headers=auth_header(mitarbeiter_token)).status_code == 403
+        assert client.get(f"/api/v1/files/{path}", headers=auth_header(admin_token)).status_code == 200
+
+    def test_unreferenced_paths_are_not_served(self, client, admin_token, upload_dir):
+        (upload_dir / "geheim.txt").write_text("nicht verlinkt")
+        assert client.get("/api/v1/files/geheim.txt", headers=auth_header(admin_token)).status_code == 404
+        assert client.get("/api/v1/files/../etc/passwd", headers=auth_header(admin_token)).status_code == 404
@@ -0,0 +1,141 @@
+"""Tests for meeting document generation and the batch export."""
+import asyncio
+import io
+import os
+import pickle
+import re
+import time
+import zipfile
+from datetime import date
+
+import pytest
+
+from app.api.v1 import meetings as meetings_api
+from app.api.v1.meetings import _meeting_context
+from app.config import settings
+from app.models.meeting import Meeting
+from tests.conftest import auth_header
+
+# Gerenderte Dokumente, Temp- und Lock-Dateien landen im tmp_path statt im echten UPLOAD_DIR
+pytestmark = pytest.mark.usefixtures("upload_dir")
+
+
+def _meeting(db, user, datum: date, titel: str = "Landesvorstand") -> Meeting:
+    m = Meeting(
+        titel=titel,
+        typ="landesvorstand",
+        datum=datum,
+        tagesordnung=["Begrüßung", {"titel": "Berichte", "unterpunkte": ["Landesvorsitz"]}],
+        protokoll_top_texte=["Eröffnet.", ["Bericht liegt vor."]],
+        erstellt_von_id=user.id,
+    )
+    db.add(m)
+    db.commit()
+    db.refresh(m)
+    return m
+
+
+class TestMeetingRendering:
+    def test_protocol_context_is_picklable(self, db, mitarbeiter_user):
+        meeting = _meeting(db, mitarbeiter_user, date(2026, 3, 1))
+        context = _meeting_context(meeting, for_protocol=True, db=db)
+        assert pickle.loads(pickle.dumps(context))["titel"] == "Landesvorstand"
+
+    def test_generate_invitation_renders_in_pool(self, client, db, mitarbeiter_user, mitarbeiter_token):
+        meeting = _meeting(db, mitarbeiter_user, date(2026, 3, 1))
+        response = client.post(
+            f"/api/v1/meetings/{meeting.id}/generate-invitation", headers=auth_header(mitarbeiter_token)
+        )
+        assert response.status_code == 200
+        assert re.fullmatch(rf"sitzungen/einladung_{meeting.id}_2026-03-01_[0-9a-f]{{12}}\.docx", response.json()["path"])
+
+    def test_regeneration_versions_file_and_keeps_replaced_one(self, client, db, mitarbeiter_user, mitarbeiter_token):
+        meeting = _meeting(db, mitarbeiter_user, date(2026, 3, 1))
+        url = f"/api/v1/meetings/{meeting.id}/generate-invitation"
+        first = client.post(url, headers=auth_header(mitarbeiter_token)).json()["path"]
+        os.utime(os.path.join(settings.UPLOAD_DIR, first), (0, 0))  # vor langer Zeit erzeugt
+        meeting.ort = "Kiel"
+        db.commit()
+        second = client.post(url, headers=auth_header(mitarbeiter_token)).json()["path"]
+        assert first != second
+        db.refresh(meeting)
+        assert meeting.einladung_pfad == second
+        # Ersetzte Version bleibt für laufende Leser liegen; löschen darf sie erst der Aufräum-Lauf
+        assert os.path.isfile(os.path.join(settings.UPLOAD_DIR, first))
+        assert os.path.getmtime(os.path.join(settings.UPLOAD_DIR, first)) > time.time() - 60  # Frist ab Ersetzen
+        assert os.path.isfile(os.path.join(settings.UPLOAD_DIR, second))
+        leftovers = [n for n in os.listdir(os.path.join(settings.UPLOAD_DIR, "sitzungen")) if n.endswith(".tmp.docx")]
+        assert leftovers == []
+
+
+class TestBatchExport:
+    def test_exports_protocols_of_one_year_as_zip(self, client, db, mitarbeiter_user, vorstand_token):
+        first = _meeting(db, mitarbeiter_user, date(2025, 2, 1))
+        second = _meeting(db, mitarbeiter_user, date(2025, 9, 1), titel="Erweiterter Landesvorstand")
+        _meeting(db, mitarbeiter_user, date(2026, 1, 1))
+        response = client.post(
+            "/api/v1/meetings/batch-export",
+            json={"jahr": 2025, "kinds": ["protokoll"]},
+            headers=auth_header(vorstand_token),
+        )
+        assert response.status_code == 200
+        assert response.headers["content-type"] == "application/zip"
+        names = zipfile.ZipFile(io.BytesIO(response.content)).namelist()
+        assert names == [f"protokoll_{first.id}_2025-02-01.docx", f"protokoll_{second.id}_2025-09-01.docx"]
+        db.refresh(first)
+        assert first.protokoll_pfad.startswith(f"sitzungen/protokoll_{first.id}_2025-02-01_")
+
+    def test_zip_is_written_outside_the_event_loop(self, client, db, mitarbeiter_user, vorstand_token, monkeypatch):
+        _meeting(db, mitarbeiter_user, date(2025, 2, 1))
+        loops = []
+        original = zipfile.ZipFile
+
+        def recording_zipfile(file, *args, **kwargs):
+            if str(file).endswith(".zip"):  # nur das Export-Archiv, nicht DOCX-Rendering
+                try:
+                    loops.append(asyncio.get_running_loop())
+                except RuntimeError:
+                    loops.append(None)
+            return original(file, *args, **kwargs)
+
+        monkeypatch.setattr(meetings_api.zipfile, "ZipFile", recording_zipfile)
+        response = client.post(
+            "/api/v1/meetings/batch-export", json={"jahr": 2025}, headers=auth_header(vorstand_token)
+        )
+        assert response.status_code == 200
+        assert loops == [None]
+
+    def test_no_matching_meetings(self, client, vorstand_token):
+        response = client.post(
+            "/api/v1/meetings/batch-export", json={"jahr": 1999}, headers=auth_header(vorstand_token)
+        )
+        assert response.status_code == 404
+
+    def test_requires_selection_and_vorstand(self, client, db, mitarbeiter_user, mitarbeiter_token, vorstand_token):
+        _meeting(db, mitarbeiter_user, date(2025, 2, 1))
+        url = "/api/v1/meetings/batch-export"
+        assert client.post(url, json={"kinds": ["protokoll"]}, headers=auth_header(vorstand_token)).status_code == 422
+        assert client.post(url, json={"jahr": 2025}, headers=auth_header(mitarbeiter_token)).status_code == 403
+
+    def test_rejects_more_documents_than_the_cap(self, client, db, mitarbeiter_user, vorstand_token, monkeypatch):
+        monkeypatch.setattr(settings, "BATCH_EXPORT_MAX_DOCUMENTS", 3)
+        meeting = _meeting(db, mitarbeiter_user, date(2025, 2, 1))
+        _meeting(db, mitarbeiter_user, date(2025, 9, 1))
+        response = client.post(
+            "/api/v1/meetings/batch-export",
+            json={"jahr": 2025, "kinds": ["einladung", "protokoll"]},
+            headers=auth_header(vorstand_token),
+        )
+        assert response.status_code == 422
+        db.refresh(meeting)
+        assert meeting.einladung_pfad is None  # nichts erzeugt
+
+
+class TestMeetingDeletion:
+    def test_deleting_meeting_removes_generated_documents(self, client, db, mitarbeiter_user, mitarbeiter_token, admin_token):
+        meeting = _meeting(db, mitarbeiter_user, date(2026, 3, 1))
+        path = client.post(
+            f"/api/v1/meetings/{meeting.id}/generate-invitation", headers=auth_header(mitarbeiter_token)
+        ).json()["path"]
+        assert client.delete(f"/api/v1/meetings/{meeting.id}", headers=auth_header(admin_token)).status_code == 204
+        assert not os.path.exists(os.path.join(settings.UPLOAD_DIR, path))
@@ -0,0 +1,69 @@
+"""Tests for the content-addressed upload store."""
+import hashlib
+import os
+from datetime import datetime, timedelta
+
+from app.models.blob import Blob
+from app.models.email_template import EmailTemplate
+from app.models.kreisverband import Kreisverband
+from app.config import settings
+from app.services.blob_store import blob_path, purge_unreferenced, release, store_file
+from tests.conftest import auth_header
+
+PDF = b"%PDF-1.4\nSatzung der JuLis SH\n"
+SHA = hashlib.sha256(PDF).hexdigest()
+
+
+def _blob_files(upload_dir):
+    return [
+        os.path.join(root, name)
+        for root, dirs, files in os.walk(upload_dir / "blobs")
+        if ".incoming" not in root
+        for name in files
+    ]
+
+
+class TestDeduplication:
+    def test_same_content_is_stored_once(self, client, db, admin_token, upload_dir):
+        kv = Kreisverband(name="Kiel")
+        db.add(kv)
+        db.commit()
+        paths = []
+        for titel in ("MV 2026", "MV 2026 (Kopie)"):
+            response = client.post(
+                f"/api/v1/kreisverband/{kv.id}/protokolle",
+                data={"titel": titel, "datum": "2026-03-01", "typ": "MV"},
+                files={"datei": ("protokoll.pdf", PDF, "application/pdf")},
+                headers=auth_header(admin_token),
+            )
+            assert response.status_code == 201
+            paths.append(response.json()["datei_pfad"])
+        assert paths[0] == paths[1] == blob_path(SHA, ".pdf")
+        assert len(_blob_files(upload_dir)) == 1
+        assert db.get(Blob, SHA).ref_count == 2
+
+    def test_attachment_replacement_releases_old_blob(self, client, db, admin_token, upload_dir):
+        template = EmailTemplate(name="Eintritt", typ="mitglied", scenario="eintritt", betreff="Willkommen", inhalt="Hallo")
+        db.add(template)
+        db.commit()
+        url = f"/api/v1/email-templates/{template.id}/attachment"
+        client.put(url, files={"file": ("satzung.pdf", PDF, "application/pdf")}, headers=auth_header(admin_token))
+        client.put(url, files={"file": ("info.txt", b"Infos", "text/plain")}, headers=auth_header(admin_token))
+        old = db.get(Blob, SHA)
+        db.refresh(old)
+        assert old.ref_count == 0 and old.released_at is not None
+
+
+class TestGarbageCollection:
+    def test_unreferenced_blobs_are_purged_after_grace_period(self, db, upload_dir, tmp_path_factory):
+        source = tmp_path_factory.mktemp("alt") / "satzung.pdf"
+        source.write_bytes(PDF)
+        blob = store_file(db, str(source), ".pdf")
+        db.commit()
+        release(db, blob.path)
+        db.commit()
+        now = datetime.utcnow()
+        assert purge_unreferenced(db, now) == 0  # noch in der Karenzzeit
+        assert purge_unreferenced(db, now + timedelta(minutes=settings.BLOB_GRACE_MINUTES + 1)) == 1
+        assert db.get(Blob, SHA) is None
+        assert _blob_files(upload_dir) == []
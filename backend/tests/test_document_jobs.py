@@ -0,0 +1,206 @@
+"""Tests for the background document job queue."""
+import io
+import os
+from datetime import date, datetime, timedelta
+
+import pytest
+from PIL import Image
+
+from app.config import settings
+from app.models.blob import Blob
+from app.models.document_job import DocumentJob
+from app.models.kreisverband import Kreisverband, KVProtokoll
+from app.models.meeting import Meeting
+from app.services import document_jobs
+from app.services.document_jobs import DocumentWorker, claim_next, run_job, submit_job
+from tests.conftest import TestingSessionLocal, auth_header
+
+DOCX = b"PK\x03\x04 protokoll"
+
+# Ergebnisse, Temp- und Lock-Dateien landen im tmp_path statt im echten UPLOAD_DIR
+pytestmark = pytest.mark.usefixtures("upload_dir")
+
+
+def _meeting(db, user) -> Meeting:
+    m = Meeting(titel="Landesvorstand", typ="landesvorstand", datum=date(2026, 11, 2), erstellt_von_id=user.id)
+    db.add(m)
+    db.commit()
+    db.refresh(m)
+    return m
+
+
+class TestJobApi:
+    def test_identical_pending_jobs_are_deduplicated(self, client, db, mitarbeiter_user, mitarbeiter_token):
+        meeting = _meeting(db, mitarbeiter_user)
+        body = {"kind": "einladung", "params": {"meeting_id": meeting.id}}
+        first = client.post("/api/v1/jobs/", json=body, headers=auth_header(mitarbeiter_token))
+        second = client.post("/api/v1/jobs/", json=body, headers=auth_header(mitarbeiter_token))
+        assert first.status_code == 202
+        assert first.json()["id"] == second.json()["id"]
+        assert first.json()["status"] == "pending"
+
+    def test_deduplicated_job_is_visible_to_second_user(self, client, db, mitarbeiter_user, mitarbeiter_token, vorstand_token):
+        meeting = _meeting(db, mitarbeiter_user)
+        body = {"kind": "einladung", "params": {"meeting_id": meeting.id}}
+        first = client.post("/api/v1/jobs/", json=body, headers=auth_header(mitarbeiter_token))
+        second = client.post("/api/v1/jobs/", json=body, headers=auth_header(vorstand_token))
+        assert second.status_code == 202 and second.json()["id"] == first.json()["id"]
+        response = client.get(f"/api/v1/jobs/{first.json()['id']}", headers=auth_header(vorstand_token))
+        assert response.status_code == 200 and response.json()["status"] == "pending"
+        response = client.get(f"/api/v1/jobs/{first.json()['id']}/result", headers=auth_header(vorstand_token))
+        assert response.status_code == 409
+
+    def test_job_reads_require_the_role_of_the_job_kind(self, client, db, mitarbeiter_user, mitarbeiter_token):
+        job = submit_job(db, "aenderungsantrag_pdf", {"aenderungsantrag_id": 1}, user_id=mitarbeiter_user.id)
+        response = client.get(f"/api/v1/jobs/{job.id}", headers=auth_header(mitarbeiter_token))
+        assert response.status_code == 403
+
+    def test_amendment_jobs_require_vorstand(self, client, mitarbeiter_token):
+        body = {"kind": "aenderungsantrag_pdf", "params": {"aenderungsantrag_id": 1}}
+        response = client.post("/api/v1/jobs/", json=body, headers=auth_header(mitarbeiter_token))
+        assert response.status_code == 403
+
+    def test_worker_renders_invitation_and_result_is_downloadable(self, client, db, mitarbeiter_user, mitarbeiter_token):
+        meeting = _meeting(db, mitarbeiter_user)
+        body = {"kind": "einladung", "params": {"meeting_id": meeting.id}}
+        job_id = client.post("/api/v1/jobs/", json=body, headers=auth_header(mitarbeiter_token)).json()["id"]
+        assert client.get(f"/api/v1/jobs/{job_id}/result", headers=auth_header(mitarbeiter_token)).status_code == 409
+
+        assert DocumentWorker(session_factory=TestingSessionLocal).run_once() == 1
+
+        status = client.get(f"/api/v1/jobs/{job_id}", headers=auth_header(mitarbeiter_token)).json()
+        assert status["status"] == "done"
+        assert status["expires_at"] is not None
+        result = client.get(f"/api/v1/jobs/{job_id}/result", headers=auth_header(mitarbeiter_token))
+        assert result.status_code == 200
+        assert result.content[:2] == b"PK"
+        db.refresh(meeting)
+        assert meeting.einladung_pfad.startswith(f"sitzungen/einladung_{meeting.id}_2026-11-02_")
+        assert result.headers["content-disposition"].endswith(f'filename="einladung_{meeting.id}_2026-11-02.docx"')
+
+    def test_failing_housekeeping_does_not_block_jobs(self, db, mitarbeiter_user, monkeypatch):
+        def broken(db, now):
+            raise OSError("S3 Zeitüberschreitung")
+
+        monkeypatch.setattr(document_jobs, "sweep_orphans", broken)
+        indexed = []
+        monkeypatch.setattr(document_jobs, "index_file_texts", lambda db: indexed.append(True))
+        meeting = _meeting(db, mitarbeiter_user)
+        job = submit_job(db, "einladung", {"meeting_id": meeting.id})
+
+        worker = DocumentWorker(session_factory=TestingSessionLocal)
+        assert worker.run_once() == 1
+        assert indexed == [True]  # spätere Schritte laufen trotzdem
+        assert worker._last_housekeeping is not None
+        db.refresh(job)
+        assert job.status == "done"
+
+
+class TestJobRetries:
+    def test_failed_attempts_back_off_then_fail(self, db, mitarbeiter_user, monkeypatch):
+        meeting = _meeting(db, mitarbeiter_user)
+
+        def broken(db, job):
+            raise RuntimeError("soffice abgestürzt")
+
+        monkeypatch.setitem(document_jobs.HANDLERS, "einladung_pdf", broken)
+        job = submit_job(db, "einladung_pdf", {"meeting_id": meeting.id})
+        for attempt in range(1, job.max_attempts + 1):
+            now = datetime.utcnow() + timedelta(days=attempt)
+            claimed = claim_next(db, now)
+            assert claimed is not None and claimed.attempts == attempt
+            run_job(db, claimed)
+            if attempt < job.max_attempts:
+                assert claimed.status == "pending"
+                assert claimed.next_attempt_at > datetime.utcnow()
+        assert claimed.status == "failed"
+        assert "soffice" in claimed.error
+
+    def test_expired_results_are_purged(self, db):
+        rel_path = os.path.join(document_jobs.JOBS_DIR, "old.pdf")
+        full = os.path.join(settings.UPLOAD_DIR, rel_path)
+        os.makedirs(os.path.dirname(full), exist_ok=True)
+        with open(full, "wb") as f:
+            f.write(b"%PDF")
+        now = datetime.utcnow()
+        db.add(DocumentJob(
+            kind="einladung_pdf", params={"meeting_id": 1}, dedup_key="x", status="done", attempts=1,
+            max_attempts=3, next_attempt_at=now, result_path=rel_path, expires_at=now - timedelta(minutes=1),
+        ))
+        db.commit()
+        assert document_jobs.purge_expired(db, now) == 1
+        assert not os.path.exists(full)
+
+
+class TestProtokollVorschau:
+    @pytest.fixture
+    def renderers(self, tmp_path, monkeypatch):
+        monkeypatch.setattr(settings, "UPLOAD_DIR", str(tmp_path))
+        monkeypatch.setattr(settings, "DOWNLOAD_URL_SECRET", "secret")
+        calls = []
+
+        def fake_docx_to_pdf(path):
+            calls.append(path)
+            pdf = path + ".pdf"
+            with open(pdf, "wb") as f:
+                f.write(b"%PDF-1.4 konvertiert")
+            return pdf
+
+        def fake_thumbnail(pdf_path, png_path, width=None):
+            Image.new("RGB", (32, 45), "white").save(png_path, "PNG")
+            return True
+
+        monkeypatch.setattr(document_jobs, "docx_to_pdf", fake_docx_to_pdf)
+        monkeypatch.setattr(document_jobs, "render_pdf_thumbnail", fake_thumbnail)
+        return calls
+
+    def _upload(self, client, db, token, filename, content):
+        kv = Kreisverband(name="Kiel")
+        db.add(kv)
+        db.commit()
+        response = client.post(
+            f"/api/v1/kreisverband/{kv.id}/protokolle",
+            data={"titel": "MV 2026", "datum": "2026-03-01", "typ": "MV"},
+            files={"datei": (filename, content, "application/octet-stream")},
+            headers=auth_header(token),
+        )
+        assert response.status_code == 201
+        assert response.json()["vorschau_status"] == "pending"
+        return kv, response.json()["id"]
+
+    def test_docx_upload_gets_pdf_and_thumbnail(self, client, db, mitarbeiter_token, admin_token, renderers):
+        kv, protokoll_id = self._upload(client, db, mitarbeiter_token, "mv.docx", DOCX)
+        assert DocumentWorker(session_factory=TestingSessionLocal).run_once() == 1
+        assert len(renderers) == 1
+
+        listing = client.get(f"/api/v1/kreisverband/{kv.id}/protokolle", headers=auth_header(mitarbeiter_token)).json()[0]
+        assert listing["vorschau_status"] == "done"
+        assert listing["pdf_pfad"].endswith(".pdf") and listing["pdf_pfad"] != listing["datei_pfad"]
+        assert client.get(listing["pdf_url"]).content == b"%PDF-1.4 konvertiert"
+        thumbnail = client.get(listing["thumbnail_url"])
+        assert Image.open(io.BytesIO(thumbnail.content)).size == (32, 45)
+
+        client.delete(f"/api/v1/kreisverband/protokolle/{protokoll_id}", headers=auth_header(admin_token))
+        assert db.query(Blob).filter(Blob.ref_count > 0).count() == 0
+
+    def test_pdf_upload_is_not_converted(self, client, db, mitarbeiter_token, renderers):
+        _, protokoll_id = self._upload(client, db, mitarbeiter_token, "mv.pdf", b"%PDF-1.4 original")
+        assert DocumentWorker(session_factory=TestingSessionLocal).run_once() == 1
+        assert renderers == []
+        protokoll = db.get(KVProtokoll, protokoll_id)
+        db.refresh(protokoll)
+        assert protokoll.pdf_pfad == protokoll.datei_pfad
+        assert protokoll.thumbnail_pfad.endswith(".png")
+
+    def test_failed_conversion_is_marked_after_last_attempt(self, client, db, mitarbeiter_token, renderers, monkeypatch):
+        monkeypatch.setattr(document_jobs, "docx_to_pdf", lambda path: None)
+        _, protokoll_id = self._upload(client, db, mitarbeiter_token, "mv.docx", DOCX)
+        job = db.query(DocumentJob).filter(DocumentJob.kind == "protokoll_vorschau").one()
+        for attempt in range(1, job.max_attempts + 1):
+            claimed = claim_next(db, datetime.utcnow() + timedelta(days=attempt))
+            run_job(db, claimed)
+        assert claimed.status == "failed"
+        protokoll = db.get(KVProtokoll, protokoll_id)
+        db.refresh(protokoll)
+        assert protokoll.vorschau_status == "failed"
+        assert protokoll.pdf_pfad is None
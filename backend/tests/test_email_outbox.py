@@ -0,0 +1,222 @@
+"""Tests for the email outbox: queueing with the member change, delivery, retries and dead letters."""
+import smtplib
+from datetime import datetime, timedelta
+
+import pytest
+
+from app.config import settings
+from app.models.email_outbox import EmailOutbox
+from app.models.email_template import EmailTemplate
+from app.models.kreisverband import Kreisverband, KVVorstandsmitglied
+from app.models.member_change import MemberChange
+from app.services import email_outbox
+from app.services.blob_store import store_file
+from app.services.email import DeliveryError, deliver_emails
+from app.services.email_outbox import EmailOutboxWorker, claim_batch, deliver_batch
+from app.services.smtp_pool import close_smtp_pool
+from tests.conftest import TestingSessionLocal, auth_header
+
+
+@pytest.fixture
+def smtp_settings(monkeypatch):
+    monkeypatch.setattr(settings, "SMTP_ENABLED", True)
+    monkeypatch.setattr(settings, "SMTP_USER", "intranet@example.org")
+    monkeypatch.setattr(settings, "SMTP_PASSWORD", "geheim")
+    monkeypatch.setattr(settings, "SMTP_FROM_EMAIL", "intranet@example.org")
+    monkeypatch.setattr(settings, "SMTP_RATE_PER_MINUTE", 0)
+    yield
+    close_smtp_pool()
+
+
+@pytest.fixture
+def kv_with_vorstand(db):
+    kv = Kreisverband(name="Kiel")
+    db.add(kv)
+    db.flush()
+    for rolle, name in (("Kreisvorsitzender", "Anna"), ("Kreisschatzmeister", "Ben")):
+        db.add(KVVorstandsmitglied(kreisverband_id=kv.id, rolle=rolle, name=name, email=f"{name.lower()}@kv.example.org"))
+    for typ in ("mitglied", "empfaenger"):
+        db.add(EmailTemplate(name=typ, typ=typ, scenario="eintritt", betreff="Eintritt {vorname}", inhalt="Hallo {empfaenger_name}"))
+    db.commit()
+    return kv
+
+
+def _create_change(client, token, kv) -> int:
+    response = client.post(
+        "/api/v1/member-changes/",
+        json={"scenario": "eintritt", "vorname": "Lea", "nachname": "Meyer", "email": "lea@example.org", "kreisverband_id": kv.id},
+        headers=auth_header(token),
+    )
+    assert response.status_code == 201
+    return response.json()["id"]
+
+
+def _emails(client, token, change_id: int) -> list:
+    response = client.get(f"/api/v1/member-changes/{change_id}/emails", headers=auth_header(token))
+    assert response.status_code == 200
+    return response.json()
+
+
+class TestQueueing:
+    def test_member_change_queues_one_message_per_recipient(self, client, db, mitarbeiter_token, kv_with_vorstand, monkeypatch):
+        monkeypatch.setattr(email_outbox, "deliver_emails", lambda messages: pytest.fail("kein Versand im Request"))
+        change_id = _create_change(client, mitarbeiter_token, kv_with_vorstand)
+
+        emails = _emails(client, mitarbeiter_token, change_id)
+        assert sorted((e["typ"], e["to_addresses"][0]) for e in emails) == [
+            ("empfaenger", "anna@kv.example.org"),
+            ("empfaenger", "ben@kv.example.org"),
+            ("mitglied", "lea@example.org"),
+        ]
+        assert {e["status"] for e in emails} == {"pending"}
+        assert emails[0]["subject"] == "Eintritt Lea"
+
+    def test_queue_rolls_back_with_the_change(self, db, kv_with_vorstand):
+        from app.api.v1.member_changes import _queue_change_emails
+
+        change = MemberChange(scenario="eintritt", vorname="Lea", nachname="Meyer", email="lea@example.org", kreisverband_id=kv_with_vorstand.id)
+        db.add(change)
+        db.flush()
+        _queue_change_emails(db, change)
+        db.rollback()
+        assert db.query(EmailOutbox).count() == 0 and db.query(MemberChange).count() == 0
+
+    def test_draft_queues_nothing_until_sent(self, client, db, mitarbeiter_token, kv_with_vorstand):
+        response = client.post(
+            "/api/v1/member-changes/",
+            params={"send_emails": False},
+            json={"scenario": "eintritt", "vorname": "Lea", "nachname": "Meyer", "email": "lea@example.org", "kreisverband_id": kv_with_vorstand.id},
+            headers=auth_header(mitarbeiter_token),
+        )
+        change_id = response.json()["id"]
+        assert _emails(client, mitarbeiter_token, change_id) == []
+        client.post(f"/api/v1/member-changes/{change_id}/send", headers=auth_header(mitarbeiter_token))
+        assert len(_emails(client, mitarbeiter_token, change_id)) == 3
+
+
+class TestDelivery:
+    def _queue(self, db, count: int = 1, **kwargs):
+        messages = [
+            email_outbox.enqueue_email(db, [f"m{i}@example.org"], f"Betreff {i}", "Text", entity_type="member_change", entity_id=1, **kwargs)
+            for i in range(count)
+        ]
+        db.commit()
+        return messages
+
+    def test_worker_delivers_and_backs_off(self, db, smtp_settings, monkeypatch):
+        self._queue(db, 2)
+        sent = []
+
+        def fake_deliver(messages):
+            sent.extend(m["to"][0] for m in messages)
+            return [None if m["to"][0] == "m0@example.org" else DeliveryError("421 try later") for m in messages]
+
+        monkeypatch.setattr(email_outbox, "deliver_emails", fake_deliver)
+        assert EmailOutboxWorker(session_factory=TestingSessionLocal).run_once() == 1
+        assert sent == ["m0@example.org", "m1@example.org"]  # ein Stapel, nicht erneut im selben Lauf
+
+        db.expire_all()
+        ok, retry = db.query(EmailOutbox).order_by(EmailOutbox.id).all()
+        assert (ok.status, ok.finished_at is not None) == ("sent", True)
+        assert (retry.status, retry.attempts, retry.last_error) == ("pending", 1, "421 try later")
+        delay = retry.next_attempt_at - datetime.utcnow()
+        assert timedelta(seconds=settings.EMAIL_OUTBOX_RETRY_SECONDS - 5) < delay <= timedelta(seconds=settings.EMAIL_OUTBOX_RETRY_SECONDS)
+
+    def test_dead_letter_after_max_attempts_or_permanent_error(self, db, monkeypatch):
+        transient, permanent = self._queue(db, 2)
+        transient.max_attempts = 2
+        db.commit()
+        monkeypatch.setattr(email_outbox, "deliver_emails", lambda messages: [
+            DeliveryError("550 unbekannt", permanent=True) if m["to"][0] == "m1@example.org" else DeliveryError("timeout")
+            for m in messages
+        ])
+        for _ in range(2):
+            db.query(EmailOutbox).filter(EmailOutbox.status == "pending").update({"next_attempt_at": datetime.utcnow()})
+            db.commit()
+            deliver_batch(db, claim_batch(db, datetime.utcnow()))
+        db.refresh(transient)
+        db.refresh(permanent)
+        assert (transient.status, transient.attempts) == ("dead", 2)
+        assert (permanent.status, permanent.attempts) == ("dead", 1)
+
+    def test_claimed_messages_are_not_claimed_twice(self, db):
+        self._queue(db, 3)
+        first = claim_batch(db, datetime.utcnow(), limit=2)
+        other = TestingSessionLocal()
+        try:
+            second = claim_batch(other, datetime.utcnow())
+        finally:
+            other.close()
+        assert len(first) == 2 and len(second) == 1
+        assert {m.id for m in first}.isdisjoint({m.id for m in second})
+
+    def test_attachment_stays_referenced_until_delivered(self, db, tmp_path, monkeypatch):
+        monkeypatch.setattr(settings, "UPLOAD_DIR", str(tmp_path))
+        source = tmp_path / "satzung.pdf"
+        source.write_bytes(b"%PDF-1.4 Satzung")
+        blob = store_file(db, str(source), ".pdf")
+        db.commit()
+        (message,) = self._queue(db, attachment_path=blob.path, attachment_filename="Satzung.pdf")
+        db.refresh(blob)
+        assert blob.ref_count == 2
+
+        captured = []
+        monkeypatch.setattr(email_outbox, "deliver_emails", lambda messages: captured.extend(messages) or [None] * len(messages))
+        deliver_batch(db, claim_batch(db, datetime.utcnow()))
+        assert captured[0]["attachments"] == [("Satzung.pdf", b"%PDF-1.4 Satzung")]
+        db.refresh(blob)
+        assert blob.ref_count == 1
+
+    def test_retry_endpoint_requeues_dead_letters(self, client, db, admin_token, mitarbeiter_token):
+        (message,) = self._queue(db)
+        change = MemberChange(id=1, scenario="eintritt", vorname="Lea", nachname="Meyer")
+        db.add(change)
+        db.commit()
+        url = f"/api/v1/member-changes/1/emails/{message.id}/retry"
+        assert client.post(url, headers=auth_header(admin_token)).status_code == 400  # noch pending
+
+        message.status, message.attempts = "dead", 5
+        db.commit()
+        assert client.post(url, headers=auth_header(mitarbeiter_token)).status_code == 403
+        response = client.post(url, headers=auth_header(admin_token))
+        assert response.status_code == 200
+        assert (response.json()["status"], response.json()["attempts"]) == ("pending", 0)
+
+
+class _FakeSMTP:
+    """smtplib.SMTP-Ersatz: 550 für bounce@, Verbindungsabbruch bei drop@."""
+
+    def __init__(self, host, port, timeout=None):
+        self.sent = []
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        return False
+
+    def starttls(self):
+        pass
+
+    def login(self, user, password):
+        pass
+
+    def quit(self):
+        pass
+
+    def sendmail(self, sender, to, msg):
+        if to == ["bounce@example.org"]:
+            raise smtplib.SMTPRecipientsRefused({"bounce@example.org": (550, b"unknown user")})
+        if to == ["drop@example.org"]:
+            raise smtplib.SMTPServerDisconnected("connection lost")
+        self.sent.append(to)
+
+
+class TestDeliverEmails:
+    def test_errors_are_classified_per_message(self, smtp_settings, monkeypatch):
+        monkeypatch.setattr(smtplib, "SMTP", _FakeSMTP)
+        messages = [{"to": [to], "subject": "S", "body": "B"} for to in ("a@example.org", "bounce@example.org", "drop@example.org", "b@example.org")]
+        ok, bounced, dropped, after = deliver_emails(messages)
+        assert ok is None
+        assert bounced.permanent
+        assert not dropped.permanent and after is dropped  # Rest des Stapels: neuer Versuch
@@ -0,0 +1,143 @@
+"""Tests for the Microsoft Graph mail transport against an in-process Graph stand-in."""
+import base64
+import json
+
+import httpx
+
+from app.config import settings
+from app.services import graph_mail
+from app.services.email import deliver_emails
+from app.services.graph_mail import GraphMailer
+
+
+class FakeGraph:
+    """Token-Endpunkt und $batch; status_for(address, round) bestimmt die Antwort je sendMail."""
+
+    def __init__(self, status_for=None):
+        self.status_for = status_for or (lambda address, round_: 202)
+        self.token_requests = 0
+        self.batches = []
+        self.rounds = {}
+
+    def __call__(self, request: httpx.Request) -> httpx.Response:
+        if request.url.path.endswith("/oauth2/v2.0/token"):
+            self.token_requests += 1
+            return httpx.Response(200, json={"access_token": f"token-{self.token_requests}", "expires_in": 3600})
+        assert request.url.path == "/v1.0/$batch"
+        assert request.headers["Authorization"] == f"Bearer token-{self.token_requests}"
+        requests = json.loads(request.content)["requests"]
+        self.batches.append(requests)
+        responses = []
+        for item in requests:
+            address = item["body"]["message"]["toRecipients"][0]["emailAddress"]["address"]
+            round_ = self.rounds[address] = self.rounds.get(address, 0) + 1
+            status = self.status_for(address, round_)
+            body = {} if status == 202 else {"error": {"code": "ErrorCode", "message": "Fehler"}}
+            headers = {"Retry-After": "3"} if status == 429 else {}
+            responses.append({"id": item["id"], "status": status, "headers": headers, "body": body})
+        return httpx.Response(200, json={"responses": responses})
+
+
+class FakeClock:
+    def __init__(self):
+        self.now = 0.0
+        self.slept = []
+
+    def __call__(self) -> float:
+        return self.now
+
+    def sleep(self, seconds: float) -> None:
+        self.slept.append(seconds)
+
+
+def _mailer(graph: FakeGraph, clock: FakeClock = None) -> GraphMailer:
+    clock = clock or FakeClock()
+    return GraphMailer(
+        "tenant", "client", "secret", "intranet@example.org",
+        transport=httpx.MockTransport(graph), clock=clock, sleep=clock.sleep,
+    )
+
+
+def _messages(count: int, **extra) -> list:
+    return [{"to": [f"m{i}@example.org"], "subject": f"Betreff {i}", "body": "<p>Hallo</p>", **extra} for i in range(count)]
+
+
+class TestGraphMailer:
+    def test_batches_of_twenty_share_one_token(self):
+        graph = FakeGraph()
+        mailer = _mailer(graph)
+        assert mailer.send(_messages(45)) == [None] * 45
+        assert [len(b) for b in graph.batches] == [20, 20, 5]
+        assert graph.token_requests == 1
+        first = graph.batches[0][0]
+        assert first["url"] == "/users/intranet%40example.org/sendMail"
+        assert first["body"]["message"]["body"] == {"contentType": "HTML", "content": "<p>Hallo</p>"}
+
+    def test_token_is_renewed_before_expiry(self):
+        graph, clock = FakeGraph(), FakeClock()
+        mailer = _mailer(graph, clock)
+        mailer.send(_messages(1))
+        clock.now = 3600 - 301
+        mailer.send(_messages(1))
+        assert graph.token_requests == 1
+        clock.now = 3600 - 299  # innerhalb der Sicherheitsmarge
+        mailer.send(_messages(1))
+        assert graph.token_requests == 2
+
+    def test_attachments_are_encoded_once_per_call(self, monkeypatch):
+        encoded = []
+        original = base64.b64encode
+        monkeypatch.setattr(graph_mail.base64, "b64encode", lambda data: encoded.append(data) or original(data))
+        graph = FakeGraph()
+        content = b"%PDF-1.4 Satzung"
+        # getrennt gelesene, aber gleiche Inhalte (wie aus dem Outbox-Stapel)
+        messages = [{**m, "attachments": [("Satzung.pdf", bytes(content))]} for m in _messages(3)]
+        assert _mailer(graph).send(messages) == [None] * 3
+        assert encoded == [content]
+        attachment = graph.batches[0][2]["body"]["message"]["attachments"][0]
+        assert attachment["contentType"] == "application/pdf"
+        assert base64.b64decode(attachment["contentBytes"]) == content
+
+    def test_statuses_are_classified_and_throttled_requests_retried(self):
+        statuses = {"m0@example.org": [202], "m1@example.org": [429, 202], "m2@example.org": [400], "m3@example.org": [503, 503, 503]}
+        graph, clock = FakeGraph(lambda address, round_: statuses[address][round_ - 1]), FakeClock()
+        ok, throttled, invalid, unavailable = _mailer(graph, clock).send(_messages(4))
+        assert ok is None and throttled is None
+        assert invalid.permanent and "400" in str(invalid)
+        assert not unavailable.permanent
+        assert [len(b) for b in graph.batches] == [4, 2, 1]
+        assert clock.slept == [3.0, 1.0]
+
+    def test_oversized_attachment_is_rejected_without_request(self):
+        graph = FakeGraph()
+        big = [("gross.pdf", b"x" * (graph_mail.MAX_ATTACHMENT_BYTES + 1))]
+        (error,) = _mailer(graph).send(_messages(1, attachments=big))
+        assert error.permanent and graph.batches == []
+
+    def test_failed_token_request_fails_the_batch_transiently(self):
+        mailer = GraphMailer(
+            "tenant", "client", "secret", "intranet@example.org",
+            transport=httpx.MockTransport(lambda request: httpx.Response(401, json={"error": "invalid_client"})),
+        )
+        errors = mailer.send(_messages(2))
+        assert all(e is not None and not e.permanent for e in errors)
+
+
+class TestTransportSelection:
+    def test_deliver_emails_uses_graph_when_selected(self, monkeypatch):
+        for name, value in (
+            ("MAIL_TRANSPORT", "graph"), ("MS_TENANT_ID", "tenant"), ("MS_CLIENT_ID", "client"),
+            ("MS_CLIENT_SECRET", "secret"), ("MS_SENDER_MAIL", "intranet@example.org"),
+        ):
+            monkeypatch.setattr(settings, name, value)
+        graph = FakeGraph()
+        monkeypatch.setattr(graph_mail, "get_graph_mailer", lambda: _mailer(graph))
+        assert settings.email_configured
+        assert deliver_emails(_messages(2)) == [None, None]
+        assert len(graph.batches) == 1
+
+    def test_graph_settings_are_reported_missing(self, monkeypatch):
+        monkeypatch.setattr(settings, "MAIL_TRANSPORT", "graph")
+        monkeypatch.setattr(settings, "MS_CLIENT_SECRET", None)
+        assert not settings.email_configured
+        assert "MS_CLIENT_SECRET" in settings.smtp_missing_settings()
@@ -0,0 +1,64 @@
+"""Tests for cross-process resource locks (file lock backend)."""
+import multiprocessing
+import os
+import time
+
+import pytest
+
+from app.config import settings
+from app.services.locks import LockTimeout, _Lock, lock_dir, remove_stale_lock_files, resource_lock
+
+
+def _hold(name, ready, release, upload_dir):
+    settings.UPLOAD_DIR = upload_dir  # eigener Prozess (spawn): Monkeypatch wirkt dort nicht
+    with resource_lock(name):
+        ready.set()
+        release.wait(5)
+
+
+class TestResourceLock:
+    def test_lock_files_follow_upload_dir(self, upload_dir):
+        with resource_lock("blob-test"):
+            assert lock_dir() == os.path.join(str(upload_dir), ".locks")
+            assert os.listdir(lock_dir()) == ["blob-test.lock"]
+
+    def test_lock_is_exclusive_across_processes(self, upload_dir):
+        ctx = multiprocessing.get_context("spawn")
+        ready, release = ctx.Event(), ctx.Event()
+        holder = ctx.Process(target=_hold, args=("meeting-1-einladung", ready, release, str(upload_dir)))
+        holder.start()
+        try:
+            assert ready.wait(20)
+            with pytest.raises(LockTimeout):
+                with resource_lock("meeting-1-einladung", timeout=0.2):
+                    pass
+            with resource_lock("meeting-2-einladung", timeout=0.2):
+                pass  # andere Ressource ist frei
+        finally:
+            release.set()
+            holder.join(10)
+        started = time.monotonic()
+        with resource_lock("meeting-1-einladung", timeout=5):
+            assert time.monotonic() - started < 5
+
+    def test_stale_lock_files_are_removed_unless_held(self, upload_dir):
+        old = time.time() - 3600
+        for name in ("blob-alt", "blob-gehalten", "blob-neu"):
+            with resource_lock(name):
+                pass
+        for name in ("blob-alt", "blob-gehalten"):
+            os.utime(os.path.join(lock_dir(), f"{name}.lock"), (old, old))
+        with resource_lock("blob-gehalten"):
+            assert remove_stale_lock_files(time.time() - 60) == 1
+        assert sorted(os.listdir(lock_dir())) == ["blob-gehalten.lock", "blob-neu.lock"]
+
+    def test_lock_on_removed_file_is_not_trusted(self, upload_dir):
+        with resource_lock("blob-weg"):
+            pass
+        stale = _Lock("blob-weg", None)
+        stale._fd = os.open(os.path.join(lock_dir(), "blob-weg.lock"), os.O_RDWR)  # geöffnet, noch nicht gesperrt
+        assert remove_stale_lock_files(time.time() + 1) == 1
+        with resource_lock("blob-weg", timeout=0.5):
+            assert not stale.try_acquire()  # alte Datei gelöscht, neue gehalten
+        assert stale.try_acquire()
+        stale.release()
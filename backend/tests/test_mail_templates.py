@@ -0,0 +1,129 @@
+"""Tests for compiled email templates and the one-query template resolver."""
+import re
+from datetime import timedelta
+
+import pytest
+from sqlalchemy import event
+
+from app.api.v1.member_changes import _queue_change_emails
+from app.models.email_outbox import EmailOutbox
+from app.models.email_template import EmailTemplate
+from app.models.kreisverband import Kreisverband, KVVorstandsmitglied
+from app.models.member_change import MemberChange
+from app.services import mail_templates
+from app.services.mail_templates import CompiledText, TemplateResolver, compiled_template
+
+
+def _regex_render(template: str, data: dict) -> str:
+    """Bisherige Implementierung von email.render_template als Referenz."""
+    return re.sub(r"\{(\w+)\}", lambda m: str(data.get(m.group(1), "")), template).replace("\n", "<br>")
+
+
+@pytest.fixture
+def count_queries(db):
+    statements = []
+    listener = lambda conn, cursor, statement, *args: statements.append(statement)
+    event.listen(db.get_bind(), "before_cursor_execute", listener)
+    yield statements
+    event.remove(db.get_bind(), "before_cursor_execute", listener)
+
+
+class TestCompiledText:
+    @pytest.mark.parametrize("text", [
+        "",
+        "ohne Platzhalter\nzweite Zeile",
+        "{vorname}",
+        "Hallo {vorname} {nachname},\n\nwillkommen im KV {kreis}! {unbekannt}{vorname}",
+        "{nicht-erlaubt} und { leer } bleiben stehen: {}",
+    ])
+    def test_render_matches_regex_substitution(self, text):
+        data = {"vorname": "Lea", "nachname": "Meyer\nvon Holstein", "kreis": 3}
+        assert CompiledText.compile(text).render(data) == _regex_render(text, data)
+
+    def test_bind_leaves_unknown_placeholders_open(self):
+        text = "Hallo {empfaenger_name},\n{vorname} tritt in {kreis} ein ({empfaenger_name})"
+        bound = CompiledText.compile(text).bind({"vorname": "Lea", "kreis": "Kiel"})
+        assert bound.placeholders == ("empfaenger_name", "empfaenger_name")
+        data = {"vorname": "Lea", "kreis": "Kiel", "empfaenger_name": "Anna"}
+        assert bound.render({"empfaenger_name": "Anna"}) == _regex_render(text, data)
+
+
+class TestCompiledTemplateCache:
+    def test_recompiled_only_when_template_changes(self, db, monkeypatch):
+        template = EmailTemplate(name="t", typ="mitglied", scenario="eintritt", betreff="Eintritt {vorname}", inhalt="Hallo")
+        db.add(template)
+        db.commit()
+        compiles = []
+        original = CompiledText.compile.__func__
+        monkeypatch.setattr(CompiledText, "compile", classmethod(lambda cls, text: compiles.append(text) or original(cls, text)))
+
+        first = compiled_template(template)
+        assert compiled_template(template).subject is first.subject
+        assert compiles == ["Eintritt {vorname}", "Hallo"]
+
+        template.betreff = "Willkommen {vorname}"
+        template.updated_at = template.updated_at + timedelta(seconds=1)
+        db.commit()
+        assert compiled_template(template).render({"vorname": "Lea"})[0] == "Willkommen Lea"
+        assert len(compiles) == 4
+
+    def test_same_second_edit_is_not_served_stale(self, db):
+        template = EmailTemplate(name="t", typ="mitglied", scenario="eintritt", betreff="A", inhalt="x")
+        db.add(template)
+        db.commit()
+        compiled_template(template)
+        template.betreff = "B"
+        assert compiled_template(template).render({})[0] == "B"
+        mail_templates.forget_template(template.id)
+        assert template.id not in mail_templates._compiled
+
+
+class TestTemplateResolver:
+    def test_kv_specific_with_general_fallback(self, db):
+        for typ, kv_id, betreff in (
+            ("mitglied", None, "allgemein"), ("mitglied", 7, "KV 7"), ("empfaenger", None, "an KV"),
+            ("mitglied", 7, "jüngere Dublette"),
+        ):
+            db.add(EmailTemplate(name=betreff, typ=typ, scenario="eintritt", kreisverband_id=kv_id, betreff=betreff, inhalt=""))
+        db.add(EmailTemplate(name="fremd", typ="mitglied", scenario="austritt", betreff="austritt", inhalt=""))
+        db.commit()
+
+        templates = TemplateResolver.load(db, "eintritt")
+        subject = lambda t: t.render({})[0]
+        assert subject(templates.resolve("eintritt", "mitglied", 7)) == "KV 7"
+        assert subject(templates.resolve("eintritt", "mitglied", 8)) == "allgemein"
+        assert subject(templates.resolve("eintritt", "mitglied")) == "allgemein"
+        assert subject(templates.resolve("eintritt", "empfaenger", 7)) == "an KV"
+        assert templates.resolve("austritt", "mitglied") is None
+        assert [subject(t) for t in templates.general("eintritt", "mitglied")] == ["allgemein"]
+
+    def test_member_change_emails_use_one_template_query(self, db, count_queries):
+        kvs = [Kreisverband(name=name) for name in ("Kiel", "Lübeck")]
+        db.add_all(kvs)
+        db.flush()
+        for kv in kvs:
+            for rolle, name in (("Kreisvorsitzender", f"Vorsitz {kv.name}"), ("Kreisschatzmeister", f"Kasse {kv.name}")):
+                db.add(KVVorstandsmitglied(kreisverband_id=kv.id, rolle=rolle, name=name, email=f"{rolle}@{kv.id}.example.org"))
+        db.add_all([
+            EmailTemplate(name="m", typ="mitglied", scenario="wechsel", betreff="Wechsel {vorname}", inhalt="nach {kreisverband_neu}"),
+            EmailTemplate(name="e", typ="empfaenger", scenario="wechsel", betreff="Wechsel {vorname}",
+                          inhalt="Hallo {empfaenger_name},\n{vorname} ({abgebend_oder_aufnehmend}), {ihr_kreis}"),
+            EmailTemplate(name="e-kiel", typ="empfaenger", scenario="wechsel", kreisverband_id=kvs[0].id,
+                          betreff="Kiel: {vorname}", inhalt="Moin {vorsitzender}"),
+        ])
+        change = MemberChange(scenario="wechsel", vorname="Lea", nachname="Meyer", email="lea@example.org",
+                              kreisverband_alt_id=kvs[0].id, kreisverband_neu_id=kvs[1].id)
+        db.add(change)
+        db.commit()
+
+        count_queries.clear()
+        _queue_change_emails(db, change)
+        assert sum("FROM email_templates" in s for s in count_queries) == 1
+        db.commit()
+
+        bodies = {m.to_addresses[0]: (m.subject, m.body) for m in db.query(EmailOutbox).all()}
+        assert bodies["lea@example.org"] == ("Wechsel Lea", "nach Lübeck")
+        assert bodies[f"Kreisvorsitzender@{kvs[0].id}.example.org"] == ("Kiel: Lea", "Moin Vorsitz Kiel")
+        assert bodies[f"Kreisschatzmeister@{kvs[1].id}.example.org"] == (
+            "Wechsel Lea", "Hallo Kasse Lübeck,<br>Lea (aufnehmend), Lübeck"
+        )
@@ -0,0 +1,58 @@
+"""Tests for the content-hash keyed PDF cache."""
+import os
+import time
+
+from app.services.pdf_cache import PdfCache, sha256_bytes, sha256_data
+
+
+def _pdf(tmp_path, name, size):
+    path = tmp_path / name
+    path.write_bytes(b"%" * size)
+    return str(path)
+
+
+class TestPdfCache:
+    def test_put_and_get(self, tmp_path):
+        cache = PdfCache(str(tmp_path / "cache"), max_bytes=1024)
+        key = sha256_bytes(b"docx")
+        assert cache.get(key) is None
+        stored = cache.put(key, _pdf(tmp_path, "a.pdf", 10))
+        assert cache.get(key) == stored
+        assert os.path.isfile(stored)
+        assert cache.stats()["hits"] == 1
+        assert cache.stats()["misses"] == 1
+
+    def test_move_removes_source(self, tmp_path):
+        cache = PdfCache(str(tmp_path / "cache"), max_bytes=1024)
+        src = _pdf(tmp_path, "a.pdf", 10)
+        cache.put("ab" * 32, src, move=True)
+        assert not os.path.exists(src)
+
+    def test_evicts_least_recently_used(self, tmp_path):
+        cache = PdfCache(str(tmp_path / "cache"), max_bytes=250)
+        old = cache.put("aa" * 32, _pdf(tmp_path, "1.pdf", 100))
+        recent = cache.put("bb" * 32, _pdf(tmp_path, "2.pdf", 100))
+        past = time.time() - 100
+        os.utime(old, (past, past))
+        os.utime(recent, (past + 10, past + 10))
+        cache.get("aa" * 32)  # Zugriff macht den ältesten Eintrag wieder frisch
+        cache.put("cc" * 32, _pdf(tmp_path, "3.pdf", 100))
+        assert cache.get("aa" * 32) is not None
+        assert cache.get("bb" * 32) is None
+        assert cache.stats()["evictions"] == 1
+
+    def test_recently_served_entries_are_not_evicted(self, tmp_path):
+        cache = PdfCache(str(tmp_path / "cache"), max_bytes=150)
+        cache.put("aa" * 32, _pdf(tmp_path, "1.pdf", 100))
+        served = cache.get("aa" * 32)  # Pfad geht gleich an eine FileResponse
+        cache.put("bb" * 32, _pdf(tmp_path, "2.pdf", 100))
+        assert os.path.isfile(served)
+        assert cache.stats()["evictions"] == 0
+        past = time.time() - 100
+        os.utime(served, (past, past))
+        cache.put("cc" * 32, _pdf(tmp_path, "3.pdf", 100))
+        assert not os.path.exists(served)
+
+    def test_data_key_is_order_independent(self):
+        assert sha256_data({"a": 1, "b": [1, 2]}) == sha256_data({"b": [1, 2], "a": 1})
+        assert sha256_data({"a": 1}) != sha256_data({"a": 2})
@@ -0,0 +1,70 @@
+"""Tests for the LibreOffice conversion pool (using a stand-in soffice script)."""
+import os
+import stat
+import textwrap
+
+import pytest
+
+from app.services.pdf import SofficePool, PdfPoolBusy
+
+FAKE_SOFFICE = textwrap.dedent("""\
+    #!/bin/sh
+    # Stand-in: args ... --outdir DIR FILE -> DIR/FILE.pdf
+    for last; do :; done
+    while [ "$1" != "--outdir" ]; do shift; done
+    out="$2/$(basename "${last%.*}").pdf"
+    case "$last" in *slow*) sleep 5;; esac
+    printf '%%PDF-1.4 fake' > "$out"
+""")
+
+
+@pytest.fixture
+def fake_pool(tmp_path):
+    script = tmp_path / "soffice"
+    script.write_text(FAKE_SOFFICE)
+    script.chmod(script.stat().st_mode | stat.S_IEXEC)
+    pool = SofficePool(size=1, queue_size=1, job_timeout=1, base_dir=str(tmp_path / "profiles"))
+    pool.use_uno = False
+    pool._binary = str(script)
+    yield pool
+    pool.shutdown()
+
+
+class TestSofficePool:
+    def test_converts_with_isolated_profile(self, fake_pool, tmp_path):
+        docx = tmp_path / "einladung.docx"
+        docx.write_bytes(b"PK")
+        pdf = fake_pool.submit(str(docx)).result(timeout=5)
+        assert pdf == str(tmp_path / "einladung.pdf")
+        assert os.path.isdir(tmp_path / "profiles" / f"profile_{os.getpid()}_0")
+        stats = fake_pool.stats()
+        assert stats["conversions"] == 1
+        assert stats["mode"] == "cli"
+
+    def test_profiles_are_per_process_and_stale_ones_removed(self, tmp_path):
+        profiles = tmp_path / "profiles"
+        stale = profiles / "profile_999999999_0"
+        other = profiles / f"profile_{os.getppid()}_0"  # lebender Prozess (anderer Worker)
+        stale.mkdir(parents=True)
+        other.mkdir()
+        pool = SofficePool(size=2, base_dir=str(profiles))
+        try:
+            assert [i.pipe_name for i in pool._instances] == [f"julis_soffice_{os.getpid()}_{n}" for n in range(2)]
+            assert not stale.exists() and other.exists()
+        finally:
+            pool.shutdown()
+
+    def test_timeout_counts_as_failure(self, fake_pool, tmp_path):
+        docx = tmp_path / "slow.docx"
+        docx.write_bytes(b"PK")
+        assert fake_pool.submit(str(docx)).result(timeout=10) is None
+        assert fake_pool.stats()["timeouts"] == 1
+
+    def test_bounded_queue_rejects(self, fake_pool, tmp_path):
+        slow = tmp_path / "slow.docx"
+        slow.write_bytes(b"PK")
+        futures = [fake_pool.submit(str(slow))]
+        with pytest.raises(PdfPoolBusy):
+            for _ in range(3):
+                futures.append(fake_pool.submit(str(slow)))
+        assert fake_pool.stats()["rejected"] == 1
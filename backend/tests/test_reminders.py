@@ -0,0 +1,114 @@
+"""Tests for reminder arming and the min-heap reminder scheduler."""
+from datetime import date, datetime, timedelta
+
+from app.models.email_outbox import EmailOutbox
+from app.models.event import Event
+from app.models.reminder import Reminder
+from app.services import reminders
+from app.services.reminders import ReminderScheduler, sync_event_reminders
+from tests.conftest import TestingSessionLocal
+
+
+def _event(db, user, tenant, start: date) -> Event:
+    event = Event(
+        title="Landesparteitag",
+        start_date=start,
+        organizer="LV",
+        status="approved",
+        is_public=True,
+        submitter_id=user.id,
+        submitter_email="orga@test.de",
+        tenant_id=tenant.id,
+    )
+    db.add(event)
+    db.flush()
+    return event
+
+
+class TestReminderArming:
+    def test_reschedule_rearms_existing_reminder(self, db, admin_user, tenant):
+        event = _event(db, admin_user, tenant, date.today() + timedelta(days=10))
+        sync_event_reminders(db, event)
+        db.commit()
+        first_due = db.query(Reminder).one().due_at
+
+        event.start_date = date.today() + timedelta(days=20)
+        sync_event_reminders(db, event)
+        db.commit()
+        reminder = db.query(Reminder).one()
+        assert reminder.status == "pending"
+        assert reminder.due_at - first_due == timedelta(days=10)
+
+    def test_rejected_event_cancels_reminder(self, db, admin_user, tenant):
+        event = _event(db, admin_user, tenant, date.today() + timedelta(days=10))
+        sync_event_reminders(db, event)
+        event.status = "rejected"
+        sync_event_reminders(db, event)
+        db.commit()
+        assert db.query(Reminder).one().status == "cancelled"
+
+
+class TestReminderMessages:
+    def test_submitted_markup_is_escaped(self, db, admin_user, tenant):
+        event = _event(db, admin_user, tenant, date(2026, 6, 1))
+        event.title = "<script>alert(1)</script>"
+        event.location = 'Kiel <a href="https://example.org">hier</a>'
+        body = reminders._event_message(event, "r@test.de")["body"]
+        assert "<script>" not in body and "<a " not in body
+        assert "<b>&lt;script&gt;alert(1)&lt;/script&gt;</b>" in body
+        assert "Ort: Kiel &lt;a href=&quot;https://example.org&quot;&gt;hier&lt;/a&gt;" in body
+
+
+def _due_reminders(db, event, count: int) -> None:
+    for i in range(count):
+        db.add(Reminder(
+            entity_type="event",
+            entity_id=event.id,
+            recipient_email=f"r{i}@test.de",
+            due_at=datetime.utcnow() - timedelta(minutes=1),
+            status="pending",
+        ))
+
+
+class TestReminderScheduler:
+    def test_queues_due_reminders_in_batches(self, db, admin_user, tenant):
+        sessions = []
+        event = _event(db, admin_user, tenant, date.today() + timedelta(days=1))
+        _due_reminders(db, event, 3)
+        db.add(Reminder(
+            entity_type="event",
+            entity_id=event.id,
+            recipient_email="later@test.de",
+            due_at=datetime.utcnow() + timedelta(hours=5),
+            status="pending",
+        ))
+        db.commit()
+
+        scheduler = ReminderScheduler(session_factory=lambda: sessions.append(1) or TestingSessionLocal(), batch_size=2)
+        assert scheduler.run_once() == 3
+        assert len(sessions) == 3  # Abgleich + zwei Batches
+        assert len(scheduler) == 1
+        assert 0 < scheduler.seconds_until_next(datetime.utcnow()) <= scheduler.poll_seconds
+        db.expire_all()
+        assert db.query(Reminder).filter(Reminder.status == "sent").count() == 3
+        queued = db.query(EmailOutbox).filter(EmailOutbox.entity_type == "reminder").all()
+        assert sorted(m.to_addresses[0] for m in queued) == ["r0@test.de", "r1@test.de", "r2@test.de"]
+        assert {m.status for m in queued} == {"pending"} and queued[0].subject.startswith("Erinnerung: Landesparteitag")
+
+    def test_failed_batch_is_picked_up_again(self, db, admin_user, tenant, monkeypatch):
+        event = _event(db, admin_user, tenant, date.today() + timedelta(days=1))
+        _due_reminders(db, event, 2)
+        db.commit()
+        scheduler = ReminderScheduler(session_factory=TestingSessionLocal)
+        scheduler.refresh()
+
+        def broken(*args, **kwargs):
+            raise RuntimeError("Datenbank weg")
+
+        monkeypatch.setattr(reminders, "enqueue_email", broken)
+        assert scheduler.run_once() == 0
+        assert len(scheduler) == 0
+        monkeypatch.undo()
+        assert scheduler.run_once() == 2
+        db.expire_all()
+        assert db.query(EmailOutbox).count() == 2
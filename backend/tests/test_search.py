@@ -0,0 +1,221 @@
+"""Tests for the full-text search index: uploaded files, indexed records and the search endpoint."""
+import io
+from datetime import date
+
+import pytest
+from docx import Document as DocxDocument
+from sqlalchemy import text
+
+from app.config import settings
+from app.models.document import Document
+from app.models.document_aenderung import DocumentAenderung
+from app.models.document_aenderungsantrag import DocumentAenderungsantrag
+from app.models.event import Event
+from app.models.file_text import FileText
+from app.models.kreisverband import Kreisverband
+from app.models.meeting import Meeting
+from app.models.tenant import Tenant
+from app.services import text_extraction
+from app.services.blob_store import store_file
+from app.services.search_records import rebuild_records
+from app.services.text_extraction import index_file_texts
+from tests.conftest import auth_header
+
+
+def _docx(*paragraphs: str) -> bytes:
+    doc = DocxDocument()
+    for paragraph in paragraphs:
+        doc.add_paragraph(paragraph)
+    table = doc.add_table(rows=1, cols=2)
+    table.rows[0].cells[0].text = "Abstimmung"
+    table.rows[0].cells[1].text = "einstimmig"
+    buffer = io.BytesIO()
+    doc.save(buffer)
+    return buffer.getvalue()
+
+
+@pytest.fixture
+def uploads(tmp_path, monkeypatch):
+    monkeypatch.setattr(settings, "UPLOAD_DIR", str(tmp_path))
+    monkeypatch.setattr(settings, "TEXT_EXTRACTION_WORKERS", 0)
+    return tmp_path
+
+
+def _kv(db, name: str) -> Kreisverband:
+    kv = Kreisverband(name=name)
+    db.add(kv)
+    db.commit()
+    return kv
+
+
+def _upload(client, token, kv, titel: str, content: bytes) -> int:
+    response = client.post(
+        f"/api/v1/kreisverband/{kv.id}/protokolle",
+        data={"titel": titel, "datum": "2026-03-01", "typ": "Vorstand"},
+        files={"datei": ("protokoll.docx", content, "application/octet-stream")},
+        headers=auth_header(token),
+    )
+    assert response.status_code == 201
+    return response.json()["id"]
+
+
+def _search(client, token, q: str, **params):
+    response = client.get("/api/v1/search/", params={"q": q, **params}, headers=auth_header(token))
+    assert response.status_code == 200
+    return response.json()
+
+
+class TestTextExtraction:
+    def test_identical_files_are_extracted_once(self, client, db, mitarbeiter_token, uploads, monkeypatch):
+        kiel, luebeck = _kv(db, "Kiel"), _kv(db, "Lübeck")
+        content = _docx("Beschluss: Der Vorstand beschließt die Sommerfahrt.")
+        _upload(client, mitarbeiter_token, kiel, "Vorstand März", content)
+        _upload(client, mitarbeiter_token, luebeck, "Vorstand April", content)
+
+        calls = []
+        original = text_extraction._extract_safely
+        monkeypatch.setattr(text_extraction, "_extract_safely", lambda path: calls.append(path) or original(path))
+        result = index_file_texts(db)
+
+        assert result == {"indexed": 2, "extracted": 1, "removed": 0}
+        assert len(calls) == 1
+        file_text = db.query(FileText).one()
+        assert file_text.status == "done" and "einstimmig" in file_text.text
+        assert index_file_texts(db)["indexed"] == 0  # nichts mehr offen
+
+    def test_extraction_runs_in_worker_processes(self, client, db, mitarbeiter_token, uploads, monkeypatch):
+        monkeypatch.setattr(settings, "TEXT_EXTRACTION_WORKERS", 2)
+        kv = _kv(db, "Kiel")
+        _upload(client, mitarbeiter_token, kv, "Januar", _docx("Haushalt 2026 genehmigt"))
+        _upload(client, mitarbeiter_token, kv, "Februar", _docx("Satzungsänderung vertagt"))
+        assert index_file_texts(db)["extracted"] == 2
+        assert [h["title"] for h in _search(client, mitarbeiter_token, "vertagt")] == ["Februar"]
+
+    def test_batches_are_incremental(self, client, db, mitarbeiter_token, uploads):
+        kv = _kv(db, "Kiel")
+        for i in range(3):
+            _upload(client, mitarbeiter_token, kv, f"Sitzung {i}", _docx(f"Tagesordnungspunkt Nummer{i}"))
+        assert index_file_texts(db, batch=2)["indexed"] == 2
+        assert index_file_texts(db, batch=2)["indexed"] == 1
+
+
+class TestSearchEndpoint:
+    def test_hits_are_ranked_with_highlighted_snippets(self, client, db, mitarbeiter_token, uploads):
+        kv = _kv(db, "Kiel")
+        _upload(client, mitarbeiter_token, kv, "Vorstand März", _docx("Der Vorstand fasst einen Beschluss <zur> Sommerfahrt."))
+        _upload(client, mitarbeiter_token, kv, "Beschluss Haushalt", _docx("Beschluss über den Haushalt."))
+        index_file_texts(db)
+
+        hits = _search(client, mitarbeiter_token, "beschlus")
+        assert [h["title"] for h in hits] == ["Beschluss Haushalt", "Vorstand März"]  # Titeltreffer zuerst
+        snippet = hits[1]["snippet"]
+        assert "<mark>Beschluss</mark>" in snippet
+        assert "&lt;zur&gt;" in snippet
+        assert _search(client, mitarbeiter_token, "sommerfahrt haushalt") == []
+
+    def test_scoped_by_kreisverband(self, client, db, mitarbeiter_token, uploads):
+        kiel, luebeck = _kv(db, "Kiel"), _kv(db, "Lübeck")
+        _upload(client, mitarbeiter_token, kiel, "Kiel", _docx("Mitgliederversammlung"))
+        _upload(client, mitarbeiter_token, luebeck, "Lübeck", _docx("Mitgliederversammlung"))
+        index_file_texts(db)
+        hits = _search(client, mitarbeiter_token, "mitgliederversammlung", kreisverband_id=luebeck.id)
+        assert [(h["kind"], h["kreisverband_id"]) for h in hits] == [("kv_protokoll", luebeck.id)]
+
+    def test_documents_require_vorstand(self, client, db, mitarbeiter_token, vorstand_token, uploads, tmp_path):
+        source = tmp_path / "satzung.docx"
+        source.write_bytes(_docx("§ 3 Mitgliedschaft und Beitragsordnung"))
+        doc = Document(titel="Satzung", typ="satzung", datei_pfad=store_file(db, str(source), ".docx").path)
+        db.add(doc)
+        db.commit()
+        index_file_texts(db)
+        assert _search(client, mitarbeiter_token, "beitragsordnung") == []
+        hits = _search(client, vorstand_token, "beitragsordnung")
+        assert [(h["kind"], h["id"]) for h in hits] == [("dokument_datei", doc.id)]
+
+    def test_deleted_protocols_leave_the_index(self, client, db, mitarbeiter_token, admin_token, uploads):
+        kv = _kv(db, "Kiel")
+        protokoll_id = _upload(client, mitarbeiter_token, kv, "Alt", _docx("Kassenprüfung"))
+        index_file_texts(db)
+        assert len(_search(client, mitarbeiter_token, "kassenprüfung")) == 1
+        client.delete(f"/api/v1/kreisverband/protokolle/{protokoll_id}", headers=auth_header(admin_token))
+        assert index_file_texts(db)["removed"] == 1
+        assert _search(client, mitarbeiter_token, "kassenprüfung") == []
+
+    def test_rejects_queries_without_words(self, client, mitarbeiter_token):
+        response = client.get("/api/v1/search/", params={"q": "**"}, headers=auth_header(mitarbeiter_token))
+        assert response.status_code == 422
+
+
+class TestRecordIndex:
+    def _event(self, db, user, tenant_id: int, title: str, description: str) -> Event:
+        event = Event(
+            title=title, description=description, start_date=date(2026, 5, 1), status="approved",
+            submitter_id=user.id, tenant_id=tenant_id,
+        )
+        db.add(event)
+        db.commit()
+        return event
+
+    def test_events_are_filtered_by_tenant(self, client, db, tenant, mitarbeiter_user, mitarbeiter_token, admin_token):
+        other = Tenant(name="Anderer LV", slug="anderer-lv", level="landesverband", is_active=True)
+        db.add(other)
+        db.commit()
+        self._event(db, mitarbeiter_user, tenant.id, "Sommerfest", "Grillen am Strand")
+        self._event(db, mitarbeiter_user, other.id, "Sommerfest Hamburg", "Grillen an der Alster")
+
+        assert [h["title"] for h in _search(client, mitarbeiter_token, "grillen")] == ["Sommerfest"]
+        assert len(_search(client, admin_token, "grillen")) == 2
+        assert [h["kind"] for h in _search(client, admin_token, "grillen", kind="sitzung")] == []
+
+    def test_meeting_changes_are_reindexed_after_commit(self, client, db, mitarbeiter_user, mitarbeiter_token):
+        meeting = Meeting(
+            titel="Landesvorstand", typ="vorstandssitzung", datum=date(2026, 11, 2),
+            tagesordnung=["Begrüßung", {"titel": "Finanzen", "unterpunkte": ["Haushaltsentwurf"]}],
+            protokoll_top_texte=["", ["Der Haushaltsentwurf wird vorgestellt."]],
+        )
+        db.add(meeting)
+        db.commit()
+        hits = _search(client, mitarbeiter_token, "haushaltsentwurf")
+        assert [(h["kind"], h["id"]) for h in hits] == [("sitzung", meeting.id)]
+
+        meeting.tagesordnung = ["Wahlen"]
+        meeting.protokoll_top_texte = None
+        db.commit()
+        assert _search(client, mitarbeiter_token, "haushaltsentwurf") == []
+        assert len(_search(client, mitarbeiter_token, "wahlen")) == 1
+
+        meeting.titel = "Nicht gespeichert"
+        db.flush()
+        db.rollback()
+        assert _search(client, mitarbeiter_token, "gespeichert") == []
+
+    def test_amendments_include_their_changes(self, client, db, mitarbeiter_token, vorstand_token):
+        doc = Document(titel="Satzung", typ="satzung", aktueller_text="§ 1 Name und Sitz")
+        db.add(doc)
+        db.commit()
+        antrag = DocumentAenderungsantrag(document_id=doc.id, antragsteller="KV Kiel", antrag_text="Neufassung")
+        antrag.stellen.append(DocumentAenderung(position=0, bezug="§ 4", aenderungstext="Beitragsfreiheit für Schüler"))
+        db.add(antrag)
+        db.commit()
+
+        assert _search(client, mitarbeiter_token, "beitragsfreiheit") == []
+        hits = _search(client, vorstand_token, "beitragsfreiheit")
+        assert [(h["kind"], h["id"], h["parent_id"]) for h in hits] == [("aenderungsantrag", antrag.id, doc.id)]
+
+        db.delete(antrag.stellen[0])
+        db.commit()
+        assert _search(client, vorstand_token, "beitragsfreiheit") == []
+
+        db.delete(doc)
+        db.commit()
+        assert _search(client, vorstand_token, "neufassung") == []
+        assert _search(client, vorstand_token, "sitz") == []
+
+    def test_rebuild_restores_entries(self, client, db, mitarbeiter_user, mitarbeiter_token, tenant):
+        self._event(db, mitarbeiter_user, tenant.id, "Stammtisch", "Kneipenabend")
+        db.execute(text("DELETE FROM search_entries"))
+        db.commit()
+        assert _search(client, mitarbeiter_token, "kneipenabend") == []
+        assert rebuild_records(db) == 1
+        db.commit()
+        assert len(_search(client, mitarbeiter_token, "kneipenabend")) == 1
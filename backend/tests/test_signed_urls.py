@@ -0,0 +1,73 @@
+"""Tests for signed, expiring download links."""
+import base64
+import hashlib
+import time
+from urllib.parse import parse_qs, urlsplit
+
+import pytest
+
+from app.config import settings
+from app.models.kreisverband import Kreisverband
+from app.services.signed_urls import signed_download_url
+from tests.conftest import auth_header
+
+PDF = b"%PDF-1.4\nProtokoll\n"
+SECRET = "test-download-secret"
+
+
+@pytest.fixture
+def signing(tmp_path, monkeypatch):
+    monkeypatch.setattr(settings, "UPLOAD_DIR", str(tmp_path))
+    monkeypatch.setattr(settings, "DOWNLOAD_URL_SECRET", SECRET)
+    return tmp_path
+
+
+@pytest.fixture
+def kv_with_protokoll(client, db, admin_token, signing):
+    kv = Kreisverband(name="Kiel")
+    db.add(kv)
+    db.commit()
+    client.post(
+        f"/api/v1/kreisverband/{kv.id}/protokolle",
+        data={"titel": "MV 2026", "datum": "2026-03-01", "typ": "MV"},
+        files={"datei": ("mv.pdf", PDF, "application/pdf")},
+        headers=auth_header(admin_token),
+    )
+    return kv
+
+
+class TestSigner:
+    def test_token_matches_nginx_secure_link_md5(self, signing):
+        (signing / "protokolle").mkdir()
+        (signing / "protokolle" / "a.pdf").write_bytes(PDF)
+        url = signed_download_url("protokolle/a.pdf", "MV 2026.pdf", ttl=300, now=1_700_000_000)
+        parts = urlsplit(url)
+        query = {k: v[0] for k, v in parse_qs(parts.query).items()}
+        assert parts.path == "/dl/protokolle/a.pdf"
+        assert query["expires"] == "1700000300"
+        raw = f"1700000300/dl/protokolle/a.pdfMV%202026.pdf {SECRET}".encode()
+        assert query["md5"] == base64.urlsafe_b64encode(hashlib.md5(raw).digest()).decode().rstrip("=")
+
+    def test_disabled_without_secret(self, signing, monkeypatch):
+        monkeypatch.setattr(settings, "DOWNLOAD_URL_SECRET", None)
+        assert signed_download_url("protokolle/a.pdf", "a.pdf") is None
+
+
+class TestSignedDownloads:
+    def test_listing_embeds_working_links(self, client, kv_with_protokoll, mitarbeiter_token):
+        listing = client.get(f"/api/v1/kreisverband/{kv_with_protokoll.id}/protokolle", headers=auth_header(mitarbeiter_token))
+        url = listing.json()[0]["download_url"]
+        assert url.startswith("/dl/blobs/")
+        response = client.get(url)  # ohne Login
+        assert response.status_code == 200
+        assert response.content == PDF
+        assert response.headers["content-disposition"] == "attachment; filename*=utf-8''MV%202026.pdf"
+
+    def test_tampered_and_expired_links_are_rejected(self, client, kv_with_protokoll, mitarbeiter_token):
+        listing = client.get(f"/api/v1/kreisverband/{kv_with_protokoll.id}/protokolle", headers=auth_header(mitarbeiter_token))
+        path = listing.json()[0]["datei_pfad"]
+        url = listing.json()[0]["download_url"]
+        assert client.get(url.replace("name=MV", "name=XY")).status_code == 403
+
+        expired = signed_download_url(path, "MV 2026.pdf", ttl=1, now=time.time() - 10)
+        assert client.get(expired).status_code == 410
@@ -0,0 +1,53 @@
+"""Tests for single-flight request coalescing."""
+import asyncio
+
+from app.services.singleflight import SingleFlight
+
+
+class TestSingleFlight:
+    def test_concurrent_calls_share_one_computation(self):
+        flight = SingleFlight()
+        runs = []
+
+        async def compute():
+            runs.append(1)
+            await asyncio.sleep(0.05)
+            return "pdf"
+
+        async def main():
+            return await asyncio.gather(*(flight.do(("pdf", "abc"), compute) for _ in range(10)))
+
+        assert asyncio.run(main()) == ["pdf"] * 10
+        assert len(runs) == 1
+        assert flight.stats() == {"calls": 10, "shared": 9, "in_flight": 0}
+
+    def test_errors_reach_all_waiters_and_are_not_kept(self):
+        flight = SingleFlight()
+
+        async def broken():
+            await asyncio.sleep(0.01)
+            raise RuntimeError("soffice")
+
+        async def main():
+            results = await asyncio.gather(flight.do("k", broken), flight.do("k", broken), return_exceptions=True)
+            assert all(isinstance(r, RuntimeError) for r in results)
+            assert await flight.do("k", lambda: asyncio.sleep(0, result="ok")) == "ok"
+
+        asyncio.run(main())
+
+    def test_cancelled_caller_does_not_cancel_shared_work(self):
+        flight = SingleFlight()
+
+        async def compute():
+            await asyncio.sleep(0.05)
+            return 42
+
+        async def main():
+            first = asyncio.ensure_future(flight.do("k", compute))
+            second = asyncio.ensure_future(flight.do("k", compute))
+            await asyncio.sleep(0.01)
+            first.cancel()
+            return await second
+
+        assert asyncio.run(main()) == 42
+
@@ -0,0 +1,122 @@
+"""Tests for the SMTP session pool and its token bucket."""
+import smtplib
+
+import pytest
+
+from app.services.smtp_pool import SMTPPool, TokenBucket
+
+
+class FakeClock:
+    def __init__(self):
+        self.now = 1000.0
+        self.slept = []
+
+    def __call__(self) -> float:
+        return self.now
+
+    def sleep(self, seconds: float) -> None:
+        self.slept.append(seconds)
+        self.now += seconds
+
+
+class FakeSMTP:
+    """smtplib.SMTP-Ersatz; responses: Liste von Ausnahmen, die sendmail der Reihe nach wirft."""
+
+    instances = []
+    responses = []
+
+    def __init__(self, host, port, timeout=None):
+        self.logins = 0
+        self.sent = []
+        self.closed = False
+        FakeSMTP.instances.append(self)
+
+    def starttls(self):
+        pass
+
+    def login(self, user, password):
+        self.logins += 1
+
+    def sendmail(self, sender, to, msg):
+        if FakeSMTP.responses:
+            error = FakeSMTP.responses.pop(0)
+            if error is not None:
+                raise error
+        self.sent.append(to)
+        return {}
+
+    def quit(self):
+        self.closed = True
+
+
+@pytest.fixture
+def fake_smtp(monkeypatch):
+    FakeSMTP.instances, FakeSMTP.responses = [], []
+    monkeypatch.setattr(smtplib, "SMTP", FakeSMTP)
+    return FakeSMTP
+
+
+def _pool(clock=None, **kwargs) -> SMTPPool:
+    clock = clock or FakeClock()
+    return SMTPPool("smtp.example.org", 587, "user", "pw", clock=clock, sleep=clock.sleep, **kwargs)
+
+
+class TestSMTPPool:
+    def test_session_is_reused_for_many_messages(self, fake_smtp):
+        pool = _pool()
+        for i in range(5):
+            pool.send("from@example.org", [f"to{i}@example.org"], "msg")
+        assert len(fake_smtp.instances) == 1
+        assert fake_smtp.instances[0].logins == 1 and len(fake_smtp.instances[0].sent) == 5
+        assert pool.stats()["connects"] == 1 and pool.stats()["sent"] == 5
+
+    def test_reconnects_on_421_and_disconnect(self, fake_smtp):
+        pool = _pool()
+        fake_smtp.responses = [
+            smtplib.SMTPSenderRefused(421, b"4.7.0 Too many messages in this connection", "from@example.org"),
+            None,
+            smtplib.SMTPServerDisconnected("gone"),
+            None,
+        ]
+        pool.send("from@example.org", ["a@example.org"], "msg")
+        pool.send("from@example.org", ["b@example.org"], "msg")
+        assert len(fake_smtp.instances) == 3
+        assert [i.closed for i in fake_smtp.instances] == [True, True, False]
+        assert pool.stats()["reconnects"] == 2 and pool.stats()["sent"] == 2
+
+    def test_rejected_message_keeps_the_session(self, fake_smtp):
+        pool = _pool()
+        fake_smtp.responses = [smtplib.SMTPRecipientsRefused({"x@example.org": (550, b"unknown")})]
+        with pytest.raises(smtplib.SMTPRecipientsRefused):
+            pool.send("from@example.org", ["x@example.org"], "msg")
+        pool.send("from@example.org", ["y@example.org"], "msg")
+        assert len(fake_smtp.instances) == 1 and pool.stats()["failed"] == 1
+
+    def test_idle_sessions_are_replaced(self, fake_smtp):
+        clock = FakeClock()
+        pool = _pool(clock, idle_seconds=60)
+        pool.send("from@example.org", ["a@example.org"], "msg")
+        clock.now += 61
+        pool.send("from@example.org", ["b@example.org"], "msg")
+        assert len(fake_smtp.instances) == 2 and fake_smtp.instances[0].closed
+        assert pool.stats()["expired"] == 1
+
+    def test_rate_limit_throttles_sends(self, fake_smtp):
+        clock = FakeClock()
+        pool = _pool(clock, rate_per_minute=30)
+        for i in range(32):
+            pool.send("from@example.org", [f"to{i}@example.org"], "msg")
+        assert clock.slept == [pytest.approx(2.0), pytest.approx(2.0)]  # nach dem Stoß von 30: alle 2 s
+        assert pool.stats()["throttled_seconds"] == pytest.approx(4.0)
+
+
+class TestTokenBucket:
+    def test_waiting_callers_reserve_in_order(self):
+        clock = FakeClock()
+        bucket = TokenBucket(60, capacity=1, clock=clock, sleep=lambda s: None)
+        assert bucket.acquire() == 0
+        assert bucket.acquire() == pytest.approx(1.0)
+        assert bucket.acquire() == pytest.approx(2.0)  # ohne Zeitfortschritt: hinter dem vorigen
+        clock.now += 10
+        assert bucket.acquire() == 0  # aufgefüllt, aber höchstens capacity
+        assert bucket.acquire() == pytest.approx(1.0)
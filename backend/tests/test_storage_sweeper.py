@@ -0,0 +1,88 @@
+"""Tests for the orphaned upload sweeper and the storage usage report."""
+import os
+import time
+from datetime import datetime
+
+from app.config import settings
+from app.models.blob import Blob
+from app.models.document import Document
+from app.models.storage_sweep import StorageSweep
+from app.services.blob_store import blob_path
+from app.services.storage_sweeper import sweep_orphans
+from tests.conftest import auth_header
+
+OLD = time.time() - 3 * 24 * 3600
+SHA = "ab" * 32
+
+
+def _write(upload_dir, rel: str, data: bytes = b"x", old: bool = True) -> str:
+    path = upload_dir / rel
+    path.parent.mkdir(parents=True, exist_ok=True)
+    path.write_bytes(data)
+    if old:
+        os.utime(path, (OLD, OLD))
+    return rel
+
+
+class TestSweepOrphans:
+    def test_deletes_only_old_unreferenced_files(self, db, upload_dir):
+        referenced = _write(upload_dir, blob_path(SHA, ".pdf"))
+        db.add(Blob(sha256=SHA, path=referenced, size=1, mime_type="application/pdf", ref_count=1))
+        legacy = _write(upload_dir, "dokumente/satzung.pdf")
+        db.add(Document(titel="Satzung", typ="satzung", datei_pfad=os.path.join(settings.UPLOAD_DIR, legacy)))
+        db.commit()
+        orphans = [
+            _write(upload_dir, blob_path("cd" * 32, ".pdf"), b"verwaist"),
+            _write(upload_dir, "sitzungen/einladung_7_2026-03-01_0123456789ab.docx"),
+            _write(upload_dir, "blobs/.incoming/.upload-abc.part"),
+        ]
+        young = _write(upload_dir, "jobs/12_einladung.pdf", old=False)
+        stale_lock = _write(upload_dir, ".locks/blob-x.lock")
+
+        result = sweep_orphans(db)
+
+        assert result["deleted"] == 3 and result["pass_completed"]
+        assert not any((upload_dir / rel).exists() for rel in orphans)
+        for rel in (referenced, legacy, young):
+            assert (upload_dir / rel).exists()
+        assert not (upload_dir / stale_lock).exists()  # nicht gehaltene Lock-Datei, außerhalb der Zählung
+        state = db.get(StorageSweep, 1)
+        assert state.cursor is None and state.deleted_files == 3 and state.last_pass_at is not None
+
+    def test_resumes_from_persisted_cursor(self, db, upload_dir):
+        names = [_write(upload_dir, f"sitzungen/protokoll_{i}_2026-01-01_0123456789ab.docx") for i in range(5)]
+        first = sweep_orphans(db, batch=2)
+        assert first == {"checked": 2, "deleted": 2, "freed_bytes": 2, "pass_completed": False}
+        assert db.get(StorageSweep, 1).cursor == names[1]
+
+        _write(upload_dir, "dokumente/neu.pdf")  # liegt vor dem Cursor, erst im nächsten Durchlauf
+        assert sweep_orphans(db, batch=2)["checked"] == 2
+        last = sweep_orphans(db, batch=2)
+        assert last["checked"] == 1 and last["pass_completed"]
+        assert (upload_dir / "dokumente/neu.pdf").exists()
+        assert sweep_orphans(db, batch=10)["deleted"] == 1
+        assert not (upload_dir / "dokumente/neu.pdf").exists()
+
+    def test_reused_blob_content_is_not_swept(self, db, upload_dir):
+        rel = _write(upload_dir, blob_path(SHA, ".pdf"))
+        os.utime(upload_dir / rel)  # wie blob_store._place beim erneuten Upload desselben Inhalts
+        assert sweep_orphans(db)["deleted"] == 0
+        assert (upload_dir / rel).exists()
+
+
+class TestStorageReport:
+    def test_reports_usage_per_area(self, client, db, admin_token, upload_dir):
+        _write(upload_dir, "sitzungen/a.docx", b"1234")
+        _write(upload_dir, "blobs/.incoming/b.part", b"12")
+        db.add(Blob(sha256=SHA, path=blob_path(SHA), size=10, mime_type="text/plain", ref_count=0, released_at=datetime.utcnow()))
+        db.commit()
+        response = client.get("/api/v1/settings/storage", headers=auth_header(admin_token))
+        assert response.status_code == 200
+        body = response.json()
+        areas = {a["area"]: a for a in body["areas"]}
+        assert areas["sitzungen"]["bytes"] == 4 and areas["sitzungen"]["swept"]
+        assert areas["blobs"]["files"] == 1
+        assert body["blobs"]["unreferenced_bytes"] == 10
+
+    def test_admin_only(self, client, vorstand_token, upload_dir):
+        assert client.get("/api/v1/settings/storage", headers=auth_header(vorstand_token)).status_code == 403
@@ -0,0 +1,55 @@
+"""Tests for the parsed DOCX template cache."""
+import os
+
+from docx import Document as DocxDocument
+
+from app.services.template_cache import TemplateCache
+
+
+def _template(path, text):
+    d = DocxDocument()
+    d.add_paragraph(text)
+    d.save(path)
+
+
+def _rendered_text(path):
+    return "\n".join(p.text for p in DocxDocument(path).paragraphs)
+
+
+class TestTemplateCache:
+    def test_renders_from_cache_with_fresh_copies(self, tmp_path):
+        src = tmp_path / "einladung.docx"
+        _template(src, "Sitzung: {{ titel }}")
+        cache = TemplateCache()
+        for titel in ("Landesvorstand", "Landesausschuss"):
+            doc = cache.get(str(src))
+            doc.render({"titel": titel})
+            doc.save(str(tmp_path / f"{titel}.docx"))
+            assert _rendered_text(tmp_path / f"{titel}.docx") == f"Sitzung: {titel}"
+        stats = cache.stats()
+        assert (stats["misses"], stats["hits"]) == (1, 1)
+        assert stats["hit_rate"] == 0.5
+        assert stats["templates"]["einladung.docx"]["parse_seconds"] >= 0
+
+    def test_reloads_when_content_changes(self, tmp_path):
+        src = tmp_path / "protokoll.docx"
+        _template(src, "Alt {{ titel }}")
+        cache = TemplateCache()
+        cache.get(str(src))
+        _template(src, "Neu {{ titel }}")
+        os.utime(src, ns=(os.stat(src).st_atime_ns, os.stat(src).st_mtime_ns + 1_000_000))
+        doc = cache.get(str(src))
+        doc.render({"titel": "X"})
+        doc.save(str(tmp_path / "out.docx"))
+        assert _rendered_text(tmp_path / "out.docx") == "Neu X"
+        assert cache.stats()["reloads"] == 1
+
+    def test_touched_but_unchanged_file_is_a_hit(self, tmp_path):
+        src = tmp_path / "einladung.docx"
+        _template(src, "{{ titel }}")
+        cache = TemplateCache()
+        cache.get(str(src))
+        os.utime(src, ns=(os.stat(src).st_atime_ns, os.stat(src).st_mtime_ns + 1_000_000))
+        cache.get(str(src))
+        assert cache.stats()["reloads"] == 0
+        assert cache.stats()["hits"] == 1
@@ -0,0 +1,83 @@
+"""Tests for streamed, size-limited uploads."""
+import asyncio
+import hashlib
+import io
+import os
+
+import pytest
+from fastapi import HTTPException, UploadFile
+
+from app.api.v1 import documents as documents_api
+from app.config import settings
+from app.models.document import Document
+from app.services import uploads
+from app.services.uploads import save_upload, sniff_mime_type
+from tests.conftest import auth_header
+
+PDF = b"%PDF-1.4\n" + b"x" * 5000
+
+
+def _upload(data: bytes, filename: str = "datei.pdf") -> UploadFile:
+    return UploadFile(io.BytesIO(data), filename=filename)
+
+
+class TestSaveUpload:
+    def test_streams_in_chunks_and_hashes(self, tmp_path, monkeypatch):
+        monkeypatch.setattr(uploads, "CHUNK_SIZE", 1024)
+        target = tmp_path / "ziel.pdf"
+        stored = asyncio.run(save_upload(_upload(PDF), str(target), max_bytes=len(PDF), ext=".pdf"))
+        assert target.read_bytes() == PDF
+        assert stored.size == len(PDF)
+        assert stored.sha256 == hashlib.sha256(PDF).hexdigest()
+        assert stored.mime_type == "application/pdf"
+
+    def test_aborts_when_limit_is_exceeded(self, tmp_path, monkeypatch):
+        monkeypatch.setattr(uploads, "CHUNK_SIZE", 1024)
+        upload = _upload(PDF)
+        with pytest.raises(HTTPException) as exc:
+            asyncio.run(save_upload(upload, str(tmp_path / "ziel.pdf"), max_bytes=2048, ext=".pdf"))
+        assert exc.value.status_code == 400
+        assert upload.file.tell() == 3072  # nach dem dritten Block abgebrochen, Rest nie gelesen
+        assert os.listdir(tmp_path) == []
+
+    def test_rejects_content_not_matching_extension(self, tmp_path):
+        with pytest.raises(HTTPException) as exc:
+            asyncio.run(save_upload(_upload(b"MZ\x90\x00binary", "bericht.pdf"), str(tmp_path / "x.pdf"), 1024, ".pdf"))
+        assert "passt nicht" in exc.value.detail
+        assert os.listdir(tmp_path) == []
+
+    def test_sniffs_common_types(self):
+        assert sniff_mime_type(b"PK\x03\x04rest") == "application/zip"
+        assert sniff_mime_type(b"\xd0\xcf\x11\xe0\xa1\xb1\x1a\xe1") == "application/x-ole-storage"
+        assert sniff_mime_type("Protokoll über §3".encode("utf-8")) == "text/plain"
+        assert sniff_mime_type(b"\x00\x01\x02") == "application/octet-stream"
+
+
+class TestDocumentUpload:
+    def test_upload_too_large_leaves_no_file(self, client, db, admin_token, monkeypatch, tmp_path):
+        monkeypatch.setattr(settings, "UPLOAD_DIR", str(tmp_path))
+        monkeypatch.setattr(documents_api, "MAX_FILE_SIZE", 1024)
+        doc = Document(titel="Satzung", typ="satzung")
+        db.add(doc)
+        db.commit()
+        response = client.post(
+            f"/api/v1/documents/{doc.id}/upload",
+            files={"datei": ("satzung.pdf", PDF, "application/pdf")},
+            headers=auth_header(admin_token),
+        )
+        assert response.status_code == 400
+        assert [files for _root, _dirs, files in os.walk(tmp_path) if files] == []
+
+    def test_upload_is_stored(self, client, db, admin_token, monkeypatch, tmp_path):
+        monkeypatch.setattr(settings, "UPLOAD_DIR", str(tmp_path))
+        doc = Document(titel="Satzung", typ="satzung")
+        db.add(doc)
+        db.commit()
+        response = client.post(
+            f"/api/v1/documents/{doc.id}/upload",
+            files={"datei": ("satzung.pdf", PDF, "application/pdf")},
+            headers=auth_header(admin_token),
+        )
+        assert response.status_code == 200
+        db.refresh(doc)
+        assert (tmp_path / doc.datei_pfad).read_bytes() == PDF
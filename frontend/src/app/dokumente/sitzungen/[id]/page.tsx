@@ -22,6 +22,7 @@ import {
   type Tagesordnungspunkt,
   type EinladungVariante,
 } from '@/lib/api/meetings';
+import { downloadFile } from '@/lib/api/files';
 import { getApiErrorMessage } from '@/lib/apiError';
 import { Button } from '@/components/ui/button';
 import { Card, CardContent, CardDescription, CardHeader, CardTitle } from '@/components/ui/card';
@@ -32,8 +33,6 @@ import { format } from 'date-fns';
 import { de } from 'date-fns/locale';
 import { ConfirmDialog } from '@/components/ui/confirm-dialog';
 
-const API_BASE = process.env.NEXT_PUBLIC_API_URL?.replace(/\/api\/v1\/?$/, '') || 'http://localhost:8000';
-
 function normalizeTop(item: string | Tagesordnungspunkt): Tagesordnungspunkt {
   if (typeof item === 'string') return { titel: item, unterpunkte: [] };
   const kids = item?.unterpunkte;
@@ -389,10 +388,13 @@ export default function SitzungDetailPage() {
     }
   };
 
-  const downloadUrl = (path: string | null | undefined) => {
-    if (!path) return null;
-    const relative = path.replace(/^.*?[/\\]uploads[/\\]?/i, '');
-    return relative ? `${API_BASE}/uploads/${relative}` : null;
+  const handleDownloadDocx = async (kind: 'einladung' | 'protokoll', path: string) => {
+    setError(null);
+    try {
+      await downloadFile(path, `${kind}_${id}.docx`);
+    } catch (e: unknown) {
+      setError(getApiErrorMessage(e, 'Download fehlgeschlagen'));
+    }
   };
 
   const handleDownloadEinladungPdf = async () => {
@@ -456,9 +458,6 @@ export default function SitzungDetailPage() {
 
   if (!meeting) return null;
 
-  const einladungUrl = downloadUrl(meeting.einladung_pfad);
-  const protokollUrl = downloadUrl(meeting.protokoll_pfad);
-
   return (
     <div className="min-h-screen bg-background">
       <div className="sticky top-0 z-10 border-b border-border/60 bg-background/95 backdrop-blur supports-[backdrop-filter]:bg-background/80 px-4 py-3 md:px-6">
@@ -789,16 +788,13 @@ export default function SitzungDetailPage() {
                   {meeting.einladung_pfad ? (
                     <div className="space-y-3">
                       <div className="flex flex-wrap gap-2">
-                        <Button asChild variant="default" size="sm">
-                          <a
-                            href={einladungUrl ?? '#'}
-                            target="_blank"
-                            rel="noopener noreferrer"
-                            className="inline-flex items-center gap-2"
-                          >
-                            <Download className="h-4 w-4" />
-                            DOCX
-                          </a>
+                        <Button
+                          variant="default"
+                          size="sm"
+                          onClick={() => handleDownloadDocx('einladung', meeting.einladung_pfad!)}
+                        >
+                          <Download className="h-4 w-4" />
+                          DOCX
                         </Button>
                         <Button
                           variant="outline"
@@ -863,16 +859,13 @@ export default function SitzungDetailPage() {
                   {meeting.protokoll_pfad ? (
                     <div className="space-y-3">
                       <div className="flex flex-wrap gap-2">
-                        <Button asChild variant="default" size="sm">
-                          <a
-                            href={protokollUrl ?? '#'}
-                            target="_blank"
-                            rel="noopener noreferrer"
-                            className="inline-flex items-center gap-2"
-                          >
-                            <Download className="h-4 w-4" />
-                            DOCX
-                          </a>
+                        <Button
+                          variant="default"
+                          size="sm"
+                          onClick={() => handleDownloadDocx('protokoll', meeting.protokoll_pfad!)}
+                        >
+                          <Download className="h-4 w-4" />
+                          DOCX
                         </Button>
                         <Button
                           variant="outline"
@@ -3,6 +3,7 @@
 import { useEffect, useState } from 'react';
 import { useParams, useRouter } from 'next/navigation';
 import Link from 'next/link';
+import Image from 'next/image';
 import { useAuth } from '@/lib/hooks/useAuth';
 import {
   getKreisverbandById,
@@ -16,6 +17,7 @@ import {
   type Vorstandsmitglied,
   type KVProtokoll,
 } from '@/lib/api/kreisverband';
+import { downloadFile, signedDownloadHref } from '@/lib/api/files';
 import { getApiErrorMessage } from '@/lib/apiError';
 import { Button } from '@/components/ui/button';
 import { Card, CardContent, CardDescription, CardHeader, CardTitle } from '@/components/ui/card';
@@ -148,11 +150,14 @@ export default function KreisverbandDetailPage() {
     }
   };
 
-  const downloadUrl = (datei_pfad: string | null | undefined) => {
-    if (!datei_pfad) return null;
-    const base = process.env.NEXT_PUBLIC_API_URL?.replace(/\/api\/v1\/?$/, '') || 'http://localhost:8000';
-    const relative = datei_pfad.replace(/^.*?[/\\]uploads[/\\]?/i, '');
-    return relative ? `${base}/uploads/${relative}` : null;
+  const handleDownloadProtokoll = async (p: KVProtokoll) => {
+    if (!p.datei_pfad) return;
+    setError(null);
+    try {
+      await downloadFile(p.datei_pfad, `${p.titel}.pdf`);
+    } catch (e: unknown) {
+      setError(getApiErrorMessage(e, 'Download fehlgeschlagen'));
+    }
   };
 
   if (!hasMinRole('mitarbeiter')) return null;
@@ -381,14 +386,27 @@ export default function KreisverbandDetailPage() {
           ) : (
             <ul className="space-y-2">
               {protokolle.map((p) => {
-                const url = downloadUrl(p.datei_pfad);
+                const href = signedDownloadHref(p.download_url);
+                const pdfHref = p.pdf_pfad !== p.datei_pfad ? signedDownloadHref(p.pdf_url) : null;
+                const thumbnail = signedDownloadHref(p.thumbnail_url);
                 return (
                   <li
                     key={p.id}
                     className="flex flex-wrap items-center justify-between gap-2 rounded-md border border-border px-3 py-2"
                   >
                     <div className="flex items-center gap-2">
-                      <FileText className="h-4 w-4 text-muted-foreground" />
+                      {thumbnail ? (
+                        <Image
+                          src={thumbnail}
+                          alt=""
+                          width={36}
+                          height={51}
+                          unoptimized
+                          className="rounded border border-border object-cover object-top"
+                        />
+                      ) : (
+                        <FileText className="h-4 w-4 text-muted-foreground" />
+                      )}
                       <span className="font-medium">{p.titel}</span>
                       <Badge variant="outline" className="text-xs">{p.typ}</Badge>
                       <span className="text-sm text-muted-foreground">
@@ -396,16 +414,29 @@ export default function KreisverbandDetailPage() {
                       </span>
                     </div>
                     <div className="flex items-center gap-2">
-                      {url && (
-                        <a
-                          href={url}
-                          target="_blank"
-                          rel="noopener noreferrer"
-                          className="text-sm text-primary hover:underline"
-                        >
+                      {p.vorschau_status === 'pending' && (
+                        <span className="text-xs text-muted-foreground">PDF wird erstellt …</span>
+                      )}
+                      {pdfHref && (
+                        <a href={pdfHref} className="text-sm text-primary hover:underline">
                           PDF
                         </a>
                       )}
+                      {href ? (
+                        <a href={href} className="text-sm text-primary hover:underline">
+                          {pdfHref ? 'Original' : 'PDF'}
+                        </a>
+                      ) : (
+                        p.datei_pfad && (
+                          <button
+                            type="button"
+                            onClick={() => handleDownloadProtokoll(p)}
+                            className="text-sm text-primary hover:underline"
+                          >
+                            PDF
+                          </button>
+                        )
+                      )}
                       {canDeleteProtokoll && (
                         <Button
                           type="button"
@@ -3,7 +3,16 @@
 import { useEffect, useState } from 'react';
 import Link from 'next/link';
 import { useAuth } from '@/lib/hooks/useAuth';
-import { getMemberChanges, sendMemberChangeEmails, resendMemberChangeEmails, SZENARIEN, type MemberChange } from '@/lib/api/members';
+import {
+  getMemberChanges,
+  getMemberChangeEmails,
+  retryMemberChangeEmail,
+  sendMemberChangeEmails,
+  resendMemberChangeEmails,
+  SZENARIEN,
+  type MemberChange,
+  type MemberChangeEmail,
+} from '@/lib/api/members';
 import { getApiErrorMessage } from '@/lib/apiError';
 import { Button } from '@/components/ui/button';
 import { Card, CardContent, CardHeader, CardTitle } from '@/components/ui/card';
@@ -12,6 +21,13 @@ import { ArrowLeft, Send, Mail } from 'lucide-react';
 import { format } from 'date-fns';
 import { de } from 'date-fns/locale';
 
+const EMAIL_STATUS: Record<MemberChangeEmail['status'], string> = {
+  pending: 'In Warteschlange',
+  sending: 'Wird gesendet',
+  sent: 'Zugestellt',
+  dead: 'Fehlgeschlagen',
+};
+
 export default function VerlaufPage() {
   const { canAccessMemberChanges, hasMinRole } = useAuth();
   const [list, setList] = useState<MemberChange[]>([]);
@@ -22,6 +38,23 @@ export default function VerlaufPage() {
   const [resendToMember, setResendToMember] = useState(true);
   const [resendToKv, setResendToKv] = useState(true);
   const [resendLoading, setResendLoading] = useState(false);
+  const [emails, setEmails] = useState<MemberChangeEmail[]>([]);
+
+  useEffect(() => {
+    if (!resendDialog) return;
+    setEmails([]);
+    getMemberChangeEmails(resendDialog.id).then(setEmails).catch(() => setEmails([]));
+  }, [resendDialog]);
+
+  const handleRetryEmail = async (emailId: number) => {
+    if (!resendDialog) return;
+    try {
+      const updated = await retryMemberChangeEmail(resendDialog.id, emailId);
+      setEmails((prev) => prev.map((m) => (m.id === emailId ? updated : m)));
+    } catch (e: unknown) {
+      setError(getApiErrorMessage(e, 'Erneuter Versand fehlgeschlagen'));
+    }
+  };
 
   useEffect(() => {
     if (!canAccessMemberChanges()) return;
@@ -138,6 +171,24 @@ export default function VerlaufPage() {
               <p className="mb-4 text-sm text-muted-foreground">
                 {resendDialog.vorname} {resendDialog.nachname} – {SZENARIEN.find((s) => s.value === resendDialog.scenario)?.label ?? resendDialog.scenario}
               </p>
+              {emails.length > 0 && (
+                <div className="mb-4 space-y-1 text-sm">
+                  <p className="font-medium">Zustellstatus</p>
+                  {emails.map((m) => (
+                    <div key={m.id} className="flex items-center justify-between gap-2">
+                      <span className="truncate" title={m.last_error ?? undefined}>{m.to_addresses.join(', ')}</span>
+                      <span className="flex shrink-0 items-center gap-2">
+                        <Badge variant={m.status === 'dead' ? 'destructive' : m.status === 'sent' ? 'default' : 'secondary'}>
+                          {EMAIL_STATUS[m.status]}
+                        </Badge>
+                        {m.status === 'dead' && (
+                          <Button size="sm" variant="ghost" onClick={() => handleRetryEmail(m.id)}>Erneut</Button>
+                        )}
+                      </span>
+                    </div>
+                  ))}
+                </div>
+              )}
               <p className="mb-3 text-sm font-medium">Welche E-Mails sollen erneut gesendet werden?</p>
               <div className="space-y-2">
                 <label className="flex cursor-pointer items-center gap-2 text-sm">
@@ -8,6 +8,8 @@ export interface Document {
   version?: string | null;
   gueltig_ab?: string | null;
   datei_pfad?: string | null;
+  /** Signierter, kurzlebiger Direktlink (nur in der Liste; null wenn nicht konfiguriert) */
+  download_url?: string | null;
   created_at: string;
   updated_at: string;
 }
@@ -0,0 +1,38 @@
+import apiClient from './client';
+
+/**
+ * API-Pfad einer gespeicherten Datei (Wert aus datei_pfad, einladung_pfad, …).
+ * Ältere Einträge enthalten noch das Upload-Verzeichnis als Präfix – das wird entfernt.
+ */
+export function fileApiPath(storedPath: string | null | undefined): string | null {
+  if (!storedPath) return null;
+  const relative = storedPath.replace(/^.*?[/\\]uploads[/\\]?/i, '').replace(/\\/g, '/');
+  return relative ? `/files/${relative.split('/').map(encodeURIComponent).join('/')}` : null;
+}
+
+const SITE_ORIGIN = process.env.NEXT_PUBLIC_API_URL?.replace(/\/api\/v1\/?$/, '') || 'http://localhost:8000';
+
+/** Absolute URL zu einem signierten Download-Link aus einer API-Liste (/dl/…). */
+export function signedDownloadHref(downloadUrl: string | null | undefined): string | null {
+  return downloadUrl ? `${SITE_ORIGIN}${downloadUrl}` : null;
+}
+
+/** Gespeicherte Datei herunterladen (Rechteprüfung im Backend, erfordert Auth). */
+export async function downloadFile(storedPath: string, fallbackName: string): Promise<void> {
+  const path = fileApiPath(storedPath);
+  if (!path) return;
+  const response = await apiClient.get(path, { responseType: 'blob' });
+  const blob = response.data as Blob;
+  const disposition: string = response.headers['content-disposition'] ?? '';
+  const encoded = disposition.match(/filename\*=utf-8''([^;]+)/i)?.[1];
+  const name =
+    (encoded && decodeURIComponent(encoded)) ||
+    disposition.match(/filename="?([^";]+)"?/)?.[1] ||
+    fallbackName;
+  const url = URL.createObjectURL(blob);
+  const a = document.createElement('a');
+  a.href = url;
+  a.download = name;
+  a.click();
+  URL.revokeObjectURL(url);
+}
@@ -32,6 +32,14 @@ export interface KVProtokoll {
   typ: string;
   beschreibung?: string | null;
   datei_pfad?: string | null;
+  /** PDF-Fassung (bei PDF-Uploads gleich datei_pfad), erzeugt im Hintergrund */
+  pdf_pfad?: string | null;
+  thumbnail_pfad?: string | null;
+  vorschau_status?: 'pending' | 'done' | 'failed' | null;
+  /** Signierter, kurzlebiger Direktlink (nur in Listen; null wenn nicht konfiguriert) */
+  download_url?: string | null;
+  pdf_url?: string | null;
+  thumbnail_url?: string | null;
   created_at: string;
 }
 
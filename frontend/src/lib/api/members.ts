@@ -98,6 +98,32 @@ export async function resendMemberChangeEmails(
   return response.data;
 }
 
+/** Zustellstatus einer E-Mail aus der Mail-Warteschlange. */
+export interface MemberChangeEmail {
+  id: number;
+  typ?: 'mitglied' | 'empfaenger' | null;
+  to_addresses: string[];
+  subject: string;
+  status: 'pending' | 'sending' | 'sent' | 'dead';
+  attempts: number;
+  max_attempts: number;
+  next_attempt_at: string;
+  finished_at?: string | null;
+  last_error?: string | null;
+  created_at: string;
+}
+
+export async function getMemberChangeEmails(id: number): Promise<MemberChangeEmail[]> {
+  const response = await apiClient.get<MemberChangeEmail[]>(`/member-changes/${id}/emails`);
+  return response.data;
+}
+
+/** Endgültig fehlgeschlagene E-Mail erneut einreihen (Leitung+). */
+export async function retryMemberChangeEmail(id: number, emailId: number): Promise<MemberChangeEmail> {
+  const response = await apiClient.post<MemberChangeEmail>(`/member-changes/${id}/emails/${emailId}/retry`);
+  return response.data;
+}
+
 // --- Email Templates (Leitung+) ---
 
 export interface EmailTemplate {
@@ -87,3 +87,37 @@ export async function getPublicCalendars(): Promise<PublicCalendarsResponse> {
   if (!res.ok) throw new Error('Kalender-Infos konnten nicht geladen werden');
   return res.json();
 }
+
+export interface PublicCalendarCategory {
+  id: number;
+  name: string;
+  color: string;
+  tenant_id: number;
+}
+
+/** Sammel-Antwort: Events referenzieren Kategorien und Tenants nur per ID. */
+export interface PublicCalendarData {
+  events: PublicEvent[];
+  categories: Record<string, PublicCalendarCategory>;
+  tenants: Record<string, TenantPublicShort>;
+  calendars: {
+    landesverband: number | null;
+    kreisverband: number[];
+  };
+}
+
+export async function getPublicCalendarData(
+  params?: GetPublicEventsParams
+): Promise<PublicCalendarData> {
+  const search = new URLSearchParams();
+  if (params?.start_date) search.set('start_date', params.start_date);
+  if (params?.end_date) search.set('end_date', params.end_date);
+  if (params?.category_id != null) search.set('category_id', String(params.category_id));
+  if (params?.calendar) search.set('calendar', params.calendar);
+  if (params?.skip != null) search.set('skip', String(params.skip));
+  if (params?.limit != null) search.set('limit', String(params.limit));
+  const qs = search.toString();
+  const res = await fetch(`${API_BASE}/public/calendar-data${qs ? `?${qs}` : ''}`);
+  if (!res.ok) throw new Error('Kalenderdaten konnten nicht geladen werden');
+  return res.json();
+}
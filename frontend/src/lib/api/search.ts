@@ -0,0 +1,35 @@
+import apiClient from './client';
+
+export type SearchHitKind =
+  | 'termin'
+  | 'dokument'
+  | 'aenderungsantrag'
+  | 'sitzung'
+  | 'kv_protokoll'
+  | 'dokument_datei';
+
+export interface SearchHit {
+  kind: SearchHitKind;
+  id: number;
+  /** Änderungsantrag: ID des Dokuments */
+  parent_id?: number | null;
+  kreisverband_id?: number | null;
+  title: string;
+  /** HTML-escaped Ausschnitt, Treffer in <mark>…</mark> */
+  snippet: string;
+  score: number;
+}
+
+export async function searchFullText(params: {
+  q: string;
+  kind?: SearchHitKind[];
+  kreisverband_id?: number;
+  limit?: number;
+  offset?: number;
+}): Promise<SearchHit[]> {
+  const response = await apiClient.get<SearchHit[]>('/search/', {
+    params,
+    paramsSerializer: { indexes: null }, // kind=termin&kind=sitzung
+  });
+  return response.data;
+}
@@ -16,6 +16,11 @@ if [ ! -f "$CERT_DIR/fullchain.pem" ]; then
   echo "Then: docker compose exec nginx nginx -s reload"
 fi
 
+# Secret für signierte Download-Links (/dl/) – muss DOWNLOAD_URL_SECRET des Backends entsprechen
+# (nur Buchstaben/Ziffern verwenden; Anführungszeichen, \, ; und $ werden entfernt). Leer: /dl/ antwortet mit 404.
+printf 'set $download_url_secret "%s";\n' "$(printf '%s' "${DOWNLOAD_URL_SECRET:-}" | tr -d '"\\;$')" \
+  > /etc/nginx/download_secret.conf
+
 # Cron für Certbot-Renewal starten (im Hintergrund)
 crond -b -l 2
 